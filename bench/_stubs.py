@@ -0,0 +1,42 @@
+"""
+Local stand-in upstreams shared by the bench scripts.
+"""
+
+import os
+import socket
+import struct
+import sys
+import threading
+
+REPO = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def use_repo():
+    """Put this checkout first on ``sys.path``; call before importing
+    ``discordia``."""
+    if sys.path[0] != REPO:
+        sys.path.insert(0, REPO)
+
+
+def answer(query: bytes, ttl: int = 300) -> bytes:
+    """A NOERROR reply to *query* carrying one A record (127.0.0.1)."""
+    head = bytearray(query[:12])
+    head[2] |= 0x80
+    head[3] = 0x80
+    head[6:8] = b"\x00\x01"
+    rr = b"\xc0\x0c" + struct.pack("!HHIH", 1, 1, ttl, 4) + b"\x7f\x00\x00\x01"
+    return bytes(head) + query[12:] + rr
+
+
+def udp_server() -> int:
+    """Start a UDP responder on 127.0.0.1; return its port."""
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    s.bind(("127.0.0.1", 0))
+
+    def loop():
+        while True:
+            data, addr = s.recvfrom(4096)
+            s.sendto(answer(data), addr)
+
+    threading.Thread(target=loop, daemon=True).start()
+    return s.getsockname()[1]
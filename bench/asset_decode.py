@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Full-size sources vs. generated assets: file size, decode time and the
+RGBA texture each one becomes.  Needs Pillow; run
+``python -m discordia.assets`` first.
+
+    python bench/asset_decode.py [runs]
+"""
+
+import os
+import sys
+import time
+
+import _stubs
+_stubs.use_repo()
+
+from PIL import Image  # noqa: E402
+
+from discordia.assets import ASSET_DIR, DENSITIES, ROOT  # noqa: E402
+
+PAIRS = [
+    ("presplash", os.path.join(ROOT, "presplash.png"),
+     os.path.join(ASSET_DIR, "presplash.jpg")),
+    ("icon", os.path.join(ROOT, "logo.png"),
+     os.path.join(ASSET_DIR, "icon.png")),
+] + [
+    (f"logo {bucket}", os.path.join(ROOT, "logo.png"),
+     os.path.join(ASSET_DIR, f"ui-{bucket}-0.png"))
+    for bucket, _ in DENSITIES
+]
+
+
+def decode(path: str, runs: int):
+    best = float("inf")
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        with Image.open(path) as im:
+            im = im.convert("RGBA")
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000, im.width * im.height * 4
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"{'':14} {'file KB':>15} {'decode ms':>17} {'texture KB':>19}")
+    for name, src, out in PAIRS:
+        if not os.path.exists(out):
+            sys.exit(f"{out} missing; run python -m discordia.assets")
+        s_ms, s_tex = decode(src, runs)
+        o_ms, o_tex = decode(out, runs)
+        print(f"{name:14} {os.path.getsize(src) / 1024:7.0f} "
+              f"{os.path.getsize(out) / 1024:7.0f}  {s_ms:8.2f} {o_ms:8.2f}"
+              f"  {s_tex / 1024:9.0f} {o_tex / 1024:9.0f}")
+
+
+if __name__ == "__main__":
+    main()
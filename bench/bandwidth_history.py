@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Bandwidth history: append cost, window cost per zoom, file round trip.
+
+    python bench/bandwidth_history.py [days]
+"""
+
+import math
+import os
+import sys
+import tempfile
+import time
+
+import _stubs
+_stubs.use_repo()
+
+from discordia.storage.timeseries import BandwidthSeries  # noqa: E402
+
+SPANS = (60, 600, 3600, 86400, 30 * 86400)
+
+
+def main():
+    days = float(sys.argv[1]) if len(sys.argv) > 1 else 30
+    series = BandwidthSeries()
+    now = time.time()
+    t = now - days * 86400
+    n = 0
+    t0 = time.perf_counter()
+    while t < now:
+        # a daily wave with a spike every ten minutes
+        v = 500 + 400 * math.sin(t / 86400 * 2 * math.pi)
+        if int(t) % 600 == 0:
+            v *= 5
+        series.add(v, v / 4, t)
+        t += 1.5
+        n += 1
+    dt = time.perf_counter() - t0
+    print(f"{n} samples over {days:g} days: {dt / n * 1e6:.2f} us/add")
+
+    for span in SPANS:
+        t0 = time.perf_counter()
+        xd, yd, xu, yu = series.window(span, 400, now)
+        ms = (time.perf_counter() - t0) * 1000
+        print(f"window {span:>8} s: {len(xd):4} points, peak {max(yd):7.0f}, "
+              f"{ms:6.2f} ms")
+
+    path = os.path.join(tempfile.mkdtemp(), "bandwidth.bin")
+    t0 = time.perf_counter()
+    series.save(path)
+    save_ms = (time.perf_counter() - t0) * 1000
+    t0 = time.perf_counter()
+    back = BandwidthSeries.load(path)
+    load_ms = (time.perf_counter() - t0) * 1000
+    assert back.window(86400, 400, now) == series.window(86400, 400, now)
+    print(f"file {os.path.getsize(path)} bytes, save {save_ms:.2f} ms, "
+          f"load {load_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
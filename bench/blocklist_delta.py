@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Blocklist update: reloading the whole list vs applying a delta.
+
+Builds a hosts-format list of N names, then brings it to the next
+version both ways — rereading the new file (as the engine did on every
+change) and patching the loaded list with a ``<from>-<to>.delta`` — while
+another thread keeps looking names up.  Reports the update time, the
+memory it allocated and the longest pause the lookup thread saw.
+
+    python bench/blocklist_delta.py [names] [changes]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import _stubs
+_stubs.use_repo()
+
+from discordia.engine.blocklist import Blocklist, Delta  # noqa: E402
+
+
+class Lookups(threading.Thread):
+    """Look names up in ``self.blocklist`` until stopped; track the
+    longest gap between two lookups."""
+
+    def __init__(self, blocklist, names):
+        super().__init__(daemon=True)
+        self.blocklist = blocklist
+        self.names = names
+        self.stop = threading.Event()
+        self.max_gap = 0.0
+        self.count = 0
+
+    def run(self):
+        names = self.names
+        perf = time.perf_counter
+        last = perf()
+        while not self.stop.is_set():
+            for n in names:
+                self.blocklist.blocks(n)
+            now = perf()
+            self.max_gap = max(self.max_gap, now - last)
+            last = now
+            self.count += len(names)
+
+
+def update(label, lookups, fn):
+    """Time *fn* (an update) with lookups running, then again for the
+    memory it allocates; swap its result in."""
+    lookups.max_gap = 0.0
+    time.sleep(0.05)
+    t0 = time.perf_counter()
+    new = fn()
+    ms = (time.perf_counter() - t0) * 1000
+    time.sleep(0.05)
+    gap = lookups.max_gap
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    lookups.blocklist = new
+    print(f"{label:12} {ms:8.1f} ms  {peak / 1e6:6.1f} MB allocated  "
+          f"longest lookup pause {gap * 1000:6.1f} ms")
+    return new
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300000
+    changes = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    rng = random.Random(3)
+    d = tempfile.mkdtemp()
+    old_names = [f"ads{i}.tracker{i % 997}.example" for i in range(n)]
+    removed = set(rng.sample(old_names, changes // 2))
+    new_names = [x for x in old_names if x not in removed]
+    new_names += [f"new{i}.example.net" for i in range(changes // 2)]
+
+    path = os.path.join(d, "blocklist.txt")
+    with open(path, "w") as f:
+        f.write("# version: 1\n")
+        f.writelines(f"0.0.0.0 {x}\n" for x in old_names)
+    current = Blocklist.load(path)
+    probe = [f"x.{x}" for x in rng.sample(old_names, 200)]
+    lookups = Lookups(current, probe)
+    lookups.start()
+
+    new_path = os.path.join(d, "blocklist-2.txt")
+    with open(new_path, "w") as f:
+        f.write("# version: 2\n")
+        f.writelines(f"0.0.0.0 {x}\n" for x in new_names)
+    print(f"{n} names, {changes} changed; {os.path.getsize(new_path) / 1e6:.1f}"
+          f" MB list file")
+    lookups.max_gap = 0.0
+    time.sleep(0.3)
+    print(f"{'no update':12} longest lookup pause "
+          f"{lookups.max_gap * 1000:6.1f} ms (thread switching)")
+    full = update("full reload", lookups, lambda: Blocklist.load(new_path))
+
+    lookups.blocklist = current
+    delta_path = os.path.join(d, Delta.file_name(1, 2))
+    Delta.between(old_names, new_names, 1, 2).save(delta_path)
+    print(f"delta file {os.path.getsize(delta_path) / 1e3:.1f} kB")
+    patched = update("delta", lookups,
+                     lambda: current.patched(Delta.load(delta_path)))
+
+    lookups.stop.set()
+    lookups.join()
+    same = set(full.names()) == set(patched.names())
+    t0 = time.perf_counter()
+    for x in probe * 50:
+        patched.blocks(x)
+    t_patched = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for x in probe * 50:
+        full.blocks(x)
+    t_full = time.perf_counter() - t0
+    print(f"same names: {same}; lookup {t_full * 1e9 / (len(probe) * 50):.0f}"
+          f" ns plain, {t_patched * 1e9 / (len(probe) * 50):.0f} ns with "
+          f"the overlay")
+    sys.exit(0 if same else 1)
+
+
+if __name__ == "__main__":
+    main()
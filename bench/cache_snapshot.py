@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Warm-start snapshot benchmark.
+
+Fills a DNSCache with synthetic A answers, writes a snapshot, then times
+how long a fresh cache takes to load it and to serve hits from it.
+
+    python bench/cache_snapshot.py [entries]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from _stubs import answer
+
+from discordia.engine.dnscache import DNSCache
+from discordia.engine.dnsmsg import build_query
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    names = [f"host{i}.example{i % 97}.com" for i in range(n)]
+    queries = [build_query(name, qid=i & 0xFFFF) for i, name in enumerate(names)]
+
+    warm = DNSCache(max_entries=n)
+    for q in queries:
+        warm.put(q, answer(q, 3600))
+        warm.get(q)
+
+    path = os.path.join(tempfile.mkdtemp(), "dns_cache.bin")
+    t0 = time.perf_counter()
+    written = warm.snapshot(path, limit=n)
+    t1 = time.perf_counter()
+    print(f"snapshot: {written} entries, {os.path.getsize(path) / 1024:.0f} KiB,"
+          f" {(t1 - t0) * 1000:.1f} ms")
+
+    cold = DNSCache(max_entries=n)
+    t0 = time.perf_counter()
+    cold.load_snapshot(path)
+    t1 = time.perf_counter()
+    print(f"load:     {(t1 - t0) * 1000:.3f} ms")
+
+    t0 = time.perf_counter()
+    for q in queries[:10000]:
+        assert cold.get(q) is not None
+    t1 = time.perf_counter()
+    print(f"first-hit from snapshot: {(t1 - t0) / 10000 * 1e6:.1f} us/query")
+
+    t0 = time.perf_counter()
+    for q in queries[:10000]:
+        cold.get(q)
+    t1 = time.perf_counter()
+    print(f"live hit:                {(t1 - t0) / 10000 * 1e6:.1f} us/query")
+    cold.close()
+
+
+if __name__ == "__main__":
+    main()
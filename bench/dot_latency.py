@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+DNS-over-TLS transport check against local stand-in servers.
+
+Starts a plain UDP responder and a TLS (RFC 7858) responder on 127.0.0.1
+that answers out of order, then compares per-query latency of the warm
+DoT pool with plain UDP, runs a burst of concurrent pipelined queries and
+reports whether reconnects resumed the TLS session.
+
+    python bench/dot_latency.py [queries]
+
+Needs the ``openssl`` binary to mint a throwaway certificate.
+"""
+
+import os
+import random
+import socket
+import ssl
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from _stubs import answer, udp_server
+
+from discordia.engine.dnsmsg import build_query, message_id
+from discordia.engine.dot import DoTTransport
+from discordia.engine.transport import UDPTransport
+
+
+def make_cert(tmp: str):
+    cert, key = os.path.join(tmp, "c.pem"), os.path.join(tmp, "k.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+         "-keyout", key, "-out", cert, "-days", "1", "-subj", "/CN=localhost",
+         "-addext", "subjectAltName=IP:127.0.0.1,DNS:localhost"],
+        check=True, capture_output=True,
+    )
+    return cert, key
+
+
+def dot_server(cert: str, key: str) -> int:
+    ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    ctx.load_cert_chain(cert, key)
+    ls = socket.socket()
+    ls.bind(("127.0.0.1", 0))
+    ls.listen(16)
+
+    def serve(conn):
+        wlock = threading.Lock()
+        buf = bytearray()
+        try:
+            while True:
+                chunk = conn.recv(16384)
+                if not chunk:
+                    return
+                buf += chunk
+                while len(buf) >= 2 and len(buf) >= 2 + (buf[0] << 8 | buf[1]):
+                    n = buf[0] << 8 | buf[1]
+                    q = bytes(buf[2:2 + n])
+                    del buf[:2 + n]
+                    delay = random.choice((0, 0, 0, 0.002))
+
+                    def reply(q=q, delay=delay):
+                        if delay:
+                            time.sleep(delay)
+                        r = answer(q)
+                        with wlock:
+                            conn.sendall(struct.pack("!H", len(r)) + r)
+
+                    threading.Thread(target=reply, daemon=True).start()
+        except OSError:
+            pass
+
+    def accept():
+        while True:
+            raw, _ = ls.accept()
+            try:
+                conn = ctx.wrap_socket(raw, server_side=True)
+            except OSError:
+                continue
+            threading.Thread(target=serve, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=accept, daemon=True).start()
+    return ls.getsockname()[1]
+
+
+def timed(transport, n):
+    lat = []
+    for i in range(n):
+        q = build_query(f"q{i}.example.com", qid=i & 0xFFFF)
+        t0 = time.perf_counter()
+        r = transport.resolve(q)
+        lat.append((time.perf_counter() - t0) * 1e6)
+        assert message_id(r) == i & 0xFFFF
+    return lat
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    cert, key = make_cert(tempfile.mkdtemp())
+    ctx = ssl.create_default_context(cafile=cert)
+
+    udp = UDPTransport("127.0.0.1", udp_server())
+    dot = DoTTransport("127.0.0.1", dot_server(cert, key), context=ctx,
+                       idle_timeout=0.5)
+
+    for name, t in (("udp", udp), ("dot", dot)):
+        t.warm()
+        timed(t, 50)
+        lat = timed(t, n)
+        q = statistics.quantiles(lat, n=100)
+        print(f"{name}: p50 {q[49]:.0f} us  p99 {q[98]:.0f} us")
+
+    with ThreadPoolExecutor(32) as ex:
+        t0 = time.perf_counter()
+        ids = list(ex.map(
+            lambda i: message_id(dot.resolve(
+                build_query(f"p{i}.example.com", qid=7))), range(n)))
+        dt = time.perf_counter() - t0
+    assert ids == [7] * n
+    print(f"dot pipelined: {n} queries / 32 callers in {dt * 1000:.0f} ms"
+          f" ({n / dt:.0f} q/s)")
+
+    time.sleep(1.0)  # let the idle timeout close the pool
+    timed(dot, 1)
+    print(f"dot handshakes: {dot.handshakes}, resumed: {dot.resumed}")
+    dot.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+What moving the engine out of the UI process buys: frame-loop jitter
+and DNS latency with the resolver under load on threads beside the
+"UI", versus in a process of its own; plus the cost of reading engine
+state through the stats ring versus a command round trip.
+
+    python bench/engine_process.py [seconds]
+
+The "UI" is the main thread running 60 fps frames of fixed Python work
+(about what a busy Kivy frame costs in ``py95``).  The load is client
+threads sending uncached queries through ``Resolver`` to a local UDP
+responder, as the TUN loop's workers do.  Both run for *seconds* in
+each mode.
+"""
+
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import threading
+import time
+
+os.environ["HOME"] = tempfile.mkdtemp(prefix="discordia-proc-")
+
+import _stubs  # noqa: E402
+_stubs.use_repo()
+
+from discordia.engine.dnsmsg import build_query  # noqa: E402
+from discordia.engine.resolver import Resolver  # noqa: E402
+
+FRAME = 1 / 60
+CLIENTS = 8
+
+
+def pct(xs, p):
+    s = sorted(xs)
+    return s[min(len(s) - 1, int(p / 100 * len(s)))] if s else 0.0
+
+
+def frame_work():
+    # ~2 ms of interpreter work: attribute churn and small allocations
+    d = {}
+    for i in range(4000):
+        d[i & 63] = (i, str(i))
+    return d
+
+
+def load(port: int, seconds: float, out):
+    """Resolve uncached names from CLIENTS threads; put latencies."""
+    resolver = Resolver.from_settings("doh", [f"127.0.0.1:{port}"])
+    stop = time.monotonic() + seconds
+    lat = []
+
+    def client(k):
+        i = 0
+        while time.monotonic() < stop:
+            q = build_query(f"c{k}-{i}.load.example", qid=i & 0xFFFF)
+            t0 = time.perf_counter()
+            resolver.forward(q)
+            lat.append((time.perf_counter() - t0) * 1000)
+            i += 1
+
+    threads = [threading.Thread(target=client, args=(k,))
+               for k in range(CLIENTS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    out.put(lat)
+
+
+def frames(seconds: float):
+    """Run the 60 fps loop; return (work ms, lateness ms) per frame."""
+    work, late = [], []
+    stop = time.monotonic() + seconds
+    due = time.monotonic()
+    while time.monotonic() < stop:
+        due += FRAME
+        t0 = time.perf_counter()
+        frame_work()
+        work.append((time.perf_counter() - t0) * 1000)
+        now = time.monotonic()
+        if now < due:
+            time.sleep(due - now)
+        else:
+            late.append((now - due) * 1000)
+            due = now
+    return work, late
+
+
+def run(label, port, seconds, spawn):
+    if spawn is None:
+        out = _Box()
+        t = threading.Thread(target=load, args=(port, seconds, out))
+        t.start()
+        work, late = frames(seconds)
+        t.join()
+        lat = out.value
+    else:
+        q = spawn.Queue()
+        p = spawn.Process(target=load, args=(port, seconds, q))
+        p.start()
+        work, late = frames(seconds)
+        lat = q.get()
+        p.join()
+    print(f"{label:16} frame p50 {pct(work, 50):6.2f} p99 {pct(work, 99):6.2f}"
+          f" max {max(work):6.2f} ms  late {len(late):4}/{len(work)}  |  "
+          f"dns {len(lat) / seconds:7.0f} q/s  p50 {pct(lat, 50):5.2f} "
+          f"p99 {pct(lat, 99):6.2f} ms")
+
+
+class _Box:
+    value = None
+
+    def put(self, v):
+        self.value = v
+
+
+def ring_vs_channel():
+    from multiprocessing.connection import Listener, Client
+
+    from discordia.engine.stats import StatsRing
+    from discordia.engine.vpn import vpn_engine
+
+    path = os.path.join(tempfile.mkdtemp(), "stats.bin")
+    writer = StatsRing.create(path)
+    writer.publish(vpn_engine.stats(), time.time())
+    reader = StatsRing(path)
+    n = 100000
+    t0 = time.perf_counter()
+    for _ in range(n):
+        reader.latest()
+    ring_us = (time.perf_counter() - t0) * 1e6 / n
+
+    address = os.path.join(tempfile.mkdtemp(), "s")
+    listener = Listener(address, "AF_UNIX")
+
+    def echo():
+        c = listener.accept()
+        try:
+            while True:
+                c.send(vpn_engine.stats())
+                c.recv()
+        except (EOFError, OSError):
+            pass
+        c.close()
+
+    echoer = threading.Thread(target=echo, daemon=True)
+    echoer.start()
+    c = Client(address, "AF_UNIX")
+    m = 5000
+    t0 = time.perf_counter()
+    for _ in range(m):
+        c.recv()
+        c.send(None)
+    chan_us = (time.perf_counter() - t0) * 1e6 / m
+    c.close()
+    echoer.join()
+    listener.close()
+    reader.close()
+    writer.close()
+    print(f"engine state read: stats ring {ring_us:.2f} us, "
+          f"command round trip {chan_us:.1f} us")
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    port = _stubs.udp_server()
+    print(f"{CLIENTS} resolver threads against a local responder, "
+          f"{seconds:g} s per mode")
+    frames(0.5)  # warm up
+    work, late = frames(seconds / 2)
+    print(f"{'no engine load':16} frame p50 {pct(work, 50):6.2f} p99 "
+          f"{pct(work, 99):6.2f} max {max(work):6.2f} ms  late "
+          f"{len(late):4}/{len(work)}")
+    run("engine threads", port, seconds, None)
+    run("engine process", port, seconds, mp.get_context("spawn"))
+    ring_vs_channel()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Offline GeoIP: import, open and lookup cost over a synthetic dataset.
+
+Writes GeoLite2-style CSVs — city blocks (one /24 per row, with a
+locations file), ASN blocks (one /16 per row) and some IPv6 — imports
+them with ``discordia.storage.geoip``, then checks lookups of random
+addresses against the source rows and times them.
+
+    python bench/geoip_lookup.py [city_blocks]
+
+The dashboard used to wait for an HTTPS round trip for the same fields
+(``ip_lookup_ms``: tens to hundreds of milliseconds on mobile).
+"""
+
+import ipaddress
+import os
+import random
+import sys
+import tempfile
+import time
+
+import _stubs
+_stubs.use_repo()
+
+from discordia.storage.geoip import (  # noqa: E402
+    GeoDB, build, read_csv, read_locations,
+)
+
+CITIES = 5000
+ASNS = 3000
+
+
+def write_dataset(d, blocks):
+    rng = random.Random(7)
+    locations = os.path.join(d, "locations.csv")
+    with open(locations, "w") as f:
+        f.write("geoname_id,locale_code,continent_code,continent_name,"
+                "country_iso_code,country_name,subdivision_1_iso_code,"
+                "subdivision_1_name,subdivision_2_iso_code,"
+                "subdivision_2_name,city_name,metro_code,time_zone,"
+                "is_in_european_union\n")
+        for g in range(CITIES):
+            cc = chr(65 + g % 26) + chr(65 + g // 26 % 26)
+            f.write(f"{1000 + g},en,EU,Europe,{cc},Country,,,,,"
+                    f"City {g},,Europe/Berlin,0\n")
+    # /24s from 1.0.0.0 up, every tenth one missing
+    city = os.path.join(d, "city-v4.csv")
+    truth = {}
+    with open(city, "w") as f:
+        f.write("network,geoname_id,registered_country_geoname_id,"
+                "represented_country_geoname_id,is_anonymous_proxy,"
+                "is_satellite_provider\n")
+        for i in range(blocks):
+            if i % 10 == 9:
+                continue
+            net = (1 << 24) + (i << 8)
+            g = rng.randrange(CITIES)
+            f.write(f"{ipaddress.IPv4Address(net)}/24,{1000 + g},"
+                    f"{1000 + g},,0,0\n")
+            truth[net >> 8] = g
+    asn = os.path.join(d, "asn-v4.csv")
+    with open(asn, "w") as f:
+        f.write("network,autonomous_system_number,"
+                "autonomous_system_organization\n")
+        for i in range(blocks // 256 + 1):
+            net = (1 << 24) + (i << 16)
+            f.write(f"{ipaddress.IPv4Address(net)}/16,{64512 + i % ASNS},"
+                    f"\"Provider {i % ASNS}, Inc.\"\n")
+    city6 = os.path.join(d, "city-v6.csv")
+    with open(city6, "w") as f:
+        f.write("network,geoname_id,registered_country_geoname_id\n")
+        for i in range(blocks // 10):
+            f.write(f"2001:db8:{i:x}::/48,{1000 + i % CITIES},\n")
+    return locations, [city, asn, city6], truth
+
+
+def main():
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    d = tempfile.mkdtemp()
+    locations, csvs, truth = write_dataset(d, blocks)
+    csv_mb = sum(os.path.getsize(p) for p in csvs) / 1e6
+
+    t0 = time.perf_counter()
+    locs = read_locations(locations)
+    path = os.path.join(d, "geoip.bin")
+    n4, n6 = build(path, (read_csv(p, locations=locs) for p in csvs))
+    print(f"import: {csv_mb:.1f} MB of CSV -> {n4} v4 + {n6} v6 ranges, "
+          f"{os.path.getsize(path) / 1e6:.1f} MB in "
+          f"{time.perf_counter() - t0:.1f} s")
+
+    t0 = time.perf_counter()
+    db = GeoDB(path)
+    print(f"open: {(time.perf_counter() - t0) * 1e6:.0f} us ({db!r})")
+
+    rng = random.Random(1)
+    addrs = [str(ipaddress.IPv4Address((1 << 24) + rng.randrange(blocks << 8)))
+             for _ in range(20000)]
+    wrong = 0
+    for ip in addrs:
+        n = int(ipaddress.IPv4Address(ip))
+        g = truth.get(n >> 8)
+        got = db.lookup(ip)
+        want_city = f"City {g}" if g is not None else ""
+        want_org = f"Provider {((n - (1 << 24)) >> 16) % ASNS}, Inc."
+        if got is None or got.city != want_city or got.org != want_org:
+            wrong += 1
+    print(f"checked {len(addrs)} addresses: {wrong} wrong; "
+          f"{db.lookup(addrs[0])}")
+
+    v6 = [f"2001:db8:{rng.randrange(blocks // 10):x}::1" for _ in range(2000)]
+    for label, ips in (("v4", addrs), ("v6", v6)):
+        best = float("inf")
+        for _ in range(5):
+            t0 = time.perf_counter()
+            for ip in ips:
+                db.lookup(ip)
+            best = min(best, time.perf_counter() - t0)
+        print(f"lookup {label}: {best * 1e6 / len(ips):.2f} us")
+    db.close()
+    sys.exit(1 if wrong else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Import-time budget for the entry module, from ``python -X importtime``.
+
+    python bench/import_budget.py [--own-ms N] [--total-ms N] [--runs N]
+
+Imports ``main`` (which does not start the app) in a fresh interpreter
+and checks:
+
+  * own      self time of ``main`` and ``discordia.*`` modules
+  * total    cumulative time of ``main``, Kivy included
+  * lazy     modules that must not be imported before first use
+
+Each figure is the best of ``--runs`` interpreters.  Exits non-zero when
+a budget is exceeded or a lazy module was imported eagerly.
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Only needed once a particular screen, mode or option is used.
+LAZY = (
+    "discordia.diag.memwatch",
+    "discordia.diag.profiling",
+    "discordia.engine.dot",
+    "discordia.engine.tls",
+    "discordia.engine.tun",
+    "discordia.storage.geoip",
+    "discordia.ui.screens.servers",
+    "discordia.ui.screens.settings",
+    "discordia.ui.screens.logs",
+    "discordia.ui.screens.about",
+    "http.server",
+    "jnius",
+    "kivy.core.clipboard",
+    "kivy.uix.image",
+    "kivy.uix.popup",
+    "kivy.uix.scrollview",
+    "kivy.uix.spinner",
+    "kivy.uix.switch",
+    "kivy.uix.textinput",
+    "tracemalloc",
+    "urllib.request",
+)
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def measure():
+    """One fresh ``import main``; return ``{module: (self_us, cum_us)}``."""
+    env = dict(os.environ, KIVY_NO_ARGS="1", KIVY_NO_FILELOG="1")
+    # keep Kivy's first-run config out of the user's home
+    env.setdefault("KIVY_HOME", tempfile.mkdtemp(prefix="kivy-home-"))
+    res = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if res.returncode != 0:
+        sys.exit(f"import main failed:\n{res.stderr[-2000:]}")
+    mods = {}
+    for line in res.stderr.splitlines():
+        m = _LINE.match(line)
+        if m:
+            mods[m.group(4)] = (int(m.group(1)), int(m.group(2)))
+    return mods
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--own-ms", type=float, default=60.0)
+    ap.add_argument("--total-ms", type=float, default=600.0)
+    ap.add_argument("--runs", type=int, default=3)
+    args = ap.parse_args()
+
+    best = None
+    for _ in range(args.runs):
+        mods = measure()
+        own = sum(s for name, (s, _) in mods.items()
+                  if name == "main" or name.startswith("discordia"))
+        total = mods["main"][1]
+        if best is None or total < best[1]:
+            best = (own, total, mods)
+    own, total, mods = best
+
+    ours = sorted(((s, name) for name, (s, _) in mods.items()
+                   if name.startswith("discordia")), reverse=True)
+    print("slowest discordia modules (self ms):")
+    for s, name in ours[:10]:
+        print(f"  {s / 1000:7.2f}  {name}")
+
+    eager = [name for name in LAZY if name in mods]
+    ok = True
+    print(f"own   {own / 1000:7.1f} ms  (budget {args.own_ms:g})")
+    print(f"total {total / 1000:7.1f} ms  (budget {args.total_ms:g})")
+    if own / 1000 > args.own_ms:
+        print("FAIL: discordia import time over budget")
+        ok = False
+    if total / 1000 > args.total_ms:
+        print("FAIL: total import time over budget")
+        ok = False
+    if eager:
+        print("FAIL: imported eagerly: " + ", ".join(eager))
+        ok = False
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+KV parse vs. cached load, per rule set.  Needs Kivy; no window is opened.
+
+    python bench/kv_cache.py
+"""
+
+import os
+import tempfile
+import time
+
+import _stubs
+_stubs.use_repo()
+
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+
+from kivy.lang import Builder  # noqa: E402
+from kivy.lang.parser import Parser  # noqa: E402
+
+from discordia.ui.kv import KV  # noqa: E402
+from discordia.ui.kvcache import load_kv  # noqa: E402
+from discordia.ui.screens import SCREENS, screen_class  # noqa: E402
+
+
+def main():
+    sources = [("common", KV)]
+    sources += [(name, screen_class(name)[0]) for name in SCREENS]
+    cache_dir = tempfile.mkdtemp()
+    total_parse = total_cached = 0.0
+    for name, src in sources:
+        t0 = time.perf_counter()
+        Parser(content=src)
+        parse = (time.perf_counter() - t0) * 1000
+        load_kv(src, name, cache_dir)
+        Builder.unload_file(f"{name}.kv")
+        t0 = time.perf_counter()
+        load_kv(src, name, cache_dir)
+        cached = (time.perf_counter() - t0) * 1000
+        total_parse += parse
+        total_cached += cached
+        print(f"{name:10} {src.count(chr(10)):4} lines  parse {parse:6.2f} ms"
+              f"  cached {cached:6.2f} ms")
+    print(f"{'total':21} parse {total_parse:6.2f} ms  cached "
+          f"{total_cached:6.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
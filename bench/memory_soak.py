@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Headless soak: run the engine's steady-state work for a while under the
+memory watcher and check that memory stays flat.
+
+    python bench/memory_soak.py [--minutes N] [--interval S] [--qps N]
+
+Each second it resolves ``--qps`` queries through the answer cache and
+the query journal (upstream stubbed), feeds the bandwidth history and
+metrics, checkpoints a session and starts a short-lived thread, as the
+UI does per action.  The memory report is printed at the end; the exit
+status is non-zero when the heap or RSS trend after warm-up exceeds its
+budget.  A multi-hour run is the real test; the default few minutes is
+a smoke check.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+import _stubs
+_stubs.use_repo()
+
+from discordia.diag.memwatch import memwatch  # noqa: E402
+from discordia.diag.metrics import metrics  # noqa: E402
+from discordia.engine.dnscache import DNSCache  # noqa: E402
+from discordia.engine.dnsmsg import build_query  # noqa: E402
+from discordia.engine.querylog import QueryLog  # noqa: E402
+from discordia.engine.resolver import Resolver  # noqa: E402
+from discordia.storage.sessions import SessionStore  # noqa: E402
+from discordia.storage.timeseries import BandwidthSeries  # noqa: E402
+
+
+class _Upstream:
+    """Answers every query with an empty NOERROR carrying a short TTL."""
+
+    def resolve(self, query, timeout):
+        return query[:2] + b"\x81\x80" + query[4:]
+
+    def warm(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--minutes", type=float, default=10)
+    ap.add_argument("--interval", type=float, default=10)
+    ap.add_argument("--qps", type=int, default=500)
+    ap.add_argument("--heap-kib-h", type=float, default=512,
+                    help="max traced heap growth per hour")
+    ap.add_argument("--rss-kib-h", type=float, default=4096,
+                    help="max RSS growth per hour")
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="discordia-soak-")
+    rng = random.Random(3)
+    names = [f"n{i}.soak.example" for i in range(20000)]
+    journal = QueryLog(os.path.join(tmp, "querylog"))
+    journal.start()
+    resolver = Resolver([_Upstream()], cache=DNSCache(), journal=journal)
+    series = BandwidthSeries()
+    store = SessionStore(os.path.join(tmp, "sessions.db"))
+    sid = store.open_session("doh")
+    frame = metrics.histogram("soak_frame_ms", "Soak loop iteration, ms")
+
+    # fill the cache and the journal's name dictionary first: both are
+    # bounded, and their growth up to the bound is not a leak
+    for i, name in enumerate(names):
+        resolver.forward(build_query(name, qid=i & 0xFFFF))
+    journal.flush()
+
+    memwatch.interval = args.interval
+    # entries cached before tracing started are replaced by traced ones
+    # over the first minutes; judge the trend on the second half only
+    memwatch.warmup = 0.5
+    memwatch.start(os.path.join(tmp, "memory_report.txt"))
+    end = time.monotonic() + args.minutes * 60
+    n = 0
+    while time.monotonic() < end:
+        t0 = time.perf_counter()
+        for _ in range(args.qps):
+            q = build_query(rng.choice(names), qid=n & 0xFFFF)
+            if resolver.cached(q) is None:
+                resolver.forward(q)
+            n += 1
+        series.add(rng.random() * 500, rng.random() * 50)
+        store.checkpoint(sid, n * 80, n * 40, n)
+        threading.Thread(target=time.sleep, args=(0.01,),
+                         daemon=True).start()
+        frame.observe((time.perf_counter() - t0) * 1000)
+        time.sleep(max(0.0, 1 - (time.perf_counter() - t0)))
+    memwatch.stop()
+    journal.close()
+    store.close_session(sid, n * 80, n * 40, n)
+    store.close()
+
+    print(memwatch.report())
+    tr = memwatch.trends()
+    print(f"\n{n} queries in {args.minutes:g} min")
+    ok = True
+    for key, budget in (("heap", args.heap_kib_h), ("rss", args.rss_kib_h)):
+        kib = tr.get(key, 0) / 1024
+        flag = "ok" if kib <= budget else "FAIL"
+        print(f"{key:5} {kib:+9.1f} KiB/h  (budget {budget:g})  {flag}")
+        ok = ok and kib <= budget
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Cost of recording a metric.
+
+    python bench/metrics_cost.py [iterations]
+"""
+
+import sys
+import threading
+import time
+
+import _stubs
+_stubs.use_repo()
+
+from discordia.diag.metrics import MetricsRegistry  # noqa: E402
+
+
+def per_call(fn, n):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n * 1e9
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    reg = MetricsRegistry()
+    c = reg.counter("c")
+    h = reg.histogram("h")
+    g = reg.gauge("g")
+    base = per_call(lambda: None, n)
+    print(f"empty call       {base:6.0f} ns")
+    print(f"counter.inc()    {per_call(c.inc, n) - base:6.0f} ns")
+    print(f"counter.inc(512) {per_call(lambda: c.inc(512), n) - base:6.0f} ns")
+    print(f"gauge.set(3)     {per_call(lambda: g.set(3), n) - base:6.0f} ns")
+    print(f"hist.observe()   {per_call(lambda: h.observe(3.7), n) - base:6.0f} ns")
+
+    def worker():
+        for _ in range(n // 10):
+            c.inc()
+            h.observe(1.0)
+
+    c.reset()
+    h.reset()
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert c.value == 8 * (n // 10), c.value
+    assert h.summary()["count"] == 8 * (n // 10)
+    print(f"8 threads x {n // 10}: totals exact, "
+          f"{len(c._shards)} live shards after join")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Cost of running queries through the stage pipeline.
+
+Compares ``Resolver.cached()`` — the pipeline's local half, timing one
+run in ``SAMPLE_EVERY`` stage by stage — against the same work
+hard-wired into one function (as the resolver did before it had
+stages), for cache hits and blocked names with the journal, blocklist,
+split-domain routes and cache all on.  Then prints where the time went
+per stage.
+
+    python bench/pipeline_cost.py [queries]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import _stubs
+_stubs.use_repo()
+
+from discordia.diag.metrics import metrics  # noqa: E402
+from discordia.engine.blocklist import Blocklist  # noqa: E402
+from discordia.engine.dnscache import DNSCache  # noqa: E402
+from discordia.engine.dnsmsg import (  # noqa: E402
+    RCODE_NXDOMAIN, DNSFormatError, build_error, build_query,
+    parse_question, rcode,
+)
+from discordia.engine.domainroutes import DomainRoutes  # noqa: E402
+from discordia.engine.pipeline import SAMPLE_EVERY  # noqa: E402
+from discordia.engine.querylog import (  # noqa: E402
+    FLAG_BLOCKED, UPSTREAM_CACHE, QueryLog,
+)
+from discordia.engine.resolver import (  # noqa: E402
+    BLOCKED, CACHE_HITS, QUERIES, Resolver,
+)
+
+NAMES = 512
+
+
+def hard_wired(resolver, query):
+    """The pre-pipeline ``Resolver.cached()``, stage for stage."""
+    QUERIES.inc()
+    blocklist = resolver.blocklist
+    if blocklist is not None:
+        try:
+            qname = parse_question(query)[1]
+        except DNSFormatError:
+            qname = ""
+        if qname and blocklist.blocks(qname):
+            BLOCKED.inc()
+            resolver.journal.record(query, RCODE_NXDOMAIN, 0, 255,
+                                    FLAG_BLOCKED)
+            return build_error(query, RCODE_NXDOMAIN)
+    hit = resolver.cache.get(query)
+    if hit is not None:
+        CACHE_HITS.inc()
+        resolver.journal.record(query, rcode(hit), 0, UPSTREAM_CACHE)
+        resolver.domain_routes.observe(hit)
+    return hit
+
+
+def per_query(fn, queries, rounds, reset=None, repeat=5):
+    """Best of *repeat* runs, microseconds per query; *reset* runs
+    (untimed) before each."""
+    best = float("inf")
+    for _ in range(repeat):
+        if reset is not None:
+            reset()
+        t0 = time.perf_counter()
+        for _ in range(max(rounds // repeat, 1)):
+            for q in queries:
+                fn(q)
+        best = min(best, time.perf_counter() - t0)
+    return best * 1e6 / (max(rounds // repeat, 1) * len(queries))
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    rounds = max(n // NAMES, 1)
+    journal = QueryLog(os.path.join(tempfile.mkdtemp(), "querylog"))
+    cache = DNSCache()
+    hits = [build_query(f"host{i}.example.com", qid=i) for i in range(NAMES)]
+    for q in hits:
+        cache.put(q, _stubs.answer(q))
+    blocked = [build_query(f"ad{i}.doubleclick.net", qid=i)
+               for i in range(NAMES)]
+    resolver = Resolver([], cache=cache, journal=journal,
+                        blocklist=Blocklist(["doubleclick.net"]),
+                        domain_routes=DomainRoutes(["discord.gg"], 24, 300))
+    print(f"{resolver.pipeline}, best of 5 runs of "
+          f"{rounds // 5 * NAMES} queries")
+
+    for label, queries in (("cache hit", hits), ("blocked", blocked)):
+        # the journal queues records until flushed: start each run level
+        wired = per_query(lambda q: hard_wired(resolver, q), queries, rounds,
+                          journal.flush)
+        piped = per_query(resolver.cached, queries, rounds, journal.flush)
+        print(f"{label:10} hard-wired {wired:6.2f} us  pipeline "
+              f"{piped:6.2f} us  overhead {piped - wired:+5.2f} us "
+              f"({(piped - wired) / wired * 100:+.0f}%)")
+
+    off = Resolver([], cache=cache)
+    print(f"{'cache hit':10} {off.pipeline}: "
+          f"{per_query(off.cached, hits, rounds):6.2f} us "
+          f"(disabled stages cost nothing)")
+
+    print(f"per stage (one call in {SAMPLE_EVERY} timed):")
+    for name, s in sorted(metrics.snapshot().items()):
+        if name.startswith("dns_stage_") and s["count"]:
+            print(f"  {name:24} n {s['count']:8}  mean "
+                  f"{s['sum'] / s['count'] * 1000:6.2f} us  p99 <= "
+                  f"{s['p99'] * 1000:g} us")
+    journal.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Query journal: cost on the resolver path, flush throughput and search
+latency over a full journal.
+
+    python bench/query_log.py [records]
+"""
+
+import random
+import sys
+import tempfile
+import time
+
+import _stubs
+_stubs.use_repo()
+
+from discordia.engine.dnscache import DNSCache  # noqa: E402
+from discordia.engine.dnsmsg import build_query  # noqa: E402
+from discordia.engine.querylog import QueryLog  # noqa: E402
+from discordia.engine.resolver import Resolver  # noqa: E402
+
+SITES = ("discord.gg", "discord.com", "discordapp.net", "youtube.com",
+         "googlevideo.com", "example.org", "cloudflare.com", "github.com")
+
+
+def queries(n: int, rng: random.Random):
+    names = [f"h{i}.{rng.choice(SITES)}" for i in range(4000)] + list(SITES)
+    return [build_query(rng.choice(names), rng.choice((1, 28)), qid=i & 0xFFFF)
+            for i in range(n)]
+
+
+class _Fixed:
+    """Upstream that answers every query with an empty NOERROR."""
+
+    def resolve(self, query, timeout):
+        return query[:2] + b"\x81\x80" + query[4:]
+
+
+def resolver_rate(journal, qs) -> float:
+    r = Resolver([_Fixed()], cache=DNSCache(), journal=journal)
+    t0 = time.perf_counter()
+    for q in qs:
+        if r.cached(q) is None:
+            r.forward(q)
+    return len(qs) / (time.perf_counter() - t0)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = random.Random(7)
+    qs = queries(50_000, rng)
+
+    plain = resolver_rate(None, qs)
+    journal = QueryLog(tempfile.mkdtemp())
+    logged = resolver_rate(journal, qs)
+    print(f"resolver        {plain:10.0f} q/s plain  {logged:10.0f} q/s "
+          f"journaled  ({(1 - logged / plain) * 100:.1f}% cost)")
+    t0 = time.perf_counter()
+    journal.flush()
+    print(f"flush           {len(qs) / (time.perf_counter() - t0):10.0f} "
+          f"records/s on the writer thread")
+
+    # fill a journal of n records, ~2% failures
+    journal = QueryLog(tempfile.mkdtemp())
+    t_base = time.time() - n * 0.05
+    for i in range(n):
+        q = qs[i % len(qs)]
+        code = 2 if rng.random() < 0.02 else 0
+        journal._q.append((t_base + i * 0.05, q, code, 20, 1, 0))
+        if len(journal._q) >= 50_000:
+            journal.flush()
+    journal.flush()
+    print(f"journal         {journal.stats()}")
+
+    for label, kw in (
+        ("last 50", {}),
+        ("last 50 failures", {"failures_only": True}),
+        ("last 50 *.discord.gg", {"pattern": "*.discord.gg"}),
+        ("last 50 fails *.discord.gg",
+         {"pattern": "*.discord.gg", "failures_only": True}),
+        ("fails, one hour mid-journal",
+         {"failures_only": True, "since": t_base + n * 0.025,
+          "until": t_base + n * 0.025 + 3600}),
+    ):
+        best = float("inf")
+        for _ in range(5):
+            t0 = time.perf_counter()
+            res = journal.search(50, **kw)
+            best = min(best, time.perf_counter() - t0)
+        print(f"search {label:28} {best * 1000:7.2f} ms  {len(res)} hits")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Query flood vs well-behaved clients through ``TunLoop``.
+
+A few "good" clients (own source addresses, a fresh source port per
+query like a stub resolver) each send 20 uncached queries a second
+while one client floods uncached queries as fast as it can — from one
+port, then from a random port per query.  The reply latency of the good
+clients is reported without a rate limit and with one that refuses or
+drops.  Without a limit the flood's misses queue up in front of
+everyone else's on the worker pool; with buckets keyed by port the
+port-hopping flood would drain the global bucket and starve them.
+
+    python bench/rate_limit.py [seconds]
+
+Also reports what ``RateLimiter.allow()`` costs per packet.
+"""
+
+import random
+import socket
+import sys
+import threading
+import time
+
+from _stubs import udp_server
+
+from discordia.engine.dnscache import DNSCache
+from discordia.engine.dnsmsg import build_query
+from discordia.engine.packet import build_udp4_query
+from discordia.engine.ratelimit import RateLimiter
+from discordia.engine.resolver import Resolver
+from discordia.engine.transport import UDPTransport
+from discordia.engine.tun import TUN_DNS_ADDRESS, TunLoop
+
+GOOD_ADDRESSES = ("10.0.0.3", "10.0.0.4", "10.0.0.5", "10.0.0.6")
+GOOD_INTERVAL = 0.05
+FLOOD_ADDRESS = "10.0.0.9"
+FLOOD_PORT = 50000
+
+
+def pct(xs, p):
+    s = sorted(xs)
+    return s[min(len(s) - 1, int(p / 100 * len(s)))] if s else float("nan")
+
+
+def run(label, seconds, limiter, flood=None):
+    """*flood*: None, ``"port"`` (one source port) or ``"ports"`` (a
+    random source port per query)."""
+    resolver = Resolver([UDPTransport("127.0.0.1", udp_server())],
+                        cache=DNSCache())
+    ours, peer = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+    loop = TunLoop(ours.fileno(), resolver)
+    loop.limiter = limiter
+    loop.start()
+    peer.settimeout(0.5)
+    sent = {}
+    lat = []
+    answered = {"flood": 0, "refused": 0, "good refused": 0}
+    send_lock = threading.Lock()
+    stop = threading.Event()
+    flood_key = socket.inet_aton(FLOOD_ADDRESS)
+
+    def send(addr, port, qid, name):
+        pkt = build_udp4_query(addr, TUN_DNS_ADDRESS, port,
+                               build_query(name, qid=qid))
+        with send_lock:
+            peer.send(pkt)
+
+    def reader():
+        while not stop.is_set():
+            try:
+                reply = peer.recv(2048)
+            except socket.timeout:
+                continue
+            now = time.perf_counter()
+            client = reply[16:20]
+            qid = reply[28] << 8 | reply[29]
+            if client == flood_key:
+                answered["flood"] += 1
+                if reply[31] & 0x0F == 5:
+                    answered["refused"] += 1
+                continue
+            t0 = sent.pop((client, qid), None)
+            if t0 is None:
+                continue
+            if reply[31] & 0x0F == 5:
+                answered["good refused"] += 1
+            else:
+                lat.append((now - t0) * 1000)
+
+    def good(addr):
+        key = socket.inet_aton(addr)
+        rng = random.Random(addr)
+        i = 0
+        while not stop.is_set():
+            qid = i & 0xFFFF
+            sent[(key, qid)] = time.perf_counter()
+            send(addr, rng.randrange(1024, 65536), qid, f"g{addr}-{i}.example")
+            i += 1
+            time.sleep(GOOD_INTERVAL)
+
+    flood_sent = [0]
+
+    def flooder():
+        rng = random.Random(1)
+        i = 0
+        while not stop.is_set():
+            port = FLOOD_PORT if flood == "port" else rng.randrange(1024,
+                                                                    65536)
+            send(FLOOD_ADDRESS, port, i & 0xFFFF, f"f{i}.flood.example")
+            i += 1
+        flood_sent[0] = i
+
+    threads = [threading.Thread(target=reader)]
+    threads += [threading.Thread(target=good, args=(a,))
+                for a in GOOD_ADDRESSES]
+    if flood:
+        threads.append(threading.Thread(target=flooder))
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    loop.stop()
+    ours.close()
+    peer.close()
+    resolver.close()
+
+    lost = len(sent)
+    flood_note = ""
+    if flood:
+        flood_note = (f" | flood {flood_sent[0] / seconds:6.0f} q/s, "
+                      f"{answered['flood'] - answered['refused']} answered, "
+                      f"{answered['refused']} refused, "
+                      f"{loop.rate_limited} limited")
+    print(f"{label:27} good p50 {pct(lat, 50):7.2f} p99 {pct(lat, 99):8.2f}"
+          f" ms, {len(lat)} ok / {answered['good refused']} refused / "
+          f"{lost} lost{flood_note}")
+    return len(lat), answered["good refused"] + lost
+
+
+def starvation():
+    """A flood against one well-behaved client straight into
+    ``allow()``; the flood's source port does not reach the limiter."""
+    limiter = RateLimiter(50, 100, 1000)
+    good = 0x0A000003
+    flood = 0x0A000009
+    ok = 0
+    now = 0.0
+    for i in range(60):
+        # 1000 flood queries between two of the good client's
+        for _ in range(1000):
+            now += 1e-5
+            limiter.allow(flood, now)
+        now += 0.05
+        ok += limiter.allow(good, now)
+    print(f"allow() with a port-hopping flood: good client {ok} of 60 "
+          f"queries through")
+    return ok
+
+
+def allow_cost():
+    limiter = RateLimiter(50, 100, 1000)
+    n = 200000
+    t0 = time.perf_counter()
+    now = time.monotonic()
+    allow = limiter.allow
+    for i in range(n):
+        allow(0x0A000000 | (i & 0x3FF), now + i * 1e-5)
+    ns = (time.perf_counter() - t0) * 1e9 / n
+    print(f"RateLimiter.allow(): {ns:.0f} ns per packet")
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3
+    print(f"{len(GOOD_ADDRESSES)} good clients at {1 / GOOD_INTERVAL:.0f} "
+          f"q/s each, {seconds:g} s per run")
+    run("no flood", seconds, None)
+    run("flood, no limit", seconds, None, flood="port")
+    run("flood, refuse", seconds, RateLimiter(50, 100, 1000), flood="port")
+    run("flood, drop", seconds, RateLimiter(50, 100, 1000, refuse=False),
+        flood="port")
+    ok, failed = run("port-hopping flood, refuse", seconds,
+                   RateLimiter(50, 100, 1000), flood="ports")
+    through = starvation()
+    allow_cost()
+    sys.exit(0 if through == 60 and failed <= ok // 50 else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Live reconfiguration: how long VPNEngine.reconfigure() takes for each
+kind of change, how soon new upstreams answer, and whether queries in
+flight notice.
+
+    python bench/reconfigure.py [rounds]
+
+Runs the simulated desktop engine, with the resolver the TUN path would
+start, against two local UDP responders.  A client thread keeps sending uncached queries the whole time; every
+round toggles the blocklist, changes the cache policy and moves the
+resolver to the other responder.  No query may fail.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# settings.json and the journal go to a throwaway DATA_DIR
+os.environ["HOME"] = tempfile.mkdtemp(prefix="discordia-reconf-")
+
+import _stubs  # noqa: E402
+_stubs.use_repo()
+
+from discordia.engine.dnsmsg import RCODE_SERVFAIL, build_query, rcode  # noqa: E402
+from discordia.engine.vpn import vpn_engine  # noqa: E402
+from discordia.storage.settings import settings  # noqa: E402
+
+
+def pct(xs, p):
+    s = sorted(xs)
+    return s[min(len(s) - 1, int(p / 100 * len(s)))] if s else 0.0
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    ports = [_stubs.udp_server(), _stubs.udp_server()]
+    settings.set("dns_primary", f"127.0.0.1:{ports[0]}")
+    settings.set("dns_secondary", f"127.0.0.1:{ports[0]}")
+    settings.set("block_ads", False)
+    ok, msg = vpn_engine.connect("doh")
+    # the simulated engine has no resolver of its own: nothing queries it
+    vpn_engine._start_resolver("doh")
+    print(msg)
+
+    stop = threading.Event()
+    lat, fails = [], []
+
+    def client():
+        i = 0
+        while not stop.is_set():
+            q = build_query(f"q{i}.bench.example", qid=i & 0xFFFF)
+            t0 = time.perf_counter()
+            resp = vpn_engine.resolver.resolve(q)
+            lat.append((time.perf_counter() - t0) * 1000)
+            if rcode(resp) == RCODE_SERVFAIL:
+                fails.append(i)
+            i += 1
+
+    t = threading.Thread(target=client, daemon=True)
+    t.start()
+    time.sleep(1)
+    idle = list(lat)
+
+    timings = {"blocklist": [], "cache policy": [], "upstreams": [],
+               "no change": []}
+    effective = []
+    for r in range(rounds):
+        settings.set("block_ads", not settings.get("block_ads"))
+        t0 = time.perf_counter()
+        vpn_engine.reconfigure()
+        timings["blocklist"].append((time.perf_counter() - t0) * 1000)
+
+        settings.set("cache_max_ttl", 300 + r)
+        t0 = time.perf_counter()
+        vpn_engine.reconfigure()
+        timings["cache policy"].append((time.perf_counter() - t0) * 1000)
+
+        port = ports[(r + 1) % 2]
+        settings.set("dns_primary", f"127.0.0.1:{port}")
+        settings.set("dns_secondary", f"127.0.0.1:{port}")
+        t0 = time.perf_counter()
+        vpn_engine.reconfigure()
+        timings["upstreams"].append((time.perf_counter() - t0) * 1000)
+        while vpn_engine.resolver.upstreams[0].port != port:
+            time.sleep(0.0005)
+        effective.append((time.perf_counter() - t0) * 1000)
+
+        t0 = time.perf_counter()
+        vpn_engine.reconfigure()
+        timings["no change"].append((time.perf_counter() - t0) * 1000)
+        time.sleep(0.05)
+    busy = lat[len(idle):]
+    stop.set()
+    t.join()
+    vpn_engine.disconnect()
+
+    for kind, ms in timings.items():
+        print(f"{'reconfigure, ' + kind:27} p50 {pct(ms, 50):7.3f} ms  "
+              f"max {max(ms):7.3f} ms")
+    print(f"{'new upstreams answering':27} p50 {pct(effective, 50):7.3f} ms  "
+          f"max {max(effective):7.3f} ms")
+    for label, xs in (("queries, steady", idle),
+                      ("queries, reconfiguring", busy)):
+        print(f"{label:27} p50 {pct(xs, 50):7.3f} ms  "
+              f"p99 {pct(xs, 99):7.3f} ms  ({len(xs)} queries)")
+    print(f"failed queries: {len(fails)}")
+    raise SystemExit(1 if fails else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Route planner benchmark.
+
+Plans routes for random include/exclude lists (100k prefixes each by
+default), checks the result against a brute-force membership sample and
+prints timings and the compression achieved.
+
+    python bench/route_planner.py [prefixes]
+"""
+
+import bisect
+import random
+import socket
+import sys
+import time
+
+import _stubs
+_stubs.use_repo()
+
+from discordia.engine.routes import parse_prefix, plan_routes  # noqa: E402
+
+
+def random_prefixes(rng, n, lo, hi):
+    out = []
+    for _ in range(n):
+        plen = rng.randint(lo, hi)
+        addr = rng.getrandbits(32) & ~((1 << (32 - plen)) - 1)
+        out.append(f"{socket.inet_ntoa(addr.to_bytes(4, 'big'))}/{plen}")
+    return out
+
+
+def covered(ranges, ip):
+    return any(s <= ip <= e for s, e in ranges)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    rng = random.Random(42)
+    include = random_prefixes(rng, n, 12, 24)
+    exclude = random_prefixes(rng, n, 16, 28)
+
+    t0 = time.perf_counter()
+    routes = plan_routes(include, exclude)
+    dt = time.perf_counter() - t0
+    print(f"include {len(include)} + exclude {len(exclude)} prefixes"
+          f" -> {len(routes)} routes in {dt * 1000:.0f} ms")
+
+    t0 = time.perf_counter()
+    full = plan_routes(["0.0.0.0/0"], exclude)
+    dt = time.perf_counter() - t0
+    print(f"0.0.0.0/0 minus {len(exclude)} prefixes"
+          f" -> {len(full)} routes in {dt * 1000:.0f} ms")
+
+    # spot-check a sample of addresses against the inputs
+    inc_r = [parse_prefix(p)[1] for p in include[:2000]]
+    exc_r = [parse_prefix(p)[1] for p in exclude]
+    out_r = [parse_prefix(p)[1] for p in routes]
+    out_r.sort()
+    starts = [s for s, _ in out_r]
+    checked = 0
+    for s, e in inc_r[:300]:
+        ip = rng.randint(s, e)
+        i = bisect.bisect_right(starts, ip) - 1
+        in_plan = i >= 0 and out_r[i][0] <= ip <= out_r[i][1]
+        assert in_plan == (not covered(exc_r, ip)), hex(ip)
+        checked += 1
+    print(f"spot-checked {checked} addresses: ok")
+
+
+if __name__ == "__main__":
+    main()
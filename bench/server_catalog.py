@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Server catalog: load, search and latency-sort cost for a large catalog.
+
+    python bench/server_catalog.py [entries]
+
+Every figure should stay well under a 16 ms frame for the Servers
+screen to filter as the user types.
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import _stubs
+_stubs.use_repo()
+
+from discordia.storage.catalog import PROTOCOLS, ServerCatalog  # noqa: E402
+
+REGIONS = ("us-east", "us-west", "eu-west", "eu-central", "ap-south",
+           "ap-northeast", "sa-east", "af-south", "me-central", "oc-east")
+CITIES = ("Ashburn", "Amsterdam", "Frankfurt", "London", "Mumbai", "Tokyo",
+          "Sydney", "Sao Paulo", "Johannesburg", "Dubai", "Seattle", "Paris")
+TAGS = ("anycast", "streaming", "p2p", "ipv6", "low-latency", "adblock")
+
+
+def generate(n: int, rng: random.Random):
+    out = []
+    for i in range(n):
+        proto = rng.choice(PROTOCOLS)
+        city = rng.choice(CITIES)
+        out.append({
+            "name": f"{city} {proto.upper()} {i}",
+            "host": f"{proto}-{i}.{city.lower().replace(' ', '')}.example",
+            "port": 853 if proto == "dot" else 443,
+            "protocol": proto,
+            "region": rng.choice(REGIONS),
+            "tags": rng.sample(TAGS, rng.randint(0, 3)),
+        })
+    return out
+
+
+def timed(fn, runs: int = 20):
+    best = float("inf")
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000, out
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    rng = random.Random(1)
+    path = os.path.join(tempfile.mkdtemp(), "servers.json")
+    with open(path, "w") as f:
+        json.dump({"servers": generate(n, rng)}, f)
+
+    ms, cat = timed(lambda: ServerCatalog.load(path), 3)
+    print(f"load + index {n} entries       {ms:7.2f} ms  "
+          f"({len(cat._words)} words)")
+
+    queries = [
+        ("everything", {}),
+        ("prefix 'f'", {"text": "f"}),
+        ("prefix 'fra'", {"text": "fra"}),
+        ("two words 'tok dot'", {"text": "tok dot"}),
+        ("region", {"region": "eu-west"}),
+        ("region + protocol + #tag",
+         {"region": "eu-west", "protocol": "dot", "text": "#ipv6"}),
+    ]
+    for label, kw in queries:
+        ms, res = timed(lambda: cat.search(**kw))
+        print(f"search {label:25} {ms:7.2f} ms  {len(res):5} hits")
+
+    # probe results trickling in, then a latency-ordered view
+    order = list(range(n))
+    rng.shuffle(order)
+    t0 = time.perf_counter()
+    for i in order:
+        ok = rng.random() > 0.1
+        cat.record(i, ok, rng.randint(5, 400), 0.0)
+    per = (time.perf_counter() - t0) / n * 1e6
+    print(f"record probe result            {per:7.2f} us each")
+    for label, kw in (("fastest first", {}),
+                      ("fastest 'fra'", {"text": "fra"})):
+        ms, res = timed(lambda: cat.search(by_latency=True, **kw))
+        print(f"search {label:25} {ms:7.2f} ms  {len(res):5} hits")
+    lat = [cat.servers[i].latency_ms for i in res if cat.servers[i].ok]
+    assert lat == sorted(lat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Session history summary cost.
+
+Writes N years of synthetic sessions (default 5 years × 24 per day)
+through SessionStore, then times the Settings-screen summary query.
+
+    python bench/session_summary.py [years]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+import _stubs
+_stubs.use_repo()
+
+from discordia.storage.sessions import SessionStore  # noqa: E402
+
+
+def main():
+    years = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    n = int(years * 365 * 24)
+    path = os.path.join(tempfile.mkdtemp(), "sessions.db")
+    store = SessionStore(path)
+    rng = random.Random(1)
+    t = time.time() - years * 365 * 86400
+
+    t0 = time.perf_counter()
+    for i in range(n):
+        sid = store.open_session("doh", start=t)
+        if i % 50 == 0:
+            store.record_failure("dot", "VPN permission denied by user")
+        store.checkpoint(sid, rng.randint(0, 1 << 20), 1000, 50)
+        store.close_session(sid, rng.randint(0, 1 << 24), 4000, 200,
+                            end=t + rng.randint(60, 3000))
+        t += 3600
+    enqueue = time.perf_counter() - t0
+    store.flush()
+    total = time.perf_counter() - t0
+    print(f"{n} sessions: enqueue {enqueue * 1000:.0f} ms"
+          f" ({enqueue / n * 1e6:.1f} us/session on the caller),"
+          f" committed in {total * 1000:.0f} ms")
+
+    for _ in range(3):
+        t0 = time.perf_counter()
+        s = store.summary()
+        dt = time.perf_counter() - t0
+    print(f"summary: {dt * 1000:.2f} ms -> {s}")
+    t0 = time.perf_counter()
+    s = store.summary(since=time.time() - 30 * 86400)
+    print(f"last 30 days: {(time.perf_counter() - t0) * 1000:.2f} ms")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Split-domain tracking, end to end: traffic to a learned address must
+still get out.
+
+    sudo python bench/split_forward.py
+
+Runs in a private network namespace (re-executes itself under
+``unshare -n``), so no route on the host is touched:
+
+  * a second TUN, ``wan0`` (203.0.113.2/24, default route), stands in
+    for the normal network and echoes every UDP datagram back;
+  * the engine connects on its own TUN with ``split_domains`` set and a
+    local upstream that answers 198.51.100.7 for every name;
+  * a query through the tunnel's DNS address teaches it the block, the
+    routes are applied again, and a UDP datagram to 198.51.100.7 has to
+    come back from ``wan0``.
+
+Then the learned block is routed into the tunnel by hand — what the
+engine used to do — to show that the same datagram is lost there.
+"""
+
+import os
+import select
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+NETNS_FLAG = "DISCORDIA_BENCH_NETNS"
+LEARNED_ADDRESS = "198.51.100.7"
+
+if os.environ.get(NETNS_FLAG) != "1":
+    os.environ[NETNS_FLAG] = "1"
+    try:
+        os.execvp("unshare", ["unshare", "-n", sys.executable]
+                  + [os.path.abspath(__file__)] + sys.argv[1:])
+    except OSError as exc:
+        sys.exit(f"unshare: {exc} (needs root and util-linux)")
+
+# settings.json and the journal go to a throwaway DATA_DIR
+os.environ["HOME"] = tempfile.mkdtemp(prefix="discordia-fwd-")
+os.environ["DISCORDIA_TUN"] = "discordia%d"
+
+import _stubs  # noqa: E402
+_stubs.use_repo()
+
+from discordia.engine.dnsmsg import (  # noqa: E402
+    answer_addresses, build_query,
+)
+from discordia.engine.tun import (  # noqa: E402
+    TUN_DNS_ADDRESS, open_tun, update_tun_routes,
+)
+
+
+def ip(*args):
+    subprocess.run(["ip", *args], check=True, capture_output=True)
+
+
+def wan_echo() -> str:
+    """Bring up ``wan0`` as the default route and echo UDP on it."""
+    fd, ifname = open_tun("wan%d")
+    ip("addr", "add", "203.0.113.2/24", "dev", ifname)
+    ip("link", "set", ifname, "up")
+    ip("route", "add", "default", "via", "203.0.113.1", "dev", ifname)
+
+    def loop():
+        while True:
+            select.select([fd], [], [])
+            try:
+                pkt = bytearray(os.read(fd, 2048))
+            except BlockingIOError:
+                continue
+            if len(pkt) < 28 or pkt[0] >> 4 != 4 or pkt[9] != 17:
+                continue
+            ihl = (pkt[0] & 0x0F) * 4
+            # swapping addresses and ports leaves both checksums valid
+            pkt[12:16], pkt[16:20] = pkt[16:20], pkt[12:16]
+            pkt[ihl:ihl + 2], pkt[ihl + 2:ihl + 4] = (
+                pkt[ihl + 2:ihl + 4], pkt[ihl:ihl + 2])
+            os.write(fd, pkt)
+
+    threading.Thread(target=loop, daemon=True).start()
+    return ifname
+
+
+def upstream() -> int:
+    """UDP responder on 127.0.0.1 answering LEARNED_ADDRESS."""
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    s.bind(("127.0.0.1", 0))
+    rdata = socket.inet_aton(LEARNED_ADDRESS)
+
+    def loop():
+        while True:
+            data, addr = s.recvfrom(4096)
+            head = bytearray(data[:12])
+            head[2] |= 0x80
+            head[3] = 0x80
+            head[6:8] = b"\x00\x01"
+            rr = b"\xc0\x0c" + struct.pack("!HHIH", 1, 1, 60, 4) + rdata
+            s.sendto(bytes(head) + data[12:] + rr, addr)
+
+    threading.Thread(target=loop, daemon=True).start()
+    return s.getsockname()[1]
+
+
+def echo(timeout: float = 1.0):
+    """Round trip of one datagram to LEARNED_ADDRESS in ms, or None."""
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    s.settimeout(timeout)
+    try:
+        t0 = time.perf_counter()
+        s.sendto(b"ping", (LEARNED_ADDRESS, 7))
+        data, _ = s.recvfrom(64)
+        return (time.perf_counter() - t0) * 1000 if data == b"ping" else None
+    except OSError:
+        return None
+    finally:
+        s.close()
+
+
+def shown(ms) -> str:
+    return f"{ms:.2f} ms" if ms is not None else "LOST"
+
+
+def route_dev() -> str:
+    out = subprocess.run(["ip", "route", "get", LEARNED_ADDRESS],
+                         capture_output=True, text=True).stdout
+    words = out.split()
+    return words[words.index("dev") + 1] if "dev" in words else "?"
+
+
+def main():
+    ip("link", "set", "lo", "up")
+    wan = wan_echo()
+    print(f"before connect: {LEARNED_ADDRESS} via {route_dev()}, echo "
+          f"{shown(echo())}")
+
+    from discordia.engine.vpn import vpn_engine
+    from discordia.storage.settings import settings
+
+    settings.set("dns_primary", f"127.0.0.1:{upstream()}")
+    settings.set("dns_secondary", "")
+    settings.set("split_tunnel", True)
+    settings.set("split_domains", ["example.org"])
+    ok, msg = vpn_engine.connect("doh")
+    if not ok:
+        sys.exit(f"connect failed: {msg}")
+
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    s.settimeout(2)
+    s.sendto(build_query("app.example.org"), (TUN_DNS_ADDRESS, 53))
+    got = [socket.inet_ntoa(a.to_bytes(4, "big"))
+           for a, _ in answer_addresses(s.recv(2048))]
+    s.close()
+    vpn_engine.reconfigure()
+    dr = vpn_engine._domain_routes
+    learned = dr.routes()
+    ms = echo()
+    print(f"answered {got}; learned {learned}; routes {vpn_engine._routes}")
+    print(f"after learning: {LEARNED_ADDRESS} via {route_dev()}, echo "
+          f"{shown(ms)}")
+    passed = bool(learned) and ms is not None and route_dev() == wan
+
+    # what routing the learned block into the tunnel does
+    tun = vpn_engine._tun
+    ifname = vpn_engine._ifname
+    update_tun_routes(ifname, learned, [])
+    lost = echo() is None
+    print(f"block routed into {ifname}: echo "
+          f"{'LOST' if lost else 'returned'}, split_packets "
+          f"{tun.split_packets}")
+    update_tun_routes(ifname, [], learned)
+    vpn_engine.disconnect()
+    print("pass" if passed else "FAIL")
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
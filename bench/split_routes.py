@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Split-domain tracking: the interval set behind the per-packet check, the
+cost of learning blocks from answers, and a check that the engine keeps
+them out of its route plan.
+
+    python bench/split_routes.py [blocks]
+
+  1. random block adds/removes on ``IntervalSet``, checked against a
+     plain set of addresses, and lookups timed against a linear scan;
+  2. ``DomainRoutes.observe`` on matching and non-matching answers;
+  3. the simulated engine and the resolver the TUN path would start,
+     with ``split_domains`` set, answering bursts of queries from a
+     local responder that hands out addresses in two new /24s per
+     burst: blocks learned, and no route pushed for them (the TUN loop
+     forwards only DNS; see bench/split_forward.py).
+"""
+
+import os
+import random
+import socket
+import struct
+import sys
+import tempfile
+import threading
+import time
+from ipaddress import ip_network
+
+# settings.json and the journal go to a throwaway DATA_DIR
+os.environ["HOME"] = tempfile.mkdtemp(prefix="discordia-split-")
+
+import _stubs  # noqa: E402
+_stubs.use_repo()
+
+from discordia.engine.dnsmsg import build_query  # noqa: E402
+from discordia.engine.domainroutes import DomainRoutes  # noqa: E402
+from discordia.engine.routes import IntervalSet  # noqa: E402
+
+
+def answer(query: bytes, addresses, ttl: int = 60) -> bytes:
+    """A NOERROR reply to *query* with one A record per address."""
+    head = bytearray(query[:12])
+    head[2] |= 0x80
+    head[3] = 0x80
+    head[6:8] = struct.pack("!H", len(addresses))
+    rrs = b"".join(b"\xc0\x0c" + struct.pack("!HHIH", 1, 1, ttl, 4)
+                   + a.to_bytes(4, "big") for a in addresses)
+    return bytes(head) + query[12:] + rrs
+
+
+def cdn_server(rng, nets) -> int:
+    """UDP responder answering 2 addresses drawn from the /24s in
+    *nets* (a list the caller may change)."""
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    s.bind(("127.0.0.1", 0))
+
+    def loop():
+        while True:
+            data, addr = s.recvfrom(4096)
+            picks = [rng.choice(nets) | rng.randrange(1, 255)
+                     for _ in range(2)]
+            s.sendto(answer(data, picks), addr)
+
+    threading.Thread(target=loop, daemon=True).start()
+    return s.getsockname()[1]
+
+
+def interval_set(rng, n):
+    ivs, truth = IntervalSet(), set()
+    t0 = time.perf_counter()
+    for _ in range(n):
+        block = rng.getrandbits(24) << 8
+        ivs.add(block, block + 255)
+        truth.add(block)
+    add_us = (time.perf_counter() - t0) * 1e6 / n
+    gone = rng.sample(sorted(truth), n // 4)
+    t0 = time.perf_counter()
+    for block in gone:
+        ivs.remove(block, block + 255)
+        truth.discard(block)
+    rm_us = (time.perf_counter() - t0) * 1e6 / len(gone)
+
+    probes = [rng.getrandbits(32) for _ in range(20000)]
+    probes += [b | rng.randrange(256) for b in rng.sample(sorted(truth),
+                                                          2000)]
+    for ip in probes:
+        assert (ip in ivs) == ((ip & ~255) in truth), hex(ip)
+    t0 = time.perf_counter()
+    for ip in probes:
+        ip in ivs  # noqa: B015
+    lookup_ns = (time.perf_counter() - t0) * 1e9 / len(probes)
+    ranges = list(ivs)
+    sample = probes[:2000]
+    t0 = time.perf_counter()
+    for ip in sample:
+        any(s <= ip <= e for s, e in ranges)
+    linear_ns = (time.perf_counter() - t0) * 1e9 / len(sample)
+    print(f"IntervalSet: {len(truth)} blocks in {len(ivs)} ranges, "
+          f"{len(probes)} probes checked: ok")
+    print(f"  add {add_us:6.1f} us  remove {rm_us:6.1f} us  lookup "
+          f"{lookup_ns:6.0f} ns  (linear scan {linear_ns / 1000:.0f} us)")
+
+
+def observe(rng):
+    dr = DomainRoutes(["discord.com", "discord.gg", "discordapp.net"])
+    hit = answer(build_query("gateway.discord.com"),
+                 [rng.getrandbits(32) for _ in range(4)])
+    miss = answer(build_query("www.example.org"), [0x5DB8D822])
+    for label, msg in (("matching answer", hit), ("other answer", miss)):
+        n = 20000
+        t0 = time.perf_counter()
+        for _ in range(n):
+            dr.observe(msg)
+        print(f"observe, {label:16} "
+              f"{(time.perf_counter() - t0) * 1e6 / n:6.2f} us")
+
+
+def engine(rng):
+    from discordia.engine.vpn import vpn_engine
+    from discordia.storage.settings import settings
+
+    nets = []
+    port = cdn_server(rng, nets)
+    settings.set("dns_primary", f"127.0.0.1:{port}")
+    settings.set("dns_secondary", "")
+    settings.set("split_domains", ["discord.com", "discord.media"])
+    pushes = []
+    apply = vpn_engine._apply_routes
+
+    def counted(always=False):
+        pushes.append(len(vpn_engine._domain_routes))
+        return apply(always)
+
+    vpn_engine._apply_routes = counted
+    vpn_engine.connect("doh")
+    # the simulated engine has no resolver of its own: nothing queries it
+    vpn_engine._start_resolver("doh")
+    bursts, per_burst = 5, 80
+    t0 = time.perf_counter()
+    for b in range(bursts):
+        # each burst meets two new /24s
+        nets[:] = [(104 << 24) | (16 << 16) | ((2 * b + i) << 8)
+                   for i in range(2)]
+        for i in range(per_burst):
+            q = build_query(f"h{b}-{i}.discord.media")
+            vpn_engine.resolver.resolve(q)
+        time.sleep(0.5)
+    dt = time.perf_counter() - t0 - bursts * 0.5
+    dr = vpn_engine._domain_routes
+    learned = dr.routes()
+    planned = vpn_engine.plan_routes(["10.0.0.53"])
+    vpn_engine.disconnect()
+    leaked = [r for r in planned
+              if any(ip_network(r).overlaps(ip_network(x)) for x in learned)]
+    print(f"engine: {bursts * per_burst} answers in {dt * 1000:.0f} ms -> "
+          f"{len(dr)} /24 blocks, {learned}")
+    print(f"  route pushes: {len(pushes)}; learned blocks in the route "
+          f"plan: {len(leaked)}")
+    return not pushes and not leaked and len(dr) == 2 * bursts
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    rng = random.Random(7)
+    interval_set(rng, n)
+    observe(rng)
+    sys.exit(0 if engine(rng) else 1)
+
+
+if __name__ == "__main__":
+    main()
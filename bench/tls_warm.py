@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+First-query latency of a DoT upstream right after connect, with and
+without the shared TLS state.
+
+    python bench/tls_warm.py [rounds] [--rtt MS]
+
+Each round builds a fresh ``DoTTransport`` (as a connect or reconfigure
+does) and times its first query:
+
+  cold       new SSLContext with the CA bundle loaded, full handshake —
+             what every connection did before the shared context
+  resumed    shared context, session from ``tls.sessions`` (cached by a
+             pre-warm or an earlier connection)
+  pre-warmed shared context, connection opened by ``warm()`` before
+             the query, as ``VPNEngine`` does on connect
+
+``--rtt`` delays every byte the stand-in server sends, to model a real
+network.  Needs the ``openssl`` binary (see dot_latency.py).
+"""
+
+import argparse
+import socket
+import ssl
+import statistics
+import tempfile
+import threading
+import time
+
+from dot_latency import dot_server, make_cert
+
+from discordia.engine import tls
+from discordia.engine.dnsmsg import build_query
+from discordia.engine.dot import DoTTransport
+
+
+def delayed(port: int, rtt: float) -> int:
+    """TCP relay to 127.0.0.1:*port* adding *rtt* per server flight."""
+    ls = socket.socket()
+    ls.bind(("127.0.0.1", 0))
+    ls.listen(16)
+
+    def pipe(src, dst, delay):
+        try:
+            while True:
+                data = src.recv(65536)
+                if not data:
+                    break
+                if delay:
+                    time.sleep(delay)
+                dst.sendall(data)
+        except OSError:
+            pass
+        finally:
+            for s in (src, dst):
+                try:
+                    s.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+
+    def accept():
+        while True:
+            c, _ = ls.accept()
+            u = socket.create_connection(("127.0.0.1", port))
+            # connect costs one round trip too
+            time.sleep(rtt)
+            threading.Thread(target=pipe, args=(c, u, 0),
+                             daemon=True).start()
+            threading.Thread(target=pipe, args=(u, c, rtt),
+                             daemon=True).start()
+
+    threading.Thread(target=accept, daemon=True).start()
+    return ls.getsockname()[1]
+
+
+def first_query(make, warm: bool = False):
+    """Time from building a transport (or, when *warm*, from after its
+    ``warm()``) to the first answer."""
+    if warm:
+        transport = make()
+        transport.warm()
+        t0 = time.perf_counter()
+    else:
+        t0 = time.perf_counter()
+        transport = make()
+    transport.resolve(build_query("first.example.com"))
+    ms = (time.perf_counter() - t0) * 1000
+    transport.close()
+    return ms, transport
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("rounds", nargs="?", type=int, default=30)
+    ap.add_argument("--rtt", type=float, default=0.0, help="ms")
+    args = ap.parse_args()
+
+    cert, key = make_cert(tempfile.mkdtemp())
+    port = dot_server(cert, key)
+    if args.rtt:
+        port = delayed(port, args.rtt / 1000)
+    server = ("127.0.0.1", port, "localhost")
+
+    def fresh_context():
+        ctx = ssl.create_default_context()
+        ctx.load_verify_locations(cert)
+        return ctx
+
+    t0 = time.perf_counter()
+    for _ in range(args.rounds):
+        fresh_context()
+    ctx_ms = (time.perf_counter() - t0) * 1000 / args.rounds
+    # the stand-in's certificate joins the shared context's trust store
+    tls.client_context().load_verify_locations(cert)
+    tls.prewarm([server])
+
+    results = {"cold": [], "resumed": [], "pre-warmed": []}
+    host, port, name = server
+    for _ in range(args.rounds):
+        ms, _ = first_query(lambda: DoTTransport(
+            host, port, server_name=name, context=fresh_context()))
+        results["cold"].append(ms)
+        ms, t = first_query(lambda: DoTTransport(host, port,
+                                                 server_name=name))
+        assert t.resumed == t.handshakes == 1
+        results["resumed"].append(ms)
+        ms, _ = first_query(lambda: DoTTransport(host, port,
+                                                 server_name=name), True)
+        results["pre-warmed"].append(ms)
+
+    print(f"CA bundle load per context: {ctx_ms:.2f} ms  "
+          f"(rtt {args.rtt:g} ms, {args.rounds} rounds)")
+    for name, ms in results.items():
+        print(f"first query {name:10}  p50 {statistics.median(ms):7.2f} ms"
+              f"  max {max(ms):7.2f} ms")
+    print(f"handshakes {tls.HANDSHAKES.value}, resumed "
+          f"{tls.RESUMED.value}")
+
+
+if __name__ == "__main__":
+    main()
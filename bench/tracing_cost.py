@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+What a span costs, recording on and off, and what an export costs with
+the ring full.
+
+Spans wrap steps of a connect, a probe or a lookup — milliseconds each —
+so a few microseconds per span are noise there; this checks it stays so.
+
+    python bench/tracing_cost.py [spans]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import _stubs
+_stubs.use_repo()
+
+from discordia.diag.tracing import TRACE_CAPACITY, Tracer  # noqa: E402
+
+
+def per_call(fn, n, repeat=5):
+    """Best of *repeat* runs, nanoseconds per call."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(n):
+            fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1e9 / n
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    on = Tracer()
+    off = Tracer(enabled=False)
+
+    def span(tracer):
+        def run():
+            with tracer.span("step", mode="doh") as sp:
+                sp.set(ok=True)
+        return run
+
+    def flow(tracer):
+        def run():
+            tracer.end(tracer.begin("flow"), "flow", ok=True)
+        return run
+
+    empty = per_call(lambda: None, n)
+    for label, tracer in (("recording", on), ("off", off)):
+        print(f"{label:10} span {per_call(span(tracer), n) - empty:6.0f} ns"
+              f"  begin+end {per_call(flow(tracer), n) - empty:6.0f} ns")
+
+    path = os.path.join(tempfile.mkdtemp(), "trace.json")
+    t0 = time.perf_counter()
+    spans = on.export(path)
+    print(f"export of a full ring ({TRACE_CAPACITY} events, {spans} "
+          f"spans and flows): "
+          f"{(time.perf_counter() - t0) * 1000:.1f} ms, "
+          f"{os.path.getsize(path) / 1024:.0f} KiB")
+    t0 = time.perf_counter()
+    on.summary()
+    print(f"summary: {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+TUN data-path latency.
+
+Sends DNS queries through ``TunLoop`` after varying idle gaps and reports
+the time to the reply.  With an event-driven loop the latency after a
+quiet period should match the back-to-back latency — there is no 50 ms
+poll floor as in the Java service.
+
+    python bench/tun_latency.py            # datagram socketpair stand-in
+    sudo python bench/tun_latency.py --tun # real /dev/net/tun device
+
+The ``--tun`` mode creates an interface, routes 10.0.0.53 into it and
+queries that address through the kernel.
+"""
+
+import os
+import socket
+import statistics
+import sys
+import time
+
+from _stubs import udp_server
+
+from discordia.engine.dnscache import DNSCache
+from discordia.engine.dnsmsg import build_query, message_id
+from discordia.engine.packet import build_udp4_query
+from discordia.engine.resolver import Resolver
+from discordia.engine.transport import UDPTransport
+from discordia.engine.tun import (
+    TUN_DNS_ADDRESS, TunLoop, configure_tun, open_tun,
+)
+
+
+def pair_roundtrip(peer, qid, name):
+    q = build_query(name, qid=qid)
+    pkt = build_udp4_query("10.0.0.2", TUN_DNS_ADDRESS, 40000, q)
+    t0 = time.perf_counter()
+    peer.send(pkt)
+    reply = peer.recv(2048)
+    dt = time.perf_counter() - t0
+    assert message_id(reply[28:]) == qid
+    return dt
+
+
+def tun_roundtrip(sock, qid, name):
+    q = build_query(name, qid=qid)
+    t0 = time.perf_counter()
+    sock.send(q)
+    reply = sock.recv(2048)
+    dt = time.perf_counter() - t0
+    assert message_id(reply) == qid
+    return dt
+
+
+def run(roundtrip, target, label):
+    for gap in (0.0, 0.02, 0.1, 0.25):
+        hits, misses = [], []
+        for i in range(40 if gap else 400):
+            if gap:
+                time.sleep(gap)
+            misses.append(roundtrip(target, i, f"m{label}{gap}{i}.example"))
+            if gap:
+                time.sleep(gap)
+            hits.append(roundtrip(target, i, f"m{label}{gap}{i}.example"))
+        print(f"{label} idle {gap * 1000:>5.0f} ms:"
+              f"  hit p50 {statistics.median(hits) * 1e6:6.0f} us"
+              f"  max {max(hits) * 1e6:6.0f} us"
+              f" | miss p50 {statistics.median(misses) * 1e6:6.0f} us"
+              f"  max {max(misses) * 1e6:6.0f} us")
+
+
+def main():
+    resolver = Resolver([UDPTransport("127.0.0.1", udp_server())],
+                        cache=DNSCache())
+    if "--tun" in sys.argv:
+        fd, ifname = open_tun()
+        configure_tun(ifname, [f"{TUN_DNS_ADDRESS}/32"])
+        loop = TunLoop(fd, resolver)
+        loop.start()
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        s.connect((TUN_DNS_ADDRESS, 53))
+        s.settimeout(2)
+        run(tun_roundtrip, s, ifname)
+    else:
+        ours, peer = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        loop = TunLoop(ours.fileno(), resolver)
+        loop.start()
+        peer.settimeout(2)
+        run(pair_roundtrip, peer, "pair")
+    print(f"wakeups {loop.wakeups}, rx {loop.rx_packets},"
+          f" tx {loop.tx_packets}, dropped {loop.dropped}")
+    loop.stop()
+    if "--tun" in sys.argv:
+        os.close(fd)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Headless UI frame times: the real app under an offscreen Kivy window,
+driven through a fixed script of screen changes and a simulated
+connect/disconnect.
+
+    python bench/ui_frames.py [--fps 60] [--scale 1] [--json out.json]
+                              [--compare baseline.json]
+
+With no display the window is SDL's offscreen driver on software GL
+(Mesa llvmpipe), so the numbers include real rasterisation on the CPU —
+slower than a phone's GPU, but stable and comparable run to run on one
+machine.  Each frame is one ``EventLoop.idle()``; its cost is the CPU
+time of the UI thread minus the frame limiter's own sleep/spin, so
+background threads (resolver, housekeeping) do not count.  Kivy only
+draws when a canvas changed, so idle frames are cheap and the tail is
+made of redraws; the part spent outside ``on_draw``/``on_flip`` (clock
+callbacks, layout, text rendering — the Python side) is reported on its
+own as ``py95``.
+
+For every phase the script prints frame and redraw counts, p50/p95/p99/
+max CPU ms, the p95 of the Python side, frames over the 60 fps budget,
+and the widget / canvas-instruction count of the screen on show.  ``--json`` saves the table; ``--compare``
+prints p95/p99 deltas against a saved one.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from typing import Tuple
+
+# environment before any discordia / kivy import: a throwaway data dir
+# (DATA_DIR follows $HOME) and a headless window
+_tmp = tempfile.mkdtemp(prefix="discordia-ui-bench-")
+os.environ["HOME"] = _tmp
+os.environ.setdefault("KIVY_HOME", os.path.join(_tmp, ".kivy"))
+os.environ["KIVY_NO_ARGS"] = "1"
+os.environ.setdefault("KIVY_LOG_LEVEL", "warning")
+if not (os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY")):
+    os.environ.setdefault("SDL_VIDEODRIVER", "offscreen")
+    os.environ.setdefault("LIBGL_ALWAYS_SOFTWARE", "1")
+
+import _stubs  # noqa: E402
+_stubs.use_repo()
+
+BUDGET_MS = 1000 / 60
+SCREENS = ("servers", "settings", "logs", "about", "dashboard")
+
+
+def percentile(xs, p: float) -> float:
+    if not xs:
+        return 0.0
+    s = sorted(xs)
+    return s[min(len(s) - 1, int(round(p / 100 * (len(s) - 1))))]
+
+
+class Driver:
+    """Steps the Kivy event loop one frame at a time and times it."""
+
+    def __init__(self, app, clock, loop, window):
+        self.app = app
+        self.loop = loop
+        self.results = []
+        self._limiter = 0.0
+        self._draw = 0.0
+        self._drawn = False
+
+        def timed(fn, into):
+            def _call(*args):
+                t0 = time.thread_time()
+                try:
+                    return fn(*args)
+                finally:
+                    setattr(self, into, getattr(self, into)
+                            + time.thread_time() - t0)
+            return _call
+
+        # ClockBase.tick() and EventDispatcher.dispatch() look these up
+        # on the instance
+        clock.idle = timed(clock.idle, "_limiter")
+        window.on_draw = timed(window.on_draw, "_draw")
+        window.on_flip = timed(window.on_flip, "_draw")
+
+    def frame(self) -> Tuple[float, float, bool]:
+        """One frame: (CPU ms, CPU ms outside drawing, redrawn)."""
+        self._limiter = self._draw = 0.0
+        t0 = time.thread_time()
+        self.loop.idle()
+        ms = (time.thread_time() - t0 - self._limiter) * 1000
+        return ms, ms - self._draw * 1000, self._draw > 0
+
+    def run(self, label: str, frames: int = 0, until=None,
+            limit: int = 600, settle: int = 0):
+        """Run *frames* frames, or until ``until()`` holds (+ *settle*)."""
+        from discordia.ui.app import count_ui
+
+        out = []
+        if until is None:
+            for _ in range(frames):
+                out.append(self.frame())
+        else:
+            while len(out) < limit and not until():
+                out.append(self.frame())
+            for _ in range(settle):
+                out.append(self.frame())
+        ms = [f[0] for f in out]
+        widgets, instructions = count_ui([self.app.sm.current_screen])
+        row = {
+            "phase": label,
+            "frames": len(ms),
+            "draws": sum(1 for f in out if f[2]),
+            "p50": percentile(ms, 50),
+            "p95": percentile(ms, 95),
+            "p99": percentile(ms, 99),
+            "max": max(ms, default=0.0),
+            "py95": percentile([f[1] for f in out], 95),
+            "slow": sum(1 for m in ms if m > BUDGET_MS),
+            "widgets": widgets,
+            "instructions": instructions,
+        }
+        self.results.append(row)
+        print(f"{label:22} {row['frames']:6} {row['draws']:5} "
+              f"{row['p50']:7.2f} {row['p95']:7.2f} {row['p99']:7.2f} "
+              f"{row['max']:7.2f} {row['py95']:7.2f} {row['slow']:5} "
+              f"{widgets:7} {instructions:7}", flush=True)
+        return row
+
+
+def script(d: Driver, scale: float):
+    from discordia.engine.control import vpn_engine
+
+    app = d.app
+    sm = app.sm
+    n = lambda frames: max(1, int(frames * scale))  # noqa: E731
+    settled = lambda: not sm.transition.is_active  # noqa: E731
+
+    d.run("startup", n(30))
+    d.run("dashboard idle", n(180))
+
+    dash = app.screen("dashboard")
+    dash._connect()
+    d.run("connecting", until=lambda: vpn_engine.connected, settle=n(30))
+    d.run("dashboard connected", n(300))
+
+    for name in SCREENS:
+        app.go(name)
+        d.run(f"-> {name}", until=settled, settle=2)
+        d.run(name, n(120))
+
+    dash._disconnect()
+    d.run("disconnecting", until=lambda: not vpn_engine.connected,
+          settle=n(30))
+    d.run("dashboard idle again", n(180))
+
+
+def compare(results, path: str):
+    with open(path) as f:
+        base = {r["phase"]: r for r in json.load(f)["phases"]}
+    print(f"\nvs {path}")
+    print(f"{'phase':22} {'p95':>16} {'p99':>16} {'py95':>16}")
+    for r in results:
+        b = base.get(r["phase"])
+        if b is None:
+            continue
+        cells = []
+        for key in ("p95", "p99", "py95"):
+            delta = r[key] - b[key]
+            pct = delta / b[key] * 100 if b[key] else 0.0
+            cells.append(f"{delta:+7.2f} ({pct:+5.0f}%)")
+        print(f"{r['phase']:22} " + " ".join(f"{c:>16}" for c in cells))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--fps", type=int, default=60,
+                    help="frame limiter (Kivy maxfps), 0 for none")
+    ap.add_argument("--scale", type=float, default=1.0,
+                    help="multiply the frame count of every fixed phase")
+    ap.add_argument("--width", type=int, default=400)
+    ap.add_argument("--height", type=int, default=800)
+    ap.add_argument("--json", help="save the results here")
+    ap.add_argument("--compare", help="baseline saved with --json")
+    args = ap.parse_args()
+
+    from kivy.config import Config
+    Config.set("graphics", "width", str(args.width))
+    Config.set("graphics", "height", str(args.height))
+    Config.set("graphics", "maxfps", str(args.fps))
+
+    from kivy.base import EventLoop, runTouchApp
+    from kivy.clock import Clock
+    from kivy.core.window import Window
+
+    from discordia.ui.app import DiscordiaVPNApp
+
+    logging.getLogger("Discordia").setLevel(logging.WARNING)
+
+    app = DiscordiaVPNApp()
+    app._run_prepare()
+    runTouchApp(embedded=True)
+    d = Driver(app, Clock, EventLoop, Window)
+
+    try:
+        from kivy.graphics.opengl import GL_RENDERER, glGetString
+        gl = glGetString(GL_RENDERER).decode(errors="replace")
+    except Exception:
+        gl = "unknown"
+    print(f"window {Window.__class__.__name__} {Window.size[0]}x"
+          f"{Window.size[1]}  GL {gl}  maxfps {args.fps}")
+    print(f"{'phase':22} {'frames':>6} {'draws':>5} {'p50':>7} {'p95':>7} "
+          f"{'p99':>7} {'max':>7} {'py95':>7} {'slow':>5} {'widgets':>7} "
+          f"{'instr':>7}")
+
+    try:
+        script(d, args.scale)
+    finally:
+        app.stop()
+        EventLoop.idle()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"gl": gl, "fps": args.fps,
+                       "size": [args.width, args.height],
+                       "phases": d.results}, f, indent=1)
+    if args.compare:
+        compare(d.results, args.compare)
+    sys.stdout.flush()
+    # daemon threads (resolver, tickers) go with the process
+    os._exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,12 +4,14 @@ package.name = discordiavpn
 package.domain = org.discordia
 source.dir = .
 source.include_exts = py,png,jpg,kv,atlas,json
+# full-size sources; the app ships the variants from assets/
+source.exclude_patterns = logo.png,presplash.png
 version = 1.0.0
 
 requirements = python3,kivy==2.3.0,pyjnius,android,pillow,certifi
 
-icon.filename = icon.png
-presplash.filename = presplash.png
+icon.filename = assets/icon.png
+presplash.filename = assets/presplash.jpg
 presplash.color = #070912
 
 orientation = portrait
@@ -29,6 +31,10 @@ android.manifest_placeholders = appAuthRedirectScheme:discordiavpn
 # Java source files for VPNService
 android.add_src = java_src
 
+# Resolver engine process (discordia/engine/service.py), reached over a
+# local socket and a shared stats file; see discordia/engine/control.py
+services = Engine:discordia/engine/service.py
+
 # AndroidManifest additions
 android.manifest_extra =
     <service
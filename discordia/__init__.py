@@ -0,0 +1,15 @@
+"""
+DiscordiaVPN application package.
+
+  engine/     resolver, DNS cache, transports, TUN loop and VPN control
+  storage/    settings and the on-disk stores kept in DATA_DIR
+  diag/       metrics and profiling
+  platform/   platform detection and lazily reflected Android classes
+  ui/         the Kivy app, screens and widgets
+
+Only ``discordia.ui`` imports Kivy, and nothing imports pyjnius at module
+level, so everything else can be exercised on a plain desktop
+interpreter.  ``main.py`` is just the entry point.
+"""
+
+__version__ = "1.0.0"
@@ -0,0 +1,169 @@
+"""
+Image assets: a build step that writes screen-density variants, and the
+runtime lookup that picks one.
+
+    python -m discordia.assets [--out DIR]
+
+Needs Pillow (already a build requirement).  From the full-size sources
+in the repository root it writes, into ``assets/``:
+
+  * ``ui-<bucket>.atlas`` + ``ui-<bucket>-0.png`` for each Android
+    density bucket — every small UI image scaled to its display size at
+    that density and packed into one palette-quantized texture, so a
+    screen needs one small upload instead of one full-size decode per
+    image;
+  * ``presplash.jpg`` — the launch image at phone resolution;
+  * ``icon.png`` — the launcher/window icon.
+
+``asset(name)`` returns the ``atlas://`` path for the current
+``Metrics.density``, or the full-size source if the atlas has not been
+built.
+"""
+
+import json
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ASSET_DIR = os.path.join(ROOT, "assets")
+
+# Android density buckets: (name, scale relative to 160 dpi)
+DENSITIES = (
+    ("mdpi", 1.0), ("hdpi", 1.5), ("xhdpi", 2.0),
+    ("xxhdpi", 3.0), ("xxxhdpi", 4.0),
+)
+
+# name -> (source file, largest on-screen size in dp)
+UI_IMAGES = {
+    "logo": ("logo.png", 100),
+}
+
+PRESPLASH = ("presplash.png", 1080, 85)   # source, width px, JPEG quality
+ICON = ("logo.png", 512)                  # source, size px
+ATLAS_SIZE = 1024
+ATLAS_PADDING = 2
+
+
+def density_bucket(density: float) -> str:
+    """Smallest bucket at least as dense as *density* (else the densest)."""
+    for name, scale in DENSITIES:
+        if scale >= density - 0.05:
+            return name
+    return DENSITIES[-1][0]
+
+
+_resolved: Dict[str, str] = {}
+
+
+def asset(name: str) -> str:
+    """Image source for UI image *name* at the current screen density."""
+    src = _resolved.get(name)
+    if src is None:
+        from kivy.metrics import Metrics
+        bucket = density_bucket(Metrics.density)
+        atlas = os.path.join(ASSET_DIR, f"ui-{bucket}")
+        if os.path.exists(atlas + ".atlas"):
+            src = f"atlas://{atlas}/{name}"
+        else:
+            src = os.path.join(ROOT, UI_IMAGES[name][0])
+        _resolved[name] = src
+    return src
+
+
+# ── build step ──
+def _pack(sizes: List[Tuple[str, int, int]], size: int,
+          padding: int) -> Optional[Dict[str, Tuple[int, int]]]:
+    """Shelf-pack ``(name, w, h)`` boxes; top-left positions or None."""
+    pos = {}
+    x = y = shelf = 0
+    for name, w, h in sorted(sizes, key=lambda s: -s[2]):
+        w += padding * 2
+        h += padding * 2
+        if x + w > size:
+            x, y = 0, y + shelf
+            shelf = 0
+        if w > size or y + h > size:
+            return None
+        pos[name] = (x + padding, y + padding)
+        x += w
+        shelf = max(shelf, h)
+    return pos
+
+
+def _build_atlas(Image, out_dir: str, bucket: str, scale: float) -> str:
+    images = {}
+    for name, (src, dp) in UI_IMAGES.items():
+        im = Image.open(os.path.join(ROOT, src)).convert("RGBA")
+        px = max(1, round(dp * scale))
+        images[name] = im.resize((px, px), Image.Resampling.LANCZOS)
+    pos = _pack([(n, *im.size) for n, im in images.items()],
+                ATLAS_SIZE, ATLAS_PADDING)
+    if pos is None:
+        raise ValueError(f"UI images do not fit a {ATLAS_SIZE}px atlas")
+    # crop the page to what is used; Kivy rounds textures up itself
+    used_w = max(x + images[n].size[0] for n, (x, _) in pos.items())
+    used_h = max(y + images[n].size[1] for n, (_, y) in pos.items())
+    page_w, page_h = used_w + ATLAS_PADDING, used_h + ATLAS_PADDING
+    page = Image.new("RGBA", (page_w, page_h))
+    meta = {}
+    for name, (x, y) in pos.items():
+        im = images[name]
+        w, h = im.size
+        page.paste(im, (x, y))
+        # 1 px bleed so linear filtering never samples a neighbour
+        page.paste(im.crop((0, 0, w, 1)), (x, y - 1))
+        page.paste(im.crop((0, h - 1, w, h)), (x, y + h))
+        page.paste(im.crop((0, 0, 1, h)), (x - 1, y))
+        page.paste(im.crop((w - 1, 0, w, h)), (x + w, y))
+        # atlas coordinates have their origin bottom-left
+        meta[name] = [x, page_h - y - h, w, h]
+    png = f"ui-{bucket}-0.png"
+    page.quantize(256, method=Image.Quantize.FASTOCTREE).save(
+        os.path.join(out_dir, png), optimize=True)
+    path = os.path.join(out_dir, f"ui-{bucket}.atlas")
+    with open(path, "w") as f:
+        json.dump({png: meta}, f)
+    return png
+
+
+def build(out_dir: str = ASSET_DIR) -> List[str]:
+    """Write every variant into *out_dir*; return the files written."""
+    from PIL import Image
+
+    os.makedirs(out_dir, exist_ok=True)
+    written = []
+    for bucket, scale in DENSITIES:
+        written.append(_build_atlas(Image, out_dir, bucket, scale))
+        written.append(f"ui-{bucket}.atlas")
+
+    src, width, quality = PRESPLASH
+    im = Image.open(os.path.join(ROOT, src)).convert("RGB")
+    if im.width > width:
+        im = im.resize((width, round(im.height * width / im.width)),
+                       Image.Resampling.LANCZOS)
+    im.save(os.path.join(out_dir, "presplash.jpg"), quality=quality,
+            optimize=True, progressive=False)
+    written.append("presplash.jpg")
+
+    src, px = ICON
+    im = Image.open(os.path.join(ROOT, src)).convert("RGBA")
+    im = im.resize((px, px), Image.Resampling.LANCZOS)
+    im.quantize(256, method=Image.Quantize.FASTOCTREE).save(
+        os.path.join(out_dir, "icon.png"), optimize=True)
+    written.append("icon.png")
+    return written
+
+
+def main(argv: List[str]) -> int:
+    out_dir = ASSET_DIR
+    if argv[:1] == ["--out"] and len(argv) > 1:
+        out_dir = argv[1]
+    for fn in build(out_dir):
+        path = os.path.join(out_dir, fn)
+        print(f"{os.path.getsize(path):9} {os.path.relpath(path, ROOT)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
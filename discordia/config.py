@@ -0,0 +1,76 @@
+"""
+App name, data paths and environment knobs.
+
+Shared by the engine and the UI; like the rest of the package outside
+``discordia.ui`` this module does not import Kivy.
+"""
+
+import os
+from pathlib import Path
+
+from discordia.platform import IS_ANDROID
+
+APP_NAME = "DiscordiaVPN"
+
+
+def _data_dir():
+    if IS_ANDROID:
+        from discordia.platform import android
+        return android.files_dir()
+    return str(Path.home() / ".discordia_vpn_android")
+
+
+DATA_DIR = _data_dir()
+os.makedirs(DATA_DIR, exist_ok=True)
+SETTINGS_FILE = os.path.join(DATA_DIR, "settings.json")
+LOG_FILE = os.path.join(DATA_DIR, "vpn.log")
+CACHE_SNAPSHOT_FILE = os.path.join(DATA_DIR, "dns_cache.bin")
+CACHE_SNAPSHOT_INTERVAL = 60  # seconds between warm-start snapshots
+SESSIONS_DB = os.path.join(DATA_DIR, "sessions.db")
+SESSION_CHECKPOINT_INTERVAL = 30  # seconds between open-session saves
+BANDWIDTH_FILE = os.path.join(DATA_DIR, "bandwidth.bin")
+# Segmented binary journal of answered DNS queries
+QUERY_LOG_DIR = os.path.join(DATA_DIR, "querylog")
+KV_CACHE_DIR = os.path.join(DATA_DIR, "kvcache")
+# Servers screen catalog; the built-in Cloudflare set when absent
+SERVER_CATALOG_FILE = os.path.join(DATA_DIR, "servers.json")
+# Extra split-tunnel routes, one prefix per line
+ROUTE_INCLUDE_FILE = os.path.join(DATA_DIR, "routes_include.txt")
+ROUTE_EXCLUDE_FILE = os.path.join(DATA_DIR, "routes_exclude.txt")
+# split_domains: seconds between sweeps of expired DNS-learned blocks
+# (tracked only, never routed)
+SPLIT_ROUTE_SWEEP = 30
+# block_ads list, hosts format or one domain per line; built-in when absent
+BLOCKLIST_FILE = os.path.join(DATA_DIR, "blocklist.txt")
+# Versioned updates to it, <from>-<to>.delta; applied as they appear
+BLOCKLIST_DELTA_DIR = os.path.join(DATA_DIR, "blocklist.d")
+
+# Public IP / location lookup behind the dashboard's IP card
+IP_LOOKUP_URL = "https://ipinfo.io/json"
+# With a GeoIP database (see discordia.storage.geoip) only the address is
+# fetched — from the same host, so the warmed TLS session serves both
+IP_ADDRESS_URL = "https://ipinfo.io/ip"
+GEOIP_FILE = os.path.join(DATA_DIR, "geoip.bin")
+# seconds between checks for a changed network (TLS pre-warming)
+NETWORK_CHECK_INTERVAL = 10
+
+# Engine process: command socket (with its auth key beside it), the
+# shared stats ring the UI maps, and the engine's own metrics dump
+ENGINE_SOCKET = os.path.join(DATA_DIR, "engine.sock")
+ENGINE_KEY_FILE = os.path.join(DATA_DIR, "engine.key")
+ENGINE_STATS_FILE = os.path.join(DATA_DIR, "engine_stats.bin")
+ENGINE_METRICS_FILE = os.path.join(DATA_DIR, "engine_metrics.json")
+ENGINE_STATS_INTERVAL = 0.5  # seconds between published samples
+ENGINE_START_TIMEOUT = 10    # seconds to wait for the process to listen
+
+METRICS_FILE = os.path.join(DATA_DIR, "metrics.json")
+MEMORY_REPORT_FILE = os.path.join(DATA_DIR, "memory_report.txt")
+# Logs screen "Trace": Chrome trace JSON of the recent spans
+TRACE_FILE = os.path.join(DATA_DIR, "trace.json")
+METRICS_DUMP_INTERVAL = 60
+# Headless: serve Prometheus text on 127.0.0.1:<port>/metrics when set
+METRICS_PORT = int(os.environ.get("DISCORDIA_METRICS_PORT", "0") or 0)
+
+# Desktop: name (or pattern, e.g. "discordia%d") of a Linux TUN interface
+# to serve DNS on instead of simulating.  Needs CAP_NET_ADMIN.
+TUN_DEVICE = os.environ.get("DISCORDIA_TUN", "")
@@ -0,0 +1,3 @@
+"""
+Diagnostics — metrics and other self-measurement helpers.
+"""
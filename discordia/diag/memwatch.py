@@ -0,0 +1,243 @@
+"""
+Opt-in memory diagnostics for long-running sessions.
+
+``start()`` turns on ``tracemalloc`` and a sampler thread.  Every
+``interval`` seconds it records:
+
+  * RSS (``/proc/self/statm``; peak RSS where that is unavailable),
+    traced Python heap, live threads and GC-tracked objects;
+  * any gauges pushed with ``set()`` — the app pushes its Kivy widget
+    and canvas-instruction counts from the UI thread;
+  * a ``tracemalloc`` snapshot, reduced to per-line totals at once and
+    diffed against the first and the previous sample to rank the
+    allocation sites that keep growing.  Only the totals are kept, so
+    the watcher's own footprint does not grow with the heap.
+
+The last ``keep`` samples and the diff are rewritten to a plain-text
+report after each sample, so a session that is killed still leaves one
+behind.  The report ends with least-squares trends per hour over the
+kept samples minus the oldest ``warmup`` fraction (caches and pools
+still filling) — a flat session shows RSS and heap near zero.
+
+``tracemalloc`` slows allocation-heavy code noticeably, which is why
+none of this runs unless asked for.
+"""
+
+import gc
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from typing import Dict, List, Optional, Sequence, Tuple
+
+log = logging.getLogger("Discordia")
+
+# columns of a sample row, after the timestamp
+COLUMNS = ("rss", "heap", "threads", "objects")
+_IGNORE = (tracemalloc.__file__, "<frozen importlib._bootstrap>",
+           "<frozen importlib._bootstrap_external>", "<unknown>")
+
+
+def rss_bytes() -> int:
+    """Resident set size of this process (peak RSS off Linux/Android)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+    except Exception:
+        return 0
+
+
+def trend(ts: Sequence[float], ys: Sequence[float]) -> float:
+    """Least-squares slope of *ys* over *ts*, per hour."""
+    n = len(ts)
+    if n < 2:
+        return 0.0
+    mt = sum(ts) / n
+    my = sum(ys) / n
+    var = sum((t - mt) ** 2 for t in ts)
+    if not var:
+        return 0.0
+    return sum((t - mt) * (y - my) for t, y in zip(ts, ys)) / var * 3600
+
+
+class MemWatch:
+    """Periodic memory sampler with a tracemalloc growth report."""
+
+    def __init__(self, interval: float = 300, keep: int = 288,
+                 frames: int = 1, top: int = 12, warmup: float = 0.25):
+        self.interval = interval
+        self.frames = frames
+        self.top = top
+        self.warmup = warmup
+        self.samples: "deque[Tuple[float, Dict[str, int]]]" = deque(
+            maxlen=keep)
+        self.started = 0.0
+        self.report_path: Optional[str] = None
+        self._gauges: Dict[str, int] = {}
+        self._first: Optional[Dict[str, Tuple[int, int]]] = None
+        self._prev: Optional[Dict[str, Tuple[int, int]]] = None
+        self._growth: List[str] = []
+        self._recent: List[str] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def set(self, name: str, value: int):
+        """Record an externally measured gauge for the next sample."""
+        self._gauges[name] = value
+
+    def start(self, report_path: Optional[str] = None):
+        if self.running:
+            return
+        self.report_path = report_path
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self.started = time.time()
+        self._stop.clear()
+
+        def _loop():
+            self.sample()
+            while not self._stop.wait(self.interval):
+                self.sample()
+
+        self._thread = threading.Thread(
+            target=_loop, name="Discordia-MemWatch", daemon=True
+        )
+        self._thread.start()
+        log.info(f"Memory diagnostics on: sample every {self.interval:g} s")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+        if tracemalloc.is_tracing():
+            self.sample()
+            tracemalloc.stop()
+
+    # ── sampling ──
+    @staticmethod
+    def _sites() -> Dict[str, Tuple[int, int]]:
+        """``{"file.py:line": (bytes, blocks)}`` for every live allocation."""
+        snap = tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, f) for f in _IGNORE])
+        out = {}
+        for st in snap.statistics("lineno"):
+            fr = st.traceback[0]
+            out[f"{os.path.basename(fr.filename)}:{fr.lineno}"] = (
+                st.size, st.count)
+        return out
+
+    @staticmethod
+    def _diff(now: Dict[str, Tuple[int, int]],
+              then: Dict[str, Tuple[int, int]], top: int) -> List[str]:
+        rows = []
+        for site, (size, count) in now.items():
+            b_size, b_count = then.get(site, (0, 0))
+            if size > b_size:
+                rows.append((size - b_size, count - b_count, site))
+        rows.sort(reverse=True)
+        return [f"{d / 1024:+9.1f} KiB {c:+7}  {site}"
+                for d, c, site in rows[:top]]
+
+    def sample(self) -> Dict[str, int]:
+        """Take one sample now (also called by the sampler thread)."""
+        row = {
+            "rss": rss_bytes(),
+            "heap": tracemalloc.get_traced_memory()[0]
+            if tracemalloc.is_tracing() else 0,
+            "threads": threading.active_count(),
+            "objects": len(gc.get_objects()),
+        }
+        row.update(self._gauges)
+        sites = self._sites() if tracemalloc.is_tracing() else None
+        with self._lock:
+            self.samples.append((time.time(), row))
+            if sites is not None:
+                if self._first is None:
+                    self._first = sites
+                else:
+                    self._growth = self._diff(sites, self._first, self.top)
+                    self._recent = self._diff(sites, self._prev, self.top)
+                self._prev = sites
+        if self.report_path:
+            self.dump(self.report_path)
+        return row
+
+    # ── reporting ──
+    def trends(self) -> Dict[str, float]:
+        """Per-hour slope of every column, warm-up samples excluded."""
+        with self._lock:
+            rows = list(self.samples)
+        rows = rows[int(len(rows) * self.warmup):]
+        if len(rows) < 2:
+            return {}
+        ts = [t for t, _ in rows]
+        names = [k for k in rows[-1][1] if all(k in r for _, r in rows)]
+        return {k: trend(ts, [r[k] for _, r in rows]) for k in names}
+
+    def report(self, rows: int = 24) -> str:
+        with self._lock:
+            samples = list(self.samples)
+            growth, recent = list(self._growth), list(self._recent)
+        if not samples:
+            return "(no memory samples yet)"
+        names = list(COLUMNS) + sorted(k for k in samples[-1][1]
+                                       if k not in COLUMNS)
+        up = samples[-1][0] - self.started
+        lines = [
+            f"memory diagnostics — up {up / 3600:.1f} h, "
+            f"{len(samples)} samples every {self.interval:g} s",
+            "",
+            "  time     " + " ".join(f"{n[:10]:>10}" for n in names),
+        ]
+        step = max(1, -(-len(samples) // rows))
+        shown = samples[::step]
+        if shown[-1] is not samples[-1]:
+            shown.append(samples[-1])
+        for t, row in shown:
+            cells = []
+            for n in names:
+                v = row.get(n, 0)
+                cells.append(f"{v / 2**20:8.1f}MB" if n in ("rss", "heap")
+                             else f"{v:>10}")
+            lines.append(f"  {time.strftime('%H:%M:%S', time.localtime(t))} "
+                         + " ".join(cells))
+        tr = self.trends()
+        if tr:
+            lines += ["", "trend per hour (after warm-up):"]
+            for n in names:
+                if n in tr:
+                    v = tr[n]
+                    lines.append(f"  {n:12} {v / 1024:+10.1f} KiB"
+                                 if n in ("rss", "heap")
+                                 else f"  {n:12} {v:+10.1f}")
+        lines += ["", "top growth since start:"] + (growth or ["  (none)"])
+        lines += ["", "top growth since last sample:"] + (recent
+                                                          or ["  (none)"])
+        return "\n".join(lines)
+
+    def dump(self, path: str):
+        tmp = path + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                f.write(self.report() + "\n")
+            os.replace(tmp, path)
+        except OSError as e:
+            log.error(f"Memory report error: {e}")
+
+
+memwatch = MemWatch()
@@ -0,0 +1,320 @@
+"""
+Low-overhead metrics registry.
+
+Counters and histograms are sharded per thread: each recording thread
+owns a small list it increments without any lock, and readers sum the
+shards.  Shards of threads that have exited are folded into a base value
+the next time the metric is read, so the per-action worker threads this
+app spawns do not make the shard list grow without bound.
+
+Exports:
+  * ``snapshot()``        plain dict for the screens
+  * ``dump_json(path)``   periodic file in DATA_DIR
+  * ``to_prometheus()``   text exposition format, served on localhost by
+                          ``MetricsServer`` when running headless
+"""
+
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+log = logging.getLogger("Discordia")
+
+# milliseconds — wide enough for cache hits and for slow upstreams
+LATENCY_BUCKETS_MS = (
+    0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000,
+)
+
+
+class _Sharded:
+    """Per-thread cells plus a base that collects exited threads."""
+
+    __slots__ = ("name", "help", "_local", "_shards", "_lock", "_base")
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._local = threading.local()
+        self._shards: List[tuple] = []
+        self._lock = threading.Lock()
+        self._base = self._new_cell()
+
+    def _new_cell(self) -> list:
+        raise NotImplementedError
+
+    def _cell(self) -> list:
+        cell = self._new_cell()
+        self._local.cell = cell
+        with self._lock:
+            self._shards.append((threading.current_thread(), cell))
+        return cell
+
+    def _collect(self) -> List[list]:
+        """Fold dead threads into the base; return all live cells."""
+        with self._lock:
+            live = []
+            for thread, cell in self._shards:
+                if thread.is_alive():
+                    live.append((thread, cell))
+                else:
+                    base = self._base
+                    for i, v in enumerate(cell):
+                        base[i] += v
+            self._shards = live
+            return [self._base] + [c for _, c in live]
+
+    def reset(self):
+        with self._lock:
+            self._base = self._new_cell()
+            for _, cell in self._shards:
+                for i in range(len(cell)):
+                    cell[i] = 0
+
+
+class Counter(_Sharded):
+    """Monotonic counter."""
+
+    __slots__ = ()
+    kind = "counter"
+
+    def _new_cell(self) -> list:
+        return [0]
+
+    def inc(self, n=1):
+        try:
+            self._local.cell[0] += n
+        except AttributeError:
+            self._cell()[0] += n
+
+    @property
+    def value(self):
+        return sum(c[0] for c in self._collect())
+
+
+class Histogram(_Sharded):
+    """Fixed-bucket histogram; cell layout is [bucket counts…, +Inf, sum]."""
+
+    __slots__ = ("buckets",)
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str,
+                 buckets: Sequence[float] = LATENCY_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        super().__init__(name, help)
+
+    def _new_cell(self) -> list:
+        return [0] * (len(self.buckets) + 2)
+
+    def observe(self, v: float):
+        try:
+            cell = self._local.cell
+        except AttributeError:
+            cell = self._cell()
+        cell[bisect.bisect_left(self.buckets, v)] += 1
+        cell[-1] += v
+
+    def time(self):
+        """Context manager observing elapsed milliseconds."""
+        return _Timer(self)
+
+    def totals(self) -> list:
+        cells = self._collect()
+        return [sum(col) for col in zip(*cells)]
+
+    def summary(self) -> Dict[str, float]:
+        t = self.totals()
+        counts, total = t[:-1], t[-1]
+        n = sum(counts)
+        out = {"count": n, "sum": round(total, 3)}
+        for q in (0.5, 0.95, 0.99):
+            out[f"p{int(q * 100)}"] = self._quantile(counts, n, q)
+        return out
+
+    def _quantile(self, counts: list, n: int, q: float) -> float:
+        if not n:
+            return 0.0
+        rank = q * n
+        seen = 0
+        for i, c in enumerate(counts):
+            seen += c
+            if seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else float(
+                    self.buckets[-1])
+        return float(self.buckets[-1])
+
+
+class _Timer:
+    __slots__ = ("hist", "t0")
+
+    def __init__(self, hist: Histogram):
+        self.hist = hist
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.observe((time.perf_counter() - self.t0) * 1000)
+
+
+class Gauge:
+    """Last-written value; a plain attribute store is already atomic."""
+
+    __slots__ = ("name", "help", "value")
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.value = 0
+
+    def set(self, v):
+        self.value = v
+
+    def reset(self):
+        self.value = 0
+
+
+class MetricsRegistry:
+    """Named metrics; registering the same name twice returns the first."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self._dump_stop: Optional[threading.Event] = None
+
+    def _register(self, cls, name, help, *args):
+        with self._lock:
+            m = self._metrics.get(name)
+            if m is None:
+                m = self._metrics[name] = cls(name, help, *args)
+            return m
+
+    def counter(self, name: str, help: str = "") -> Counter:
+        return self._register(Counter, name, help)
+
+    def gauge(self, name: str, help: str = "") -> Gauge:
+        return self._register(Gauge, name, help)
+
+    def histogram(self, name: str, help: str = "",
+                  buckets: Sequence[float] = LATENCY_BUCKETS_MS) -> Histogram:
+        return self._register(Histogram, name, help, buckets)
+
+    def get(self, name: str):
+        return self._metrics.get(name)
+
+    # ── exports ──
+    def snapshot(self) -> Dict[str, object]:
+        """Name → value (counters/gauges) or summary dict (histograms)."""
+        out = {}
+        for name, m in list(self._metrics.items()):
+            if isinstance(m, Histogram):
+                out[name] = m.summary()
+            else:
+                out[name] = m.value
+        return out
+
+    def to_prometheus(self) -> str:
+        lines = []
+        for name, m in sorted(self._metrics.items()):
+            if m.help:
+                lines.append(f"# HELP {name} {m.help}")
+            lines.append(f"# TYPE {name} {m.kind}")
+            if isinstance(m, Histogram):
+                t = m.totals()
+                acc = 0
+                for bound, c in zip(m.buckets, t):
+                    acc += c
+                    lines.append(f'{name}_bucket{{le="{bound}"}} {acc}')
+                acc += t[len(m.buckets)]
+                lines.append(f'{name}_bucket{{le="+Inf"}} {acc}')
+                lines.append(f"{name}_sum {t[-1]}")
+                lines.append(f"{name}_count {acc}")
+            else:
+                lines.append(f"{name} {m.value}")
+        return "\n".join(lines) + "\n"
+
+    def dump_json(self, path: str):
+        data = {"time": time.time(), "metrics": self.snapshot()}
+        tmp = path + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(data, f, indent=1)
+            os.replace(tmp, path)
+        except Exception as e:
+            log.error(f"Metrics dump error: {e}")
+
+    def start_json_dump(self, path: str, interval: float = 60.0):
+        """Write ``dump_json(path)`` every *interval* seconds."""
+        if self._dump_stop is not None:
+            return
+        stop = self._dump_stop = threading.Event()
+
+        def _loop():
+            while not stop.wait(interval):
+                self.dump_json(path)
+
+        threading.Thread(target=_loop, name="Discordia-Metrics",
+                         daemon=True).start()
+
+    def stop_json_dump(self):
+        if self._dump_stop is not None:
+            self._dump_stop.set()
+            self._dump_stop = None
+
+    def reset(self):
+        for m in list(self._metrics.values()):
+            m.reset()
+
+
+class MetricsServer:
+    """Prometheus text (``/metrics``) and JSON (``/metrics.json``) on localhost."""
+
+    def __init__(self, registry: MetricsRegistry, port: int = 9477,
+                 host: str = "127.0.0.1"):
+        # only headless runs serve metrics; keep http.server off startup
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        registry_ = registry
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/metrics":
+                    body = registry_.to_prometheus().encode()
+                    ctype = "text/plain; version=0.0.4"
+                elif self.path == "/metrics.json":
+                    body = json.dumps(registry_.snapshot()).encode()
+                    ctype = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self._thread = threading.Thread(
+            target=self.httpd.serve_forever, name="Discordia-MetricsHTTP",
+            daemon=True
+        )
+
+    def start(self):
+        self._thread.start()
+        log.info(f"Metrics endpoint on http://127.0.0.1:{self.port}/metrics")
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+metrics = MetricsRegistry()
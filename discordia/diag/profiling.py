@@ -0,0 +1,223 @@
+"""
+Opt-in profiling of UI callbacks and worker threads.
+
+``install()`` wraps, from that moment on:
+
+  * every callback handed to ``Clock.schedule_once``,
+    ``Clock.schedule_interval`` and ``Clock.create_trigger``;
+  * the handlers Kivy's Builder creates for KV rule expressions
+    (``kivy.lang.builder.call_fn``), when that hook exists;
+  * ``threading.Thread.run``, i.e. every thread started afterwards.
+
+Each wrapped call updates per-callback counters (calls, cumulative and
+max duration, calls over the frame budget), and a per-frame sampler counts
+frames whose interval exceeded the budget.  ``start_capture`` additionally
+records a cProfile dump of the UI thread for a fixed number of seconds.
+
+Nothing is patched unless ``install()`` is called, so when profiling is
+off there is no overhead at all.  Wrapped callbacks hold strong references
+to bound methods, which is acceptable for a diagnostics session.
+"""
+
+import cProfile
+import functools
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+log = logging.getLogger("Discordia")
+
+FRAME_BUDGET_MS = 1000 / 60
+
+# stat layout: [calls, total_s, max_s, over_budget]
+_CALLS, _TOTAL, _MAX, _OVER = range(4)
+
+
+def _name(fn) -> str:
+    if isinstance(fn, functools.partial):
+        return _name(fn.func)
+    qual = getattr(fn, "__qualname__", None) or repr(fn)
+    if qual.endswith("<lambda>"):
+        code = getattr(fn, "__code__", None)
+        if code is not None:
+            qual += f" ({os.path.basename(code.co_filename)}" \
+                    f":{code.co_firstlineno})"
+    return qual
+
+
+class Profiler:
+    """Callback timing table plus the hooks that feed it."""
+
+    def __init__(self, budget_ms: float = FRAME_BUDGET_MS):
+        self.budget = budget_ms / 1000
+        self.stats: Dict[str, list] = {}
+        self.frames = 0
+        self.frames_over = 0
+        self.worst_frame = 0.0
+        self.installed = False
+        self._lock = threading.Lock()
+        self._restore: List[Callable] = []
+        self._capture: Optional[cProfile.Profile] = None
+
+    # ── recording ──
+    def record(self, name: str, elapsed: float, budgeted: bool = True):
+        with self._lock:
+            s = self.stats.get(name)
+            if s is None:
+                s = self.stats[name] = [0, 0.0, 0.0, 0]
+            s[_CALLS] += 1
+            s[_TOTAL] += elapsed
+            if elapsed > s[_MAX]:
+                s[_MAX] = elapsed
+            if budgeted and elapsed > self.budget:
+                s[_OVER] += 1
+
+    def wrap(self, fn, prefix: str = "clock"):
+        if getattr(fn, "_discordia_profiled", False):
+            return fn
+        name = f"{prefix}:{_name(fn)}"
+        record = self.record
+        perf = time.perf_counter
+
+        def timed(*args, **kwargs):
+            t0 = perf()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(name, perf() - t0)
+
+        timed._discordia_profiled = True
+        return timed
+
+    def _frame(self, dt):
+        self.frames += 1
+        if dt > self.budget:
+            self.frames_over += 1
+        if dt > self.worst_frame:
+            self.worst_frame = dt
+
+    # ── hooks ──
+    def install(self, clock, builder_module=None):
+        """Start wrapping *clock* callbacks, KV handlers and new threads."""
+        if self.installed:
+            return
+        self.installed = True
+
+        # unwrapped, so the frame sampler does not time itself
+        clock.schedule_interval(self._frame, 0)
+
+        for meth in ("schedule_once", "schedule_interval", "create_trigger"):
+            orig = getattr(clock, meth, None)
+            if orig is None:
+                continue
+
+            def patched(callback, *args, _orig=orig, **kwargs):
+                return _orig(self.wrap(callback), *args, **kwargs)
+
+            setattr(clock, meth, patched)
+            self._restore.append(
+                lambda m=meth, o=orig: setattr(clock, m, o)
+            )
+
+        if builder_module is not None and hasattr(builder_module, "call_fn"):
+            orig_call = builder_module.call_fn
+            record = self.record
+            perf = time.perf_counter
+
+            def call_fn(args, instance, v):
+                t0 = perf()
+                try:
+                    return orig_call(args, instance, v)
+                finally:
+                    try:
+                        name = f"kv:{type(args[0]).__name__}.{args[1]}"
+                    except Exception:
+                        name = "kv:?"
+                    record(name, perf() - t0)
+
+            builder_module.call_fn = call_fn
+            self._restore.append(
+                lambda: setattr(builder_module, "call_fn", orig_call)
+            )
+
+        orig_run = threading.Thread.run
+        profiler = self
+
+        def run(thread):
+            target = getattr(thread, "_target", None)
+            name = "thread:" + (_name(target) if target is not None
+                                else type(thread).__qualname__ + ".run")
+            t0 = time.perf_counter()
+            try:
+                orig_run(thread)
+            finally:
+                profiler.record(name, time.perf_counter() - t0,
+                                budgeted=False)
+
+        threading.Thread.run = run
+        self._restore.append(lambda: setattr(threading.Thread, "run",
+                                             orig_run))
+
+        log.info(f"Profiling enabled (frame budget "
+                 f"{self.budget * 1000:.1f} ms)")
+
+    def uninstall(self):
+        for undo in reversed(self._restore):
+            undo()
+        self._restore.clear()
+        self.installed = False
+
+    # ── cProfile capture ──
+    def start_capture(self, seconds: float, path: str,
+                      schedule_once: Callable):
+        """
+        Profile the calling (UI) thread for *seconds*, then write a pstats
+        dump to *path*.  *schedule_once(fn, delay)* must run ``fn`` on the
+        same thread — pass ``Clock.schedule_once``.
+        """
+        if self._capture is not None:
+            return
+        prof = self._capture = cProfile.Profile()
+        prof.enable()
+
+        def _stop(*_):
+            prof.disable()
+            self._capture = None
+            try:
+                prof.dump_stats(path)
+                log.info(f"cProfile capture written to {path}")
+            except OSError as e:
+                log.error(f"cProfile dump error: {e}")
+
+        schedule_once(_stop, seconds)
+
+    # ── reporting ──
+    def report(self, top: int = 25) -> str:
+        with self._lock:
+            rows = sorted(self.stats.items(), key=lambda kv: kv[1][_TOTAL],
+                          reverse=True)[:top]
+        lines = [
+            f"frames {self.frames}, over budget {self.frames_over}, "
+            f"worst {self.worst_frame * 1000:.1f} ms",
+            f"{'calls':>8} {'total ms':>10} {'avg ms':>8} {'max ms':>8} "
+            f"{'>budget':>7}  callback",
+        ]
+        for name, (calls, total, mx, over) in rows:
+            lines.append(
+                f"{calls:>8} {total * 1000:>10.1f} "
+                f"{total * 1000 / calls:>8.3f} {mx * 1000:>8.2f} "
+                f"{over:>7}  {name}"
+            )
+        return "\n".join(lines)
+
+    def dump(self, path: str):
+        try:
+            with open(path, "w") as f:
+                f.write(self.report(top=200) + "\n")
+        except OSError as e:
+            log.error(f"Profile report error: {e}")
+
+
+profiler = Profiler()
@@ -0,0 +1,224 @@
+"""
+Span tracing of user-visible flows, exported as Chrome trace JSON.
+
+A connect touches the UI thread, a worker, JNI calls, the permission
+dialog, the VPN service and the first upstream answer; spans show where
+its seconds go.  ``tracer`` records into a bounded ring (the oldest
+spans fall out), so it is always on:
+
+    with tracer.span("vpn.connect", mode=mode) as sp:
+        ...
+        sp.set(ok=ok)
+
+    sid = tracer.begin("ui.connect")      # a flow that ends on another
+    ...                                   # thread or in a callback
+    tracer.end(sid, "ui.connect", ok=ok)
+
+A finished span is one tuple appended to a ``deque`` — a couple of
+microseconds, and nothing is formatted until ``export()``.  Spans are
+for steps that take milliseconds, not for per-packet work;
+``DISCORDIA_TRACE=0`` turns recording off altogether.
+
+``export()`` writes the Trace Event Format read by ``chrome://tracing``
+and ui.perfetto.dev: complete ("X") events for spans, async ("b"/"e")
+pairs for flows, and the thread and process names.  Times come from
+``perf_counter_ns`` — the system-wide monotonic clock on Linux and
+Android — so the engine process's spans (fetched with its ``trace``
+command) line up with the app's in one file.
+"""
+
+import functools
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Iterable, List, Optional
+
+log = logging.getLogger("Discordia")
+
+# spans kept per process
+TRACE_CAPACITY = 4096
+
+# event tuple: (ph, name, ts_ns, dur_ns, pid, tid, id, args)
+_PH, _NAME, _TS, _DUR, _PID, _TID, _ID, _ARGS = range(8)
+
+
+class Span:
+    """A timed step; use as a context manager."""
+
+    __slots__ = ("tracer", "name", "args", "t0")
+
+    def __init__(self, tracer: "Tracer", name: str, args: dict):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def set(self, **args):
+        """Attach attributes (a result, a size…) before the span ends."""
+        self.args.update(args)
+
+    def __enter__(self):
+        self.t0 = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = f"{exc_type.__name__}: {exc}"
+        self.tracer.complete(self.name, self.t0,
+                             time.perf_counter_ns() - self.t0, **self.args)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def set(self, **args):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """Bounded ring of spans for this process."""
+
+    def __init__(self, capacity: int = TRACE_CAPACITY,
+                 enabled: bool = True, process_name: str = "Discordia"):
+        self.enabled = enabled
+        self.process_name = process_name
+        self.pid = os.getpid()
+        self._events: deque = deque(maxlen=capacity)
+        self._threads = {}
+        self._ids = itertools.count(1)
+
+    # ── recording ──
+    def _tid(self) -> int:
+        # idents are reused once a thread exits: keep the latest name,
+        # and only so many of them
+        threads = self._threads
+        if len(threads) > 256:
+            threads.clear()
+        tid = threading.get_ident()
+        threads[tid] = threading.current_thread().name
+        return tid
+
+    def span(self, name: str, **args):
+        """Context manager timing the block it wraps."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, args)
+
+    def complete(self, name: str, start_ns: int, dur_ns: int, **args):
+        """Record a span measured by the caller."""
+        if self.enabled:
+            self._events.append(("X", name, start_ns, dur_ns, self.pid,
+                                 self._tid(), 0, args))
+
+    def begin(self, name: str, **args) -> int:
+        """Start a flow that may end on another thread; its id."""
+        if not self.enabled:
+            return 0
+        sid = next(self._ids)
+        self._events.append(("b", name, time.perf_counter_ns(), 0,
+                             self.pid, self._tid(), sid, args))
+        return sid
+
+    def end(self, sid: int, name: str, **args):
+        """End the flow ``begin(name)`` returned *sid* for."""
+        if sid and self.enabled:
+            self._events.append(("e", name, time.perf_counter_ns(), 0,
+                                 self.pid, self._tid(), sid, args))
+
+    def traced(self, name: Optional[str] = None):
+        """Decorator: run every call of the function in a span."""
+        def wrap(fn):
+            label = name or fn.__qualname__
+
+            @functools.wraps(fn)
+            def traced_fn(*a, **kw):
+                with self.span(label):
+                    return fn(*a, **kw)
+
+            return traced_fn
+        return wrap
+
+    # ── export ──
+    def events(self) -> List[tuple]:
+        """The ring's spans plus thread and process names, as plain
+        tuples (picklable, for the engine's ``trace`` command)."""
+        meta = [("M", "thread_name", 0, 0, self.pid, tid, 0, {"name": n})
+                for tid, n in list(self._threads.items())]
+        meta.append(("M", "process_name", 0, 0, self.pid, 0, 0,
+                     {"name": self.process_name}))
+        return meta + list(self._events)
+
+    def export(self, path: str, extra: Iterable[tuple] = ()) -> int:
+        """Write this ring and *extra* events (another process's) to
+        *path* as Chrome trace JSON; return the number of spans."""
+        out = []
+        spans = 0
+        for ev in itertools.chain(self.events(), extra):
+            ph = ev[_PH]
+            rec = {"ph": ph, "name": ev[_NAME], "pid": ev[_PID],
+                   "tid": ev[_TID], "args": _plain(ev[_ARGS])}
+            if ph != "M":
+                rec["ts"] = ev[_TS] / 1000
+                spans += ph != "e"
+            if ph == "X":
+                rec["dur"] = ev[_DUR] / 1000
+            elif ph in ("b", "e"):
+                rec["cat"] = "flow"
+                rec["id"] = f"{ev[_PID]}.{ev[_ID]}"
+            out.append(rec)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"traceEvents": out, "displayTimeUnit": "ms"}, f)
+        os.replace(tmp, path)
+        log.info(f"Trace: {spans} spans written to {path}")
+        return spans
+
+    def summary(self, extra: Iterable[tuple] = (), last: int = 40) -> str:
+        """The latest spans and flows, here and in *extra*, as text;
+        ordered by when they ended."""
+        events = self.events() + list(extra)
+        threads = {(ev[_PID], ev[_TID]): ev[_ARGS]["name"] for ev in events
+                   if ev[_PH] == "M" and ev[_NAME] == "thread_name"}
+        opened = {(ev[_PID], ev[_ID]): ev for ev in events
+                  if ev[_PH] == "b"}
+        rows = []
+        for ev in events:
+            ph = ev[_PH]
+            if ph == "X":
+                ms = ev[_DUR] / 1e6
+                ended = ev[_TS] + ev[_DUR]
+            elif ph == "e" and (ev[_PID], ev[_ID]) in opened:
+                ms = (ev[_TS] - opened[ev[_PID], ev[_ID]][_TS]) / 1e6
+                ended = ev[_TS]
+            else:
+                continue
+            args = " ".join(f"{k}={v}" for k, v in ev[_ARGS].items())
+            thread = threads.get((ev[_PID], ev[_TID]), "?")
+            rows.append((ended, f"{ms:9.1f} ms  {ev[_NAME]:<24} "
+                                f"{thread:<22} {args}".rstrip()))
+        rows.sort(key=lambda row: row[0])
+        return "\n".join(line for _, line in rows[-last:])
+
+    def clear(self):
+        self._events.clear()
+
+
+def _plain(args: dict) -> dict:
+    """JSON-safe copy of span attributes."""
+    return {k: v if isinstance(v, (str, int, float, bool, type(None)))
+            else str(v) for k, v in args.items()}
+
+
+tracer = Tracer(enabled=os.environ.get("DISCORDIA_TRACE") != "0")
@@ -0,0 +1,3 @@
+"""
+Resolver engine — DNS wire helpers, answer cache and upstream transports.
+"""
@@ -0,0 +1,341 @@
+"""
+Domain blocklist behind the ``block_ads`` setting.
+
+A name is blocked when it, or any parent domain, is on the list, so
+``doubleclick.net`` also covers ``ad.doubleclick.net``.  Lists are read
+from ``BLOCKLIST_FILE`` in either hosts format (``0.0.0.0 name``) or one
+name per line; ``#`` starts a comment.  Without a file a short built-in
+list of common ad and tracker domains is used.
+
+A ``Blocklist`` is never changed after it is built — the resolver swaps
+in a new one instead, so lookups need no lock.
+
+Lists are versioned (a ``# version: N`` line in the file) and updated
+with deltas: sorted ``+name`` / ``-name`` lines in ``<from>-<to>.delta``
+files.  ``patched()`` does not rebuild the set — the new list shares the
+loaded names and carries the changes as a small added/removed overlay,
+so an update costs what the changes since the file was read cost, and
+the old list keeps answering until the new one is swapped in.
+``save()`` folds the overlay back into the file now and then (the
+engine does it off the lookup path), after which the deltas it covered
+are deleted.
+
+    python -m discordia.engine.blocklist diff old.txt new.txt 41 42 \
+        -o 41-42.delta
+"""
+
+import logging
+import os
+import time
+from typing import FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+log = logging.getLogger("Discordia")
+
+DEFAULT_BLOCKED = (
+    "doubleclick.net",
+    "googlesyndication.com",
+    "googleadservices.com",
+    "google-analytics.com",
+    "adservice.google.com",
+    "app-measurement.com",
+    "ads.yahoo.com",
+    "adnxs.com",
+    "scorecardresearch.com",
+    "moatads.com",
+    "taboola.com",
+    "outbrain.com",
+)
+
+# hosts-file addresses that mean "block", not a real mapping
+_SINKS = {"0.0.0.0", "127.0.0.1", "::", "::1"}
+# the usual preamble of a hosts file, never blocked
+_LOCAL = {"localhost", "localhost.localdomain", "local", "broadcasthost",
+          "ip6-localhost", "ip6-loopback", "0.0.0.0"}
+
+DELTA_SUFFIX = ".delta"
+_VERSION_TAG = "# version:"
+# rewrite the list file once the changes since it was read reach this
+# fraction of it
+COMPACT_FRACTION = 0.25
+
+
+def _clean(names: Iterable[str]) -> Iterator[str]:
+    for n in names:
+        n = n.strip(".").lower()
+        if n and n not in _LOCAL:
+            yield n
+
+
+class Delta:
+    """The changes from list version *base* to *version*."""
+
+    __slots__ = ("base", "version", "added", "removed")
+
+    def __init__(self, base: int, version: int, added: Iterable[str] = (),
+                 removed: Iterable[str] = ()):
+        self.base = base
+        self.version = version
+        self.added: List[str] = sorted(set(_clean(added)))
+        self.removed: List[str] = sorted(set(_clean(removed)))
+
+    def __len__(self) -> int:
+        return len(self.added) + len(self.removed)
+
+    @classmethod
+    def between(cls, old: Iterable[str], new: Iterable[str], base: int,
+                version: int) -> "Delta":
+        """What turns list *old* (version *base*) into *new*."""
+        old = frozenset(_clean(old))
+        new = frozenset(_clean(new))
+        return cls(base, version, new - old, old - new)
+
+    @staticmethod
+    def file_name(base: int, version: int) -> str:
+        return f"{base}-{version}{DELTA_SUFFIX}"
+
+    @classmethod
+    def load(cls, path: str) -> "Delta":
+        """Read a ``<from>-<to>.delta`` file; ValueError when malformed."""
+        base, version = _delta_versions(os.path.basename(path))
+        added, removed = [], []
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line[0] == "#":
+                    continue
+                if line[0] == "+":
+                    added.append(line[1:].strip())
+                elif line[0] == "-":
+                    removed.append(line[1:].strip())
+                else:
+                    raise ValueError(f"{path}: bad delta line {line!r}")
+        return cls(base, version, added, removed)
+
+    def save(self, path: str):
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(f"# blocklist delta {self.base} -> {self.version}: "
+                    f"+{len(self.added)} -{len(self.removed)}\n")
+            f.writelines(f"+{n}\n" for n in self.added)
+            f.writelines(f"-{n}\n" for n in self.removed)
+        os.replace(tmp, path)
+
+    def __repr__(self) -> str:
+        return (f"<Delta {self.base} -> {self.version}: "
+                f"+{len(self.added)} -{len(self.removed)}>")
+
+
+def _delta_versions(name: str) -> Tuple[int, int]:
+    if not name.endswith(DELTA_SUFFIX):
+        raise ValueError(f"not a delta file: {name}")
+    base, _, version = name[:-len(DELTA_SUFFIX)].partition("-")
+    return int(base), int(version)
+
+
+def delta_chain(directory: str, version: int) -> List[str]:
+    """Paths of the delta files leading on from *version*, in order;
+    the longest step where several start at the same version."""
+    steps = {}
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return []
+    for name in names:
+        try:
+            base, to = _delta_versions(name)
+        except ValueError:
+            continue
+        if to > base and to > steps.get(base, (base, ""))[0]:
+            steps[base] = (to, os.path.join(directory, name))
+    chain = []
+    while version in steps:
+        version, path = steps[version]
+        chain.append(path)
+    return chain
+
+
+def prune_deltas(directory: str, version: int) -> int:
+    """Delete the delta files that end at or before *version*."""
+    removed = 0
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return 0
+    for name in names:
+        try:
+            if _delta_versions(name)[1] <= version:
+                os.remove(os.path.join(directory, name))
+                removed += 1
+        except (ValueError, OSError):
+            continue
+    return removed
+
+
+class Blocklist:
+    """Immutable set of blocked domains with parent-domain matching."""
+
+    __slots__ = ("_names", "_added", "_removed", "source", "mtime",
+                 "version", "changes")
+
+    def __init__(self, names: Iterable[str] = (), source: str = "",
+                 mtime: float = 0.0, version: int = 0):
+        self._names: FrozenSet[str] = frozenset(_clean(names))
+        # overlay of patched() lists: names not in _names, and names of
+        # _names no longer on the list; None when there is none
+        self._added: Optional[FrozenSet[str]] = None
+        self._removed: FrozenSet[str] = frozenset()
+        self.source = source
+        self.mtime = mtime
+        self.version = version
+        # names changed since the list file was read
+        self.changes = 0
+
+    def __len__(self) -> int:
+        if self._added is None:
+            return len(self._names)
+        return len(self._names) - len(self._removed) + len(self._added)
+
+    def blocks(self, qname: str) -> bool:
+        name = qname.rstrip(".").lower()
+        names = self._names
+        added = self._added
+        if added is None:
+            while name:
+                if name in names:
+                    return True
+                _, _, name = name.partition(".")
+            return False
+        removed = self._removed
+        while name:
+            if name in added or (name in names and name not in removed):
+                return True
+            _, _, name = name.partition(".")
+        return False
+
+    def names(self) -> Iterator[str]:
+        """Every name on the list, overlay applied."""
+        removed = self._removed
+        for n in self._names:
+            if n not in removed:
+                yield n
+        if self._added:
+            yield from self._added
+
+    # ── updates ──
+    def _derive(self, added, removed, version: int, changes: int,
+                mtime: float) -> "Blocklist":
+        new = Blocklist.__new__(Blocklist)
+        new._names = self._names
+        new._added = added
+        new._removed = removed
+        new.source = self.source
+        new.mtime = mtime
+        new.version = version
+        new.changes = changes
+        return new
+
+    def patched(self, delta: Delta) -> "Blocklist":
+        """
+        This list with *delta* applied, as a new list sharing this one's
+        names: the cost is that of the delta and of the changes already
+        carried.  ValueError when *delta* is for another version.
+        """
+        if delta.base != self.version:
+            raise ValueError(f"{delta!r} does not apply to version "
+                             f"{self.version}")
+        names = self._names
+        plus = frozenset(delta.added)
+        minus = frozenset(delta.removed) - plus
+        added = self._added or frozenset()
+        # frozenset operators iterate the smaller side: O(delta + overlay)
+        added = (added - minus) | (plus - names)
+        removed = (self._removed | (minus & names)) - plus
+        return self._derive(added, removed, delta.version,
+                            self.changes + len(delta), self.mtime)
+
+    def apply_deltas(self, directory: str) -> "Blocklist":
+        """This list patched with the deltas in *directory* that lead on
+        from its version; itself when there are none."""
+        new = self
+        for path in delta_chain(directory, self.version):
+            t0 = time.perf_counter()
+            try:
+                delta = Delta.load(path)
+                new = new.patched(delta)
+            except (OSError, ValueError) as e:
+                log.warning(f"Blocklist delta {path} skipped: {e}")
+                break
+            log.info(f"Blocklist v{delta.base} -> v{delta.version}: "
+                     f"+{len(delta.added)} -{len(delta.removed)} in "
+                     f"{(time.perf_counter() - t0) * 1000:.1f} ms")
+        return new
+
+    @property
+    def needs_compaction(self) -> bool:
+        """Enough changes carried that the file should be rewritten."""
+        return self.changes > max(len(self._names), 1) * COMPACT_FRACTION
+
+    def save(self, path: str):
+        """Write the list with its version to *path* atomically."""
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(f"{_VERSION_TAG} {self.version}\n")
+            f.writelines(f"{n}\n" for n in self.names())
+        os.replace(tmp, path)
+
+    def saved(self, mtime: float) -> "Blocklist":
+        """The same list, known to be in the file stamped *mtime*."""
+        return self._derive(self._added, self._removed, self.version, 0,
+                            mtime)
+
+    @classmethod
+    def load(cls, path: str) -> "Blocklist":
+        """Read *path*; the built-in list when it is missing or unreadable."""
+        version = 0
+        try:
+            mtime = os.path.getmtime(path)
+            with open(path, encoding="utf-8", errors="replace") as f:
+                names = []
+                for line in f:
+                    fields = line.partition("#")[0].split()
+                    if not fields:
+                        if line.startswith(_VERSION_TAG):
+                            tag = line[len(_VERSION_TAG):].strip()
+                            version = int(tag) if tag.isdigit() else 0
+                        continue
+                    if fields[0] in _SINKS:
+                        names.extend(fields[1:])
+                    elif len(fields) == 1:
+                        names.append(fields[0])
+        except OSError:
+            return cls(DEFAULT_BLOCKED, source="built-in")
+        return cls(names, source=path, mtime=mtime, version=version)
+
+    def __repr__(self) -> str:
+        return (f"<Blocklist v{self.version}: {len(self)} domains "
+                f"({self.source})>")
+
+
+def main(argv: Optional[List[str]] = None):
+    import argparse
+    ap = argparse.ArgumentParser(prog="discordia.engine.blocklist")
+    sub = ap.add_subparsers(dest="command", required=True)
+    d = sub.add_parser("diff", help="write the delta between two lists")
+    d.add_argument("old")
+    d.add_argument("new")
+    d.add_argument("base", type=int, help="version of OLD")
+    d.add_argument("version", type=int, help="version of NEW")
+    d.add_argument("-o", "--output", help="default: <base>-<version>.delta")
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    delta = Delta.between(Blocklist.load(args.old).names(),
+                          Blocklist.load(args.new).names(),
+                          args.base, args.version)
+    out = args.output or Delta.file_name(args.base, args.version)
+    delta.save(out)
+    log.info(f"{out}: {delta!r}")
+
+
+if __name__ == "__main__":
+    main()
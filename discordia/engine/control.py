@@ -0,0 +1,40 @@
+"""
+What the UI talks to: ``vpn_engine``, ``query_log`` and ``session_store``.
+
+With ``ENGINE_PROCESS`` (the default where ``AF_UNIX`` exists) the
+engine runs in its own process and these are the ``discordia.engine.
+remote`` proxies plus a read-only view of the session database; the
+engine modules themselves are never imported here, so the app does not
+replay ``session_store.recover()`` or open the query journal next to
+the process that owns them.  Otherwise they are the in-process objects
+from ``discordia.engine.vpn``.
+
+``DISCORDIA_ENGINE_PROCESS=0`` (or ``"engine_process": false`` in
+settings.json) keeps everything in one process.
+"""
+
+import os
+import socket
+
+from discordia.storage.settings import settings
+
+ENGINE_PROCESS = (
+    hasattr(socket, "AF_UNIX")
+    and os.environ.get("DISCORDIA_ENGINE_PROCESS",
+                       "1" if settings.get("engine_process", True) else "0")
+    != "0"
+)
+
+if ENGINE_PROCESS:
+    from discordia.config import SESSIONS_DB
+    from discordia.engine.remote import RemoteEngine, RemoteQueryLog
+    from discordia.storage.sessions import SessionStore
+
+    vpn_engine = RemoteEngine()
+    query_log = RemoteQueryLog(vpn_engine)
+    # summaries only; the engine process writes the rows
+    session_store = SessionStore(SESSIONS_DB)
+else:
+    from discordia.engine.vpn import query_log, session_store, vpn_engine
+
+__all__ = ["ENGINE_PROCESS", "query_log", "session_store", "vpn_engine"]
@@ -0,0 +1,336 @@
+"""
+DNS answer cache with a warm-start snapshot.
+
+Answers are kept as raw wire bytes (ID zeroed) together with the offsets
+of their TTL fields, so a hit costs one dict lookup plus a small TTL
+patch.  Expiry is stored as absolute wall-clock time, which lets the hot
+part of the cache survive a service restart:
+
+    snapshot file  (little-endian)
+    ┌──────────────────────────────────────────────────────────────┐
+    │ header   magic "DVDC" · version u16 · pad u16 · count u32    │
+    │          written_at f64                                      │
+    │ index    count × (key_hash u64 · expires f64 · offset u32 ·  │
+    │                   key_len u16 · resp_len u16 · hits u32)     │
+    │          sorted by key_hash                                  │
+    │ data     key bytes + response bytes, back to back            │
+    └──────────────────────────────────────────────────────────────┘
+
+Loading only maps the file and checks the header; records are looked up
+by binary search over the index the first time a question misses the live
+cache, so start-up cost does not depend on the number of entries.
+"""
+
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterator, List, Optional, Tuple
+
+from discordia.engine.dnsmsg import (
+    DNSFormatError, RCODE_NOERROR, RCODE_NXDOMAIN,
+    cache_key, is_truncated, min_ttl, parse_question, rcode,
+    rewrite_ttls, ttl_offsets, with_id,
+)
+
+try:
+    # hashlib also loads OpenSSL's _hashlib (~20 ms at startup); the
+    # builtin blake2 module is all the key hash needs
+    from _blake2 import blake2b as _blake2b
+except ImportError:
+    from hashlib import blake2b as _blake2b
+
+log = logging.getLogger("Discordia")
+
+SNAPSHOT_MAGIC = b"DVDC"
+SNAPSHOT_VERSION = 1
+_SNAP_HEADER = struct.Struct("<4sHHId")
+_SNAP_INDEX = struct.Struct("<QdIHHI")
+
+# entry layout: [expires_at, stored_at, response, ttl_offsets, hits]
+_EXP, _STORED, _RESP, _OFFS, _HITS = range(5)
+
+
+def _key_hash(key: bytes) -> int:
+    return int.from_bytes(
+        _blake2b(key, digest_size=8).digest(), "little"
+    )
+
+
+class _Snapshot:
+    """Read-only, memory-mapped view of a snapshot file."""
+
+    def __init__(self, path: str):
+        self._fh = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._fh.close()
+            raise
+        size = len(self._mm)
+        if size < _SNAP_HEADER.size:
+            self.close()
+            raise ValueError("snapshot too small")
+        magic, version, _pad, count, written_at = _SNAP_HEADER.unpack_from(
+            self._mm, 0
+        )
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            self.close()
+            raise ValueError("unknown snapshot format")
+        if _SNAP_HEADER.size + count * _SNAP_INDEX.size > size:
+            self.close()
+            raise ValueError("snapshot index truncated")
+        self.count = count
+        self.written_at = written_at
+
+    def _index(self, i: int) -> Tuple[int, float, int, int, int, int]:
+        return _SNAP_INDEX.unpack_from(
+            self._mm, _SNAP_HEADER.size + i * _SNAP_INDEX.size
+        )
+
+    def _record(self, i: int):
+        h, exp, off, klen, rlen, hits = self._index(i)
+        key = self._mm[off:off + klen]
+        resp = self._mm[off + klen:off + klen + rlen]
+        return h, exp, key, resp, hits
+
+    def lookup(self, key: bytes, now: float) -> Optional[list]:
+        """Return a live-cache entry for *key*, or ``None``."""
+        target = _key_hash(key)
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._index(mid)[0] < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        while lo < self.count:
+            h, exp, k, resp, hits = self._record(lo)
+            if h != target:
+                break
+            if k == key:
+                if exp <= now:
+                    return None
+                try:
+                    offs = tuple(ttl_offsets(resp))
+                except DNSFormatError:
+                    return None
+                return [exp, self.written_at, resp, offs, hits]
+            lo += 1
+        return None
+
+    def entries(self, now: float) -> Iterator[Tuple[bytes, list]]:
+        """Yield every unexpired ``(key, entry)`` still in the file."""
+        for i in range(self.count):
+            _h, exp, key, resp, hits = self._record(i)
+            if exp <= now:
+                continue
+            try:
+                offs = tuple(ttl_offsets(resp))
+            except DNSFormatError:
+                continue
+            yield key, [exp, self.written_at, resp, offs, hits]
+
+    def close(self):
+        try:
+            self._mm.close()
+        finally:
+            self._fh.close()
+
+
+class DNSCache:
+    """
+    Thread-safe LRU cache of DNS answers keyed by (qname, qtype, qclass).
+
+    Only NOERROR and NXDOMAIN replies that were not truncated are stored.
+    TTLs are clamped to ``[min_ttl, max_ttl]``; answers without any TTL
+    (e.g. NODATA with no SOA) live for ``negative_ttl`` seconds.
+    """
+
+    def __init__(self, max_entries: int = 8192, min_ttl: int = 0,
+                 max_ttl: int = 86400, negative_ttl: int = 60):
+        self.max_entries = max_entries
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[bytes, list]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._snap: Optional[_Snapshot] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ── lookups ──
+    def get(self, query: bytes) -> Optional[bytes]:
+        """Return a cached reply to *query* with its ID and TTLs fixed up."""
+        try:
+            qid, qname, qtype, qclass, _ = parse_question(query)
+        except DNSFormatError:
+            return None
+        key = cache_key(qname, qtype, qclass)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[_EXP] <= now:
+                    del self._entries[key]
+                    entry = None
+                else:
+                    self._entries.move_to_end(key)
+            if entry is None and self._snap is not None:
+                entry = self._snap.lookup(key, now)
+                if entry is not None:
+                    self._insert(key, entry)
+            if entry is None:
+                self.misses += 1
+                return None
+            entry[_HITS] += 1
+            self.hits += 1
+        resp = rewrite_ttls(entry[_RESP], entry[_OFFS],
+                            int(now - entry[_STORED]))
+        return with_id(resp, qid)
+
+    def put(self, query: bytes, response: bytes) -> bool:
+        """Store *response* as the answer to *query*; return True if kept."""
+        try:
+            _qid, qname, qtype, qclass, _ = parse_question(query)
+            code = rcode(response)
+            if code not in (RCODE_NOERROR, RCODE_NXDOMAIN):
+                return False
+            if is_truncated(response):
+                return False
+            offs = tuple(ttl_offsets(response))
+        except (DNSFormatError, IndexError, struct.error):
+            return False
+        ttl = min_ttl(response, list(offs))
+        if ttl is None:
+            ttl = self.negative_ttl
+        ttl = max(self.min_ttl, min(ttl, self.max_ttl))
+        if ttl <= 0:
+            return False
+        now = time.time()
+        entry = [now + ttl, now, with_id(response, 0), offs, 0]
+        with self._lock:
+            self._insert(cache_key(qname, qtype, qclass), entry)
+        return True
+
+    def _insert(self, key: bytes, entry: list):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def configure(self, max_entries: Optional[int] = None,
+                  min_ttl: Optional[int] = None,
+                  max_ttl: Optional[int] = None,
+                  negative_ttl: Optional[int] = None):
+        """
+        Change the cache policy in place.
+
+        TTL bounds apply to answers stored from now on; a smaller
+        ``max_entries`` evicts the least recently used entries at once.
+        """
+        with self._lock:
+            if min_ttl is not None:
+                self.min_ttl = min_ttl
+            if max_ttl is not None:
+                self.max_ttl = max_ttl
+            if negative_ttl is not None:
+                self.negative_ttl = negative_ttl
+            if max_entries is not None:
+                self.max_entries = max_entries
+                while len(self._entries) > max_entries:
+                    self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    # ── warm-start snapshot ──
+    def load_snapshot(self, path: str) -> int:
+        """
+        Map the snapshot at *path* for lazy lookups.
+
+        Returns the number of records in the file (expired ones included —
+        they are skipped when looked up).  A missing or unreadable file
+        just leaves the cache cold.
+        """
+        if not os.path.exists(path):
+            return 0
+        try:
+            snap = _Snapshot(path)
+        except Exception as e:
+            log.warning(f"DNS cache snapshot ignored: {e}")
+            return 0
+        with self._lock:
+            old, self._snap = self._snap, snap
+        if old is not None:
+            old.close()
+        return snap.count
+
+    def snapshot(self, path: str, limit: int = 20000,
+                 min_remaining: float = 5.0) -> int:
+        """
+        Write the hottest *limit* unexpired answers to *path* atomically.
+
+        Entries are ranked by hit count; still-valid records of the
+        previous snapshot that were never touched this session fill any
+        remaining room.  Returns the number of records written.
+        """
+        now = time.time()
+        with self._lock:
+            live = [(k, list(e)) for k, e in self._entries.items()
+                    if e[_EXP] - now >= min_remaining]
+            snap = self._snap
+        live.sort(key=lambda kv: kv[1][_HITS], reverse=True)
+        chosen = live[:limit]
+        if snap is not None and len(chosen) < limit:
+            seen = {k for k, _ in chosen}
+            for key, entry in snap.entries(now + min_remaining):
+                if key in seen:
+                    continue
+                chosen.append((bytes(key), entry))
+                if len(chosen) >= limit:
+                    break
+
+        records: List[Tuple[int, float, bytes, bytes, int]] = []
+        for key, entry in chosen:
+            resp = rewrite_ttls(entry[_RESP], entry[_OFFS],
+                                int(now - entry[_STORED]))
+            records.append((_key_hash(key), entry[_EXP], key, resp,
+                            min(entry[_HITS], 0xFFFFFFFF)))
+        records.sort(key=lambda r: r[0])
+
+        data_off = _SNAP_HEADER.size + len(records) * _SNAP_INDEX.size
+        index = bytearray()
+        data = bytearray()
+        for h, exp, key, resp, hits in records:
+            index += _SNAP_INDEX.pack(h, exp, data_off + len(data),
+                                      len(key), len(resp), hits)
+            data += key
+            data += resp
+
+        tmp = path + ".tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(_SNAP_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION,
+                                          0, len(records), now))
+                f.write(index)
+                f.write(data)
+            os.replace(tmp, path)
+        except Exception as e:
+            log.error(f"DNS cache snapshot error: {e}")
+            return 0
+        return len(records)
+
+    def close(self):
+        with self._lock:
+            snap, self._snap = self._snap, None
+        if snap is not None:
+            snap.close()
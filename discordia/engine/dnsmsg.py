@@ -0,0 +1,224 @@
+"""
+Minimal DNS wire-format helpers (RFC 1035).
+
+Only what the engine needs to cache and forward messages: read the
+question, locate TTL fields, patch IDs and build error replies.  Messages
+are handled as ``bytes``; nothing here allocates a full object model.
+"""
+
+import struct
+from typing import List, Optional, Tuple
+
+# ─── Header / record constants ───
+HEADER = struct.Struct("!HHHHHH")
+HEADER_LEN = 12
+
+QTYPE_A = 1
+QTYPE_NS = 2
+QTYPE_CNAME = 5
+QTYPE_SOA = 6
+QTYPE_PTR = 12
+QTYPE_MX = 15
+QTYPE_TXT = 16
+QTYPE_AAAA = 28
+QTYPE_OPT = 41
+QTYPE_HTTPS = 65
+
+QCLASS_IN = 1
+
+RCODE_NOERROR = 0
+RCODE_FORMERR = 1
+RCODE_SERVFAIL = 2
+RCODE_NXDOMAIN = 3
+RCODE_REFUSED = 5
+
+FLAG_QR = 0x8000
+FLAG_TC = 0x0200
+FLAG_RD = 0x0100
+FLAG_RA = 0x0080
+
+
+class DNSFormatError(ValueError):
+    """Raised when a message is truncated or malformed."""
+
+
+def _skip_name(msg: bytes, off: int) -> int:
+    """Return the offset just past the (possibly compressed) name at *off*."""
+    end = len(msg)
+    while True:
+        if off >= end:
+            raise DNSFormatError("name runs past end of message")
+        ln = msg[off]
+        if ln == 0:
+            return off + 1
+        if ln & 0xC0 == 0xC0:
+            if off + 2 > end:
+                raise DNSFormatError("truncated compression pointer")
+            return off + 2
+        off += ln + 1
+
+
+def _read_name(msg: bytes, off: int) -> str:
+    """Decode the name at *off* (following pointers) as lower-case text."""
+    labels = []
+    jumps = 0
+    end = len(msg)
+    while True:
+        if off >= end:
+            raise DNSFormatError("name runs past end of message")
+        ln = msg[off]
+        if ln == 0:
+            break
+        if ln & 0xC0 == 0xC0:
+            if off + 2 > end or jumps > 16:
+                raise DNSFormatError("bad compression pointer")
+            off = ((ln & 0x3F) << 8) | msg[off + 1]
+            jumps += 1
+            continue
+        labels.append(msg[off + 1:off + 1 + ln])
+        off += ln + 1
+    return b".".join(labels).decode("ascii", "replace").lower()
+
+
+def parse_question(msg: bytes) -> Tuple[int, str, int, int, int]:
+    """
+    Return ``(id, qname, qtype, qclass, end)`` for the first question.
+
+    *end* is the offset just past the question section entry.
+    """
+    if len(msg) < HEADER_LEN:
+        raise DNSFormatError("message shorter than header")
+    qid, _flags, qdcount = struct.unpack_from("!HHH", msg, 0)
+    if qdcount < 1:
+        raise DNSFormatError("no question")
+    qname = _read_name(msg, HEADER_LEN)
+    off = _skip_name(msg, HEADER_LEN)
+    if off + 4 > len(msg):
+        raise DNSFormatError("truncated question")
+    qtype, qclass = struct.unpack_from("!HH", msg, off)
+    return qid, qname, qtype, qclass, off + 4
+
+
+def cache_key(qname: str, qtype: int, qclass: int = QCLASS_IN) -> bytes:
+    """Compact, hashable key identifying a question."""
+    return qname.encode("ascii", "replace") + struct.pack("!HH", qtype, qclass)
+
+
+def message_id(msg: bytes) -> int:
+    return (msg[0] << 8) | msg[1]
+
+
+def with_id(msg: bytes, qid: int) -> bytes:
+    """Return *msg* with its transaction ID replaced."""
+    return struct.pack("!H", qid) + msg[2:]
+
+
+def rcode(msg: bytes) -> int:
+    return msg[3] & 0x0F
+
+
+def is_truncated(msg: bytes) -> bool:
+    return bool(msg[2] & (FLAG_TC >> 8))
+
+
+def ttl_offsets(msg: bytes) -> List[int]:
+    """
+    Offsets of every TTL field in the answer, authority and additional
+    sections.  The EDNS OPT pseudo-record is skipped — its "TTL" carries
+    flags, not a lifetime.
+    """
+    _qid, _flags, qd, an, ns, ar = HEADER.unpack_from(msg, 0)
+    off = HEADER_LEN
+    for _ in range(qd):
+        off = _skip_name(msg, off) + 4
+    offsets = []
+    end = len(msg)
+    for _ in range(an + ns + ar):
+        off = _skip_name(msg, off)
+        if off + 10 > end:
+            raise DNSFormatError("truncated resource record")
+        rtype = (msg[off] << 8) | msg[off + 1]
+        rdlen = (msg[off + 8] << 8) | msg[off + 9]
+        if rtype != QTYPE_OPT:
+            offsets.append(off + 4)
+        off += 10 + rdlen
+        if off > end:
+            raise DNSFormatError("rdata runs past end of message")
+    return offsets
+
+
+def answer_addresses(msg: bytes) -> List[Tuple[int, int]]:
+    """
+    ``(IPv4 address as int, TTL)`` of every A record in the answer
+    section, whatever name owns it (so a CNAME chain's final addresses
+    count too).
+    """
+    _qid, _flags, qd, an, _ns, _ar = HEADER.unpack_from(msg, 0)
+    off = HEADER_LEN
+    for _ in range(qd):
+        off = _skip_name(msg, off) + 4
+    out = []
+    end = len(msg)
+    for _ in range(an):
+        off = _skip_name(msg, off)
+        if off + 10 > end:
+            raise DNSFormatError("truncated resource record")
+        rtype, rclass, ttl, rdlen = struct.unpack_from("!HHIH", msg, off)
+        off += 10
+        if off + rdlen > end:
+            raise DNSFormatError("rdata runs past end of message")
+        if rtype == QTYPE_A and rclass == QCLASS_IN and rdlen == 4:
+            out.append((int.from_bytes(msg[off:off + 4], "big"), ttl))
+        off += rdlen
+    return out
+
+
+def min_ttl(msg: bytes, offsets: List[int]) -> Optional[int]:
+    """Smallest TTL among *offsets*, or ``None`` when there are none."""
+    if not offsets:
+        return None
+    return min(struct.unpack_from("!I", msg, o)[0] for o in offsets)
+
+
+def rewrite_ttls(msg: bytes, offsets: List[int], elapsed: int) -> bytes:
+    """Return *msg* with every TTL at *offsets* decreased by *elapsed*."""
+    if not offsets or elapsed <= 0:
+        return msg
+    buf = bytearray(msg)
+    for o in offsets:
+        ttl = struct.unpack_from("!I", buf, o)[0]
+        struct.pack_into("!I", buf, o, max(ttl - elapsed, 0))
+    return bytes(buf)
+
+
+def build_query(qname: str, qtype: int = QTYPE_A, qid: int = 0,
+                rd: bool = True) -> bytes:
+    """Build a plain single-question query."""
+    flags = FLAG_RD if rd else 0
+    out = bytearray(HEADER.pack(qid, flags, 1, 0, 0, 0))
+    for label in qname.rstrip(".").split("."):
+        if label:
+            raw = label.encode("ascii")
+            out.append(len(raw))
+            out += raw
+    out.append(0)
+    out += struct.pack("!HH", qtype, QCLASS_IN)
+    return bytes(out)
+
+
+def build_error(query: bytes, code: int) -> bytes:
+    """
+    Build a header-plus-question reply to *query* carrying *code*
+    (SERVFAIL, REFUSED, NXDOMAIN…).
+    """
+    try:
+        _qid, _name, _qt, _qc, end = parse_question(query)
+        question = query[HEADER_LEN:end]
+        qd = 1
+    except DNSFormatError:
+        question = b""
+        qd = 0
+    flags = (query[2] << 8 | query[3]) if len(query) >= 4 else 0
+    flags = (flags & FLAG_RD) | FLAG_QR | FLAG_RA | (code & 0x0F)
+    qid = message_id(query) if len(query) >= 2 else 0
+    return HEADER.pack(qid, flags, qd, 0, 0, 0) + question
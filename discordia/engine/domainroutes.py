@@ -0,0 +1,136 @@
+"""
+Address blocks learned from DNS answers, tracked but not routed.
+
+With ``split_domains`` set, every answer the resolver gives for one of
+those names (or a subdomain — ``discord.com`` covers
+``gateway.discord.com``) adds its A records to the tracked set:
+
+  * each address is widened to its ``/prefix_len`` block, so a service
+    spread over a CDN range settles on a handful of routes instead of
+    one per answer;
+  * a block stays until the longest TTL that named it has run out, but
+    never less than ``min_ttl`` — apps keep connections open well past
+    a 60 s TTL;
+  * the blocks live in an ``IntervalSet``, so the TUN loop's per-packet
+    membership test is a binary search;
+  * nothing here touches the interface.  The engine does not route the
+    blocks into the tunnel yet — the TUN loop forwards only DNS, so
+    traffic sent there would be lost.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, FrozenSet, Iterable, List
+
+from discordia.diag.metrics import metrics
+from discordia.engine.dnsmsg import (
+    DNSFormatError, answer_addresses, parse_question,
+)
+from discordia.engine.routes import IntervalSet
+
+log = logging.getLogger("Discordia")
+
+LEARNED = metrics.counter("split_prefixes_learned_total",
+                          "DNS-learned blocks added from answers")
+EXPIRED = metrics.counter("split_prefixes_expired_total",
+                          "DNS-learned blocks dropped after their TTL")
+PREFIXES = metrics.gauge("split_prefixes", "DNS-learned blocks tracked")
+
+
+class DomainRoutes:
+    """IPv4 blocks answered for the names under *suffixes*."""
+
+    def __init__(self, suffixes: Iterable[str], prefix_len: int = 24,
+                 min_ttl: float = 300, max_prefixes: int = 1024):
+        cleaned = (s.strip().strip(".").lower() for s in suffixes)
+        self.suffixes: FrozenSet[str] = frozenset(s for s in cleaned if s)
+        self.prefix_len = max(8, min(32, int(prefix_len)))
+        self.min_ttl = min_ttl
+        self.max_prefixes = max_prefixes
+        self.addresses = IntervalSet()
+        # block start -> monotonic expiry
+        self._expiry: Dict[int, float] = {}
+        self._size = 1 << (32 - self.prefix_len)
+        self._lock = threading.Lock()
+        self._changed = threading.Event()
+
+    def __len__(self) -> int:
+        return len(self._expiry)
+
+    def __contains__(self, address: int) -> bool:
+        return address in self.addresses
+
+    def matches(self, qname: str) -> bool:
+        name = qname.rstrip(".").lower()
+        suffixes = self.suffixes
+        while name:
+            if name in suffixes:
+                return True
+            _, _, name = name.partition(".")
+        return False
+
+    def observe(self, resp: bytes) -> int:
+        """Take the A records of *resp* if its name matches; return how
+        many blocks are new."""
+        try:
+            if not self.matches(parse_question(resp)[1]):
+                return 0
+            answers = answer_addresses(resp)
+        except DNSFormatError:
+            return 0
+        if not answers:
+            return 0
+        now = time.monotonic()
+        mask = ~(self._size - 1) & 0xFFFFFFFF
+        new = 0
+        with self._lock:
+            expiry = self._expiry
+            for address, ttl in answers:
+                block = address & mask
+                until = now + max(ttl, self.min_ttl)
+                if block not in expiry:
+                    self.addresses.add(block, block + self._size - 1)
+                    new += 1
+                    expiry[block] = until
+                elif until > expiry[block]:
+                    expiry[block] = until
+            while len(expiry) > self.max_prefixes:
+                # the block closest to expiring makes room
+                block = min(expiry, key=expiry.get)
+                del expiry[block]
+                self.addresses.remove(block, block + self._size - 1)
+            PREFIXES.set(len(expiry))
+        if new:
+            LEARNED.inc(new)
+            self._changed.set()
+        return new
+
+    def expire(self) -> int:
+        """Drop the blocks whose time is up; return how many."""
+        now = time.monotonic()
+        with self._lock:
+            gone = [b for b, until in self._expiry.items() if until <= now]
+            for block in gone:
+                del self._expiry[block]
+                self.addresses.remove(block, block + self._size - 1)
+            PREFIXES.set(len(self._expiry))
+        if gone:
+            EXPIRED.inc(len(gone))
+            self._changed.set()
+        return len(gone)
+
+    def take_changed(self) -> bool:
+        """Whether the set changed since the last call."""
+        if not self._changed.is_set():
+            return False
+        self._changed.clear()
+        return True
+
+    def routes(self) -> List[str]:
+        """The set as aggregated CIDR routes (adjacent blocks merge)."""
+        return self.addresses.cidrs(32)
+
+    def __repr__(self) -> str:
+        return (f"DomainRoutes({len(self.suffixes)} suffixes, "
+                f"{len(self)} /{self.prefix_len} blocks)")
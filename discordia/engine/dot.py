@@ -0,0 +1,266 @@
+"""
+DNS-over-TLS transport (RFC 7858).
+
+Each upstream keeps up to ``pool_size`` persistent TLS connections.
+Queries are written as 2-byte length-prefixed frames without waiting for
+earlier replies; a reader thread per connection matches replies back to
+callers by message ID, so answers may arrive in any order.  Wire IDs are
+allocated per connection, which keeps concurrent queries that share a
+client ID apart.
+
+Connections use the shared client context and the per-server session
+cache in ``discordia.engine.tls``: after an idle close, a reconnect or
+a reconfigure, the next handshake is a resumption rather than a full
+one.  A connection that sees no traffic for ``idle_timeout`` seconds
+closes itself.
+"""
+
+import logging
+import random
+import socket
+import ssl
+import struct
+import threading
+import time
+from typing import Dict, List, Optional
+
+from discordia.engine import tls
+from discordia.engine.dnsmsg import message_id, with_id
+
+log = logging.getLogger("Discordia")
+
+DOT_PORT = 853
+
+
+class _Pending:
+    __slots__ = ("client_id", "wire_id", "event", "response")
+
+    def __init__(self, client_id: int):
+        self.client_id = client_id
+        self.wire_id = -1
+        self.event = threading.Event()
+        self.response: Optional[bytes] = None
+
+
+class _DoTConnection:
+    """One TLS stream carrying many in-flight queries."""
+
+    def __init__(self, transport: "DoTTransport", sock: ssl.SSLSocket):
+        self.transport = transport
+        self.sock = sock
+        self.pending: Dict[int, _Pending] = {}
+        self.alive = True
+        self.last_used = time.monotonic()
+        self._wlock = threading.Lock()
+        self._next_id = random.randrange(0x10000)
+        self._reader = threading.Thread(
+            target=self._read_loop, name="Discordia-DoT-reader", daemon=True
+        )
+        self._reader.start()
+
+    @property
+    def inflight(self) -> int:
+        return len(self.pending)
+
+    def submit(self, query: bytes) -> _Pending:
+        p = _Pending(message_id(query))
+        with self._wlock:
+            if not self.alive:
+                raise ConnectionError("DoT connection closed")
+            for _ in range(0x10000):
+                self._next_id = (self._next_id + 1) & 0xFFFF
+                if self._next_id not in self.pending:
+                    break
+            else:
+                raise ConnectionError("DoT connection saturated")
+            wire_id = p.wire_id = self._next_id
+            self.pending[wire_id] = p
+            frame = struct.pack("!H", len(query)) + with_id(query, wire_id)
+            try:
+                self.sock.sendall(frame)
+            except OSError:
+                self.pending.pop(wire_id, None)
+                self._shutdown()
+                raise
+            self.last_used = time.monotonic()
+        return p
+
+    def forget(self, p: _Pending):
+        if self.pending.get(p.wire_id) is p:
+            self.pending.pop(p.wire_id, None)
+
+    def _read_loop(self):
+        buf = bytearray()
+        first = True
+        try:
+            while self.alive:
+                try:
+                    chunk = self.sock.recv(16384)
+                except socket.timeout:
+                    idle = time.monotonic() - self.last_used
+                    if idle >= self.transport.idle_timeout:
+                        break
+                    continue
+                if not chunk:
+                    break
+                buf += chunk
+                while len(buf) >= 2:
+                    n = (buf[0] << 8) | buf[1]
+                    if len(buf) < 2 + n:
+                        break
+                    msg = bytes(buf[2:2 + n])
+                    del buf[:2 + n]
+                    if n < 12:
+                        continue
+                    p = self.pending.pop(message_id(msg), None)
+                    if p is None:
+                        continue
+                    p.response = with_id(msg, p.client_id)
+                    p.event.set()
+                    self.last_used = time.monotonic()
+                if first:
+                    # TLS 1.3 tickets arrive after the handshake, so the
+                    # resumable session is only complete once data flows.
+                    first = False
+                    tls.sessions.put(self.transport.key, self.sock)
+        except (OSError, ssl.SSLError) as e:
+            if self.alive:
+                log.debug(f"DoT reader stopped: {e}")
+        finally:
+            self._shutdown()
+            # only the reader closes: closing under a blocked recv() frees
+            # the fd number, and the next connection may get it and lose
+            # its handshake bytes to this thread
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+
+    def _shutdown(self):
+        if not self.alive:
+            return
+        self.alive = False
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)  # wakes the reader
+        except OSError:
+            pass
+        for p in list(self.pending.values()):
+            p.event.set()
+        self.pending.clear()
+        self.transport._discard(self)
+
+    def close(self):
+        self._shutdown()
+
+
+class DoTTransport:
+    """RFC 7858 upstream with pipelined queries over pooled connections."""
+
+    name = "dot"
+
+    def __init__(self, host: str, port: int = DOT_PORT,
+                 server_name: Optional[str] = None, pool_size: int = 2,
+                 idle_timeout: float = 30.0, connect_timeout: float = 5.0,
+                 context: Optional[ssl.SSLContext] = None,
+                 spread_at: int = 16):
+        self.host = host
+        self.port = port
+        self.server_name = server_name or host
+        self.pool_size = max(1, pool_size)
+        self.idle_timeout = idle_timeout
+        self.connect_timeout = connect_timeout
+        self.context = context or tls.client_context()
+        self.spread_at = spread_at
+        self.handshakes = 0
+        self.resumed = 0
+        self._conns: List[_DoTConnection] = []
+        self._opening = 0                    # handshakes in progress
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+
+    @property
+    def key(self) -> tls.ServerKey:
+        return self.host, self.port, self.server_name
+
+    # ── connection pool ──
+    def _open(self) -> _DoTConnection:
+        sock = tls.connect(self.key, self.connect_timeout, self.context)
+        sock.settimeout(self.idle_timeout)
+        self.handshakes += 1
+        if sock.session_reused:
+            self.resumed += 1
+        return _DoTConnection(self, sock)
+
+    def _acquire(self) -> _DoTConnection:
+        deadline = time.monotonic() + self.connect_timeout
+        with self._ready:
+            while True:
+                live = [c for c in self._conns if c.alive]
+                best = min(live, key=lambda c: c.inflight, default=None)
+                slots = len(live) + self._opening
+                if best is not None and (best.inflight < self.spread_at
+                                         or slots >= self.pool_size):
+                    return best
+                if slots < self.pool_size:
+                    self._opening += 1       # reserve a slot
+                    break
+                # every slot is a handshake in flight: wait for one
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise socket.timeout(
+                        f"DoT connect to {self.host} timed out")
+                self._ready.wait(remaining)
+        # the handshake runs unlocked so queries on live connections
+        # never wait for it
+        conn = None
+        try:
+            conn = self._open()
+        finally:
+            with self._ready:
+                self._opening -= 1
+                if conn is not None and conn.alive:
+                    self._conns.append(conn)
+                self._ready.notify_all()
+        return conn
+
+    def _discard(self, conn: _DoTConnection):
+        with self._lock:
+            if conn in self._conns:
+                self._conns.remove(conn)
+
+    # ── transport API ──
+    def resolve(self, query: bytes, timeout: float = 5.0) -> bytes:
+        deadline = time.monotonic() + timeout
+        for _attempt in range(2):
+            conn = self._acquire()
+            try:
+                p = conn.submit(query)
+            except OSError:
+                # it died between _acquire() and here; the next
+                # attempt opens or picks another
+                self._discard(conn)
+                continue
+            remaining = max(deadline - time.monotonic(), 0.0)
+            if not p.event.wait(remaining):
+                conn.forget(p)
+                raise socket.timeout(f"DoT query to {self.host} timed out")
+            if p.response is not None:
+                return p.response
+            # connection dropped under us — retry once on a fresh one
+        raise ConnectionError(f"DoT connection to {self.host} lost")
+
+    def warm(self):
+        """Open the first connection (and complete its handshake) now."""
+        try:
+            self._acquire()
+        except OSError as e:
+            log.warning(f"DoT pre-connect to {self.host} failed: {e}")
+
+    def close(self):
+        with self._lock:
+            conns, self._conns = self._conns, []
+        for c in conns:
+            c.close()
+
+    def __repr__(self):
+        return f"tls://{self.server_name}@{self.host}:{self.port}"
@@ -0,0 +1,83 @@
+"""
+IPv4/UDP packet helpers for the TUN data path.
+
+Mirrors what ``DiscordiaVPNService.isDnsPacket``/``handleDnsPacket`` do
+in Java: recognise DNS queries and wrap a reply in a swapped IP/UDP
+header.  Unlike the Java side the UDP checksum is filled in.
+"""
+
+import socket
+import struct
+from typing import Optional
+
+IPPROTO_UDP = 17
+DNS_PORT = 53
+
+
+def checksum(data) -> int:
+    """Internet checksum (RFC 1071) of *data*."""
+    if len(data) % 2:
+        data = bytes(data) + b"\0"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    while total >> 16:
+        total = (total & 0xFFFF) + (total >> 16)
+    return ~total & 0xFFFF
+
+
+def dns_query_offset(pkt) -> Optional[int]:
+    """
+    If *pkt* is an IPv4 UDP datagram to port 53, return the IP header
+    length; otherwise ``None``.
+    """
+    n = len(pkt)
+    if n < 28 or pkt[0] >> 4 != 4 or pkt[9] != IPPROTO_UDP:
+        return None
+    ihl = (pkt[0] & 0x0F) * 4
+    if ihl < 20 or n < ihl + 8:
+        return None
+    if (pkt[ihl + 2] << 8 | pkt[ihl + 3]) != DNS_PORT:
+        return None
+    return ihl
+
+
+def build_udp4_reply(header: bytes, payload: bytes) -> bytes:
+    """
+    Build the reply datagram for a query whose IP+UDP *header* (as
+    received) is given: addresses and ports swapped, lengths and both
+    checksums recomputed, IP options dropped.
+    """
+    ihl = (header[0] & 0x0F) * 4
+    src, dst = header[12:16], header[16:20]
+    sport, dport = header[ihl:ihl + 2], header[ihl + 2:ihl + 4]
+    udp_len = 8 + len(payload)
+    total = 20 + udp_len
+
+    ip = bytearray(20)
+    ip[0] = 0x45
+    ip[1] = header[1]
+    struct.pack_into("!HHHBB", ip, 2, total, 0, 0x4000, 64, IPPROTO_UDP)
+    ip[12:16] = dst
+    ip[16:20] = src
+    struct.pack_into("!H", ip, 10, checksum(ip))
+
+    udp = bytearray(dport + sport + struct.pack("!HH", udp_len, 0))
+    pseudo = dst + src + struct.pack("!BBH", 0, IPPROTO_UDP, udp_len)
+    csum = checksum(pseudo + bytes(udp) + payload) or 0xFFFF
+    struct.pack_into("!H", udp, 6, csum)
+    return bytes(ip) + bytes(udp) + payload
+
+
+def build_udp4_query(src: str, dst: str, sport: int, payload: bytes,
+                     dport: int = DNS_PORT) -> bytes:
+    """Build a client-side IPv4/UDP datagram (used by benches)."""
+    s, d = socket.inet_aton(src), socket.inet_aton(dst)
+    udp_len = 8 + len(payload)
+    ip = bytearray(20)
+    ip[0] = 0x45
+    struct.pack_into("!HHHBB", ip, 2, 20 + udp_len, 0, 0x4000, 64,
+                     IPPROTO_UDP)
+    ip[12:16] = s
+    ip[16:20] = d
+    struct.pack_into("!H", ip, 10, checksum(ip))
+    udp = struct.pack("!HHHH", sport, dport, udp_len, 0)
+    return bytes(ip) + udp + payload
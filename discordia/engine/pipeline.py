@@ -0,0 +1,257 @@
+"""
+The resolver's query handling as an ordered pipeline of stages.
+
+A ``Stage`` may implement either hook or both:
+
+  * ``query(ctx)`` on the way in — return an answer to stop there (a
+    blocked name, a cache hit) or None to pass the query on;
+  * ``answer(ctx, resp)`` on the way out — see the answer (cache it,
+    journal it, learn routes from it).
+
+Stages run in order and the answer travels back through every stage
+the query passed, in reverse: an answer from stage *k* is shown to the
+stages before *k* and to none after it, so a cache hit is journaled but
+not cached again, and a blocked name never reaches the cache.  The
+last stage (``ForwardStage``) always answers.
+
+``Pipeline`` keeps only the hooks a stage actually implements, and a
+stage that is switched off (no blocklist, no journal…) is simply not in
+it — it costs nothing per query.  One call in ``SAMPLE_EVERY`` is timed,
+hook by hook, into the ``dns_stage_<name>_ms`` histogram of each stage;
+timing every query would cost more than the cheap stages themselves.
+
+The TUN loop answers inline what the local stages can (``local``) and
+sends the rest to a worker (``forward``), so the pipeline is run in
+those two halves.  Like the resolver's other parts a ``Pipeline`` is
+never changed: ``Resolver`` builds a new one and swaps it in.
+"""
+
+import itertools
+import time
+from typing import List, Optional, Sequence
+
+from discordia.diag.metrics import metrics
+from discordia.engine.dnsmsg import (
+    RCODE_NXDOMAIN, RCODE_SERVFAIL, DNSFormatError, build_error,
+    parse_question, rcode,
+)
+from discordia.engine.querylog import (
+    FLAG_BLOCKED, UPSTREAM_CACHE, UPSTREAM_NONE,
+)
+
+# milliseconds — microsecond-scale local stages up to slow upstreams
+STAGE_BUCKETS_MS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5,
+    10, 25, 50, 100, 250, 500, 1000, 2500, 5000,
+)
+# time the stages of one pipeline run in this many
+SAMPLE_EVERY = 8
+
+
+class QueryContext:
+    """One query on its way through the pipeline."""
+
+    __slots__ = ("query", "upstream", "flags", "ms", "_question")
+
+    def __init__(self, query: bytes):
+        self.query = query
+        # journal fields: which upstream answered (1-based, or one of the
+        # UPSTREAM_* codes), FLAG_* bits, and the upstream time
+        self.upstream = UPSTREAM_NONE
+        self.flags = 0
+        self.ms = 0.0
+        self._question = None
+
+    @property
+    def qname(self) -> str:
+        """Lower-case question name, parsed once; "" when malformed."""
+        q = self._question
+        if q is None:
+            try:
+                q = self._question = parse_question(self.query)
+            except DNSFormatError:
+                q = self._question = (0, "", 0, 0, 0)
+        return q[1]
+
+
+class Stage:
+    """Base class; override ``query`` and/or ``answer``."""
+
+    name = "stage"
+
+    def query(self, ctx: QueryContext) -> Optional[bytes]:
+        return None
+
+    def answer(self, ctx: QueryContext, resp: bytes):
+        pass
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}>"
+
+
+class JournalStage(Stage):
+    """Record every answer in a ``QueryLog``."""
+
+    name = "journal"
+
+    def __init__(self, journal):
+        self.journal = journal
+
+    def answer(self, ctx, resp):
+        self.journal.record(ctx.query, rcode(resp), ctx.ms, ctx.upstream,
+                            ctx.flags)
+
+
+class BlockStage(Stage):
+    """NXDOMAIN for names on a ``Blocklist``."""
+
+    name = "block"
+
+    def __init__(self, blocklist, counter):
+        self.blocklist = blocklist
+        self.counter = counter
+
+    def query(self, ctx):
+        qname = ctx.qname
+        if qname and self.blocklist.blocks(qname):
+            self.counter.inc()
+            ctx.flags |= FLAG_BLOCKED
+            return build_error(ctx.query, RCODE_NXDOMAIN)
+        return None
+
+
+class RouteStage(Stage):
+    """Show answers to ``DomainRoutes`` (``split_domains`` tracking)."""
+
+    name = "route"
+
+    def __init__(self, domain_routes):
+        self.domain_routes = domain_routes
+
+    def answer(self, ctx, resp):
+        if ctx.upstream != UPSTREAM_NONE:
+            self.domain_routes.observe(resp)
+
+
+class CacheStage(Stage):
+    """Answer from a ``DNSCache``; cache what the upstreams answer."""
+
+    name = "cache"
+
+    def __init__(self, cache, hits, entries):
+        self.cache = cache
+        self.hits = hits
+        self.entries = entries
+
+    def query(self, ctx):
+        hit = self.cache.get(ctx.query)
+        if hit is not None:
+            self.hits.inc()
+            ctx.upstream = UPSTREAM_CACHE
+        return hit
+
+    def answer(self, ctx, resp):
+        # an upstream's answer; not SERVFAIL for none answering
+        if UPSTREAM_CACHE < ctx.upstream < UPSTREAM_NONE:
+            self.cache.put(ctx.query, resp)
+            self.entries.set(len(self.cache))
+
+
+class ForwardStage(Stage):
+    """Ask the resolver's upstreams in order; SERVFAIL when none answer."""
+
+    name = "forward"
+
+    def __init__(self, resolver):
+        self.resolver = resolver
+
+    def query(self, ctx):
+        resp, pos, ms = self.resolver._ask_upstreams(ctx.query)
+        ctx.ms = ms
+        if resp is None:
+            return build_error(ctx.query, RCODE_SERVFAIL)
+        ctx.upstream = pos + 1
+        return resp
+
+
+def stage_histogram(name: str):
+    return metrics.histogram(f"dns_stage_{name}_ms",
+                             f"Time in the {name} stage per call, ms",
+                             STAGE_BUCKETS_MS)
+
+
+class Pipeline:
+    """Immutable, compiled stage list; the last stage must answer."""
+
+    __slots__ = ("stages", "_queries", "_answers", "_forward", "_runs")
+
+    def __init__(self, stages: Sequence[Stage]):
+        self.stages = tuple(stages)
+        self._runs = itertools.count()
+        *local, last = self.stages
+        # (position, hook, histogram) for the hooks each stage overrides
+        self._queries = tuple(
+            (i, s.query, stage_histogram(s.name))
+            for i, s in enumerate(local)
+            if type(s).query is not Stage.query
+        )
+        answers = [(i, s.answer, stage_histogram(s.name))
+                   for i, s in enumerate(self.stages)
+                   if type(s).answer is not Stage.answer]
+        # _answers[k]: the (hook, histogram) pairs an answer from stage k
+        # goes back through, innermost first
+        self._answers = tuple(
+            tuple((hook, hist) for i, hook, hist in reversed(answers)
+                  if i < k)
+            for k in range(len(self.stages))
+        )
+        self._forward = (last.query, stage_histogram(last.name))
+
+    def local(self, ctx: QueryContext) -> Optional[bytes]:
+        """Run the stages before the last; their answer, or None."""
+        if next(self._runs) % SAMPLE_EVERY:
+            for i, hook, _hist in self._queries:
+                resp = hook(ctx)
+                if resp is not None:
+                    self._answered(ctx, resp, i, False)
+                    return resp
+            return None
+        perf = time.perf_counter
+        for i, hook, hist in self._queries:
+            t0 = perf()
+            resp = hook(ctx)
+            hist.observe((perf() - t0) * 1000)
+            if resp is not None:
+                self._answered(ctx, resp, i, True)
+                return resp
+        return None
+
+    def forward(self, ctx: QueryContext) -> bytes:
+        """Run the last stage and return its answer through all others."""
+        hook, hist = self._forward
+        timed = not next(self._runs) % SAMPLE_EVERY
+        t0 = time.perf_counter()
+        resp = hook(ctx)
+        if timed:
+            hist.observe((time.perf_counter() - t0) * 1000)
+        self._answered(ctx, resp, len(self.stages) - 1, timed)
+        return resp
+
+    def _answered(self, ctx: QueryContext, resp: bytes, depth: int,
+                  timed: bool):
+        if not timed:
+            for hook, _hist in self._answers[depth]:
+                hook(ctx, resp)
+            return
+        perf = time.perf_counter
+        for hook, hist in self._answers[depth]:
+            t0 = perf()
+            hook(ctx, resp)
+            hist.observe((perf() - t0) * 1000)
+
+    @property
+    def names(self) -> List[str]:
+        return [s.name for s in self.stages]
+
+    def __repr__(self) -> str:
+        return f"<Pipeline {' > '.join(self.names)}>"
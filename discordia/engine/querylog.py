@@ -0,0 +1,532 @@
+"""
+Append-only DNS query journal.
+
+Every question the resolver answers becomes one fixed-width record in
+the current segment file; names are stored once in that segment's
+dictionary and referenced by id.  The resolver thread only appends a
+tuple to a deque — parsing, interning and packing happen on one writer
+thread that flushes whatever has accumulated once a second with a
+single ``write``.
+
+    directory DATA_DIR/querylog/
+    ┌──────────────────────────────────────────────────────────────┐
+    │ q-<seq>.dic name entries back to back: len u8 · ascii bytes; │
+    │             the n-th entry is name id n in segment seq       │
+    │ q-<seq>.dql header  magic "DVQL" · version u16 ·             │
+    │                     record size u16 · base time f64          │
+    │             records 16 B each, in time order:                │
+    │                     t_ms u32 (since base) · name id u32 ·    │
+    │                     qtype u16 · rcode u8 · upstream u8 ·     │
+    │                     latency_ms u16 · flags u16               │
+    │ index.dqi   header  magic "DVQI" · version u16 · count u16   │
+    │             per segment  seq u32 · records u32 ·             │
+    │                          failures u32 · first f64 · last f64 │
+    └──────────────────────────────────────────────────────────────┘
+
+``upstream`` is 0 for a cache answer, 1 + the upstream's position for a
+forwarded one and 255 when no upstream answered.  Segments roll over at
+``segment_records`` and the oldest are dropped, dictionary and all, past
+``max_segments``, so the names held in memory and on disk stay bounded
+along with the records; the index is rewritten on each roll and rebuilt
+for any segment whose size disagrees with it (the live one, after a
+crash).  Nothing is read from disk until the first record is flushed or
+the first search.
+
+``search()`` walks segments newest first through ``mmap``: the index
+skips segments outside the time window or without failures, ``bisect``
+finds the window inside a segment, and a name pattern is resolved to a
+set of ids once against each dictionary, so records are compared as
+integers and never decoded unless they match.
+"""
+
+import fnmatch
+import logging
+import mmap
+import os
+import shutil
+import struct
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import deque
+from typing import Dict, List, Optional, Set, Tuple
+
+from discordia.engine.dnsmsg import (
+    DNSFormatError, RCODE_REFUSED, RCODE_SERVFAIL, parse_question,
+)
+
+log = logging.getLogger("Discordia")
+
+QL_MAGIC = b"DVQL"
+QL_VERSION = 1
+_SEG_HEADER = struct.Struct("<4sHHd")
+_RECORD = struct.Struct("<IIHBBHH")
+_IDX_MAGIC = b"DVQI"
+_IDX_HEADER = struct.Struct("<4sHH")
+_IDX_ENTRY = struct.Struct("<IIIdd")
+
+UPSTREAM_CACHE = 0
+UPSTREAM_NONE = 255
+FLAG_BLOCKED = 0x0001
+FAIL_RCODES = (RCODE_SERVFAIL, RCODE_REFUSED)
+MALFORMED = "<malformed>"
+
+# segments hold at most ~49 days of t_ms offsets; roll well before that
+_MAX_SEGMENT_AGE = 86400.0
+
+
+def _seg_name(seq: int) -> str:
+    return f"q-{seq:08d}.dql"
+
+
+def _dic_name(seq: int) -> str:
+    return f"q-{seq:08d}.dic"
+
+
+class _Segment:
+    __slots__ = ("seq", "base", "count", "failures", "first", "last")
+
+    def __init__(self, seq: int, base: float):
+        self.seq = seq
+        self.base = base
+        self.count = 0
+        self.failures = 0
+        self.first = 0.0
+        self.last = 0.0
+
+
+class QueryLog:
+    """Batched writer and mmap reader for the query journal."""
+
+    def __init__(self, path: str, segment_records: int = 65536,
+                 max_segments: int = 16, flush_interval: float = 1.0):
+        self.path = path
+        self.segment_records = segment_records
+        self.max_segments = max_segments
+        self.flush_interval = flush_interval
+        self._q: "deque" = deque()
+        self._append = self._q.append
+        self._lock = threading.Lock()        # segments, names, files
+        self._names: Dict[int, List[str]] = {}   # seq -> names by id
+        self._ids: Dict[str, int] = {}           # live segment only
+        self._segments: List[_Segment] = []
+        self._fh = None
+        self._buf = bytearray(_RECORD.size * 1024)
+        self._patterns: Dict[str, Dict[int, Tuple[Set[int], int]]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._opened = False
+
+    # ── hot path ──
+    def record(self, query: bytes, rcode: int, latency_ms: float,
+               upstream: int, flags: int = 0):
+        """Queue one answered *query*; safe from any thread, never blocks."""
+        self._append((time.time(), query, rcode, latency_ms, upstream,
+                      flags))
+
+    # ── writer ──
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def _loop():
+            while not self._stop.wait(self.flush_interval):
+                self.flush()
+
+        self._thread = threading.Thread(
+            target=_loop, name="Discordia-QueryLog", daemon=True
+        )
+        self._thread.start()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
+        with self._lock:
+            if not self._opened:
+                return
+            self._write_index()
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+    def flush(self) -> int:
+        """Write everything queued so far; return the number of records."""
+        q = self._q
+        written = 0
+        with self._lock:
+            if not self._opened:
+                if not q:
+                    return 0
+                self._open()
+            while q:
+                written += self._write_batch(q)
+        return written
+
+    def _write_batch(self, q: "deque") -> int:
+        seg = self._segments[-1] if self._segments else None
+        if (seg is None or seg.count >= self.segment_records
+                or q[0][0] - seg.base > _MAX_SEGMENT_AGE):
+            seg = self._roll(q[0][0])
+        room = min(len(q), self.segment_records - seg.count,
+                   len(self._buf) // _RECORD.size)
+        buf, pack, size = self._buf, _RECORD.pack_into, _RECORD.size
+        ids, names = self._ids, self._names[seg.seq]
+        new_names = bytearray()
+        base = seg.base
+        last_ms = round((seg.last - base) * 1000) if seg.count else 0
+        first_ms = None
+        failures = 0
+        for i in range(room):
+            t, query, code, lat, upstream, flags = q.popleft()
+            try:
+                _qid, name, qtype, _qclass, _end = parse_question(query)
+            except (DNSFormatError, struct.error):
+                name, qtype = MALFORMED, 0
+            nid = ids.get(name)
+            if nid is None:
+                # interned as stored, so the ids read back after a
+                # restart are the same (non-ASCII, over 255 bytes)
+                raw = name.encode("ascii", "replace")[:255]
+                name = raw.decode("ascii")
+                nid = ids.get(name)
+                if nid is None:
+                    nid = ids[name] = len(names)
+                    names.append(name)
+                    new_names.append(len(raw))
+                    new_names += raw
+            # keep each segment sorted by time for bisect
+            t_ms = max(int((t - base) * 1000), last_ms)
+            last_ms = t_ms
+            if first_ms is None:
+                first_ms = t_ms
+            if code in FAIL_RCODES:
+                failures += 1
+            pack(buf, i * size, t_ms, nid, qtype, code, upstream,
+                 min(int(lat), 0xFFFF), flags)
+        if new_names:
+            with open(os.path.join(self.path, _dic_name(seg.seq)),
+                      "ab") as f:
+                f.write(new_names)
+        self._fh.write(memoryview(buf)[:room * size])
+        self._fh.flush()
+        if not seg.count:
+            seg.first = base + first_ms / 1000
+        seg.count += room
+        seg.failures += failures
+        seg.last = base + last_ms / 1000
+        return room
+
+    def _roll(self, now: float) -> _Segment:
+        if self._fh is not None:
+            self._fh.close()
+        seq = self._segments[-1].seq + 1 if self._segments else 1
+        seg = _Segment(seq, now)
+        self._fh = open(os.path.join(self.path, _seg_name(seq)), "wb")
+        self._fh.write(_SEG_HEADER.pack(QL_MAGIC, QL_VERSION, _RECORD.size,
+                                        now))
+        self._segments.append(seg)
+        self._names[seq] = []
+        self._ids = {}
+        while len(self._segments) > self.max_segments:
+            old = self._segments.pop(0)
+            for fn in (_seg_name(old.seq), _dic_name(old.seq)):
+                try:
+                    os.remove(os.path.join(self.path, fn))
+                except OSError:
+                    pass
+            self._names.pop(old.seq, None)
+            for cached in self._patterns.values():
+                cached.pop(old.seq, None)
+        self._write_index()
+        return seg
+
+    # ── files ──
+    def _open(self):
+        """Load the dictionaries and index; repair whatever a crash left."""
+        self._opened = True
+        os.makedirs(self.path, exist_ok=True)
+        files = os.listdir(self.path)
+
+        def seqs_of(ext):
+            return {int(fn[2:10]) for fn in files
+                    if fn.startswith("q-") and fn.endswith(ext)
+                    and fn[2:10].isdigit()}
+
+        seqs, dics = sorted(seqs_of(".dql")), seqs_of(".dic")
+        legacy = os.path.join(self.path, "names.dic")
+        if os.path.exists(legacy):
+            # one shared dictionary from before they went per segment:
+            # every segment written then refers into it
+            for seq in seqs:
+                if seq not in dics:
+                    shutil.copyfile(legacy,
+                                    os.path.join(self.path, _dic_name(seq)))
+                    dics.add(seq)
+            os.remove(legacy)
+        for seq in dics.difference(seqs):
+            os.remove(os.path.join(self.path, _dic_name(seq)))
+        known = self._read_index()
+        for seq in seqs:
+            dic = os.path.join(self.path, _dic_name(seq))
+            seg = self._check_segment(seq, known.get(seq))
+            if seg is None:
+                if seq in dics:
+                    os.remove(dic)
+                continue
+            self._segments.append(seg)
+            self._names[seq] = self._load_names(dic)
+        if self._segments:
+            seg = self._segments[-1]
+            self._fh = open(os.path.join(self.path, _seg_name(seg.seq)),
+                            "ab")
+            self._ids = {n: i for i, n in enumerate(self._names[seg.seq])}
+        self._write_index()
+
+    @staticmethod
+    def _load_names(path: str) -> List[str]:
+        names: List[str] = []
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return names
+        off, end = 0, len(data)
+        while off < end:
+            ln = data[off]
+            if off + 1 + ln > end:
+                break
+            names.append(data[off + 1:off + 1 + ln].decode("ascii",
+                                                           "replace"))
+            off += 1 + ln
+        if off < end:
+            # a write cut short; ids past it were never used by a record
+            with open(path, "r+b") as f:
+                f.truncate(off)
+        return names
+
+    def _read_index(self) -> Dict[int, _Segment]:
+        try:
+            with open(os.path.join(self.path, "index.dqi"), "rb") as f:
+                data = f.read()
+            magic, version, count = _IDX_HEADER.unpack_from(data, 0)
+            if magic != _IDX_MAGIC or version != QL_VERSION:
+                raise ValueError("unknown index format")
+        except FileNotFoundError:
+            return {}
+        except (ValueError, struct.error) as e:
+            log.warning(f"Query log index rebuilt: {e}")
+            return {}
+        out = {}
+        for i in range(count):
+            off = _IDX_HEADER.size + i * _IDX_ENTRY.size
+            if off + _IDX_ENTRY.size > len(data):
+                break
+            seq, n, failures, first, last = _IDX_ENTRY.unpack_from(data, off)
+            seg = _Segment(seq, 0.0)
+            seg.count, seg.failures = n, failures
+            seg.first, seg.last = first, last
+            out[seq] = seg
+        return out
+
+    def _check_segment(self, seq: int,
+                       known: Optional[_Segment]) -> Optional[_Segment]:
+        path = os.path.join(self.path, _seg_name(seq))
+        try:
+            with open(path, "rb") as f:
+                magic, version, rsize, base = _SEG_HEADER.unpack(
+                    f.read(_SEG_HEADER.size))
+            if (magic != QL_MAGIC or version != QL_VERSION
+                    or rsize != _RECORD.size):
+                raise ValueError("unknown segment format")
+            size = os.path.getsize(path) - _SEG_HEADER.size
+        except (OSError, ValueError, struct.error) as e:
+            log.warning(f"Query log segment {seq} dropped: {e}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        count, partial = divmod(size, _RECORD.size)
+        if partial:
+            with open(path, "r+b") as f:
+                f.truncate(_SEG_HEADER.size + count * _RECORD.size)
+        if known is not None and known.count == count:
+            known.base = base
+            return known
+        seg = _Segment(seq, base)
+        seg.count = count
+        if count:
+            with open(path, "rb") as f:
+                f.seek(_SEG_HEADER.size)
+                data = f.read(count * _RECORD.size)
+            codes = data[10::_RECORD.size]
+            seg.failures = sum(codes.count(c) for c in FAIL_RCODES)
+            seg.first = base + _RECORD.unpack_from(data, 0)[0] / 1000
+            seg.last = base + _RECORD.unpack_from(
+                data, (count - 1) * _RECORD.size)[0] / 1000
+        return seg
+
+    def _write_index(self):
+        segs = self._segments
+        data = bytearray(_IDX_HEADER.pack(_IDX_MAGIC, QL_VERSION, len(segs)))
+        for s in segs:
+            data += _IDX_ENTRY.pack(s.seq, s.count, s.failures, s.first,
+                                    s.last)
+        path = os.path.join(self.path, "index.dqi")
+        tmp = path + ".tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError as e:
+            log.warning(f"Query log index write error: {e}")
+
+    # ── reading ──
+    def _match_ids(self, pattern: str, seq: int) -> Set[int]:
+        """Ids of segment *seq*'s names matching *pattern* (fnmatch)."""
+        cached = self._patterns.get(pattern)
+        if cached is None:
+            if len(self._patterns) >= 32:
+                self._patterns.clear()
+            cached = self._patterns[pattern] = {}
+        ids, scanned = cached.get(seq, (set(), 0))
+        names = self._names[seq]
+        if scanned < len(names):
+            pat = pattern.lower()
+            # "*.example.com" also means example.com itself
+            apex = pat[2:] if pat.startswith("*.") else None
+            for i in range(scanned, len(names)):
+                n = names[i]
+                if n == apex or fnmatch.fnmatchcase(n, pat):
+                    ids.add(i)
+            cached[seq] = (ids, len(names))
+        return ids
+
+    def search(self, limit: int = 100, pattern: Optional[str] = None,
+               failures_only: bool = False, since: Optional[float] = None,
+               until: Optional[float] = None) -> List[tuple]:
+        """
+        Newest-first records matching every filter, at most *limit*, as
+        ``(when, name, qtype, rcode, latency_ms, upstream, flags)``.
+        """
+        self.flush()
+        with self._lock:
+            if not self._opened:
+                self._open()
+            segs = [(s.seq, s.base, s.count, s.failures, s.first, s.last,
+                     self._names[s.seq],
+                     self._match_ids(pattern, s.seq) if pattern else None)
+                    for s in self._segments]
+        out: List[tuple] = []
+        for seq, base, count, failures, first, last, names, want in \
+                reversed(segs):
+            if not count or (failures_only and not failures):
+                continue
+            if want is not None and not want:
+                continue
+            if until is not None and first > until:
+                continue
+            if since is not None and last < since:
+                break
+            out += self._scan(seq, base, count, limit - len(out), want,
+                              failures_only, since, until, names)
+            if len(out) >= limit:
+                break
+        return out
+
+    def _scan(self, seq, base, count, limit, want, failures_only, since,
+              until, names) -> List[tuple]:
+        path = os.path.join(self.path, _seg_name(seq))
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return []     # dropped by a roll meanwhile
+        with f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            end = _SEG_HEADER.size + count * _RECORD.size
+            with memoryview(mm)[_SEG_HEADER.size:end] as mv:
+                with mv.cast("I") as words:
+                    times = words[0::4].tolist()
+                    nids = words[1::4].tolist()
+                codes = mv[10::_RECORD.size].tolist()
+            lo = 0 if since is None else bisect_left(
+                times, int((since - base) * 1000))
+            hi = count if until is None else bisect_right(
+                times, int((until - base) * 1000))
+            out = []
+            for k in range(hi - 1, lo - 1, -1):
+                if want is not None and nids[k] not in want:
+                    continue
+                if failures_only and codes[k] not in FAIL_RCODES:
+                    continue
+                t_ms, nid, qtype, code, upstream, lat, flags = \
+                    _RECORD.unpack_from(mm, _SEG_HEADER.size
+                                        + k * _RECORD.size)
+                name = names[nid] if nid < len(names) else MALFORMED
+                out.append((base + t_ms / 1000, name, qtype, code, lat,
+                            upstream, flags))
+                if len(out) >= limit:
+                    break
+        return out
+
+    def stats(self) -> Dict[str, int]:
+        self.flush()
+        with self._lock:
+            if not self._opened:
+                self._open()
+            return {
+                "segments": len(self._segments),
+                "records": sum(s.count for s in self._segments),
+                "failures": sum(s.failures for s in self._segments),
+                "names": sum(len(n) for n in self._names.values()),
+            }
+
+
+_QTYPES = {1: "A", 2: "NS", 5: "CNAME", 6: "SOA", 12: "PTR", 15: "MX",
+           16: "TXT", 28: "AAAA", 33: "SRV", 65: "HTTPS"}
+_RCODES = {0: "NOERROR", 1: "FORMERR", 2: "SERVFAIL", 3: "NXDOMAIN",
+           5: "REFUSED"}
+
+
+def format_record(rec: tuple) -> str:
+    """One ``search()`` result as a log-style line."""
+    when, name, qtype, code, lat, upstream, flags = rec
+    if flags & FLAG_BLOCKED:
+        via = "blocked"
+    elif upstream == UPSTREAM_CACHE:
+        via = "cache"
+    elif upstream == UPSTREAM_NONE:
+        via = "no upstream"
+    else:
+        via = f"upstream {upstream} {lat} ms"
+    return (f"{time.strftime('%m-%d %H:%M:%S', time.localtime(when))}  "
+            f"{_RCODES.get(code, code):8} {_QTYPES.get(qtype, qtype):5} "
+            f"{name}  ({via})")
+
+
+def main(argv: List[str]) -> int:
+    import argparse
+
+    from discordia.config import QUERY_LOG_DIR
+
+    ap = argparse.ArgumentParser(prog="python -m discordia.engine.querylog")
+    ap.add_argument("pattern", nargs="?", help="name glob, e.g. *.discord.gg")
+    ap.add_argument("-n", type=int, default=50, help="records to show")
+    ap.add_argument("--failures", action="store_true",
+                    help="SERVFAIL / REFUSED only")
+    ap.add_argument("--hours", type=float, help="only the last N hours")
+    args = ap.parse_args(argv)
+    journal = QueryLog(QUERY_LOG_DIR)
+    since = time.time() - args.hours * 3600 if args.hours else None
+    for rec in reversed(journal.search(args.n, args.pattern, args.failures,
+                                       since)):
+        print(format_record(rec))
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main(sys.argv[1:]))
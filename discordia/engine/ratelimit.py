@@ -0,0 +1,93 @@
+"""
+Token-bucket query rate limiting for the TUN data path.
+
+One misbehaving client (a retry loop, a chatty tracker SDK) must not
+starve the others.  Each client — the source address of its queries —
+drains its own bucket of *burst* tokens refilled at *rate* a second,
+and every query also takes a token from one global bucket
+refilled at *global_rate*.  A query that finds either bucket empty is
+refused (or dropped) before it reaches the cache or the worker pool, so
+a flood costs a multiply and a few float operations per packet.
+
+The source port is left out on purpose: stub resolvers pick a new one
+for every query, so a flood keyed by port would spread over the whole
+table and drain only the global bucket.  Programs on the device itself
+all send from the tunnel's address and so share one bucket; the
+per-client limit tells apart hosts behind it (a tethered laptop, a
+container).
+
+Buckets live in a fixed table indexed by a hash of the client key, not
+in a dict: memory stays the same however many clients come and go, and
+nothing has to be evicted.  Two clients that land in the same slot
+share a bucket, which errs on the side of limiting.
+
+A ``RateLimiter`` is used from the TUN thread only; the engine swaps in
+a new one when the settings change.
+"""
+
+from typing import Tuple
+
+# Fibonacci hashing: spreads source addresses over the table
+_HASH_MUL = 0x9E3779B1
+
+
+class RateLimiter:
+    """Per-client and global token buckets; ``allow()`` takes a token."""
+
+    __slots__ = ("rate", "burst", "global_rate", "global_burst", "refuse",
+                 "_mask", "_tokens", "_stamps", "_gtokens", "_gstamp")
+
+    def __init__(self, rate: float, burst: float, global_rate: float = 0.0,
+                 refuse: bool = True, slots: int = 1024):
+        self.rate = float(rate)
+        self.burst = max(float(burst), 1.0)
+        self.global_rate = float(global_rate)
+        # a second's worth, and never less than one client's burst
+        self.global_burst = max(self.global_rate, self.burst)
+        # answer limited queries with REFUSED (else drop them silently)
+        self.refuse = refuse
+        size = 1 << max(slots - 1, 1).bit_length()
+        self._mask = size - 1
+        self._tokens = [self.burst] * size
+        self._stamps = [0.0] * size
+        self._gtokens = self.global_burst
+        self._gstamp = 0.0
+
+    @property
+    def key(self) -> Tuple[float, float, float, bool]:
+        """What the limiter was built from; equal keys, same behaviour."""
+        return self.rate, self.burst, self.global_rate, self.refuse
+
+    def allow(self, client: int, now: float) -> bool:
+        """Take a token for *client* (an IPv4 source address as an int)
+        at monotonic time *now*."""
+        rate = self.rate
+        if rate > 0:
+            i = (client * _HASH_MUL >> 16) & self._mask
+            tokens = self._tokens[i] + (now - self._stamps[i]) * rate
+            if tokens > self.burst:
+                tokens = self.burst
+            self._stamps[i] = now
+            if tokens < 1.0:
+                self._tokens[i] = tokens
+                return False
+        if self.global_rate > 0:
+            gtokens = self._gtokens + (now - self._gstamp) * self.global_rate
+            if gtokens > self.global_burst:
+                gtokens = self.global_burst
+            self._gstamp = now
+            if gtokens < 1.0:
+                # the client keeps its token: the limit was not its doing
+                self._gtokens = gtokens
+                if rate > 0:
+                    self._tokens[i] = tokens
+                return False
+            self._gtokens = gtokens - 1.0
+        if rate > 0:
+            self._tokens[i] = tokens - 1.0
+        return True
+
+    def __repr__(self) -> str:
+        return (f"<RateLimiter {self.rate:g}/s burst {self.burst:g}, "
+                f"global {self.global_rate:g}/s, "
+                f"{'refuse' if self.refuse else 'drop'}>")
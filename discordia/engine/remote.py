@@ -0,0 +1,320 @@
+"""
+The app's side of the engine process (see ``discordia.engine.service``).
+
+``RemoteEngine`` stands in for ``VPNEngine`` in the UI: state, uptime
+and counters come from the shared ``StatsRing`` — a memory read per
+call — and actions go over the command channel.  Requests carry an id
+and are answered by a reader thread, so several can be in flight and
+none blocks the UI thread unless it waits for the answer itself.
+
+Only the parts that need the app stay here: the Android VPN permission
+dialog (a service cannot show it), launching other apps, and the TLS
+session for the app's own IP lookups.
+"""
+
+import itertools
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from multiprocessing.connection import Client
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from discordia.config import (
+    ENGINE_KEY_FILE, ENGINE_SOCKET, ENGINE_START_TIMEOUT, ENGINE_STATS_FILE,
+    ENGINE_STATS_INTERVAL, IP_LOOKUP_URL,
+)
+from discordia.diag.tracing import tracer
+from discordia.engine.stats import Sample, StatsRing
+from discordia.platform import IS_ANDROID, android
+
+log = logging.getLogger("Discordia")
+
+# a sample older than this means the engine is not running
+STALE_AFTER = ENGINE_STATS_INTERVAL * 6
+
+
+class EngineUnavailable(OSError):
+    """The engine process is not running or stopped answering."""
+
+
+class RemoteEngine:
+    """``VPNEngine``'s interface, backed by the engine process."""
+
+    def __init__(self, address: str = ENGINE_SOCKET,
+                 stats_path: str = ENGINE_STATS_FILE):
+        self.address = address
+        self.ring = StatsRing(stats_path)
+        self._conn = None
+        self._proc: Optional[subprocess.Popen] = None
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, Future] = {}
+        self._send_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+
+    # ── process ──
+    def start(self):
+        """Attach to a running engine process, or start one."""
+        with self._start_lock:
+            if self._conn is not None:
+                return
+            conn = self._attach()
+            if conn is None:
+                with tracer.span("engine.spawn"):
+                    conn = self._spawn_and_attach()
+            self._conn = conn
+            threading.Thread(target=self._read_loop, args=(conn,),
+                             name="Discordia-EngineLink",
+                             daemon=True).start()
+        log.info(f"Engine process {self._call('ping')} attached")
+
+    def _spawn_and_attach(self):
+        self._spawn()
+        conn = None
+        deadline = time.monotonic() + ENGINE_START_TIMEOUT
+        while conn is None and time.monotonic() < deadline:
+            if self._proc is not None and self._proc.poll() is not None:
+                raise EngineUnavailable(
+                    f"engine exited with {self._proc.returncode}")
+            time.sleep(0.05)
+            conn = self._attach()
+        if conn is None:
+            raise EngineUnavailable("engine did not start")
+        return conn
+
+    def _attach(self):
+        try:
+            with open(ENGINE_KEY_FILE, "rb") as f:
+                key = f.read()
+            return Client(self.address, "AF_UNIX", authkey=key)
+        except (OSError, EOFError) as exc:
+            log.debug(f"Engine attach: {exc}")
+            return None
+
+    def _spawn(self):
+        if IS_ANDROID:
+            android.start_engine_service()
+            return
+        # a fresh interpreter: the engine must not import Kivy or the
+        # app's main module, as multiprocessing's spawn would
+        root = os.path.dirname(os.path.dirname(os.path.dirname(
+            os.path.abspath(__file__))))
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            p for p in (root, env.get("PYTHONPATH")) if p)
+        self._proc = subprocess.Popen(
+            [sys.executable, "-m", "discordia.engine.service",
+             "--parent", str(os.getpid())],
+            env=env,
+        )
+
+    def stop(self, timeout: float = 5.0):
+        """Ask the engine to exit (it disconnects first) and wait."""
+        if self._conn is not None:
+            try:
+                self._call("shutdown", timeout=timeout)
+            except OSError as exc:
+                log.warning(f"Engine shutdown: {exc}")
+            self._close()
+        if self._proc is not None:
+            try:
+                self._proc.wait(timeout)
+            except subprocess.TimeoutExpired:
+                self._proc.kill()
+            self._proc = None
+
+    def _close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            conn.close()
+        for rid in list(self._pending):
+            fut = self._pending.pop(rid, None)
+            if fut is not None and not fut.done():
+                fut.set_exception(EngineUnavailable("engine link closed"))
+
+    # ── command channel ──
+    def _read_loop(self, conn):
+        while True:
+            try:
+                rid, ok, result = conn.recv()
+            except (EOFError, OSError):
+                break
+            fut = self._pending.pop(rid, None)
+            if fut is None:
+                continue
+            if ok:
+                fut.set_result(result)
+            else:
+                fut.set_exception(RuntimeError(result))
+        if self._conn is conn:
+            log.warning("Engine link lost")
+            self._close()
+
+    def _send(self, command: str, *args) -> Future:
+        fut: Future = Future()
+        conn = self._conn
+        if conn is None:
+            fut.set_exception(EngineUnavailable("engine not started"))
+            return fut
+        rid = next(self._ids)
+        self._pending[rid] = fut
+        try:
+            with self._send_lock:
+                conn.send((rid, command, args))
+        except OSError as exc:
+            self._pending.pop(rid, None)
+            fut.set_exception(EngineUnavailable(str(exc)))
+        return fut
+
+    def _call(self, command: str, *args, timeout: float = 30.0):
+        try:
+            with tracer.span(f"engine.{command}"):
+                return self._send(command, *args).result(timeout)
+        except FutureTimeout:
+            raise EngineUnavailable(f"{command}: no answer in {timeout} s")
+
+    # ── status, from the stats ring ──
+    def sample(self) -> Optional[Sample]:
+        """The engine's newest sample; None when it is not running."""
+        s = self.ring.latest()
+        if s is None or time.time() - s.time > STALE_AFTER:
+            return None
+        return s
+
+    @property
+    def connected(self) -> bool:
+        s = self.sample()
+        return s is not None and s.connected
+
+    @property
+    def mode(self) -> str:
+        s = self.sample()
+        return s.mode if s is not None else "doh"
+
+    @property
+    def uptime_seconds(self) -> int:
+        s = self.sample()
+        if s is None or not s.connected or not s.connect_time:
+            return 0
+        return max(int(time.time() - s.connect_time), 0)
+
+    @property
+    def uptime_str(self) -> str:
+        h, rem = divmod(self.uptime_seconds, 3600)
+        m, s = divmod(rem, 60)
+        return f"{h:02d}:{m:02d}:{s:02d}"
+
+    def stats(self) -> Dict[str, object]:
+        """``VPNEngine.stats()`` as last published."""
+        s = self.sample()
+        if s is None:
+            return {"connected": False, "mode": "doh", "connect_time": 0.0,
+                    "bytes_rx": 0, "bytes_tx": 0, "queries": 0,
+                    "cache_hits": 0, "blocked": 0, "upstream_errors": 0,
+                    "tls_handshakes": 0, "tls_resumed": 0, "first_ms": None,
+                    "rx_rate": 0.0, "tx_rate": 0.0}
+        out = s._asdict()
+        del out["time"]
+        return out
+
+    # ── actions ──
+    def connect(self, mode: str = "doh") -> Tuple[bool, str]:
+        if IS_ANDROID:
+            try:
+                if not android.ensure_vpn_permission():
+                    return False, "VPN permission denied by user"
+            except Exception as exc:
+                log.error(f"VPN connect error: {exc}")
+                return False, str(exc)
+        try:
+            if self._conn is None:
+                self.start()
+            return tuple(self._call("connect", mode))
+        except (OSError, RuntimeError) as exc:
+            log.error(f"Engine connect error: {exc}")
+            return False, str(exc)
+
+    def disconnect(self) -> Tuple[bool, str]:
+        try:
+            return tuple(self._call("disconnect"))
+        except (OSError, RuntimeError) as exc:
+            log.error(f"Engine disconnect error: {exc}")
+            return False, str(exc)
+
+    def reconfigure(self) -> Tuple[bool, str]:
+        try:
+            return tuple(self._call("reconfigure"))
+        except (OSError, RuntimeError) as exc:
+            log.error(f"Engine reconfigure error: {exc}")
+            return False, str(exc)
+
+    def prewarm(self):
+        """Warm the app's IP lookup session here, the upstreams there."""
+        host = urlsplit(IP_LOOKUP_URL).hostname
+
+        def _run():
+            from discordia.engine import tls
+            tls.prewarm([(host, 443, host)])
+
+        threading.Thread(target=_run, name="Discordia-TLS-Warm",
+                         daemon=True).start()
+        self._send("prewarm")
+
+    def check_network(self):
+        """Have the engine check for a network change; never waits.  On
+        a change the app's own HTTPS connections are renewed too."""
+        def _done(fut: Future):
+            if fut.exception() is None and fut.result():
+                from discordia.engine import tls
+                tls.close_idle()
+                self.prewarm()
+
+        self._send("check_network").add_done_callback(_done)
+
+    def metrics(self) -> Dict[str, object]:
+        """The engine process's ``metrics.snapshot()``."""
+        return self._call("metrics")
+
+    def trace_events(self) -> List[tuple]:
+        """The engine process's spans (``Tracer.events()``); none when
+        it is not running."""
+        try:
+            return self._send("trace").result(5.0)
+        except (FutureTimeout, OSError, RuntimeError) as exc:
+            log.warning(f"Engine trace unavailable: {exc}")
+            return []
+
+    def launch_wireguard(self):
+        if not IS_ANDROID:
+            return
+        try:
+            android.launch_package("com.wireguard.android")
+        except Exception as exc:
+            log.error(f"WireGuard launch error: {exc}")
+
+    def launch_warp(self):
+        if not IS_ANDROID:
+            return
+        try:
+            android.launch_package("com.cloudflare.onedotonedotonedotone")
+        except Exception as exc:
+            log.error(f"WARP launch error: {exc}")
+
+
+class RemoteQueryLog:
+    """The engine's query journal, searched through the engine (it is
+    the only process that may open the files)."""
+
+    def __init__(self, engine: RemoteEngine):
+        self.engine = engine
+
+    def search(self, limit: int = 100, **kwargs) -> List[tuple]:
+        return self.engine._call("search_log", limit, kwargs)
+
+    def close(self):
+        pass  # the engine closes its journal on shutdown
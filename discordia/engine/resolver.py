@@ -0,0 +1,231 @@
+"""
+Forwarding resolver: answer cache in front of one or more upstreams.
+"""
+
+import logging
+import time
+from typing import List, Optional, Sequence, Tuple
+
+from discordia.diag.metrics import metrics
+from discordia.diag.tracing import tracer
+from discordia.engine.dnscache import DNSCache
+from discordia.engine.pipeline import (
+    BlockStage, CacheStage, ForwardStage, JournalStage, Pipeline,
+    QueryContext, RouteStage, Stage,
+)
+from discordia.engine.transport import UDPTransport
+
+log = logging.getLogger("Discordia")
+
+QUERIES = metrics.counter("dns_queries_total", "DNS queries received")
+CACHE_HITS = metrics.counter("dns_cache_hits_total",
+                             "Queries answered from the answer cache")
+BLOCKED = metrics.counter("dns_blocked_total",
+                          "Queries refused by the blocklist")
+UPSTREAM_ERRORS = metrics.counter("dns_upstream_errors_total",
+                                  "Failed upstream attempts")
+UPSTREAM_MS = metrics.histogram("dns_upstream_latency_ms",
+                                "Upstream round trip, milliseconds")
+CACHE_ENTRIES = metrics.gauge("dns_cache_entries", "Live answer cache size")
+FIRST_QUERY_MS = metrics.histogram(
+    "dns_first_query_ms", "First upstream answer on new upstreams, ms")
+
+# Names to present during the TLS handshake for well-known resolver IPs.
+TLS_NAMES = {
+    "1.1.1.1": "cloudflare-dns.com",
+    "1.0.0.1": "cloudflare-dns.com",
+    "8.8.8.8": "dns.google",
+    "8.8.4.4": "dns.google",
+    "9.9.9.9": "dns.quad9.net",
+}
+
+
+def _split_port(server: str, default: int) -> Tuple[str, int]:
+    """``(host, port)`` of ``host[:port]``; ValueError naming *server*
+    when the port is not one."""
+    host, _, port = server.partition(":")
+    if not port:
+        return host, default
+    if not port.isdigit() or not 0 < int(port) < 65536:
+        raise ValueError(f"bad port in DNS server {server!r}")
+    return host, int(port)
+
+
+def dot_server(server: str) -> Tuple[str, int, str]:
+    """``(host, port, TLS name)`` of a DoT ``server`` setting value."""
+    server, _, name = server.partition("#")
+    host, port = _split_port(server, 853)
+    return host, port, name or TLS_NAMES.get(host) or host
+
+
+def make_transport(protocol: str, server: str):
+    """
+    Build the upstream transport for a ``protocol`` setting value.
+
+    ``"dot"`` selects DNS-over-TLS; everything else (``"doh"`` and
+    ``"wireguard"``) forwards plain UDP like the Android service does.
+    A server may carry an explicit port as ``host:port``, and a TLS name
+    as ``host:port#name`` (``1.1.1.1#cloudflare-dns.com``).  Raises
+    ValueError on a port that is not one.
+    """
+    if protocol == "dot":
+        from discordia.engine.dot import DoTTransport
+        host, port, name = dot_server(server)
+        return DoTTransport(host, port, server_name=name)
+    host, port = _split_port(server.partition("#")[0], 53)
+    return UDPTransport(host, port)
+
+
+def make_upstreams(protocol: str, servers: List[str]) -> List:
+    """Transports for *servers*; one that does not parse is left out."""
+    upstreams = []
+    for server in servers:
+        if not server:
+            continue
+        try:
+            upstreams.append(make_transport(protocol, server))
+        except ValueError as e:
+            log.error(f"Upstream skipped: {e}")
+    return upstreams
+
+
+def _stage_setting(name: str) -> property:
+    """A ``Resolver`` attribute whose replacement rebuilds the pipeline."""
+    attr = "_" + name
+
+    def fget(self):
+        return getattr(self, attr)
+
+    def fset(self, value):
+        setattr(self, attr, value)
+        self._build()
+
+    return property(fget, fset)
+
+
+class Resolver:
+    """
+    Answer from cache when possible, otherwise try each upstream in
+    order.  A query that no upstream could answer gets SERVFAIL, and a
+    name on *blocklist* gets NXDOMAIN without leaving the device.  Every
+    answer is recorded in *journal* (a ``QueryLog``) when one is given,
+    and shown to *domain_routes* (a ``DomainRoutes``), cached or not.
+
+    Each of these is a stage of ``pipeline`` (see
+    ``discordia.engine.pipeline``), in the order journal, block, the
+    extra *stages*, route, cache, forward; one that is None is left out.
+
+    ``upstreams``, ``blocklist``, ``domain_routes``, ``journal`` and
+    ``stages`` may be replaced while queries are in flight: each query
+    reads the pipeline once, so it runs entirely on either the old or
+    the new value.  Replace them whole, never mutate them.
+
+    ``first_ms`` is the latency of the first forwarded query on the
+    current upstreams — what a user feels right after connecting.
+    """
+
+    def __init__(self, upstreams: List, cache: Optional[DNSCache] = None,
+                 timeout: float = 5.0, journal=None, blocklist=None,
+                 domain_routes=None, stages: Sequence[Stage] = ()):
+        self.upstreams = upstreams
+        self.timeout = timeout
+        self.first_ms: Optional[float] = None
+        self._cache = cache
+        self._journal = journal
+        self._blocklist = blocklist
+        self._domain_routes = domain_routes
+        self._stages = tuple(stages)
+        self._forward_stage = ForwardStage(self)
+        self._build()
+
+    @classmethod
+    def from_settings(cls, protocol: str, servers: List[str],
+                      cache: Optional[DNSCache] = None,
+                      journal=None, blocklist=None,
+                      domain_routes=None,
+                      stages: Sequence[Stage] = ()) -> "Resolver":
+        return cls(make_upstreams(protocol, servers),
+                   cache=cache, journal=journal, blocklist=blocklist,
+                   domain_routes=domain_routes, stages=stages)
+
+    # ── pipeline ──
+    def _build(self):
+        stages = []
+        if self._journal is not None:
+            stages.append(JournalStage(self._journal))
+        if self._blocklist is not None:
+            stages.append(BlockStage(self._blocklist, BLOCKED))
+        stages += self._stages
+        if self._domain_routes is not None:
+            stages.append(RouteStage(self._domain_routes))
+        if self._cache is not None:
+            stages.append(CacheStage(self._cache, CACHE_HITS, CACHE_ENTRIES))
+        stages.append(self._forward_stage)
+        self.pipeline = Pipeline(stages)
+
+    cache = _stage_setting("cache")
+    journal = _stage_setting("journal")
+    blocklist = _stage_setting("blocklist")
+    domain_routes = _stage_setting("domain_routes")
+    stages = _stage_setting("stages")
+
+    # ── queries ──
+    def resolve(self, query: bytes) -> bytes:
+        hit = self.cached(query)
+        if hit is not None:
+            return hit
+        return self.forward(query)
+
+    def cached(self, query: bytes) -> Optional[bytes]:
+        """Count the query and return a blocked or cached reply, if any."""
+        QUERIES.inc()
+        return self.pipeline.local(QueryContext(query))
+
+    def forward(self, query: bytes) -> bytes:
+        """Ask the upstreams (no cache lookup) and cache the answer."""
+        return self.pipeline.forward(QueryContext(query))
+
+    def _ask_upstreams(self, query: bytes
+                       ) -> Tuple[Optional[bytes], int, float]:
+        """``(answer, upstream index, ms)``; answer None if all failed."""
+        start = time.perf_counter()
+        upstreams = self.upstreams
+        for pos, upstream in enumerate(upstreams):
+            t0 = time.perf_counter()
+            try:
+                resp = upstream.resolve(query, self.timeout)
+            except OSError as e:
+                UPSTREAM_ERRORS.inc()
+                log.debug(f"Upstream {upstream!r} failed: {e}")
+                continue
+            UPSTREAM_MS.observe((time.perf_counter() - t0) * 1000)
+            ms = (time.perf_counter() - start) * 1000
+            if self.first_ms is None:
+                self.first_ms = ms
+                FIRST_QUERY_MS.observe(ms)
+                tracer.complete("dns.first_answer", int(start * 1e9),
+                                int(ms * 1e6), upstream=repr(upstream))
+                log.info(f"First upstream answer in {ms:.1f} ms "
+                         f"via {upstream!r}")
+            return resp, pos, ms
+        return None, -1, (time.perf_counter() - start) * 1000
+
+    def swap_upstreams(self, upstreams: List) -> List:
+        """
+        Send new queries to *upstreams*; return the previous list.
+
+        Queries already forwarded finish on the old transports, so close
+        those only once ``timeout`` has passed.
+        """
+        old, self.upstreams = self.upstreams, upstreams
+        self.first_ms = None
+        return old
+
+    def warm(self):
+        for upstream in self.upstreams:
+            with tracer.span("upstream.warm", upstream=repr(upstream)):
+                upstream.warm()
+
+    def close(self):
+        for upstream in self.upstreams:
+            upstream.close()
@@ -0,0 +1,231 @@
+"""
+CIDR route planner.
+
+Turns include/exclude prefix lists into the smallest equivalent set of
+CIDR routes.  Prefixes are handled as inclusive integer ranges:
+
+    parse → sort + merge includes → sort + merge excludes
+          → subtract (linear sweep) → split each range into CIDR blocks
+
+Sorting dominates, so planning is O(n log n) in the number of prefixes,
+and the output has at most 2·bits blocks per remaining range.
+
+``IntervalSet`` keeps such ranges for lookups: membership is a binary
+search, so it stays O(log n) per packet however many ranges there are.
+"""
+
+import logging
+import os
+import socket
+from bisect import bisect_left, bisect_right
+from typing import Iterable, Iterator, List, Tuple
+
+log = logging.getLogger("Discordia")
+
+Range = Tuple[int, int]
+
+_FAMILIES = (
+    (socket.AF_INET, 32),
+    (socket.AF_INET6, 128),
+)
+
+
+def parse_prefix(text: str) -> Tuple[int, Range]:
+    """
+    Parse ``addr[/len]`` into ``(bits, (first, last))``.
+
+    Host bits below the prefix length are ignored, so ``10.1.2.3/8``
+    means ``10.0.0.0/8``.  Raises ValueError on bad input.
+    """
+    addr, _, plen = text.strip().partition("/")
+    if ":" in addr:
+        fam, bits = _FAMILIES[1]
+    else:
+        fam, bits = _FAMILIES[0]
+    try:
+        value = int.from_bytes(socket.inet_pton(fam, addr), "big")
+    except OSError:
+        raise ValueError(f"bad address: {text!r}")
+    length = int(plen) if plen else bits
+    if not 0 <= length <= bits:
+        raise ValueError(f"bad prefix length: {text!r}")
+    size = 1 << (bits - length)
+    first = value & ~(size - 1)
+    return bits, (first, first + size - 1)
+
+
+def merge(ranges: List[Range]) -> List[Range]:
+    """Sort *ranges* and coalesce overlapping or adjacent ones."""
+    if not ranges:
+        return []
+    ranges.sort()
+    out = []
+    cur_s, cur_e = ranges[0]
+    for s, e in ranges:
+        if s <= cur_e + 1:
+            if e > cur_e:
+                cur_e = e
+        else:
+            out.append((cur_s, cur_e))
+            cur_s, cur_e = s, e
+    out.append((cur_s, cur_e))
+    return out
+
+
+def subtract(include: List[Range], exclude: List[Range]) -> List[Range]:
+    """Remove *exclude* from *include*; both must already be merged."""
+    out = []
+    j = 0
+    n = len(exclude)
+    for s, e in include:
+        while j < n and exclude[j][1] < s:
+            j += 1
+        k = j
+        while k < n and exclude[k][0] <= e:
+            xs, xe = exclude[k]
+            if xs > s:
+                out.append((s, xs - 1))
+            s = xe + 1
+            if s > e:
+                break
+            k += 1
+        if s <= e:
+            out.append((s, e))
+    return out
+
+
+def to_cidrs(first: int, last: int, bits: int) -> List[Tuple[int, int]]:
+    """Split an inclusive range into the minimal list of (start, len)."""
+    out = []
+    while first <= last:
+        size = first & -first if first else 1 << bits
+        span = last - first + 1
+        while size > span:
+            size >>= 1
+        out.append((first, bits - size.bit_length() + 1))
+        first += size
+    return out
+
+
+def _format(start: int, length: int, bits: int) -> str:
+    fam = socket.AF_INET if bits == 32 else socket.AF_INET6
+    addr = socket.inet_ntop(fam, start.to_bytes(bits // 8, "big"))
+    return f"{addr}/{length}"
+
+
+def plan_routes(include: Iterable[str],
+                exclude: Iterable[str] = ()) -> List[str]:
+    """
+    Return the minimal CIDR list covering *include* minus *exclude*.
+
+    IPv4 routes come first, then IPv6.  Unparseable entries are skipped
+    with a warning rather than failing the whole plan.
+    """
+    inc = {32: [], 128: []}
+    exc = {32: [], 128: []}
+    bad = 0
+    for target, items in ((inc, include), (exc, exclude)):
+        for text in items:
+            if not text or not text.strip():
+                continue
+            try:
+                bits, rng = parse_prefix(text)
+            except ValueError:
+                bad += 1
+                continue
+            target[bits].append(rng)
+    if bad:
+        log.warning(f"Route planner skipped {bad} invalid prefixes")
+
+    routes = []
+    for bits in (32, 128):
+        ranges = subtract(merge(inc[bits]), merge(exc[bits]))
+        for first, last in ranges:
+            routes.extend(_format(s, ln, bits)
+                          for s, ln in to_cidrs(first, last, bits))
+    return routes
+
+
+class IntervalSet:
+    """
+    Sorted, disjoint inclusive integer ranges with O(log n) membership.
+
+    ``add`` and ``remove`` build new lists and replace them whole, so
+    ``in`` from another thread needs no lock — it sees the set either
+    before or after a change.  Writers must be serialised by the caller.
+    """
+
+    __slots__ = ("_spans",)
+
+    def __init__(self, ranges: Iterable[Range] = ()):
+        merged = merge(list(ranges))
+        self._spans: Tuple[List[int], List[int]] = (
+            [s for s, _ in merged], [e for _, e in merged]
+        )
+
+    def __contains__(self, value: int) -> bool:
+        starts, ends = self._spans
+        i = bisect_right(starts, value) - 1
+        return i >= 0 and value <= ends[i]
+
+    def __len__(self) -> int:
+        return len(self._spans[0])
+
+    def __iter__(self) -> Iterator[Range]:
+        return zip(*self._spans)
+
+    def add(self, first: int, last: int) -> bool:
+        """Cover ``first..last``; False when it already was."""
+        starts, ends = self._spans
+        # ranges overlapping or touching first..last
+        lo = bisect_left(ends, first - 1)
+        hi = bisect_right(starts, last + 1)
+        if lo < hi:
+            if hi - lo == 1 and starts[lo] <= first and last <= ends[lo]:
+                return False
+            first = min(first, starts[lo])
+            last = max(last, ends[hi - 1])
+        self._spans = (starts[:lo] + [first] + starts[hi:],
+                       ends[:lo] + [last] + ends[hi:])
+        return True
+
+    def remove(self, first: int, last: int) -> bool:
+        """Uncover ``first..last``; False when none of it was covered."""
+        starts, ends = self._spans
+        # ranges overlapping first..last
+        lo = bisect_left(ends, first)
+        hi = bisect_right(starts, last)
+        if lo >= hi:
+            return False
+        keep_s, keep_e = [], []
+        if starts[lo] < first:
+            keep_s.append(starts[lo])
+            keep_e.append(first - 1)
+        if ends[hi - 1] > last:
+            keep_s.append(last + 1)
+            keep_e.append(ends[hi - 1])
+        self._spans = (starts[:lo] + keep_s + starts[hi:],
+                       ends[:lo] + keep_e + ends[hi:])
+        return True
+
+    def cidrs(self, bits: int = 32) -> List[str]:
+        """The set as the fewest CIDR blocks of a *bits*-wide family."""
+        return [_format(s, ln, bits)
+                for first, last in self
+                for s, ln in to_cidrs(first, last, bits)]
+
+
+def load_prefix_file(path: str) -> List[str]:
+    """Read one prefix per line; blank lines and ``#`` comments ignored."""
+    if not os.path.exists(path):
+        return []
+    out = []
+    try:
+        with open(path) as f:
+            for line in f:
+                line = line.split("#", 1)[0].strip()
+                if line:
+                    out.append(line)
+    except OSError as e:
+        log.error(f"Route list {path}: {e}")
+    return out
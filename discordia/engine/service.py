@@ -0,0 +1,237 @@
+"""
+The engine process: ``VPNEngine`` with its resolver, TUN loop and
+stores, away from the Kivy process and its GIL.
+
+Started by ``RemoteEngine`` as ``python -m discordia.engine.service``
+on the desktop and as the p4a background service ``Engine`` on Android
+(buildozer.spec ``services``).  It
+
+  * listens on ``ENGINE_SOCKET`` (``multiprocessing.connection``, with
+    a fresh key in ``ENGINE_KEY_FILE`` that only this user can read) for
+    ``(id, command, args)`` requests and answers each with
+    ``(id, ok, result)`` — commands that change the engine run one at a
+    time in arrival order, and the read-only ones on a small pool, so a
+    slow connect does not hold up a log search;
+  * publishes ``VPNEngine.stats()`` to the ``StatsRing`` in
+    ``ENGINE_STATS_FILE`` every ``ENGINE_STATS_INTERVAL`` seconds, and
+    at once after connect, disconnect and reconfigure;
+  * times each command as a span, and hands its spans to the app's
+    trace export (``trace``);
+  * exits when the app goes away while disconnected, on ``shutdown``,
+    or (desktop) when the parent process dies.  A connected engine
+    outlives the app's connection and waits for the next one.
+
+Settings are read from ``settings.json``: the app saves before sending
+a command, and every command reloads the file first.
+"""
+
+import argparse
+import logging
+import os
+import secrets
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener
+
+from discordia.config import (
+    ENGINE_KEY_FILE, ENGINE_METRICS_FILE, ENGINE_SOCKET, ENGINE_STATS_FILE,
+    ENGINE_STATS_INTERVAL, METRICS_DUMP_INTERVAL,
+)
+from discordia.diag.metrics import metrics
+from discordia.diag.tracing import tracer
+from discordia.engine.stats import StatsRing
+from discordia.engine.vpn import query_log, session_store, vpn_engine
+from discordia.storage.settings import settings
+
+log = logging.getLogger("Discordia")
+
+# commands that change what the stats show
+_STATE_COMMANDS = {"connect", "disconnect", "reconfigure"}
+# safe next to anything; every other command runs on the serial executor
+_READ_ONLY = {"metrics", "trace", "search_log", "ping"}
+# not worth a span: the app's periodic poll, and the export itself
+_UNTRACED = {"check_network", "trace"}
+
+
+class EngineService:
+    """Command server and stats publisher around ``vpn_engine``."""
+
+    def __init__(self, address: str = ENGINE_SOCKET,
+                 stats_path: str = ENGINE_STATS_FILE,
+                 parent: int = 0):
+        self.address = address
+        self.ring = StatsRing.create(stats_path)
+        self.parent = parent
+        self._pool = ThreadPoolExecutor(4, thread_name_prefix="Discordia-Cmd")
+        # connect, disconnect, reconfigure and check_network all swap the
+        # engine's resolver, TUN and routes; two at once would interleave
+        self._serial = ThreadPoolExecutor(
+            1, thread_name_prefix="Discordia-Engine")
+        self._send_lock = threading.Lock()
+        self._publish_lock = threading.Lock()
+        self._stop = threading.Event()
+        vpn_engine.tls_lookup = False
+
+    # ── commands ──
+    def handle(self, command: str, args: tuple):
+        settings.load()
+        if command == "connect":
+            return vpn_engine.connect(*args)
+        if command == "disconnect":
+            return vpn_engine.disconnect()
+        if command == "reconfigure":
+            return vpn_engine.reconfigure()
+        if command == "prewarm":
+            return vpn_engine.prewarm()
+        if command == "check_network":
+            return vpn_engine.check_network()
+        if command == "search_log":
+            limit, kwargs = args
+            return query_log.search(limit, **kwargs)
+        if command == "metrics":
+            return metrics.snapshot()
+        if command == "trace":
+            return tracer.events()
+        if command == "ping":
+            return os.getpid()
+        if command == "shutdown":
+            return True
+        raise ValueError(f"unknown engine command {command!r}")
+
+    def _run(self, conn, rid: int, command: str, args: tuple):
+        try:
+            if command in _UNTRACED:
+                result = self.handle(command, args)
+            else:
+                with tracer.span(f"service.{command}"):
+                    result = self.handle(command, args)
+            reply = (rid, True, result)
+        except Exception as exc:
+            log.error(f"Engine command {command} failed: {exc}")
+            reply = (rid, False, f"{type(exc).__name__}: {exc}")
+        if command in _STATE_COMMANDS:
+            self.publish()
+        try:
+            with self._send_lock:
+                conn.send(reply)
+        except OSError:
+            pass  # the app went away meanwhile
+        if command == "shutdown":
+            self.stop()
+
+    def _serve(self, conn):
+        """Read requests from one app connection until it closes."""
+        while not self._stop.is_set():
+            try:
+                rid, command, args = conn.recv()
+            except (EOFError, OSError):
+                return
+            executor = self._pool if command in _READ_ONLY else self._serial
+            executor.submit(self._run, conn, rid, command, args)
+
+    # ── stats ──
+    def publish(self):
+        with self._publish_lock:
+            self.ring.publish(vpn_engine.stats(), time.time())
+
+    def _publish_loop(self):
+        while not self._stop.wait(ENGINE_STATS_INTERVAL):
+            self.publish()
+            if self.parent and not _alive(self.parent):
+                log.info("Engine: app process gone, stopping")
+                self.stop()
+
+    # ── lifecycle ──
+    def _listen(self) -> Listener:
+        try:
+            os.unlink(self.address)  # left by a killed engine
+        except FileNotFoundError:
+            pass
+        key = secrets.token_bytes(32)
+        fd = os.open(ENGINE_KEY_FILE,
+                     os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(key)
+        return Listener(self.address, "AF_UNIX", authkey=key)
+
+    def stop(self):
+        """Make ``run()`` return (callable from any thread)."""
+        self._stop.set()
+        # closing a listener does not wake accept(); a connection does
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            s.connect(self.address)
+        except OSError:
+            pass
+        finally:
+            s.close()
+
+    def run(self):
+        self.publish()
+        listener = self._listen()
+        threading.Thread(target=self._publish_loop,
+                         name="Discordia-Stats", daemon=True).start()
+        log.info(f"Engine process {os.getpid()} listening on {self.address}")
+        try:
+            while not self._stop.is_set():
+                try:
+                    conn = listener.accept()
+                except (OSError, EOFError, AuthenticationError) as exc:
+                    # stop()'s wake-up, or a client without the key
+                    if not self._stop.is_set():
+                        log.warning(f"Engine: rejected connection: {exc}")
+                    continue
+                self._serve(conn)
+                conn.close()
+                if not vpn_engine.connected:
+                    break
+                log.info("Engine: app disconnected, tunnel stays up")
+        finally:
+            listener.close()
+            self.shutdown()
+
+    def shutdown(self):
+        self._stop.set()
+        # let a running command finish before the disconnect; drop the rest
+        self._serial.shutdown(wait=True, cancel_futures=True)
+        if vpn_engine.connected:
+            vpn_engine.disconnect()
+        self._pool.shutdown(wait=True)
+        self.publish()
+        session_store.flush()
+        query_log.close()
+        metrics.stop_json_dump()
+        metrics.dump_json(ENGINE_METRICS_FILE)
+        log.info("Engine process stopped")
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def main():
+    ap = argparse.ArgumentParser(prog="discordia.engine.service")
+    ap.add_argument("--parent", type=int, default=0,
+                    help="exit when this process is gone")
+    args = ap.parse_args([] if "PYTHON_SERVICE_ARGUMENT" in os.environ
+                         else None)
+    logging.basicConfig(
+        level=logging.DEBUG,
+        format="%(asctime)s [%(levelname)s] [engine] %(message)s",
+    )
+    metrics.start_json_dump(ENGINE_METRICS_FILE, METRICS_DUMP_INTERVAL)
+    tracer.process_name = "Discordia engine"
+    EngineService(parent=args.parent).run()
+
+
+if __name__ == "__main__":
+    main()
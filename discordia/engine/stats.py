@@ -0,0 +1,176 @@
+"""
+Engine status shared between processes through a memory-mapped ring.
+
+The engine process publishes a fixed-size sample (state, traffic, DNS
+and TLS counters, bandwidth) a few times a second; the UI maps the same
+file and reads the newest sample with ``struct.unpack_from`` — no
+syscall, no pickling, no lock.
+
+    ENGINE_STATS_FILE
+    ┌────────────────────────────────────────────────────────────────┐
+    │ header  magic "DVST" · version u16 · slots u16 · slot size u32 │
+    │         · head u64 (samples published so far)                  │
+    │ slots   seq u64 · the fields of ``Sample``, packed by _SLOT    │
+    └────────────────────────────────────────────────────────────────┘
+
+One writer, any number of readers.  Sample *n* goes to slot
+``n % slots`` under a sequence lock: the writer sets the slot's ``seq``
+to ``2n + 1`` (odd: being written), packs the fields, sets ``2n + 2``
+and only then advances ``head``.  A reader takes slot ``head - 1`` and
+keeps it if ``seq`` reads ``2·head`` before and after the fields; a
+reader that lost the race (or lagged a whole lap) retries with the new
+head.  The file is never unlinked, so a restarted engine reuses the
+mapping a running UI already holds.
+"""
+
+import logging
+import math
+import mmap
+import os
+import struct
+from collections import namedtuple
+from typing import Dict, List, Optional
+
+log = logging.getLogger("Discordia")
+
+ST_MAGIC = b"DVST"
+ST_VERSION = 1
+_HEADER = struct.Struct("<4sHHIQ")
+_HEAD = struct.Struct("<Q")
+_HEAD_OFF = 12
+_SEQ = struct.Struct("<Q")
+
+# seq · time · connected · mode · connect_time · bytes_rx · bytes_tx ·
+# queries · cache_hits · blocked · upstream_errors · tls_handshakes ·
+# tls_resumed · first_ms (NaN: none yet) · rx_rate · tx_rate
+_SLOT = struct.Struct("<QdBB6xd8Qddd")
+
+Sample = namedtuple("Sample", (
+    "time", "connected", "mode", "connect_time", "bytes_rx", "bytes_tx",
+    "queries", "cache_hits", "blocked", "upstream_errors", "tls_handshakes",
+    "tls_resumed", "first_ms", "rx_rate", "tx_rate",
+))
+
+MODES = ("doh", "dot", "wireguard")
+
+
+class StatsRing:
+    """Writer (``create``) or reader (``open``) of the stats file."""
+
+    def __init__(self, path: str, slots: int = 64):
+        self.path = path
+        self.slots = slots
+        self._mm: Optional[mmap.mmap] = None
+        self._head = 0
+
+    @classmethod
+    def create(cls, path: str, slots: int = 64) -> "StatsRing":
+        """Map *path* for writing, reset to an empty ring."""
+        ring = cls(path, slots)
+        size = _HEADER.size + slots * _SLOT.size
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.fstat(fd).st_size != size:
+                os.ftruncate(fd, size)
+            ring._mm = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        # readers see head 0 (nothing yet) until the first publish
+        _HEAD.pack_into(ring._mm, _HEAD_OFF, 0)
+        _HEADER.pack_into(ring._mm, 0, ST_MAGIC, ST_VERSION, slots,
+                          _SLOT.size, 0)
+        return ring
+
+    def _map(self) -> bool:
+        """Reader side: map the file once the engine has created it."""
+        try:
+            with open(self.path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return False
+        magic, version, slots, slot_size, _ = _HEADER.unpack_from(mm, 0)
+        if (magic != ST_MAGIC or version != ST_VERSION
+                or slot_size != _SLOT.size
+                or len(mm) < _HEADER.size + slots * slot_size):
+            mm.close()
+            return False
+        self.slots = slots
+        self._mm = mm
+        return True
+
+    # ── writer ──
+    def publish(self, stats: Dict[str, object], now: float):
+        """Append one sample built from ``VPNEngine.stats()``."""
+        mm = self._mm
+        n = self._head
+        off = _HEADER.size + (n % self.slots) * _SLOT.size
+        first_ms = stats["first_ms"]
+        mode = stats["mode"]
+        _SEQ.pack_into(mm, off, 2 * n + 1)
+        _SLOT.pack_into(
+            mm, off, 2 * n + 1, now, bool(stats["connected"]),
+            MODES.index(mode) if mode in MODES else 0,
+            stats["connect_time"], stats["bytes_rx"], stats["bytes_tx"],
+            stats["queries"], stats["cache_hits"], stats["blocked"],
+            stats["upstream_errors"], stats["tls_handshakes"],
+            stats["tls_resumed"],
+            math.nan if first_ms is None else first_ms,
+            stats["rx_rate"], stats["tx_rate"],
+        )
+        _SEQ.pack_into(mm, off, 2 * n + 2)
+        self._head = n + 1
+        _HEAD.pack_into(mm, _HEAD_OFF, n + 1)
+
+    # ── reader ──
+    def _read(self, n: int) -> Optional[Sample]:
+        """Sample *n* (0-based) if its slot still holds it, intact."""
+        mm = self._mm
+        off = _HEADER.size + (n % self.slots) * _SLOT.size
+        want = 2 * n + 2
+        if _SEQ.unpack_from(mm, off)[0] != want:
+            return None
+        fields = _SLOT.unpack_from(mm, off)
+        if _SEQ.unpack_from(mm, off)[0] != want:
+            return None
+        return _sample(fields)
+
+    def latest(self) -> Optional[Sample]:
+        """The newest sample, or None before the engine published one."""
+        if self._mm is None and not self._map():
+            return None
+        for _ in range(8):
+            head = _HEAD.unpack_from(self._mm, _HEAD_OFF)[0]
+            if not head:
+                return None
+            sample = self._read(head - 1)
+            if sample is not None:
+                return sample
+        return None
+
+    def history(self, count: int) -> List[Sample]:
+        """Up to *count* most recent samples, oldest first."""
+        if self._mm is None and not self._map():
+            return []
+        head = _HEAD.unpack_from(self._mm, _HEAD_OFF)[0]
+        out = []
+        for n in range(max(head - min(count, self.slots - 1), 0), head):
+            sample = self._read(n)
+            if sample is not None:
+                out.append(sample)
+        return out
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+
+def _sample(fields: tuple) -> Sample:
+    (_seq, t, connected, mode, connect_time, rx, tx, queries, hits,
+     blocked, errors, handshakes, resumed, first_ms, rx_rate,
+     tx_rate) = fields
+    return Sample(t, bool(connected), MODES[mode] if mode < len(MODES)
+                  else MODES[0], connect_time, rx, tx, queries, hits,
+                  blocked, errors, handshakes, resumed,
+                  None if math.isnan(first_ms) else first_ms, rx_rate,
+                  tx_rate)
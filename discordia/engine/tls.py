@@ -0,0 +1,240 @@
+"""
+Process-wide TLS client state, shared by the DoT upstreams and the
+HTTPS lookups.
+
+  * ``client_context()`` builds one ``SSLContext`` from the certifi CA
+    bundle (the system store without certifi) on first use.  Parsing
+    the bundle costs tens of milliseconds, and a TLS session can only be
+    resumed through the context that created it.
+  * ``sessions`` keeps the last resumable session per server
+    (host, port, SNI name).  It outlives connections and transports, so
+    a reconnect, a reconfigure or a new ``DoTTransport`` for the same
+    upstream resumes instead of repeating the full handshake.
+  * ``https_get()`` does small GETs over kept-alive connections that use
+    both.
+  * ``prewarm()`` handshakes with a list of servers ahead of time (from
+    a worker thread), so the sessions are in place before the first
+    real query.
+
+Imported on first use: ``ssl`` and ``http.client`` stay off the startup
+path.
+"""
+
+import http.client
+import logging
+import socket
+import ssl
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from discordia.diag.metrics import metrics
+
+log = logging.getLogger("Discordia")
+
+HANDSHAKES = metrics.counter("tls_handshakes_total", "TLS handshakes")
+RESUMED = metrics.counter("tls_resumed_total",
+                          "TLS handshakes that resumed a session")
+HANDSHAKE_MS = metrics.histogram("tls_handshake_ms",
+                                 "TCP connect + TLS handshake, ms")
+
+# (host, port, server name)
+ServerKey = Tuple[str, int, str]
+
+_ctx: Optional[ssl.SSLContext] = None
+_ctx_lock = threading.Lock()
+
+
+def client_context() -> ssl.SSLContext:
+    """The shared client context, built on first call."""
+    global _ctx
+    if _ctx is None:
+        with _ctx_lock:
+            if _ctx is None:
+                t0 = time.perf_counter()
+                try:
+                    import certifi
+                    cafile = certifi.where()
+                except ImportError:
+                    cafile = None
+                ctx = ssl.create_default_context(cafile=cafile)
+                ctx.minimum_version = ssl.TLSVersion.TLSv1_2
+                _ctx = ctx
+                log.debug(f"TLS context built in "
+                          f"{(time.perf_counter() - t0) * 1000:.1f} ms "
+                          f"({cafile or 'system store'})")
+    return _ctx
+
+
+class SessionCache:
+    """
+    Last resumable TLS session per server and context, bounded, LRU.
+    (A session only resumes through the context that created it.)
+    """
+
+    def __init__(self, size: int = 32):
+        self.size = size
+        # (server key, context) -> session
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: ServerKey,
+            context: ssl.SSLContext) -> Optional[ssl.SSLSession]:
+        """A still-valid session for *key* created through *context*."""
+        with self._lock:
+            session = self._entries.get((key, context))
+        if session is None or session.time + session.timeout <= time.time():
+            return None
+        return session
+
+    def put(self, key: ServerKey, sock: ssl.SSLSocket):
+        """Remember *sock*'s session (call after data has flowed: TLS 1.3
+        tickets arrive after the handshake)."""
+        try:
+            session = sock.session
+        except (AttributeError, ssl.SSLError):
+            return
+        if session is None or not (session.has_ticket or session.id):
+            return
+        with self._lock:
+            self._entries[key, sock.context] = session
+            self._entries.move_to_end((key, sock.context))
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+sessions = SessionCache()
+
+
+def wrap(raw: socket.socket, key: ServerKey,
+         context: Optional[ssl.SSLContext] = None,
+         started: Optional[float] = None) -> ssl.SSLSocket:
+    """
+    TLS-wrap the connected *raw* socket for server *key*, offering the
+    cached session.  *started* is when the TCP connect began, for the
+    handshake histogram.
+    """
+    context = context or client_context()
+    t0 = started if started is not None else time.perf_counter()
+    sock = context.wrap_socket(raw, server_hostname=key[2],
+                               session=sessions.get(key, context))
+    HANDSHAKES.inc()
+    if sock.session_reused:
+        RESUMED.inc()
+    HANDSHAKE_MS.observe((time.perf_counter() - t0) * 1000)
+    return sock
+
+
+def connect(key: ServerKey, timeout: float = 5.0,
+            context: Optional[ssl.SSLContext] = None) -> ssl.SSLSocket:
+    t0 = time.perf_counter()
+    raw = socket.create_connection(key[:2], timeout=timeout)
+    try:
+        raw.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return wrap(raw, key, context, t0)
+    except Exception:
+        raw.close()
+        raise
+
+
+# ── HTTPS ──
+class _HTTPSConnection(http.client.HTTPSConnection):
+    """HTTPSConnection that resumes sessions through ``sessions``."""
+
+    def connect(self):
+        t0 = time.perf_counter()
+        http.client.HTTPConnection.connect(self)
+        self.sock = wrap(self.sock, (self.host, self.port, self.host),
+                         self._context, t0)
+
+
+_pool: Dict[Tuple[str, int], List[_HTTPSConnection]] = {}
+_pool_lock = threading.Lock()
+
+
+def https_get(url: str, headers: Optional[Dict[str, str]] = None,
+              timeout: float = 8.0) -> bytes:
+    """
+    GET *url* and return the body; raises ``OSError`` /
+    ``http.client.HTTPException`` on failure and on a non-2xx status.
+    Connections are kept alive and reused; a stale one is retried once
+    on a fresh connection.
+    """
+    u = urllib.parse.urlsplit(url)
+    host, port = u.hostname, u.port or 443
+    path = (u.path or "/") + (f"?{u.query}" if u.query else "")
+    for attempt in range(2):
+        with _pool_lock:
+            idle = _pool.get((host, port))
+            conn = idle.pop() if idle else None
+        reused = conn is not None
+        if conn is None:
+            conn = _HTTPSConnection(host, port, timeout=timeout,
+                                    context=client_context())
+        try:
+            conn.request("GET", path, headers=headers or {})
+            resp = conn.getresponse()
+            body = resp.read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            if reused and attempt == 0:
+                continue  # the server dropped an idle connection
+            raise
+        if conn.sock is not None:
+            sessions.put((host, port, host), conn.sock)
+        if resp.will_close:
+            conn.close()
+        else:
+            with _pool_lock:
+                _pool.setdefault((host, port), []).append(conn)
+        if not 200 <= resp.status < 300:
+            raise http.client.HTTPException(f"{url}: HTTP {resp.status}")
+        return body
+    raise http.client.HTTPException(f"{url}: no connection")
+
+
+def close_idle():
+    """Drop kept-alive HTTPS connections (after a network change)."""
+    with _pool_lock:
+        conns = [c for cs in _pool.values() for c in cs]
+        _pool.clear()
+    for c in conns:
+        c.close()
+
+
+# ── pre-warming ──
+def prewarm(servers: Sequence[ServerKey], timeout: float = 5.0) -> int:
+    """
+    Handshake with each server now and keep its session; return how
+    many succeeded.  Blocks, so call it from a worker thread.
+    """
+    ctx = client_context()
+    ok = 0
+    for key in servers:
+        try:
+            sock = connect(key, timeout, ctx)
+        except (OSError, ssl.SSLError) as e:
+            log.debug(f"TLS pre-warm of {key[2]}:{key[1]} failed: {e}")
+            continue
+        try:
+            # TLS 1.3 sends its session tickets after the handshake; a
+            # short read lets them in
+            sock.settimeout(0.2)
+            try:
+                sock.recv(1)
+            except (socket.timeout, ssl.SSLError, OSError):
+                pass
+            sessions.put(key, sock)
+            ok += 1
+        finally:
+            sock.close()
+    return ok
@@ -0,0 +1,54 @@
+"""
+Upstream transports.
+
+A transport sends one raw DNS query to one upstream server and returns
+the raw reply.  Every transport exposes the same small surface:
+
+    resolve(query, timeout) -> bytes     raises OSError on failure
+    warm()                               open connections ahead of time
+    close()
+"""
+
+import os
+import socket
+import time
+
+from discordia.engine.dnsmsg import message_id, with_id
+
+
+class UDPTransport:
+    """Plain DNS over UDP/53 — the same thing the Java service does."""
+
+    name = "udp"
+
+    def __init__(self, host: str, port: int = 53):
+        self.host = host
+        self.port = port
+
+    def resolve(self, query: bytes, timeout: float = 5.0) -> bytes:
+        wire_id = int.from_bytes(os.urandom(2), "big")
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            s.settimeout(timeout)
+            s.connect((self.host, self.port))
+            s.send(with_id(query, wire_id))
+            deadline = time.monotonic() + timeout
+            while True:
+                resp = s.recv(4096)
+                if len(resp) >= 12 and message_id(resp) == wire_id:
+                    return with_id(resp, message_id(query))
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise socket.timeout("no matching reply")
+                s.settimeout(remaining)
+        finally:
+            s.close()
+
+    def warm(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __repr__(self):
+        return f"udp://{self.host}:{self.port}"
@@ -0,0 +1,287 @@
+"""
+Linux TUN backend for the desktop engine.
+
+``open_tun`` creates a ``/dev/net/tun`` interface (works inside a network
+namespace, needs CAP_NET_ADMIN).  ``TunLoop`` serves DNS on any packet
+file descriptor — a real TUN fd, or one end of a datagram socketpair in
+benches:
+
+  * the fd is non-blocking and driven by ``selectors`` (epoll on Linux),
+    so the loop sleeps until a packet arrives — no idle polling;
+  * each wakeup drains up to ``batch`` packets into preallocated buffers
+    before handling them;
+  * queries over the ``limiter``'s budget (a ``RateLimiter``, one bucket
+    per source address) are refused or dropped before anything else is
+    done with them;
+  * cache hits are answered inline; misses go to a small worker pool and
+    their replies are queued and written out together on the next wakeup;
+  * other packets are not forwarded: they are counted as
+    ``split_packets`` when their destination is in ``split`` (a
+    ``DomainRoutes``; the engine keeps those blocks out of the routes, so
+    this should stay at zero), as ``dropped`` otherwise.
+"""
+
+import fcntl
+import logging
+import os
+import selectors
+import struct
+import subprocess
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from discordia.diag.metrics import metrics
+from discordia.engine.dnsmsg import RCODE_REFUSED, build_error
+from discordia.engine.packet import build_udp4_reply, dns_query_offset
+
+log = logging.getLogger("Discordia")
+
+RX_BYTES = metrics.counter("tun_rx_bytes_total", "Bytes read from the TUN")
+TX_BYTES = metrics.counter("tun_tx_bytes_total", "Bytes written to the TUN")
+RATE_LIMITED = metrics.counter("dns_rate_limited_total",
+                               "Queries refused or dropped by the rate limit")
+
+TUNSETIFF = 0x400454CA
+IFF_TUN = 0x0001
+IFF_NO_PI = 0x1000
+
+TUN_ADDRESS = "10.0.0.2"
+# Clients point at this address; upstream servers stay off the tunnel so
+# the engine's own queries never loop back into it.
+TUN_DNS_ADDRESS = "10.0.0.53"
+
+
+def open_tun(name: str = "discordia%d") -> Tuple[int, str]:
+    """Create a non-blocking TUN interface; return ``(fd, ifname)``."""
+    fd = os.open("/dev/net/tun", os.O_RDWR | os.O_NONBLOCK)
+    try:
+        ifr = struct.pack("16sH", name.encode(), IFF_TUN | IFF_NO_PI)
+        res = fcntl.ioctl(fd, TUNSETIFF, ifr)
+    except OSError:
+        os.close(fd)
+        raise
+    return fd, res[:16].rstrip(b"\0").decode()
+
+
+def configure_tun(ifname: str, routes: List[str], mtu: int = 1500,
+                  address: str = TUN_ADDRESS) -> bool:
+    """Bring *ifname* up with *address* and *routes* using ``ip``."""
+    cmds = [
+        ["ip", "addr", "add", f"{address}/32", "dev", ifname],
+        ["ip", "link", "set", ifname, "mtu", str(mtu), "up"],
+    ] + [["ip", "route", "replace", r, "dev", ifname] for r in routes]
+    ok = True
+    for cmd in cmds:
+        res = subprocess.run(cmd, capture_output=True, text=True)
+        if res.returncode != 0:
+            log.error(f"{' '.join(cmd)}: {res.stderr.strip()}")
+            ok = False
+    return ok
+
+
+def update_tun_routes(ifname: str, add: List[str],
+                      remove: List[str]) -> bool:
+    """Change the routes of a live *ifname*; the interface stays up."""
+    cmds = [["ip", "route", "replace", r, "dev", ifname] for r in add]
+    cmds += [["ip", "route", "del", r, "dev", ifname] for r in remove]
+    ok = True
+    for cmd in cmds:
+        res = subprocess.run(cmd, capture_output=True, text=True)
+        if res.returncode != 0:
+            log.error(f"{' '.join(cmd)}: {res.stderr.strip()}")
+            ok = False
+    return ok
+
+
+class TunLoop:
+    """Event-driven DNS responder over a packet file descriptor."""
+
+    def __init__(self, fd: int, resolver, mtu: int = 1500,
+                 batch: int = 64, workers: int = 4):
+        self.fd = fd
+        self.resolver = resolver
+        self.mtu = mtu
+        self.batch = batch
+        self.rx_packets = 0
+        self.tx_packets = 0
+        self.bytes_rx = 0
+        self.bytes_tx = 0
+        self.dropped = 0
+        self.split_packets = 0
+        self.rate_limited = 0
+        self.wakeups = 0
+        # set and cleared by the engine as split_domains changes
+        self.split = None
+        # likewise for the rate_limit_* settings; replaced, never mutated
+        self.limiter = None
+        self._bufs = [bytearray(mtu) for _ in range(batch)]
+        self._lens = [0] * batch
+        self._out: deque = deque()
+        self._pool = ThreadPoolExecutor(workers,
+                                        thread_name_prefix="Discordia-DNS")
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        # guards the write end against stop() closing it under a worker
+        self._wake_lock = threading.Lock()
+        self._woken = False
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    # ── lifecycle ──
+    def start(self):
+        os.set_blocking(self.fd, False)
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name="Discordia-TUN", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._wake()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        # queued lookups are dropped; one still waiting on its upstream
+        # finds the pipe gone rather than writing to whatever file
+        # reuses its descriptor number (the next TUN, a socket)
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        with self._wake_lock:
+            os.close(self._wake_r)
+            os.close(self._wake_w)
+            self._wake_w = -1
+
+    def _wake(self):
+        if self._woken:
+            return
+        with self._wake_lock:
+            if self._woken or self._wake_w < 0:
+                return
+            self._woken = True
+            try:
+                os.write(self._wake_w, b"\0")
+            except BlockingIOError:
+                pass
+
+    # ── event loop ──
+    def _run(self):
+        sel = selectors.DefaultSelector()
+        sel.register(self.fd, selectors.EVENT_READ, "tun")
+        sel.register(self._wake_r, selectors.EVENT_READ, "wake")
+        want_write = False
+        try:
+            while self._running:
+                for key, _mask in sel.select():
+                    if key.data == "wake":
+                        try:
+                            os.read(self._wake_r, 512)
+                        except BlockingIOError:
+                            pass
+                        self._woken = False
+                self.wakeups += 1
+                self._drain()
+                blocked = self._flush()
+                if blocked != want_write:
+                    want_write = blocked
+                    events = selectors.EVENT_READ
+                    if blocked:
+                        events |= selectors.EVENT_WRITE
+                    sel.modify(self.fd, events, "tun")
+        except OSError as e:
+            if self._running:
+                log.error(f"TUN loop error: {e}")
+        finally:
+            sel.close()
+
+    def _drain(self):
+        bufs, lens = self._bufs, self._lens
+        n = 0
+        while n < self.batch:
+            try:
+                got = os.readv(self.fd, [bufs[n]])
+            except BlockingIOError:
+                break
+            if got <= 0:
+                break
+            lens[n] = got
+            n += 1
+        for i in range(n):
+            try:
+                self._handle(memoryview(bufs[i])[:lens[i]])
+            except Exception as e:
+                # one bad packet (or a failing stage) must not end the
+                # loop: DNS would stop with the engine still connected
+                self.dropped += 1
+                log.warning(f"TUN packet error: {e!r}")
+        if n:
+            RX_BYTES.inc(sum(lens[:n]))
+
+    def _handle(self, pkt: memoryview):
+        self.rx_packets += 1
+        self.bytes_rx += len(pkt)
+        ihl = dns_query_offset(pkt)
+        if ihl is None:
+            split = self.split
+            if (split is not None and len(pkt) >= 20 and pkt[0] >> 4 == 4
+                    and int.from_bytes(pkt[16:20], "big") in split):
+                self.split_packets += 1
+            else:
+                self.dropped += 1
+            return
+        header = bytes(pkt[:ihl + 8])
+        query = bytes(pkt[ihl + 8:])
+        limiter = self.limiter
+        if limiter is not None:
+            # client: source address (not the port, see ratelimit)
+            client = int.from_bytes(header[12:16], "big")
+            if not limiter.allow(client, time.monotonic()):
+                self.rate_limited += 1
+                RATE_LIMITED.inc()
+                if limiter.refuse:
+                    self._out.append(build_udp4_reply(
+                        header, build_error(query, RCODE_REFUSED)))
+                return
+        hit = self.resolver.cached(query)
+        if hit is not None:
+            self._out.append(build_udp4_reply(header, hit))
+        else:
+            self._pool.submit(self._resolve, header, query)
+
+    def _resolve(self, header: bytes, query: bytes):
+        try:
+            resp = self.resolver.forward(query)
+        except Exception as e:
+            log.warning(f"TUN resolve error: {e}")
+            return
+        if not self._running:
+            return
+        self._out.append(build_udp4_reply(header, resp))
+        self._wake()
+
+    def _flush(self) -> bool:
+        """Write queued replies; return True if the fd stopped accepting."""
+        out = self._out
+        sent = 0
+        blocked = False
+        while out:
+            pkt = out.popleft()
+            try:
+                os.write(self.fd, pkt)
+            except BlockingIOError:
+                out.appendleft(pkt)
+                blocked = True
+                break
+            except OSError as e:
+                self.dropped += 1
+                log.debug(f"TUN write error: {e}")
+                continue
+            self.tx_packets += 1
+            sent += len(pkt)
+        if sent:
+            self.bytes_tx += sent
+            TX_BYTES.inc(sent)
+        return blocked
@@ -0,0 +1,870 @@
+"""
+VPN engine — Android VpnService control, the desktop TUN/simulated
+fallback and the local resolver that sits behind both.
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from discordia.config import (
+    BLOCKLIST_DELTA_DIR, BLOCKLIST_FILE, CACHE_SNAPSHOT_FILE,
+    CACHE_SNAPSHOT_INTERVAL, IP_LOOKUP_URL, QUERY_LOG_DIR, ROUTE_EXCLUDE_FILE,
+    ROUTE_INCLUDE_FILE, SESSION_CHECKPOINT_INTERVAL, SESSIONS_DB,
+    SPLIT_ROUTE_SWEEP, TUN_DEVICE,
+)
+from discordia.diag.metrics import metrics
+from discordia.diag.tracing import tracer
+from discordia.engine.blocklist import Blocklist, prune_deltas
+from discordia.engine.dnscache import DNSCache
+from discordia.engine.domainroutes import DomainRoutes
+from discordia.engine.querylog import QueryLog
+from discordia.engine.ratelimit import RateLimiter
+from discordia.engine.resolver import (
+    BLOCKED, CACHE_HITS, QUERIES, UPSTREAM_ERRORS, Resolver, dot_server,
+    make_upstreams,
+)
+from discordia.engine.routes import load_prefix_file, plan_routes
+from discordia.platform import IS_ANDROID, android
+from discordia.storage.sessions import SessionStore
+from discordia.storage.settings import settings
+
+if TYPE_CHECKING:
+    from discordia.engine.tun import TunLoop
+
+log = logging.getLogger("Discordia")
+
+CONNECT_MS = metrics.histogram("vpn_connect_ms", "Time to connect, ms")
+RECONFIGURE_MS = metrics.histogram("vpn_reconfigure_ms",
+                                   "Time to apply changed settings, ms")
+
+# Both open nothing on import: only the process that runs the engine
+# writes to them, and whatever merely imports this module stays off the
+# database and the journal.
+#
+# Connection history; rows left open by a killed app are closed at their
+# last checkpoint before anything new is written.
+session_store = SessionStore(SESSIONS_DB, recover=True)
+
+# Every answered DNS query; opened on first flush, written once a second.
+query_log = QueryLog(QUERY_LOG_DIR)
+
+
+def _route_address(host: str) -> str:
+    """Local address the system would send to *host* from ("" if none)."""
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        s.connect((host, 53))  # UDP: picks a route, sends nothing
+        return s.getsockname()[0]
+    except OSError:
+        return ""
+    finally:
+        s.close()
+
+
+class VPNEngine:
+    """
+    Controls the Android VPNService.
+    
+    Three modes:
+      1. DoH Mode — DNS-over-HTTPS via Cloudflare 1.1.1.1
+         (bypasses DNS-based blocking, most common)
+      2. DoT Mode — DNS-over-TLS (RFC 7858) to the configured
+         resolvers on port 853, over persistent pipelined connections
+      3. WireGuard Mode — full tunnel via imported .conf
+         (requires WireGuard app installed)
+    """
+
+    def __init__(self):
+        self._connected = False
+        self._mode = "doh"  # "doh", "dot" or "wireguard"
+        self._connect_time: Optional[datetime] = None
+        self._bytes_rx = 0
+        self._bytes_tx = 0
+        self.cache = DNSCache()
+        self.resolver: Optional[Resolver] = None
+        self._tun: Optional["TunLoop"] = None
+        self._tun_fd = -1
+        self._cache_loaded = False
+        self._hk_stop = threading.Event()
+        self._hk_thread: Optional[threading.Thread] = None
+        self._session_id: Optional[int] = None
+        self._session_base = (0, 0, 0)
+        # what the running tunnel was built from, for reconfigure()
+        self._ifname = ""
+        self._routes: List[str] = []
+        self._upstream_key: Optional[Tuple[str, Tuple[str, ...]]] = None
+        self._blocklist: Optional[Blocklist] = None
+        self._blocklist_lock = threading.Lock()
+        self._compacting = False
+        self._limiter: Optional[RateLimiter] = None
+        self._swap_gen = 0
+        self._net_address: Optional[str] = None
+        # split_domains: blocks learned from DNS answers, swept on a thread
+        self._domain_routes: Optional[DomainRoutes] = None
+        self._routes_lock = threading.Lock()
+        self._split_stop = threading.Event()
+        self._split_thread: Optional[threading.Thread] = None
+        # pre-warm the IP lookup host too (False in the engine process:
+        # the app does its own lookups)
+        self.tls_lookup = True
+        self._rate_base = (time.monotonic(), 0, 0)
+
+    @property
+    def connected(self) -> bool:
+        return self._connected
+
+    @property
+    def mode(self) -> str:
+        return self._mode
+
+    @property
+    def uptime_str(self) -> str:
+        if not self._connect_time:
+            return "00:00:00"
+        d = datetime.now() - self._connect_time
+        h, rem = divmod(int(d.total_seconds()), 3600)
+        m, s = divmod(rem, 60)
+        return f"{h:02d}:{m:02d}:{s:02d}"
+
+    @property
+    def uptime_seconds(self) -> int:
+        if not self._connect_time:
+            return 0
+        return int((datetime.now() - self._connect_time).total_seconds())
+
+    def connect(self, mode: str = "doh") -> Tuple[bool, str]:
+        self._mode = mode
+
+        with CONNECT_MS.time(), tracer.span("vpn.connect", mode=mode) as sp:
+            ok, msg = self._connect_platform(mode)
+            sp.set(ok=ok)
+        if ok:
+            self._open_session(mode)
+        else:
+            session_store.record_failure(mode, msg)
+        return ok, msg
+
+    def _connect_platform(self, mode: str) -> Tuple[bool, str]:
+        if IS_ANDROID:
+            return self._connect_android(mode)
+        elif TUN_DEVICE:
+            return self._connect_linux(mode)
+        else:
+            # Desktop testing — simulate.  Nothing sends DNS here, so no
+            # resolver is built, warmed or fed the cache snapshot.
+            log.info(f"[SIM] Connecting in {mode} mode...")
+            time.sleep(1)
+            self._connected = True
+            self._connect_time = datetime.now()
+            self._start_housekeeping()
+            return True, f"Connected (simulated — {mode})"
+
+    def disconnect(self) -> Tuple[bool, str]:
+        with tracer.span("vpn.disconnect"):
+            return self._disconnect_platform()
+
+    def _disconnect_platform(self) -> Tuple[bool, str]:
+        if IS_ANDROID:
+            return self._disconnect_android()
+        else:
+            if self._tun is not None:
+                self._disconnect_linux()
+            else:
+                log.info("[SIM] Disconnecting...")
+            self._close_session()
+            self._connected = False
+            self._connect_time = None
+            self._stop_resolver()
+            self._stop_housekeeping()
+            return True, "Disconnected"
+
+    # ── Linux TUN (desktop) ──
+    def _connect_linux(self, mode: str) -> Tuple[bool, str]:
+        from discordia.engine.tun import (
+            TUN_DNS_ADDRESS, TunLoop, configure_tun, open_tun,
+        )
+        try:
+            with tracer.span("tun.open"):
+                fd, ifname = open_tun(TUN_DEVICE)
+        except OSError as exc:
+            log.error(f"TUN open error: {exc}")
+            return False, str(exc)
+        routes = self._linux_routes()
+        with tracer.span("tun.configure", routes=len(routes)) as sp:
+            configured = configure_tun(ifname, routes)
+            sp.set(ok=configured)
+        if not configured:
+            # closing the fd removes the interface and what was set on it
+            os.close(fd)
+            return False, f"Could not configure {ifname} (see the log)"
+        try:
+            self._start_resolver(mode)
+        except Exception as exc:
+            log.error(f"Resolver start error: {exc}")
+            self._stop_resolver()
+            os.close(fd)
+            return False, str(exc)
+        self._ifname = ifname
+        self._routes = routes
+
+        self._connected = True
+        self._connect_time = datetime.now()
+        self._start_housekeeping()
+        self._tun_fd = fd
+        self._tun = TunLoop(fd, self.resolver)
+        self._tun.split = self._domain_routes
+        self._tun.limiter = self._limiter_setting()
+        self._tun.start()
+        log.info(f"TUN {ifname} up — DNS at {TUN_DNS_ADDRESS} (mode={mode})")
+        return True, f"Connected via {mode.upper()} on {ifname}"
+
+    def _linux_routes(self) -> List[str]:
+        from discordia.engine.tun import TUN_DNS_ADDRESS
+        upstreams = [settings.get("dns_primary", "1.1.1.1"),
+                     settings.get("dns_secondary", "1.0.0.1")]
+        return self.plan_routes([TUN_DNS_ADDRESS], exclude_extra=upstreams)
+
+    def _disconnect_linux(self):
+        self._tun.stop()
+        self._bytes_rx += self._tun.bytes_rx
+        self._bytes_tx += self._tun.bytes_tx
+        self._tun = None
+        try:
+            os.close(self._tun_fd)
+        except OSError:
+            pass
+        self._tun_fd = -1
+        log.info(f"TUN {self._ifname} down")
+
+    # ── Android VPN ──
+    def _connect_android(self, mode: str) -> Tuple[bool, str]:
+        try:
+            # In the engine service the app asked for the permission
+            # before sending connect; a service cannot show the dialog
+            if not android.IN_SERVICE:
+                with tracer.span("android.permission") as sp:
+                    granted = android.ensure_vpn_permission()
+                    sp.set(granted=granted)
+                if not granted:
+                    return False, "VPN permission denied by user"
+
+            # Start the VPN service
+            context = android.context()
+            routes = self._android_routes()
+            with tracer.span("android.start_service", routes=len(routes)):
+                context.startService(
+                    self._service_intent(context, "START", mode, routes)
+                )
+            self._routes = routes
+
+            # the service resolves in Java; the Python resolver would
+            # only hold idle upstream connections
+            self._connected = True
+            self._connect_time = datetime.now()
+            self._start_housekeeping()
+            log.info(f"VPN connected (mode={mode})")
+            return True, f"Connected via {mode.upper()}"
+
+        except Exception as exc:
+            log.error(f"VPN connect error: {exc}")
+            return False, str(exc)
+
+    def _android_routes(self) -> List[str]:
+        return self.plan_routes([
+            settings.get("dns_primary", "1.1.1.1"),
+            settings.get("dns_secondary", "1.0.0.1"),
+            # Common DNS blocking IPs
+            "8.8.8.8", "8.8.4.4",
+        ])
+
+    def _service_intent(self, context, action: str, mode: str,
+                        routes: List[str]):
+        """START / RECONFIGURE intent carrying the current settings."""
+        service_intent = android.Intent()
+        service_intent.setClassName(
+            context,
+            "org.discordia.vpn.DiscordiaVPNService"
+        )
+        service_intent.putExtra("mode", mode)
+        service_intent.putExtra(
+            "dns_primary",
+            settings.get("dns_primary", "1.1.1.1")
+        )
+        service_intent.putExtra(
+            "dns_secondary",
+            settings.get("dns_secondary", "1.0.0.1")
+        )
+        service_intent.putExtra(
+            "block_ads",
+            settings.get("block_ads", False)
+        )
+        service_intent.putExtra(
+            "split_tunnel",
+            settings.get("split_tunnel", True)
+        )
+        service_intent.putExtra("routes", ",".join(routes))
+        for key in ("rate_limit_qps", "rate_limit_burst",
+                    "rate_limit_global_qps"):
+            service_intent.putExtra(key, int(settings.get(key, 0)))
+        service_intent.putExtra(
+            "rate_limit_refuse",
+            settings.get("rate_limit_refuse", True)
+        )
+        service_intent.setAction(action)
+        return service_intent
+
+    def _disconnect_android(self) -> Tuple[bool, str]:
+        try:
+            context = android.context()
+            service_intent = android.Intent()
+            service_intent.setClassName(
+                context,
+                "org.discordia.vpn.DiscordiaVPNService"
+            )
+            service_intent.setAction("STOP")
+            context.startService(service_intent)
+
+            self._close_session()
+            self._connected = False
+            self._connect_time = None
+            self._stop_resolver()
+            self._stop_housekeeping()
+            log.info("VPN disconnected")
+            return True, "Disconnected"
+
+        except Exception as exc:
+            log.error(f"VPN disconnect error: {exc}")
+            self._close_session(failure=str(exc))
+            self._connected = False
+            self._connect_time = None
+            return False, str(exc)
+
+    # ── Routes ──
+    def plan_routes(self, dns_routes: List[str],
+                    exclude_extra: List[str] = ()) -> List[str]:
+        """
+        Compact route list for the tunnel interface.
+
+        Split tunnel routes *dns_routes* and the user include lists; full
+        tunnel routes everything.  Exclude lists are subtracted and the
+        result is aggregated into the fewest CIDR blocks.
+
+        The blocks learned for ``split_domains`` are left out: the TUN
+        loop answers DNS and forwards nothing else, so a route into it
+        would cut those services off.
+        """
+        if settings.get("split_tunnel", True):
+            include = list(dns_routes)
+            include += settings.get("route_include", [])
+            include += load_prefix_file(ROUTE_INCLUDE_FILE)
+        else:
+            include = ["0.0.0.0/0"]
+        exclude = list(exclude_extra)
+        exclude += settings.get("route_exclude", [])
+        exclude += load_prefix_file(ROUTE_EXCLUDE_FILE)
+        routes = plan_routes(include, exclude)
+        log.info(f"Route plan: {len(include)} include / {len(exclude)} "
+                 f"exclude prefixes -> {len(routes)} routes")
+        return routes
+
+    # ── Resolver ──
+    @staticmethod
+    def _upstream_settings(mode: str) -> Tuple[str, Tuple[str, ...]]:
+        """*mode* and its upstream servers as ``make_transport`` takes
+        them: ``dns_primary`` stays an address everywhere else, its port
+        and TLS name from a catalog entry are added here."""
+        primary = settings.get("dns_primary", "1.1.1.1")
+        port = settings.get("upstream_port", 0)
+        name = settings.get("upstream_host", "")
+        if port and mode == "dot":
+            primary = f"{primary}:{port}"
+        if name:
+            primary = f"{primary}#{name}"
+        return mode, (primary, settings.get("dns_secondary", "1.0.0.1"))
+
+    def _blocklist_setting(self) -> Optional[Blocklist]:
+        """The ``block_ads`` list, reread only when its file changed and
+        patched with any new deltas."""
+        if not settings.get("block_ads", False):
+            return None
+        try:
+            mtime = os.path.getmtime(BLOCKLIST_FILE)
+        except OSError:
+            mtime = 0.0
+        with self._blocklist_lock:
+            blocklist = self._blocklist
+            # while compacting the file changes under us: it is this list
+            if blocklist is None or (blocklist.mtime != mtime
+                                     and not self._compacting):
+                blocklist = Blocklist.load(BLOCKLIST_FILE)
+                log.info(f"Blocklist: {len(blocklist)} domains, version "
+                         f"{blocklist.version} ({blocklist.source})")
+            blocklist = self._blocklist = blocklist.apply_deltas(
+                BLOCKLIST_DELTA_DIR)
+        if blocklist.needs_compaction:
+            self._compact_blocklist(blocklist)
+        return blocklist
+
+    def _sync_blocklist(self) -> bool:
+        """Hand the current list to the resolver; True if replaced."""
+        resolver = self.resolver
+        if resolver is None:
+            return False
+        blocklist = self._blocklist_setting()
+        if blocklist is resolver.blocklist:
+            return False
+        resolver.blocklist = blocklist
+        return True
+
+    def _compact_blocklist(self, blocklist: Blocklist):
+        """Rewrite the list file with the deltas folded in, on a worker:
+        lookups go on against *blocklist* meanwhile."""
+        with self._blocklist_lock:
+            if self._compacting:
+                return
+            self._compacting = True
+
+        def _run():
+            try:
+                with tracer.span("blocklist.compact",
+                                 version=blocklist.version):
+                    blocklist.save(BLOCKLIST_FILE)
+                    mtime = os.path.getmtime(BLOCKLIST_FILE)
+                    pruned = prune_deltas(BLOCKLIST_DELTA_DIR,
+                                          blocklist.version)
+            except OSError as e:
+                log.error(f"Blocklist compaction error: {e}")
+                self._compacting = False
+                return
+            with self._blocklist_lock:
+                if self._blocklist is blocklist:
+                    self._blocklist = blocklist.saved(mtime)
+                self._compacting = False
+            log.info(f"Blocklist version {blocklist.version} saved, "
+                     f"{pruned} deltas folded in")
+
+        threading.Thread(target=_run, name="Discordia-Blocklist",
+                         daemon=True).start()
+
+    def _limiter_setting(self) -> Optional[RateLimiter]:
+        """The ``rate_limit_*`` limiter; the current one (with its
+        buckets) while the settings stay the same."""
+        rate = settings.get("rate_limit_qps", 50)
+        global_rate = settings.get("rate_limit_global_qps", 1000)
+        if not (rate or global_rate):
+            self._limiter = None
+            return None
+        fresh = RateLimiter(rate, settings.get("rate_limit_burst", 100),
+                            global_rate,
+                            settings.get("rate_limit_refuse", True))
+        if self._limiter is None or self._limiter.key != fresh.key:
+            self._limiter = fresh
+            log.info(f"Rate limit: {fresh!r}")
+        return self._limiter
+
+    def _apply_cache_policy(self) -> bool:
+        """Give the cache the ``cache_*`` settings; True if they differ
+        from what it had."""
+        cache = self.cache
+        policy = (settings.get("cache_max_entries", 8192),
+                  settings.get("cache_min_ttl", 0),
+                  settings.get("cache_max_ttl", 86400),
+                  settings.get("cache_negative_ttl", 60))
+        if policy == (cache.max_entries, cache.min_ttl, cache.max_ttl,
+                      cache.negative_ttl):
+            return False
+        max_entries, min_ttl, max_ttl, negative_ttl = policy
+        cache.configure(max_entries=max_entries, min_ttl=min_ttl,
+                        max_ttl=max_ttl, negative_ttl=negative_ttl)
+        return True
+
+    def _start_resolver(self, mode: str):
+        """Build the upstream resolver and open its connections early.
+        Only the Linux TUN loop queries it."""
+        self._stop_resolver()
+        self._apply_cache_policy()
+        self._load_cache_snapshot()
+        self._upstream_key = self._upstream_settings(mode)
+        with tracer.span("resolver.build", mode=mode):
+            self.resolver = Resolver.from_settings(
+                mode,
+                list(self._upstream_key[1]),
+                cache=self.cache,
+                journal=query_log,
+                blocklist=self._blocklist_setting(),
+            )
+        self._sync_domain_routes()
+        log.info(f"Query pipeline: {self.resolver.pipeline!r}")
+        query_log.start()
+        threading.Thread(
+            target=self.resolver.warm, name="Discordia-Warm", daemon=True
+        ).start()
+
+    def _stop_resolver(self):
+        self._split_stop.set()
+        if self.resolver is not None:
+            self.resolver.close()
+            self.resolver = None
+            query_log.flush()
+
+    # ── Live reconfiguration ──
+    def reconfigure(self) -> Tuple[bool, str]:
+        """
+        Apply saved settings to the running tunnel without reconnecting.
+
+        The blocklist, rate limit and cache policy change between two
+        queries.  New upstreams are built and warmed on a worker thread
+        while the old ones keep answering, then swapped in; the old ones
+        are closed once their in-flight queries have timed out.  Routes
+        are planned again and the interface is touched only when they
+        differ.
+        Returns ``(ok, summary)``.
+        """
+        t0 = time.perf_counter()
+        cache_changed = self._apply_cache_policy()
+        if not self._connected:
+            return True, "Saved"
+        changed = ["cache policy"] if cache_changed else []
+        ok = True
+
+        mode = settings.get("protocol", self._mode)
+        resolver = self.resolver
+        if resolver is not None:
+            if self._sync_blocklist():
+                changed.append("blocklist")
+            if self._sync_domain_routes():
+                changed.append("split domains")
+            if self._tun is not None:
+                limiter = self._limiter_setting()
+                if limiter is not self._tun.limiter:
+                    self._tun.limiter = limiter
+                    changed.append("rate limit")
+            key = self._upstream_settings(mode)
+            if key != self._upstream_key:
+                self._upstream_key = key
+                self._swap_upstreams(resolver, key)
+                changed.append("upstreams")
+        self._mode = mode
+
+        routes_ok, routes_changed = self._apply_routes(always=True)
+        ok = ok and routes_ok
+        if routes_changed:
+            changed.append("routes")
+
+        ms = (time.perf_counter() - t0) * 1000
+        RECONFIGURE_MS.observe(ms)
+        summary = (f"Applied {', '.join(changed)} in {ms:.1f} ms"
+                   if changed else f"Nothing changed ({ms:.1f} ms)")
+        log.info(summary)
+        return ok, summary
+
+    def _apply_routes(self, always: bool = False) -> Tuple[bool, bool]:
+        """
+        Plan the routes again and push them if they differ; return
+        ``(ok, changed)``.  The Android service is also told when
+        *always* — it carries the DNS and blocking settings too, and
+        compares routes and DNS servers itself before re-establishing
+        its interface.
+        """
+        with self._routes_lock:
+            ok = True
+            if IS_ANDROID:
+                routes = self._android_routes()
+                if always or routes != self._routes:
+                    try:
+                        context = android.context()
+                        context.startService(self._service_intent(
+                            context, "RECONFIGURE", self._mode, routes))
+                    except Exception as exc:
+                        log.error(f"VPN reconfigure error: {exc}")
+                        ok = False
+            elif self._tun is not None:
+                from discordia.engine.tun import update_tun_routes
+                routes = self._linux_routes()
+                if routes != self._routes:
+                    old, new = set(self._routes), set(routes)
+                    ok = update_tun_routes(
+                        self._ifname,
+                        [r for r in routes if r not in old],
+                        [r for r in self._routes if r not in new],
+                    )
+            else:
+                routes = self._routes
+            changed = routes != self._routes
+            self._routes = routes
+        return ok, changed
+
+    # ── Split domains (tracked, not routed) ──
+    def _domain_routes_setting(self) -> Optional[DomainRoutes]:
+        """The ``split_domains`` tracker; the current one (with what it
+        learned) while the domains and block size stay the same."""
+        suffixes = settings.get("split_domains", [])
+        if not (suffixes and settings.get("split_tunnel", True)):
+            return None
+        fresh = DomainRoutes(suffixes,
+                             settings.get("split_domain_prefix_len", 24),
+                             settings.get("split_domain_min_ttl", 300))
+        current = self._domain_routes
+        if (current is not None and current.suffixes == fresh.suffixes
+                and current.prefix_len == fresh.prefix_len):
+            current.min_ttl = fresh.min_ttl
+            return current
+        return fresh
+
+    def _sync_domain_routes(self) -> bool:
+        """Hand the tracker to the resolver and TUN loop and run the
+        sweep thread while there is one; True if it was replaced."""
+        domain_routes = self._domain_routes_setting()
+        replaced = domain_routes is not self._domain_routes
+        self._domain_routes = domain_routes
+        if self.resolver is not None:
+            self.resolver.domain_routes = domain_routes
+        if self._tun is not None:
+            self._tun.split = domain_routes
+        if domain_routes is None:
+            self._split_stop.set()
+            return replaced
+        if replaced:
+            log.info(f"Split domains tracked: {domain_routes!r}")
+        self._start_split_routes()
+        return replaced
+
+    def _start_split_routes(self):
+        """
+        Sweep expired blocks every ``SPLIT_ROUTE_SWEEP`` seconds.
+
+        The blocks are not pushed as routes (see ``plan_routes``): until
+        the tunnel can forward non-DNS traffic they are only tracked.
+        """
+        self._split_stop.clear()
+        if self._split_thread and self._split_thread.is_alive():
+            return
+
+        def _loop():
+            while not self._split_stop.wait(SPLIT_ROUTE_SWEEP):
+                domain_routes = self._domain_routes
+                if domain_routes is None:
+                    return
+                domain_routes.expire()
+                if domain_routes.take_changed():
+                    log.info(f"Split domains tracked: {domain_routes!r}")
+
+        self._split_thread = threading.Thread(
+            target=_loop, name="Discordia-SplitRoutes", daemon=True
+        )
+        self._split_thread.start()
+
+    def _swap_upstreams(self, resolver: Resolver,
+                        key: Tuple[str, Tuple[str, ...]]):
+        self._swap_gen += 1
+        gen = self._swap_gen
+        upstreams = make_upstreams(key[0], list(key[1]))
+
+        def _swap():
+            for upstream in upstreams:
+                upstream.warm()
+            # a later save or a disconnect won while we were warming
+            if gen != self._swap_gen or self.resolver is not resolver:
+                for upstream in upstreams:
+                    upstream.close()
+                return
+            old = resolver.swap_upstreams(upstreams)
+            log.info(f"Upstreams now {upstreams!r}")
+            time.sleep(resolver.timeout)
+            for upstream in old:
+                upstream.close()
+
+        threading.Thread(
+            target=_swap, name="Discordia-Reconfigure", daemon=True
+        ).start()
+
+    # ── TLS pre-warming ──
+    def tls_servers(self) -> List[Tuple[str, int, str]]:
+        """Every TLS server the next connect talks to."""
+        servers = []
+        if self.tls_lookup:
+            host = urlsplit(IP_LOOKUP_URL).hostname
+            servers.append((host, 443, host))
+        if settings.get("protocol", "doh") == "dot":
+            for s in self._upstream_settings("dot")[1]:
+                if s:
+                    try:
+                        servers.append(dot_server(s))
+                    except ValueError:
+                        pass    # make_upstreams() logs it
+        return servers
+
+    def prewarm(self):
+        """
+        Handshake with ``tls_servers()`` on a worker thread, so the CA
+        bundle is loaded and a resumable session is cached before the
+        first query.  Called at app start and after a network change.
+        """
+        servers = self.tls_servers()
+
+        def _run():
+            from discordia.engine import tls
+            t0 = time.perf_counter()
+            n = tls.prewarm(servers)
+            log.info(f"TLS pre-warm: {n}/{len(servers)} servers in "
+                     f"{(time.perf_counter() - t0) * 1000:.0f} ms")
+
+        threading.Thread(target=_run, name="Discordia-TLS-Warm",
+                         daemon=True).start()
+
+    def check_network(self) -> bool:
+        """
+        Call periodically.  When the local address towards the primary
+        upstream changed, new upstreams are built and warmed on the new
+        network (resuming their TLS sessions) and swapped in as
+        ``reconfigure()`` does; the old ones answer, or fail over, until
+        then.  Returns True on a change.
+        """
+        host = settings.get("dns_primary", "1.1.1.1").partition(":")[0]
+        address = _route_address(host)
+        previous, self._net_address = self._net_address, address
+        if previous is None or address == previous or not address:
+            return False
+        log.info(f"Network changed ({previous or 'none'} -> {address})")
+        from discordia.engine import tls
+        tls.close_idle()
+        resolver = self.resolver
+        if resolver is not None and self._upstream_key is not None:
+            self._swap_upstreams(resolver, self._upstream_key)
+        self.prewarm()
+        return True
+
+    # ── Status ──
+    def stats(self) -> Dict[str, object]:
+        """
+        Connection state and counters, as the engine process publishes
+        them (see ``discordia.engine.stats``).  Rates are bytes/s since
+        the previous call.
+        """
+        rx, tx, queries = self._traffic()
+        now = time.monotonic()
+        t0, rx0, tx0 = self._rate_base
+        self._rate_base = (now, rx, tx)
+        dt = max(now - t0, 1e-3)
+        resolver = self.resolver
+        first_ms = resolver.first_ms if resolver is not None else None
+        handshakes = metrics.get("tls_handshakes_total")
+        resumed = metrics.get("tls_resumed_total")
+        return {
+            "connected": self._connected,
+            "mode": self._mode,
+            "connect_time": (self._connect_time.timestamp()
+                             if self._connect_time else 0.0),
+            "bytes_rx": rx,
+            "bytes_tx": tx,
+            "queries": queries,
+            "cache_hits": CACHE_HITS.value,
+            "blocked": BLOCKED.value,
+            "upstream_errors": UPSTREAM_ERRORS.value,
+            "tls_handshakes": handshakes.value if handshakes else 0,
+            "tls_resumed": resumed.value if resumed else 0,
+            "first_ms": first_ms,
+            "rx_rate": max(rx - rx0, 0) / dt,
+            "tx_rate": max(tx - tx0, 0) / dt,
+        }
+
+    # ── Session history ──
+    def _traffic(self) -> Tuple[int, int, int]:
+        rx, tx = self._bytes_rx, self._bytes_tx
+        if self._tun is not None:
+            rx += self._tun.bytes_rx
+            tx += self._tun.bytes_tx
+        return rx, tx, QUERIES.value
+
+    def _open_session(self, mode: str):
+        self._session_base = self._traffic()
+        self._session_id = session_store.open_session(mode)
+
+    def _session_counters(self) -> Tuple[int, int, int]:
+        now = self._traffic()
+        return tuple(max(n - b, 0) for n, b in zip(now, self._session_base))
+
+    def _checkpoint_session(self):
+        if self._session_id is not None:
+            session_store.checkpoint(self._session_id,
+                                     *self._session_counters())
+
+    def _close_session(self, failure: Optional[str] = None):
+        if self._session_id is None:
+            return
+        session_store.close_session(self._session_id,
+                                    *self._session_counters(),
+                                    failure=failure)
+        self._session_id = None
+
+    # ── Housekeeping: session checkpoints + answer cache warm start ──
+    def _load_cache_snapshot(self):
+        """Map the last cache snapshot, once, for the first resolver."""
+        if self._cache_loaded:
+            return
+        t0 = time.perf_counter()
+        with tracer.span("cache.load_snapshot") as sp:
+            n = self.cache.load_snapshot(CACHE_SNAPSHOT_FILE)
+            sp.set(entries=n)
+        self._cache_loaded = True
+        log.info(
+            f"DNS cache snapshot mapped: {n} entries in "
+            f"{(time.perf_counter() - t0) * 1000:.1f} ms"
+        )
+
+    def _start_housekeeping(self):
+        """Start the periodic session checkpoint and cache snapshot."""
+        if self._hk_thread and self._hk_thread.is_alive():
+            return
+        self._hk_stop.clear()
+
+        def _loop():
+            last_snap = time.monotonic()
+            while not self._hk_stop.wait(SESSION_CHECKPOINT_INTERVAL):
+                self._checkpoint_session()
+                # blocklist deltas that arrived meanwhile
+                self._sync_blocklist()
+                if (self._cache_loaded and time.monotonic() - last_snap
+                        >= CACHE_SNAPSHOT_INTERVAL):
+                    self.cache.snapshot(CACHE_SNAPSHOT_FILE)
+                    last_snap = time.monotonic()
+
+        self._hk_thread = threading.Thread(
+            target=_loop, name="Discordia-Housekeeping", daemon=True
+        )
+        self._hk_thread.start()
+
+    def _stop_housekeeping(self):
+        self._hk_stop.set()
+        self._hk_thread = None
+        if not self._cache_loaded:
+            return
+        n = self.cache.snapshot(CACHE_SNAPSHOT_FILE)
+        log.info(f"DNS cache snapshot saved: {n} entries")
+
+    def launch_wireguard(self):
+        """Launch WireGuard app if installed."""
+        if not IS_ANDROID:
+            return
+        try:
+            android.launch_package("com.wireguard.android")
+        except Exception as exc:
+            log.error(f"WireGuard launch error: {exc}")
+
+    def launch_warp(self):
+        """Launch Cloudflare WARP (1.1.1.1) app if installed."""
+        if not IS_ANDROID:
+            return
+        try:
+            android.launch_package("com.cloudflare.onedotonedotonedotone")
+        except Exception as exc:
+            log.error(f"WARP launch error: {exc}")
+
+
+vpn_engine = VPNEngine()
@@ -0,0 +1,12 @@
+"""
+Platform detection and native glue.
+
+``IS_ANDROID`` uses the same environment checks as ``kivy.utils.platform``
+so that it can be read without importing Kivy.
+"""
+
+import os
+
+IS_ANDROID = (os.environ.get("KIVY_BUILD") == "android"
+              or "P4A_BOOTSTRAP" in os.environ
+              or "ANDROID_ARGUMENT" in os.environ)
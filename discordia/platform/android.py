@@ -0,0 +1,99 @@
+"""
+Android glue — Java classes are reflected on first use.
+
+Importing this module is free on every platform.  Attribute access such
+as ``android.Intent`` runs ``jnius.autoclass`` the first time and caches
+the class on the module, so start-up pays only for the classes the
+first screen actually touches.
+"""
+
+import os
+import time
+from typing import List
+
+# attribute -> Java class
+JAVA_CLASSES = {
+    "Intent": "android.content.Intent",
+    "Uri": "android.net.Uri",
+    "VpnService": "android.net.VpnService",
+    "PythonActivity": "org.kivy.android.PythonActivity",
+    "PythonService": "org.kivy.android.PythonService",
+    # p4a background service from buildozer.spec ``services = Engine:...``
+    "ServiceEngine": "org.discordia.discordiavpn.ServiceEngine",
+}
+
+# p4a sets this in a background service's environment
+IN_SERVICE = "PYTHON_SERVICE_ARGUMENT" in os.environ
+
+
+def __getattr__(name: str):
+    path = JAVA_CLASSES.get(name)
+    if path is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from jnius import autoclass
+    cls = globals()[name] = autoclass(path)
+    return cls
+
+
+def current_activity():
+    """The running PythonActivity, cast to ``android.app.Activity``."""
+    from jnius import cast
+    return cast("android.app.Activity", __getattr__("PythonActivity").mActivity)
+
+
+def context():
+    """
+    The ``android.content.Context`` of this process: the activity in the
+    app, the service in the engine's background service (which has no
+    activity).
+    """
+    if IN_SERVICE:
+        from jnius import cast
+        return cast("android.content.Context",
+                    __getattr__("PythonService").mService)
+    return current_activity()
+
+
+def files_dir() -> str:
+    return str(context().getFilesDir().getAbsolutePath())
+
+
+def ensure_vpn_permission() -> bool:
+    """Ask for the VPN permission if needed (app process only)."""
+    from discordia.diag.tracing import tracer
+    activity = current_activity()
+    with tracer.span("jni.VpnService.prepare"):
+        intent = __getattr__("VpnService").prepare(activity)
+    if intent is None:
+        return True
+    with tracer.span("android.permission_dialog"):
+        activity.startActivityForResult(intent, 0)
+        # Wait a moment, then re-check
+        time.sleep(2)
+        return __getattr__("VpnService").prepare(activity) is None
+
+
+def launch_package(package: str):
+    """Open the app *package*, or its Play Store page when missing."""
+    activity = __getattr__("PythonActivity").mActivity
+    intent = activity.getPackageManager().getLaunchIntentForPackage(package)
+    if not intent:
+        Intent = __getattr__("Intent")
+        intent = Intent(
+            Intent.ACTION_VIEW,
+            __getattr__("Uri").parse(f"market://details?id={package}"),
+        )
+    activity.startActivity(intent)
+
+
+def start_engine_service():
+    """Start the engine's background service (returns at once)."""
+    __getattr__("ServiceEngine").start(
+        __getattr__("PythonActivity").mActivity, "")
+
+
+def request_permissions(names: List[str]):
+    """Request ``android.permissions.Permission`` entries by name."""
+    from android.permissions import Permission
+    from android.permissions import request_permissions as _request
+    _request([getattr(Permission, n) for n in names])
@@ -0,0 +1,3 @@
+"""
+On-disk stores kept in DATA_DIR.
+"""
@@ -0,0 +1,224 @@
+"""
+Server catalog: the endpoints the Servers screen lists and probes.
+
+Loaded from ``servers.json`` in DATA_DIR when present, otherwise from the
+built-in Cloudflare set below.  The file is a list of entries (or an
+object with a ``"servers"`` list)::
+
+    {"name": "Frankfurt DoT", "host": "dot-fra.example.net", "port": 853,
+     "protocol": "dot", "region": "eu-central", "tags": ["anycast"]}
+
+``port`` is the service port that reachability probes connect to.  An
+entry without a ``host`` (an own WireGuard server, say) is listed but
+never probed.
+
+Indexes are built once per load, so a search over thousands of entries
+is set arithmetic rather than a scan:
+
+  * region / protocol / tag  exact value → set of entry indexes
+  * words                    sorted unique words of name, region,
+                             protocol and tags, plus each host whole and
+                             label by label, with their postings; a
+                             prefix is a ``bisect`` range of that list
+
+Probe results keep a latency order up to date one ``bisect`` insertion
+at a time, so sorting by latency never re-sorts the catalog.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from discordia.config import SERVER_CATALOG_FILE
+
+log = logging.getLogger("Discordia")
+
+PROTOCOLS = ("doh", "dot", "warp", "wireguard")
+
+DEFAULT_SERVERS = [
+    {"name": "Cloudflare DNS 1", "host": "1.1.1.1", "port": 443,
+     "protocol": "doh", "region": "global", "tags": ["cloudflare", "anycast"]},
+    {"name": "Cloudflare DNS 2", "host": "1.0.0.1", "port": 443,
+     "protocol": "doh", "region": "global", "tags": ["cloudflare", "anycast"]},
+    {"name": "Cloudflare DoT", "host": "1.1.1.1", "port": 853,
+     "protocol": "dot", "region": "global", "tags": ["cloudflare", "anycast"]},
+    {"name": "WARP Primary", "host": "162.159.36.1", "port": 2408,
+     "protocol": "warp", "region": "global", "tags": ["cloudflare"]},
+    {"name": "WARP Secondary", "host": "162.159.46.1", "port": 2408,
+     "protocol": "warp", "region": "global", "tags": ["cloudflare"]},
+    {"name": "WireGuard (Own Server)", "host": "", "port": 51820,
+     "protocol": "wireguard", "region": "custom", "tags": ["self-hosted"]},
+]
+
+_WORD = re.compile(r"[\w-]+")
+
+
+class Server:
+    __slots__ = ("index", "name", "host", "port", "protocol", "region",
+                 "tags", "ok", "latency_ms", "checked")
+
+    def __init__(self, index: int, name: str, host: str, port: int,
+                 protocol: str, region: str, tags: Tuple[str, ...]):
+        self.index = index
+        self.name = name
+        self.host = host
+        self.port = port
+        self.protocol = protocol
+        self.region = region
+        self.tags = tags
+        self.ok: Optional[bool] = None    # None until probed
+        self.latency_ms = 0
+        self.checked = 0.0
+
+    @classmethod
+    def from_dict(cls, index: int, d: Dict) -> "Server":
+        host = str(d.get("host", ""))
+        protocol = str(d.get("protocol", "doh")).lower()
+        if protocol not in PROTOCOLS:
+            raise ValueError(f"unknown protocol {protocol!r}")
+        return cls(
+            index,
+            str(d.get("name") or host),
+            host,
+            int(d.get("port", 853 if protocol == "dot" else 443)),
+            protocol,
+            str(d.get("region", "global")).lower(),
+            tuple(str(t).lower() for t in d.get("tags", ())),
+        )
+
+    def words(self) -> Set[str]:
+        text = " ".join((self.name, self.host, self.region, self.protocol)
+                        + self.tags)
+        # hosts match whole ("1.1.") as well as label by label ("fra")
+        return set(_WORD.findall(text.lower())) | {self.host.lower()}
+
+
+class ServerCatalog:
+    """Servers with region/protocol/tag/word indexes and a latency order."""
+
+    def __init__(self, entries: Iterable[Dict]):
+        self.servers: List[Server] = []
+        for d in entries:
+            try:
+                self.servers.append(Server.from_dict(len(self.servers), d))
+            except (TypeError, ValueError, AttributeError) as e:
+                log.warning(f"Server catalog: skipping {d!r}: {e}")
+        self._lock = threading.Lock()
+        self._by_latency: List[Tuple[int, int]] = []   # (ms, index), online
+        self._build_indexes()
+
+    @classmethod
+    def load(cls, path: str) -> "ServerCatalog":
+        """The catalog in *path*, or the built-in one if it is unusable."""
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                data = data.get("servers", [])
+            catalog = cls(data)
+            if catalog.servers:
+                log.info(f"Server catalog: {len(catalog)} entries")
+                return catalog
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            log.warning(f"Server catalog {os.path.basename(path)}: {e}")
+        return cls(DEFAULT_SERVERS)
+
+    def __len__(self) -> int:
+        return len(self.servers)
+
+    def _build_indexes(self):
+        self.by_region: Dict[str, Set[int]] = {}
+        self.by_protocol: Dict[str, Set[int]] = {}
+        self.by_tag: Dict[str, Set[int]] = {}
+        postings: Dict[str, List[int]] = {}
+        for s in self.servers:
+            i = s.index
+            self.by_region.setdefault(s.region, set()).add(i)
+            self.by_protocol.setdefault(s.protocol, set()).add(i)
+            for t in s.tags:
+                self.by_tag.setdefault(t, set()).add(i)
+            for w in s.words():
+                postings.setdefault(w, []).append(i)
+        self._words = sorted(postings)
+        self._postings = [postings[w] for w in self._words]
+
+    def regions(self) -> List[str]:
+        return sorted(self.by_region)
+
+    def protocols(self) -> List[str]:
+        return sorted(self.by_protocol)
+
+    def tags(self) -> List[str]:
+        return sorted(self.by_tag)
+
+    def _prefix(self, prefix: str) -> Set[int]:
+        lo = bisect_left(self._words, prefix)
+        hi = bisect_left(self._words, prefix + "\uffff", lo)
+        if hi - lo == 1:
+            return set(self._postings[lo])
+        out: Set[int] = set()
+        for p in self._postings[lo:hi]:
+            out.update(p)
+        return out
+
+    def search(self, text: str = "", region: Optional[str] = None,
+               protocol: Optional[str] = None, tag: Optional[str] = None,
+               by_latency: bool = False) -> List[int]:
+        """
+        Indexes of the servers matching every filter, in catalog order or
+        fastest first.  Each word of *text* must prefix-match a word of
+        the entry; ``#word`` in *text* is an exact tag filter.
+        """
+        sets = []
+        if region:
+            sets.append(self.by_region.get(region, set()))
+        if protocol:
+            sets.append(self.by_protocol.get(protocol, set()))
+        if tag:
+            sets.append(self.by_tag.get(tag, set()))
+        for word in text.lower().split():
+            if word.startswith("#"):
+                sets.append(self.by_tag.get(word[1:], set()))
+            else:
+                sets.append(self._prefix(word))
+        if sets:
+            sets.sort(key=len)
+            match = sets[0].intersection(*sets[1:])
+        else:
+            match = None
+
+        if not by_latency:
+            if match is None:
+                return list(range(len(self.servers)))
+            return sorted(match)
+        with self._lock:
+            fast = [i for _, i in self._by_latency
+                    if match is None or i in match]
+        # then unprobed, then offline, each in catalog order
+        rest = (range(len(self.servers)) if match is None
+                else sorted(match))
+        servers = self.servers
+        return (fast + [i for i in rest if servers[i].ok is None]
+                + [i for i in rest if servers[i].ok is False])
+
+    def record(self, index: int, ok: bool, latency_ms: int, when: float):
+        """Store a probe result and move the server in the latency order."""
+        s = self.servers[index]
+        with self._lock:
+            if s.ok:
+                pos = bisect_left(self._by_latency, (s.latency_ms, index))
+                del self._by_latency[pos]
+            s.ok = ok
+            s.latency_ms = latency_ms if ok else 0
+            s.checked = when
+            if ok:
+                insort(self._by_latency, (latency_ms, index))
+
+
+server_catalog = ServerCatalog.load(SERVER_CATALOG_FILE)
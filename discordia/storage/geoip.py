@@ -0,0 +1,504 @@
+"""
+Offline GeoIP / ASN lookup from a memory-mapped range file.
+
+The dashboard's location and provider come from here when a database is
+installed, so only the public IP itself needs a network request.  The
+file holds sorted, disjoint address ranges, each with a country, a city,
+an AS number and an organisation:
+
+    database file  (little-endian)
+    ┌──────────────────────────────────────────────────────────────┐
+    │ header   magic "DVGI" · version u16 · pad u16 · v4 count u32 │
+    │          v6 count u32 · string count u32 · built_at f64 · pad│
+    │ v4       starts  count × u32                                 │
+    │          ranges  count × (end u32 · country 2s · pad 2 ·     │
+    │                           city u32 · asn u32 · org u32)      │
+    │ v6       starts  count × 16s (big-endian, so bytes compare   │
+    │                               as numbers)                    │
+    │          ranges  count × (end 16s · country 2s · pad 2 ·     │
+    │                           city u32 · asn u32 · org u32)      │
+    │ strings  (count + 1) × u32 offsets · UTF-8 blob; id 0 is ""  │
+    └──────────────────────────────────────────────────────────────┘
+
+Opening maps the file and checks the header; a lookup is a ``bisect``
+over the starts column (a ``memoryview`` of the map for IPv4) and one
+record read — microseconds, with nothing loaded up front.
+
+``build()`` writes a database from CSV GeoIP datasets: MaxMind GeoLite2
+blocks (``network`` CIDR columns, with the locations file for city
+blocks), DB-IP lite, iptoasn's ``ip2asn`` and other range files with a
+header or a known column layout (``FORMATS``).  Sources are overlaid
+range by range, so a city dataset and an ASN dataset make one file:
+
+    python -m discordia.storage.geoip build geoip.bin \\
+        GeoLite2-City-Blocks-IPv4.csv --locations \\
+        GeoLite2-City-Locations-en.csv GeoLite2-ASN-Blocks-IPv4.csv
+    python -m discordia.storage.geoip lookup geoip.bin 1.1.1.1
+
+The importer holds every range in memory; run it on a desktop and copy
+the file to ``GEOIP_FILE``.
+"""
+
+import logging
+import mmap
+import os
+import socket
+import struct
+import sys
+import time
+from bisect import bisect_right
+from typing import (
+    Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple,
+)
+
+from discordia.config import GEOIP_FILE
+
+# the dashboard imports this module: argparse, csv and ipaddress are
+# imported by the importer only
+
+log = logging.getLogger("Discordia")
+
+GEO_MAGIC = b"DVGI"
+GEO_VERSION = 1
+_HEADER = struct.Struct("<4sHHIIId4x")
+_V4_START = struct.Struct("<I")
+_V4_RANGE = struct.Struct("<I2s2xIII")
+_V6_START = struct.Struct("<16s")
+_V6_RANGE = struct.Struct("<16s2s2xIII")
+_OFFSET = struct.Struct("<I")
+
+_V4_MAPPED = 0xFFFF << 32
+
+# range fields: (country, city, asn, org)
+_NO_FIELDS = ("", "", 0, "")
+
+# header-less layouts, by name
+FORMATS: Dict[str, Tuple[Tuple[str, ...], str]] = {
+    # name: (columns, delimiter)
+    "dbip-city-lite": (("start_ip", "end_ip", "continent", "country",
+                        "region", "city", "latitude", "longitude"), ","),
+    "dbip-country-lite": (("start_ip", "end_ip", "country"), ","),
+    "dbip-asn-lite": (("start_ip", "end_ip", "asn", "org"), ","),
+    "ip2asn": (("start_ip", "end_ip", "asn", "country", "org"), "\t"),
+    "ip2location-lite": (("start_ip", "end_ip", "country", "country_name",
+                          "region", "city"), ","),
+}
+
+# column name -> field, for files with a header
+_COLUMNS = {
+    "network": "network",
+    "start_ip": "start", "ip_start": "start", "range_start": "start",
+    "ip_from": "start",
+    "end_ip": "end", "ip_end": "end", "range_end": "end", "ip_to": "end",
+    "country_iso_code": "country", "country_code": "country",
+    "country": "country",
+    "city_name": "city", "city": "city",
+    "autonomous_system_number": "asn", "asn": "asn", "as_number": "asn",
+    "autonomous_system_organization": "org", "org": "org",
+    "as_description": "org", "organization": "org",
+    "geoname_id": "geoname", "registered_country_geoname_id": "geoname2",
+}
+
+
+class GeoInfo(NamedTuple):
+    country: str
+    city: str
+    asn: int
+    org: str
+
+    @property
+    def provider(self) -> str:
+        """As ipinfo.io shows ``org``: "AS13335 Cloudflare, Inc."."""
+        if self.asn and self.org:
+            return f"AS{self.asn} {self.org}"
+        return self.org or (f"AS{self.asn}" if self.asn else "")
+
+
+class _Column:
+    """Sequence view of one fixed-size field per record, for ``bisect``."""
+
+    __slots__ = ("_mm", "_off", "_count", "_unpack", "_size")
+
+    def __init__(self, mm, off: int, count: int, fmt: struct.Struct):
+        self._mm = mm
+        self._off = off
+        self._count = count
+        self._unpack = fmt.unpack_from
+        self._size = fmt.size
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i: int):
+        return self._unpack(self._mm, self._off + i * self._size)[0]
+
+
+class GeoDB:
+    """Read-only, memory-mapped view of a database file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fh = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._fh.close()
+            raise
+        self._v4_starts = None
+        try:
+            self._parse()
+        except struct.error:
+            self.close()
+            raise ValueError("GeoIP database truncated")
+        except ValueError:
+            self.close()
+            raise
+
+    def _parse(self):
+        mm = self._mm
+        (magic, version, _pad, n4, n6, nstr,
+         self.built_at) = _HEADER.unpack_from(mm, 0)
+        if magic != GEO_MAGIC or version != GEO_VERSION:
+            raise ValueError("unknown GeoIP database format")
+        off = _HEADER.size
+        v4_starts = off
+        self._v4_ranges = off = off + n4 * _V4_START.size
+        v6_starts = off = off + n4 * _V4_RANGE.size
+        self._v6_ranges = off = off + n6 * _V6_START.size
+        self._str_offsets = off = off + n6 * _V6_RANGE.size
+        self._str_blob = off + (nstr + 1) * _OFFSET.size
+        if self._str_blob > len(mm):
+            raise ValueError("GeoIP database truncated")
+        if sys.byteorder == "little":
+            self._v4_starts = memoryview(mm)[
+                v4_starts:v4_starts + n4 * 4].cast("I")
+        else:
+            self._v4_starts = _Column(mm, v4_starts, n4, _V4_START)
+        self._v6_starts = _Column(mm, v6_starts, n6, _V6_START)
+        self.v4_count = n4
+        self.v6_count = n6
+        self._nstr = nstr
+
+    def _string(self, i: int) -> str:
+        if not 0 < i <= self._nstr:
+            return ""
+        base = self._str_offsets + (i - 1) * 4
+        start, end = struct.unpack_from("<II", self._mm, base)
+        return self._mm[self._str_blob + start:
+                        self._str_blob + end].decode("utf-8", "replace")
+
+    def lookup(self, ip: str) -> Optional[GeoInfo]:
+        """Where *ip* (v4 or v6, as text) is, or None when not covered."""
+        try:
+            packed = socket.inet_pton(socket.AF_INET, ip)
+        except OSError:
+            try:
+                packed = socket.inet_pton(socket.AF_INET6, ip)
+            except OSError:
+                return None
+            if packed[:12] == b"\0" * 10 + b"\xff\xff":
+                packed = packed[12:]
+        if len(packed) == 4:
+            addr = int.from_bytes(packed, "big")
+            i = bisect_right(self._v4_starts, addr) - 1
+            if i < 0:
+                return None
+            end, country, city, asn, org = _V4_RANGE.unpack_from(
+                self._mm, self._v4_ranges + i * _V4_RANGE.size)
+            if addr > end:
+                return None
+        else:
+            i = bisect_right(self._v6_starts, packed) - 1
+            if i < 0:
+                return None
+            end, country, city, asn, org = _V6_RANGE.unpack_from(
+                self._mm, self._v6_ranges + i * _V6_RANGE.size)
+            if packed > end:
+                return None
+        return GeoInfo(country.decode("ascii", "replace").rstrip("\0"),
+                       self._string(city), asn, self._string(org))
+
+    def __len__(self) -> int:
+        return self.v4_count + self.v6_count
+
+    def close(self):
+        # the starts view pins the map: release it first
+        if isinstance(self._v4_starts, memoryview):
+            self._v4_starts.release()
+        self._v4_starts = None
+        try:
+            self._mm.close()
+        finally:
+            self._fh.close()
+
+    def __repr__(self) -> str:
+        return (f"<GeoDB {os.path.basename(self.path)}: "
+                f"{self.v4_count} v4 + {self.v6_count} v6 ranges>")
+
+
+# ── the installed database ──
+_db: Optional[GeoDB] = None
+_db_stamp: Optional[Tuple[float, int]] = None
+
+
+def geodb(path: str = GEOIP_FILE) -> Optional[GeoDB]:
+    """The database at *path*, mapped once and again after it is
+    replaced; None when there is none (or it is unreadable)."""
+    global _db, _db_stamp
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    stamp = (st.st_mtime, st.st_size)
+    if _db is not None and _db.path == path and _db_stamp == stamp:
+        return _db
+    try:
+        db = GeoDB(path)
+    except (OSError, ValueError) as e:
+        log.warning(f"GeoIP database ignored: {e}")
+        return None
+    old, _db, _db_stamp = _db, db, stamp
+    if old is not None:
+        old.close()
+    log.info(f"GeoIP database mapped: {db!r}")
+    return db
+
+
+# ── building ──
+_Range = Tuple[int, int, Tuple[str, str, int, str]]
+
+
+def _address(text: str) -> Tuple[int, int]:
+    """``(version, int)`` for a dotted, colon or integer address."""
+    import ipaddress
+    text = text.strip()
+    if text.isdigit():
+        n = int(text)
+        version = 4 if n < 1 << 32 else 6
+    else:
+        a = ipaddress.ip_address(text)
+        n, version = int(a), a.version
+    if version == 6 and n >> 32 == _V4_MAPPED >> 32:
+        return 4, n & 0xFFFFFFFF
+    return version, n
+
+
+def _int(text: str) -> int:
+    text = (text or "").strip().upper()
+    if text.startswith("AS"):
+        text = text[2:]
+    return int(text) if text.isdigit() else 0
+
+
+def read_locations(path: str) -> Dict[str, Tuple[str, str]]:
+    """MaxMind ``*-Locations-*.csv``: geoname_id -> (country, city)."""
+    import csv
+    out = {}
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            out[row["geoname_id"]] = (row.get("country_iso_code") or "",
+                                      row.get("city_name") or "")
+    return out
+
+
+def read_csv(path: str, fmt: Optional[str] = None,
+             locations: Optional[Dict[str, Tuple[str, str]]] = None
+             ) -> Tuple[List[_Range], List[_Range]]:
+    """
+    Ranges of one CSV dataset as ``(v4, v6)`` lists of
+    ``(start, end, (country, city, asn, org))``.
+
+    Columns are named by the file's header or by *fmt* (a ``FORMATS``
+    key); *locations* resolves MaxMind ``geoname_id`` columns.
+    """
+    import csv
+    import ipaddress
+    tables: Tuple[List[_Range], List[_Range]] = ([], [])
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if fmt is not None:
+            names, delimiter = FORMATS[fmt]
+            reader = csv.reader(f, delimiter=delimiter)
+        else:
+            reader = csv.reader(f, delimiter="\t" if path.endswith(".tsv")
+                                else ",")
+            names = next(reader, ())
+        fields = [_COLUMNS.get(n.strip().lower()) for n in names]
+        strings: Dict[str, str] = {}
+        for row in reader:
+            col = {}
+            for name, value in zip(fields, row):
+                if name is not None and value:
+                    col[name] = value
+            try:
+                if "network" in col:
+                    net = ipaddress.ip_network(col["network"], strict=False)
+                    version = net.version
+                    start = int(net.network_address)
+                    end = int(net.broadcast_address)
+                else:
+                    version, start = _address(col["start"])
+                    end = _address(col["end"])[1]
+            except (KeyError, ValueError):
+                continue
+            country = col.get("country", "")
+            city = col.get("city", "")
+            if locations is not None:
+                geo = (locations.get(col.get("geoname", ""))
+                       or locations.get(col.get("geoname2", "")))
+                if geo is not None:
+                    country = country or geo[0]
+                    city = city or geo[1]
+            if len(country) != 2 or country == "ZZ" or country == "-":
+                country = ""
+            city = "" if city == "-" else city
+            org = col.get("org", "")
+            # one str object per distinct name across millions of rows
+            city = strings.setdefault(city, city)
+            org = strings.setdefault(org, org)
+            tables[version == 6].append(
+                (start, end, (country.upper(), city, _int(col.get("asn")),
+                              org)))
+    return tables
+
+
+def _disjoint(ranges: List[_Range]) -> List[_Range]:
+    """Sorted, with overlaps clipped off the later range."""
+    ranges.sort(key=lambda r: r[0])
+    out = []
+    last = -1
+    for start, end, fields in ranges:
+        if start <= last:
+            start = last + 1
+        if start > end:
+            continue
+        out.append((start, end, fields))
+        last = end
+    return out
+
+
+def overlay(a: Sequence[_Range], b: Sequence[_Range]) -> List[_Range]:
+    """
+    Combine two sorted, disjoint range lists: every address keeps the
+    fields of both, *a*'s winning where both set one.  Adjacent ranges
+    that end up the same are merged.
+    """
+    out: List[_Range] = []
+    na, nb = len(a), len(b)
+    i = j = pos = 0
+    while True:
+        while i < na and a[i][1] < pos:
+            i += 1
+        while j < nb and b[j][1] < pos:
+            j += 1
+        if i == na and j == nb:
+            break
+        sa = max(a[i][0], pos) if i < na else None
+        sb = max(b[j][0], pos) if j < nb else None
+        start = min(s for s in (sa, sb) if s is not None)
+        in_a = sa == start
+        in_b = sb == start
+        end = min(
+            (a[i][1] if in_a else sa - 1) if sa is not None else 1 << 128,
+            (b[j][1] if in_b else sb - 1) if sb is not None else 1 << 128,
+        )
+        fa = a[i][2] if in_a else _NO_FIELDS
+        fb = b[j][2] if in_b else _NO_FIELDS
+        fields = tuple(x or y for x, y in zip(fa, fb))
+        if out and out[-1][1] + 1 == start and out[-1][2] == fields:
+            out[-1] = (out[-1][0], end, fields)
+        else:
+            out.append((start, end, fields))
+        pos = end + 1
+    return out
+
+
+def build(path: str, sources: Iterable[Tuple[List[_Range], List[_Range]]]
+          ) -> Tuple[int, int]:
+    """Write the overlay of *sources* (``read_csv`` results, first wins)
+    to *path* atomically; return the ``(v4, v6)`` range counts."""
+    v4: List[_Range] = []
+    v6: List[_Range] = []
+    for s4, s6 in sources:
+        v4 = overlay(v4, _disjoint(s4))
+        v6 = overlay(v6, _disjoint(s6))
+
+    ids: Dict[str, int] = {"": 0}
+    blob = bytearray()
+    offsets = [_OFFSET.pack(0)]
+
+    def sid(s: str) -> int:
+        i = ids.get(s)
+        if i is None:
+            i = ids[s] = len(ids)
+            blob.extend(s.encode("utf-8"))
+            offsets.append(_OFFSET.pack(len(blob)))
+        return i
+
+    def table(ranges: List[_Range], start_fmt: struct.Struct,
+              range_fmt: struct.Struct, key) -> Tuple[bytes, bytes]:
+        starts = bytearray()
+        recs = bytearray()
+        for start, end, (country, city, asn, org) in ranges:
+            starts += start_fmt.pack(key(start))
+            recs += range_fmt.pack(key(end), country.encode("ascii", "replace"),
+                                   sid(city), asn, sid(org))
+        return bytes(starts), bytes(recs)
+
+    v4_starts, v4_recs = table(v4, _V4_START, _V4_RANGE, lambda n: n)
+    v6_starts, v6_recs = table(v6, _V6_START, _V6_RANGE,
+                               lambda n: n.to_bytes(16, "big"))
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(GEO_MAGIC, GEO_VERSION, 0, len(v4), len(v6),
+                             len(ids) - 1, time.time()))
+        for part in (v4_starts, v4_recs, v6_starts, v6_recs):
+            f.write(part)
+        f.write(b"".join(offsets))
+        f.write(blob)
+    os.replace(tmp, path)
+    return len(v4), len(v6)
+
+
+def _sources(paths: List[str], fmt: Optional[str],
+             locations: Optional[str]) -> Iterator[tuple]:
+    locs = read_locations(locations) if locations else None
+    for p in paths:
+        t0 = time.perf_counter()
+        tables = read_csv(p, fmt, locs)
+        log.info(f"{p}: {len(tables[0])} v4 + {len(tables[1])} v6 ranges "
+                 f"in {time.perf_counter() - t0:.1f} s")
+        yield tables
+
+
+def main(argv: Optional[List[str]] = None):
+    import argparse
+    ap = argparse.ArgumentParser(prog="discordia.storage.geoip")
+    sub = ap.add_subparsers(dest="command", required=True)
+    b = sub.add_parser("build", help="import CSV datasets")
+    b.add_argument("output")
+    b.add_argument("csv", nargs="+", help="earlier files win on conflicts")
+    b.add_argument("--format", choices=sorted(FORMATS),
+                   help="column layout of header-less files")
+    b.add_argument("--locations", help="MaxMind locations CSV")
+    q = sub.add_parser("lookup", help="look addresses up")
+    q.add_argument("database")
+    q.add_argument("ip", nargs="+")
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.command == "build":
+        t0 = time.perf_counter()
+        n4, n6 = build(args.output,
+                       _sources(args.csv, args.format, args.locations))
+        log.info(f"{args.output}: {n4} v4 + {n6} v6 ranges, "
+                 f"{os.path.getsize(args.output) / 1e6:.1f} MB in "
+                 f"{time.perf_counter() - t0:.1f} s")
+    else:
+        db = GeoDB(args.database)
+        for ip in args.ip:
+            print(f"{ip}: {db.lookup(ip)}")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Connection session history in SQLite.
+
+One row per connect attempt: start/end time, mode, traffic, queries and
+the failure reason if it did not succeed.  Open sessions are checkpointed
+while connected, so a session that dies with the app still has a usable
+end time; ``recover()`` closes those rows on the next start.
+
+Nothing touches the database until it is used: the schema is created on
+the first read or write, and the writer thread starts with the first
+write, so a read-only view costs one connection and no thread.
+
+All writes go through a queue to one writer thread, which applies
+whatever has accumulated in a single transaction — the UI thread never
+waits on the disk.  Reads use their own connection (WAL mode lets them
+run beside the writer) and hit covering indexes, so summarising years of
+history stays in the millisecond range.
+"""
+
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+log = logging.getLogger("Discordia")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id          INTEGER PRIMARY KEY,
+    start       REAL    NOT NULL,
+    end         REAL,
+    checkpoint  REAL    NOT NULL,
+    mode        TEXT    NOT NULL,
+    bytes_rx    INTEGER NOT NULL DEFAULT 0,
+    bytes_tx    INTEGER NOT NULL DEFAULT 0,
+    queries     INTEGER NOT NULL DEFAULT 0,
+    failure     TEXT
+);
+-- covering index: every summary column, so aggregates never touch rows
+CREATE INDEX IF NOT EXISTS sessions_start
+    ON sessions (start, end, checkpoint, bytes_rx, bytes_tx, queries, failure);
+CREATE INDEX IF NOT EXISTS sessions_open
+    ON sessions (id) WHERE end IS NULL;
+"""
+
+_INSERT = ("INSERT INTO sessions (id, start, end, checkpoint, mode, failure)"
+           " VALUES (?, ?, ?, ?, ?, ?)")
+_CHECKPOINT = ("UPDATE sessions SET checkpoint = ?, bytes_rx = ?,"
+               " bytes_tx = ?, queries = ? WHERE id = ?")
+_CLOSE = ("UPDATE sessions SET end = ?, checkpoint = ?, bytes_rx = ?,"
+          " bytes_tx = ?, queries = ?, failure = ? WHERE id = ?")
+_RECOVER = ("UPDATE sessions SET end = checkpoint, failure = 'interrupted'"
+            " WHERE end IS NULL")
+# "interrupted" rows were real sessions that lost their clean close
+_SUMMARY = ("SELECT"
+            " COALESCE(SUM(failure IS NULL OR failure = 'interrupted'), 0),"
+            " COALESCE(SUM(COALESCE(end, checkpoint) - start), 0),"
+            " COALESCE(SUM(bytes_rx), 0), COALESCE(SUM(bytes_tx), 0),"
+            " COALESCE(SUM(queries), 0),"
+            " COALESCE(SUM(failure IS NOT NULL"
+            " AND failure != 'interrupted'), 0)"
+            " FROM sessions INDEXED BY sessions_start WHERE start >= ?")
+
+
+class SessionStore:
+    """Append/update session rows off the UI thread; summarise on demand."""
+
+    def __init__(self, path: str, batch: int = 256,
+                 recover: bool = False):
+        self.path = path
+        self.batch = batch
+        self._recover = recover
+        self._q: "queue.Queue" = queue.Queue()
+        self._read_lock = threading.Lock()
+        self._id_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._next_id = 0
+        self._reader: Optional[sqlite3.Connection] = None
+        self._writer: Optional[threading.Thread] = None
+
+    def _read_conn(self) -> sqlite3.Connection:
+        with self._start_lock:
+            if self._reader is None:
+                conn = self._connect()
+                conn.executescript(SCHEMA)
+                self._next_id = (conn.execute(
+                    "SELECT COALESCE(MAX(id), 0) FROM sessions"
+                ).fetchone()[0] + 1)
+                conn.commit()
+                self._reader = conn
+            return self._reader
+
+    def _start_writer(self):
+        self._read_conn()
+        with self._start_lock:
+            if self._writer is not None:
+                return
+            if self._recover:
+                # ahead of anything this process writes
+                self._q.put((_RECOVER, ()))
+            self._writer = threading.Thread(
+                target=self._write_loop, name="Discordia-Sessions",
+                daemon=True
+            )
+            self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False,
+                               cached_statements=32)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # ── writer ──
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            item = self._q.get()
+            items = [item]
+            while len(items) < self.batch:
+                try:
+                    items.append(self._q.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with conn:
+                    for sql, args in items:
+                        conn.execute(sql, args)
+            except sqlite3.Error as e:
+                log.error(f"Session store write error: {e}")
+            finally:
+                for _ in items:
+                    self._q.task_done()
+
+    def _submit(self, sql: str, args: tuple):
+        if self._writer is None:
+            self._start_writer()
+        self._q.put((sql, args))
+
+    def flush(self):
+        """Block until every queued write is committed."""
+        self._q.join()
+
+    # ── session lifecycle ──
+    def _alloc_id(self) -> int:
+        self._read_conn()
+        with self._id_lock:
+            sid = self._next_id
+            self._next_id += 1
+            return sid
+
+    def open_session(self, mode: str, start: Optional[float] = None) -> int:
+        start = start or time.time()
+        sid = self._alloc_id()
+        self._submit(_INSERT, (sid, start, None, start, mode, None))
+        return sid
+
+    def checkpoint(self, sid: int, bytes_rx: int = 0, bytes_tx: int = 0,
+                   queries: int = 0):
+        self._submit(_CHECKPOINT,
+                     (time.time(), bytes_rx, bytes_tx, queries, sid))
+
+    def close_session(self, sid: int, bytes_rx: int = 0, bytes_tx: int = 0,
+                      queries: int = 0, failure: Optional[str] = None,
+                      end: Optional[float] = None):
+        end = end or time.time()
+        self._submit(_CLOSE,
+                     (end, end, bytes_rx, bytes_tx, queries, failure, sid))
+
+    def record_failure(self, mode: str, reason: str):
+        """A connect attempt that never came up."""
+        now = time.time()
+        self._submit(_INSERT, (self._alloc_id(), now, now, now, mode,
+                               reason[:200] or "failed"))
+
+    def recover(self):
+        """Close sessions left open by a killed process at their checkpoint."""
+        self._submit(_RECOVER, ())
+
+    # ── reads ──
+    def summary(self, since: float = 0.0) -> Dict[str, float]:
+        conn = self._read_conn()
+        with self._read_lock:
+            count, seconds, rx, tx, q, failures = conn.execute(
+                _SUMMARY, (since,)).fetchone()
+        return {
+            "sessions": count,
+            "seconds": int(seconds),
+            "bytes_rx": rx,
+            "bytes_tx": tx,
+            "queries": q,
+            "failures": failures,
+        }
+
+    def recent(self, limit: int = 20):
+        conn = self._read_conn()
+        with self._read_lock:
+            return conn.execute(
+                "SELECT id, start, end, mode, bytes_rx, bytes_tx, queries,"
+                " failure FROM sessions ORDER BY id DESC LIMIT ?",
+                (limit,)).fetchall()
+
+    def close(self):
+        self.flush()
+        with self._read_lock:
+            if self._reader is not None:
+                self._reader.close()
@@ -0,0 +1,100 @@
+"""
+User settings, persisted as JSON in DATA_DIR.
+"""
+
+import json
+import logging
+import os
+import threading
+
+from discordia.config import SETTINGS_FILE
+
+log = logging.getLogger("Discordia")
+
+
+class Settings:
+    _defaults = {
+        "dns_primary": "1.1.1.1",
+        "dns_secondary": "1.0.0.1",
+        # set with dns_primary (an address) from a catalog entry: its DoT
+        # port when not 853 (0 = the protocol's own) and the host name it
+        # was resolved from, the upstream's TLS name; read only by the
+        # resolver
+        "upstream_port": 0,
+        "upstream_host": "",
+        "auto_connect": False,
+        "block_ads": False,
+        "split_tunnel": True,
+        "protocol": "doh",
+        "theme": "cyberpunk",
+        "first_run": True,
+        "wg_config": "",
+        "route_include": [],
+        "route_exclude": [],
+        # addresses answered for these domains (and their subdomains)
+        # are tracked as /prefix_len blocks held for at least min_ttl
+        # seconds; tracking only: nothing is routed by name until the
+        # tunnel forwards non-DNS traffic
+        "split_domains": [],
+        "split_domain_prefix_len": 24,
+        "split_domain_min_ttl": 300,
+        # answer cache policy
+        "cache_max_entries": 8192,
+        "cache_min_ttl": 0,
+        "cache_max_ttl": 86400,
+        "cache_negative_ttl": 60,
+        # per-client query budget (by source address): rate_limit_qps
+        # a second with bursts of rate_limit_burst, under a global ceiling
+        # of rate_limit_global_qps; over it, REFUSED (or a silent drop when
+        # rate_limit_refuse is false).  0 turns a limit off.
+        "rate_limit_qps": 50,
+        "rate_limit_burst": 100,
+        "rate_limit_global_qps": 1000,
+        "rate_limit_refuse": True,
+        # run the resolver engine in its own process (see engine.control)
+        "engine_process": True,
+        # hidden diagnostics — edit settings.json to enable
+        "profiling": False,
+        "profile_capture_seconds": 0,
+        "memory_diagnostics": False,
+        "memwatch_interval": 300,
+        "total_connected_time": 0,
+        "total_connections": 0,
+    }
+
+    def __init__(self):
+        self.data = dict(self._defaults)
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        if os.path.exists(SETTINGS_FILE):
+            try:
+                with open(SETTINGS_FILE) as f:
+                    saved = json.load(f)
+                self.data.update(saved)
+            except Exception:
+                pass
+
+    def save(self):
+        # the engine process load()s at every command: it must never see
+        # a half-written file, so write a per-process temp file and
+        # rename it over the old one
+        tmp = f"{SETTINGS_FILE}.{os.getpid()}.tmp"
+        try:
+            with self._lock:
+                with open(tmp, "w") as f:
+                    json.dump(self.data, f, indent=2)
+                os.replace(tmp, SETTINGS_FILE)
+        except Exception as e:
+            log.error(f"Settings save error: {e}")
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def set(self, key, value):
+        self.data[key] = value
+        self.save()
+
+
+settings = Settings()
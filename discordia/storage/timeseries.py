@@ -0,0 +1,240 @@
+"""
+Round-robin bandwidth history with fixed-size rollup tiers.
+
+Every sample goes into each tier; a tier averages the samples that fall
+into one of its slots and keeps the last ``slots`` averages in a ring of
+``array('f')`` cells indexed by ``absolute_slot % slots``.  Appending is
+O(tiers), memory never grows, and a long gap costs at most one pass over
+a tier's ring.
+
+    file  (little-endian)
+    ┌──────────────────────────────────────────────────────────────┐
+    │ header   magic "DVTS" · version u16 · tier count u16         │
+    │ per tier step u32 · slots u32 · current slot i64 ·           │
+    │          pending dl f64 · pending ul f64 · pending n u32     │
+    │          dl ring  slots × f32 · ul ring  slots × f32         │
+    └──────────────────────────────────────────────────────────────┘
+
+``window()`` reads the finest tier that covers the requested span and
+reduces it with largest-triangle-three-buckets, so a graph never draws
+more points than it has pixels, whatever the zoom.
+"""
+
+import logging
+import math
+import os
+import struct
+import sys
+import time
+from array import array
+from typing import List, Optional, Sequence, Tuple
+
+log = logging.getLogger("Discordia")
+
+TS_MAGIC = b"DVTS"
+TS_VERSION = 1
+_HEADER = struct.Struct("<4sHH")
+_TIER = struct.Struct("<IIqddI")
+
+# (seconds per slot, slots): 1 s for 10 min, 1 min for a day,
+# 15 min for a month
+DEFAULT_TIERS = ((1, 600), (60, 1440), (900, 2976))
+
+
+def lttb(xs: Sequence[float], ys: Sequence[float],
+         threshold: int) -> Tuple[List[float], List[float]]:
+    """
+    Largest-triangle-three-buckets downsampling to *threshold* points.
+
+    Keeps the first and last point and, from each bucket in between, the
+    point forming the largest triangle with the previous pick and the
+    next bucket's average — peaks survive where plain decimation drops
+    them.
+    """
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(xs), list(ys)
+    out_x = [xs[0]]
+    out_y = [ys[0]]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        lo = int(i * every) + 1
+        hi = int((i + 1) * every) + 1
+        nlo = hi
+        nhi = min(int((i + 2) * every) + 1, n)
+        cnt = nhi - nlo
+        avg_x = sum(xs[nlo:nhi]) / cnt
+        avg_y = sum(ys[nlo:nhi]) / cnt
+        ax, ay = xs[a], ys[a]
+        best = -1.0
+        pick = lo
+        for j in range(lo, hi):
+            area = abs((ax - avg_x) * (ys[j] - ay)
+                       - (ax - xs[j]) * (avg_y - ay))
+            if area > best:
+                best = area
+                pick = j
+        out_x.append(xs[pick])
+        out_y.append(ys[pick])
+        a = pick
+    out_x.append(xs[-1])
+    out_y.append(ys[-1])
+    return out_x, out_y
+
+
+class _Tier:
+    __slots__ = ("step", "slots", "cur", "dl", "ul", "p_dl", "p_ul", "p_n")
+
+    def __init__(self, step: int, slots: int):
+        self.step = step
+        self.slots = slots
+        self.cur = -1
+        self.dl = array("f", bytes(4 * slots))
+        self.ul = array("f", bytes(4 * slots))
+        self.p_dl = self.p_ul = 0.0
+        self.p_n = 0
+
+    def add(self, slot: int, dl: float, ul: float):
+        if slot != self.cur:
+            if slot < self.cur:
+                return  # clock went backwards; drop rather than corrupt
+            self._advance(slot)
+        self.p_dl += dl
+        self.p_ul += ul
+        self.p_n += 1
+
+    def _advance(self, slot: int):
+        if self.cur >= 0:
+            self._commit()
+            # zero the slots nobody reported for (app closed, asleep)
+            for s in range(self.cur + 1, min(slot, self.cur + 1 + self.slots)):
+                i = s % self.slots
+                self.dl[i] = self.ul[i] = 0.0
+        self.cur = slot
+        self.p_dl = self.p_ul = 0.0
+        self.p_n = 0
+
+    def _commit(self):
+        i = self.cur % self.slots
+        n = self.p_n or 1
+        self.dl[i] = self.p_dl / n
+        self.ul[i] = self.p_ul / n
+
+    def read(self, first: int, last: int) -> Tuple[list, list, list]:
+        """Slots ``first..last`` (absolute); unknown slots read as 0."""
+        xs, dl, ul = [], [], []
+        oldest = self.cur - self.slots + 1
+        for s in range(first, last + 1):
+            xs.append(s * self.step)
+            if s == self.cur and self.p_n:
+                dl.append(self.p_dl / self.p_n)
+                ul.append(self.p_ul / self.p_n)
+            elif oldest <= s < self.cur:
+                i = s % self.slots
+                dl.append(self.dl[i])
+                ul.append(self.ul[i])
+            else:
+                dl.append(0.0)
+                ul.append(0.0)
+        return xs, dl, ul
+
+
+class BandwidthSeries:
+    """Download/upload throughput history at several resolutions."""
+
+    def __init__(self, tiers: Sequence[Tuple[int, int]] = DEFAULT_TIERS):
+        self.tiers = [_Tier(step, slots) for step, slots in tiers]
+
+    def add(self, dl: float, ul: float, t: Optional[float] = None):
+        t = time.time() if t is None else t
+        for tier in self.tiers:
+            tier.add(int(t // tier.step), dl, ul)
+
+    def clear(self):
+        self.tiers = [_Tier(t.step, t.slots) for t in self.tiers]
+
+    def tier_for(self, span: float) -> _Tier:
+        """Finest tier holding *span* seconds (else the coarsest)."""
+        for tier in self.tiers:
+            if tier.step * tier.slots >= span:
+                return tier
+        return self.tiers[-1]
+
+    def window(self, span: float, max_points: int,
+               now: Optional[float] = None) -> Tuple[list, list, list, list]:
+        """
+        The last *span* seconds as ``(xs_dl, dl, xs_ul, ul)``, x in
+        seconds relative to *now* (≤ 0), each side at most *max_points*.
+        """
+        now = time.time() if now is None else now
+        tier = self.tier_for(span)
+        last = int(now // tier.step)
+        count = min(max(int(math.ceil(span / tier.step)), 2), tier.slots)
+        xs, dl, ul = tier.read(last - count + 1, last)
+        xs = [x - now for x in xs]
+        xd, yd = lttb(xs, dl, max_points)
+        xu, yu = lttb(xs, ul, max_points)
+        return xd, yd, xu, yu
+
+    # ── persistence ──
+    def save(self, path: str):
+        parts = [_HEADER.pack(TS_MAGIC, TS_VERSION, len(self.tiers))]
+        for t in self.tiers:
+            parts.append(_TIER.pack(t.step, t.slots, t.cur,
+                                    t.p_dl, t.p_ul, t.p_n))
+            dl, ul = t.dl, t.ul
+            if sys.byteorder != "little":
+                dl, ul = array("f", dl), array("f", ul)
+                dl.byteswap()
+                ul.byteswap()
+            parts.append(dl.tobytes())
+            parts.append(ul.tobytes())
+        tmp = path + ".tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(b"".join(parts))
+            os.replace(tmp, path)
+        except OSError as e:
+            log.error(f"Bandwidth history save error: {e}")
+
+    @classmethod
+    def load(cls, path: str,
+             tiers: Sequence[Tuple[int, int]] = DEFAULT_TIERS
+             ) -> "BandwidthSeries":
+        """Restore *path*; a missing or mismatched file starts empty."""
+        series = cls(tiers)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return series
+        except OSError as e:
+            log.warning(f"Bandwidth history unreadable: {e}")
+            return series
+        try:
+            magic, version, count = _HEADER.unpack_from(data, 0)
+            if (magic != TS_MAGIC or version != TS_VERSION
+                    or count != len(series.tiers)):
+                raise ValueError("format changed")
+            off = _HEADER.size
+            for t in series.tiers:
+                step, slots, cur, p_dl, p_ul, p_n = _TIER.unpack_from(data, off)
+                if (step, slots) != (t.step, t.slots):
+                    raise ValueError("tier layout changed")
+                off += _TIER.size
+                size = 4 * slots
+                dl = array("f", data[off:off + size])
+                ul = array("f", data[off + size:off + 2 * size])
+                if len(dl) != slots or len(ul) != slots:
+                    raise ValueError("truncated")
+                if sys.byteorder != "little":
+                    dl.byteswap()
+                    ul.byteswap()
+                off += 2 * size
+                t.cur, t.p_dl, t.p_ul, t.p_n = cur, p_dl, p_ul, p_n
+                t.dl, t.ul = dl, ul
+        except (struct.error, ValueError) as e:
+            log.warning(f"Bandwidth history discarded: {e}")
+            return cls(tiers)
+        return series
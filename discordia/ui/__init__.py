@@ -0,0 +1,3 @@
+"""
+UI helpers — KV rule loading and other Kivy-side plumbing.
+"""
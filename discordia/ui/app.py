@@ -0,0 +1,224 @@
+"""
+The Kivy application: startup, screen navigation and lifecycle hooks.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Tuple
+
+from kivy.app import App
+from kivy.clock import Clock
+from kivy.uix.screenmanager import ScreenManager, SlideTransition
+
+from discordia import __version__
+from discordia.config import (
+    APP_NAME, BANDWIDTH_FILE, DATA_DIR, KV_CACHE_DIR, MEMORY_REPORT_FILE,
+    METRICS_DUMP_INTERVAL, METRICS_FILE, METRICS_PORT, NETWORK_CHECK_INTERVAL,
+)
+from discordia.diag.metrics import MetricsServer, metrics
+from discordia.engine.control import (
+    ENGINE_PROCESS, query_log, session_store, vpn_engine,
+)
+from discordia.platform import IS_ANDROID, android
+from discordia.storage.settings import settings
+from discordia.ui.kv import KV
+from discordia.ui.kvcache import load_kv
+from discordia.ui.screens import screen_class
+from discordia.ui.ticker import ui_ticker
+from discordia.ui.widgets import bandwidth
+
+log = logging.getLogger("Discordia")
+
+UI_FRAME_MS = metrics.histogram("ui_frame_ms", "UI frame interval, ms")
+
+# ─── Opt-in profiling ───
+# DISCORDIA_PROFILE=1 (or "profiling": true in settings.json) times every
+# Clock callback, KV rule handler and worker thread.  Must be installed
+# before any widget schedules anything; when off nothing is patched.
+PROFILING = (os.environ.get("DISCORDIA_PROFILE") == "1"
+             or bool(settings.get("profiling", False)))
+PROFILE_CAPTURE_SECONDS = float(
+    os.environ.get("DISCORDIA_PROFILE_CAPTURE", "")
+    or settings.get("profile_capture_seconds", 0)
+)
+PROFILE_REPORT_FILE = os.path.join(DATA_DIR, "profile_report.txt")
+
+if PROFILING:
+    import kivy.lang.builder as _kv_builder
+    from discordia.diag.profiling import profiler
+    profiler.install(Clock, _kv_builder)
+
+# DISCORDIA_MEMWATCH=1 (or "memory_diagnostics": true) samples RSS, heap,
+# threads and widget/instruction counts and diffs tracemalloc snapshots
+# into MEMORY_REPORT_FILE, shown on the Logs screen.
+MEMWATCH = (os.environ.get("DISCORDIA_MEMWATCH") == "1"
+            or bool(settings.get("memory_diagnostics", False)))
+MEMWATCH_INTERVAL = float(
+    os.environ.get("DISCORDIA_MEMWATCH_INTERVAL", "")
+    or settings.get("memwatch_interval", 300)
+)
+
+if MEMWATCH:
+    from discordia.diag.memwatch import memwatch
+    memwatch.interval = MEMWATCH_INTERVAL
+
+
+def count_ui(roots) -> Tuple[int, int]:
+    """Widgets under *roots* and the canvas instructions they hold."""
+    widgets = instructions = 0
+    seen = set()
+    stack = list(roots)
+    while stack:
+        w = stack.pop()
+        if id(w) in seen:
+            continue
+        seen.add(id(w))
+        widgets += 1
+        c = w.canvas
+        groups = [c]
+        if c.has_before:
+            groups.append(c.before)
+        if c.has_after:
+            groups.append(c.after)
+        while groups:
+            children = groups.pop().children
+            instructions += len(children)
+            groups += [i for i in children if hasattr(i, "children")]
+        stack += w.children
+    return widgets, instructions
+
+
+class DiscordiaVPNApp(App):
+    title = APP_NAME
+
+    def build(self):
+        load_kv(KV, "common", KV_CACHE_DIR)
+        self.sm = ScreenManager(
+            transition=SlideTransition(duration=0.25)
+        )
+        self.screen("dashboard")
+
+        if IS_ANDROID:
+            self._request_permissions()
+
+        from kivy.core.window import Window
+        Window.bind(
+            focus=lambda w, f: ui_ticker.set_state(focused=f),
+            on_minimize=lambda w: ui_ticker.set_state(focused=False),
+            on_restore=lambda w: ui_ticker.set_state(focused=True),
+        )
+
+        return self.sm
+
+    def screen(self, name):
+        """Load a screen's KV rules and create it on first use."""
+        if not self.sm.has_screen(name):
+            t0 = time.perf_counter()
+            kv, cls = screen_class(name)
+            load_kv(kv, name, KV_CACHE_DIR)
+            self.sm.add_widget(cls(name=name))
+            log.debug(f"Screen {name} built in "
+                      f"{(time.perf_counter() - t0) * 1000:.1f} ms")
+        return self.sm.get_screen(name)
+
+    def go(self, screen_name):
+        self.screen(screen_name)
+        self.sm.current = screen_name
+
+    def on_start(self):
+        log.info(f"{APP_NAME} Android v{__version__} started")
+        if settings.get("first_run"):
+            settings.set("first_run", False)
+        if settings.get("auto_connect"):
+            Clock.schedule_once(lambda dt: self._auto_connect(), 2)
+        self._start_metrics()
+        threading.Thread(target=self._start_engine,
+                         name="Discordia-EngineStart", daemon=True).start()
+        Clock.schedule_interval(self._check_network, NETWORK_CHECK_INTERVAL)
+        if PROFILING and PROFILE_CAPTURE_SECONDS > 0:
+            profiler.start_capture(
+                PROFILE_CAPTURE_SECONDS,
+                os.path.join(DATA_DIR, f"profile-{int(time.time())}.pstats"),
+                Clock.schedule_once,
+            )
+        if MEMWATCH:
+            self._count_ui(0)
+            memwatch.start(MEMORY_REPORT_FILE)
+            # just ahead of each sample the sampler thread takes
+            Clock.schedule_interval(self._count_ui,
+                                    max(MEMWATCH_INTERVAL - 1, 1))
+
+    def _start_engine(self):
+        if ENGINE_PROCESS:
+            try:
+                vpn_engine.start()
+            except OSError as exc:
+                log.error(f"Engine process error: {exc}")
+        # TLS sessions for the IP lookup and DoT upstreams, off-thread
+        vpn_engine.prewarm()
+        vpn_engine.check_network()
+
+    def _start_metrics(self):
+        metrics.start_json_dump(METRICS_FILE, METRICS_DUMP_INTERVAL)
+        if METRICS_PORT:
+            try:
+                MetricsServer(metrics, METRICS_PORT).start()
+            except OSError as exc:
+                log.error(f"Metrics endpoint error: {exc}")
+        if PROFILING or METRICS_PORT:
+            # a callback on every frame for the app's lifetime: only
+            # worth it while the histogram is profiled or scraped
+            Clock.schedule_interval(self._sample_frame, 0)
+
+    def _sample_frame(self, dt):
+        UI_FRAME_MS.observe(dt * 1000)
+
+    def _count_ui(self, dt):
+        widgets, instructions = count_ui(list(self.sm.screens) + [self.sm])
+        memwatch.set("widgets", widgets)
+        memwatch.set("instructions", instructions)
+
+    def _check_network(self, dt):
+        vpn_engine.check_network()
+
+    def _auto_connect(self):
+        dash = self.sm.get_screen("dashboard")
+        dash._connect()
+
+    def on_pause(self):
+        ui_ticker.set_state(paused=True)
+        bandwidth.save(BANDWIDTH_FILE)
+        return True
+
+    def on_resume(self):
+        ui_ticker.set_state(paused=False)
+        vpn_engine.check_network()
+
+    def on_stop(self):
+        if vpn_engine.connected:
+            vpn_engine.disconnect()
+        session_store.flush()
+        query_log.close()
+        if ENGINE_PROCESS:
+            vpn_engine.stop()
+        bandwidth.save(BANDWIDTH_FILE)
+        metrics.stop_json_dump()
+        metrics.dump_json(METRICS_FILE)
+        if MEMWATCH:
+            memwatch.stop()
+        if PROFILING:
+            profiler.dump(PROFILE_REPORT_FILE)
+            log.info("Profile report:\n" + profiler.report(top=15))
+
+    def _request_permissions(self):
+        if IS_ANDROID:
+            try:
+                android.request_permissions([
+                    "INTERNET",
+                    "ACCESS_NETWORK_STATE",
+                    "ACCESS_WIFI_STATE",
+                ])
+            except Exception:
+                pass
@@ -0,0 +1,82 @@
+"""
+KV rules shared by every screen.  Each screen module carries its own
+rules (``KV``), loaded the first time the screen is shown.
+"""
+
+KV_HEADER = """
+#:import dp kivy.metrics.dp
+#:import sp kivy.metrics.sp
+#:import C discordia.ui.theme.C
+"""
+
+KV = KV_HEADER + """
+# ═══════════════════════════════════════
+#  Styled Button
+# ═══════════════════════════════════════
+<CyberButton@Button>:
+    background_color: 0, 0, 0, 0
+    background_normal: ""
+    color: C.TEXT
+    font_size: sp(14)
+    bold: True
+    size_hint_y: None
+    height: dp(48)
+    canvas.before:
+        Color:
+            rgba: C.CYAN_DIM if self.state == "normal" else C.CYAN
+        RoundedRectangle:
+            pos: self.pos
+            size: self.size
+            radius: [dp(12)]
+
+# ═══════════════════════════════════════
+#  Card container
+# ═══════════════════════════════════════
+<Card@BoxLayout>:
+    orientation: "vertical"
+    padding: dp(14)
+    spacing: dp(6)
+    canvas.before:
+        Color:
+            rgba: C.BG_CARD
+        RoundedRectangle:
+            pos: self.pos
+            size: self.size
+            radius: [dp(14)]
+        Color:
+            rgba: C.BORDER
+        Line:
+            rounded_rectangle: [self.x, self.y, self.width, self.height, dp(14)]
+            width: 1
+
+# ═══════════════════════════════════════
+#  Bottom Navigation
+# ═══════════════════════════════════════
+<BottomNav@BoxLayout>:
+    orientation: "horizontal"
+    size_hint_y: None
+    height: dp(60)
+    padding: [dp(4), dp(4)]
+    spacing: dp(2)
+    canvas.before:
+        Color:
+            rgba: C.BG
+        Rectangle:
+            pos: self.pos
+            size: self.size
+        Color:
+            rgba: C.BORDER
+        Line:
+            points: [self.x, self.top, self.right, self.top]
+            width: 1
+
+<NavButton@Button>:
+    background_color: 0, 0, 0, 0
+    background_normal: ""
+    color: C.TEXT_DIM
+    font_size: sp(10)
+    halign: "center"
+    valign: "middle"
+    text_size: self.size
+    markup: True
+"""
@@ -0,0 +1,103 @@
+"""
+Parse cache for KV rule strings.
+
+``Builder.load_string`` tokenises the KV source and compiles every
+property expression and handler on each launch.  ``load_kv`` keeps the
+resulting ``Parser`` (rules, directives, compiled code objects) in a
+pickle keyed by a hash of the source, the Kivy version and the Python
+bytecode tag, and on later starts hands the unpickled parser to the
+Builder instead of parsing again.  Editing the KV string, upgrading Kivy
+or the interpreter simply produces a new key; stale files are removed.
+
+Rule merging, dynamic classes and templates still go through Kivy's own
+``load_string`` — only the ``Parser(...)`` call inside it is replaced —
+so cached and uncached loads register exactly the same things.
+"""
+
+import copyreg
+import hashlib
+import io
+import logging
+import marshal
+import os
+import pickle
+import sys
+import types
+
+log = logging.getLogger("Discordia")
+
+KVCACHE_VERSION = 1
+
+
+def _reduce_code(code):
+    return marshal.loads, (marshal.dumps(code),)
+
+
+def cache_key(source: str) -> str:
+    import kivy
+    h = hashlib.blake2b(digest_size=12)
+    h.update(f"{KVCACHE_VERSION}|{kivy.__version__}|"
+             f"{sys.implementation.cache_tag}|".encode())
+    h.update(source.encode())
+    return h.hexdigest()
+
+
+def _read(path: str):
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        log.warning(f"KV cache {os.path.basename(path)} unusable: {e}")
+        return None
+
+
+def _write(path: str, parser):
+    buf = io.BytesIO()
+    pickler = pickle.Pickler(buf, protocol=pickle.HIGHEST_PROTOCOL)
+    pickler.dispatch_table = copyreg.dispatch_table.copy()
+    pickler.dispatch_table[types.CodeType] = _reduce_code
+    tmp = path + ".tmp"
+    try:
+        pickler.dump(parser)
+        with open(tmp, "wb") as f:
+            f.write(buf.getvalue())
+        os.replace(tmp, path)
+    except Exception as e:
+        log.warning(f"KV cache write error: {e}")
+
+
+def _prune(cache_dir: str, name: str, keep: str):
+    for fn in os.listdir(cache_dir):
+        if fn.startswith(name + "-") and fn != os.path.basename(keep):
+            try:
+                os.remove(os.path.join(cache_dir, fn))
+            except OSError:
+                pass
+
+
+def load_kv(source: str, name: str, cache_dir: str):
+    """
+    ``Builder.load_string(source, filename=name + ".kv")`` backed by a
+    parse cache in *cache_dir*.  Returns whatever ``load_string`` does.
+    """
+    from kivy.lang import builder as kvbuilder
+
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, f"{name}-{cache_key(source)}.kvc")
+    parser = _read(path)
+    if parser is None:
+        parser = kvbuilder.Parser(content=source, filename=f"{name}.kv")
+        _write(path, parser)
+        _prune(cache_dir, name, path)
+    else:
+        # #:import / #:set run during parsing; replay them for the cache
+        parser.execute_directives()
+
+    orig = kvbuilder.Parser
+    kvbuilder.Parser = lambda **kwargs: parser
+    try:
+        return kvbuilder.Builder.load_string(source, filename=f"{name}.kv")
+    finally:
+        kvbuilder.Parser = orig
@@ -0,0 +1,111 @@
+"""
+Public IP lookup and server reachability probes for the screens.
+
+With a GeoIP database installed the dashboard places the address itself
+(``discordia.storage.geoip``), and the lookup fetches only the address.
+"""
+
+import json
+import socket
+import threading
+import time
+from typing import Tuple
+
+from kivy.clock import Clock
+
+from discordia.config import IP_ADDRESS_URL, IP_LOOKUP_URL
+from discordia.diag.metrics import metrics
+from discordia.diag.tracing import tracer
+
+IP_LOOKUP_MS = metrics.histogram("ip_lookup_ms", "Public IP lookup, ms")
+
+
+def fetch_ip_threaded(callback, address_only: bool = False):
+    """Look up the public IP (and, unless *address_only*, where it is)
+    and pass ``{"ip", "country", "city", "org"}`` to *callback* on the
+    UI thread."""
+    # from the request to the card being filled in
+    sid = tracer.begin("ip.fetch", address_only=address_only)
+
+    def _fetch():
+        try:
+            # shared TLS context, resumed sessions, kept-alive connection
+            from discordia.engine.tls import https_get
+            with IP_LOOKUP_MS.time(), tracer.span("ip.lookup"):
+                body = https_get(
+                    IP_ADDRESS_URL if address_only else IP_LOOKUP_URL,
+                    headers={"User-Agent": "DiscordiaVPN-Android/1.0"},
+                    timeout=8,
+                )
+            if address_only:
+                data = {"ip": body.decode().strip() or "?"}
+            else:
+                data = json.loads(body.decode())
+            result = {
+                "ip": data.get("ip", "?"),
+                "country": data.get("country", "?"),
+                "city": data.get("city", "?"),
+                "org": data.get("org", "?"),
+            }
+        except Exception:
+            result = {
+                "ip": "unavailable", "country": "?",
+                "city": "?", "org": "?"
+            }
+
+        def _deliver(dt):
+            tracer.end(sid, "ip.fetch", ip=result["ip"])
+            callback(result)
+
+        Clock.schedule_once(_deliver)
+
+    threading.Thread(target=_fetch, name="Discordia-IP",
+                     daemon=True).start()
+
+
+def resolve_host(host: str) -> str:
+    """An IPv4 address for *host* (returned as is when it is one);
+    raises OSError when the name does not resolve."""
+    infos = socket.getaddrinfo(host, None, socket.AF_INET,
+                               socket.SOCK_DGRAM)
+    return infos[0][4][0]
+
+
+def check_server(host, port, timeout=3) -> Tuple[bool, int]:
+    with tracer.span("probe.connect", host=host, port=port) as sp:
+        try:
+            start = time.monotonic()
+            s = socket.create_connection((host, port), timeout=timeout)
+            latency = round((time.monotonic() - start) * 1000)
+            s.close()
+            sp.set(ok=True)
+            return True, latency
+        except Exception:
+            sp.set(ok=False)
+            return False, 0
+
+
+def probe_servers(servers, on_result, stop: threading.Event,
+                  workers: int = 16, timeout: float = 2):
+    """
+    TCP-connect to each ``server.host:server.port`` from a pool of
+    *workers* threads, calling ``on_result(server, ok, latency_ms)`` as
+    each finishes (on a worker thread).  Setting *stop* skips whatever
+    has not started yet.  Returns at once.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    def _one(server):
+        if not stop.is_set():
+            on_result(server, *check_server(server.host, server.port,
+                                            timeout))
+
+    def _run():
+        targets = [s for s in servers if s.host]
+        sid = tracer.begin("probe.servers", servers=len(targets))
+        with ThreadPoolExecutor(workers,
+                                thread_name_prefix="Discordia-Probe") as ex:
+            ex.map(_one, targets)
+        tracer.end(sid, "probe.servers", stopped=stop.is_set())
+
+    threading.Thread(target=_run, daemon=True).start()
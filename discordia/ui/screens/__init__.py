@@ -0,0 +1,21 @@
+"""
+One module per screen, each holding its KV rules and its Screen class.
+Only the dashboard is imported at startup; the others load on first use.
+"""
+
+import importlib
+
+# name -> Screen class in discordia.ui.screens.<name>
+SCREENS = {
+    "dashboard": "DashboardScreen",
+    "servers": "ServersScreen",
+    "settings": "SettingsScreen",
+    "logs": "LogsScreen",
+    "about": "AboutScreen",
+}
+
+
+def screen_class(name: str):
+    """Import screen *name*; return its ``(KV rules, Screen class)``."""
+    mod = importlib.import_module(f"{__name__}.{name}")
+    return mod.KV, getattr(mod, SCREENS[name])
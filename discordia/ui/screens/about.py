@@ -0,0 +1,95 @@
+"""
+About — static information.
+"""
+
+from kivy.uix.screenmanager import Screen
+
+from discordia.ui.kv import KV_HEADER
+
+KV = KV_HEADER + """
+#:import asset discordia.assets.asset
+# ═══════════════════════════════════════
+#  ABOUT SCREEN
+# ═══════════════════════════════════════
+<AboutScreen>:
+    name: "about"
+
+    BoxLayout:
+        orientation: "vertical"
+        canvas.before:
+            Color:
+                rgba: C.BG_DARK
+            Rectangle:
+                pos: self.pos
+                size: self.size
+
+        ScrollView:
+            do_scroll_x: False
+            BoxLayout:
+                orientation: "vertical"
+                size_hint_y: None
+                height: self.minimum_height
+                padding: [dp(30), dp(20), dp(30), dp(20)]
+                spacing: dp(12)
+
+                Image:
+                    source: asset("logo")
+                    size_hint: None, None
+                    size: dp(100), dp(100)
+                    pos_hint: {"center_x": 0.5}
+
+                Label:
+                    text: "DiscordiaVPN"
+                    font_size: sp(24)
+                    bold: True
+                    color: C.CYAN
+                    halign: "center"
+                    size_hint_y: None
+                    height: dp(36)
+
+                Label:
+                    text: "Android Edition v1.0.0"
+                    font_size: sp(12)
+                    color: C.TEXT_DIM
+                    halign: "center"
+                    size_hint_y: None
+                    height: dp(20)
+
+                Label:
+                    text: "━━━━━━━━━━━━━━━━━━━━━━"
+                    color: C.BORDER
+                    halign: "center"
+                    size_hint_y: None
+                    height: dp(16)
+
+                Label:
+                    text: "Cyberpunk VPN client for Android.\\n\\nModes:\\n  ● DNS-over-HTTPS (1.1.1.1)\\n  ● Cloudflare WARP integration\\n  ● WireGuard (own server)\\n\\nFeatures:\\n  ✦ Encrypted DNS queries\\n  ✦ Bypass DNS-based blocks\\n  ✦ Split tunneling\\n  ✦ Ad blocking via DNS\\n  ✦ Real-time bandwidth monitor\\n  ✦ IP / location checker\\n  ✦ Beautiful cyberpunk UI\\n\\nPowered by Cloudflare 1.1.1.1\\n\\nPrivacy is not a privilege.\\nIt's a right."
+                    font_size: sp(12)
+                    color: C.TEXT_DIM
+                    halign: "left"
+                    valign: "top"
+                    text_size: self.size
+                    size_hint_y: None
+                    height: dp(360)
+
+        BottomNav:
+            NavButton:
+                text: "⬢\\nHome"
+                on_release: app.go("dashboard")
+            NavButton:
+                text: "⊕\\nServers"
+                on_release: app.go("servers")
+            NavButton:
+                text: "⚙\\nSettings"
+                on_release: app.go("settings")
+            NavButton:
+                text: "≡\\nLogs"
+                on_release: app.go("logs")
+            NavButton:
+                text: "[color=#00e5ff]ⓘ[/color]\\nAbout"
+                on_release: app.go("about")
+"""
+
+
+class AboutScreen(Screen):
+    pass
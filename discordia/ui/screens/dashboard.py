@@ -0,0 +1,438 @@
+"""
+Dashboard — connect orb, uptime, IP and bandwidth.
+"""
+
+import threading
+
+from kivy.clock import Clock
+from kivy.uix.screenmanager import Screen
+
+from discordia.config import BANDWIDTH_FILE
+from discordia.diag.tracing import tracer
+from discordia.engine.control import vpn_engine
+from discordia.storage.settings import settings
+from discordia.ui.kv import KV_HEADER
+from discordia.ui.netcheck import fetch_ip_threaded
+from discordia.ui.theme import C
+from discordia.ui.ticker import ui_ticker
+from discordia.ui.widgets import bandwidth
+
+KV = KV_HEADER + """
+#:import asset discordia.assets.asset
+# ═══════════════════════════════════════
+#  DASHBOARD SCREEN
+# ═══════════════════════════════════════
+<DashboardScreen>:
+    name: "dashboard"
+
+    BoxLayout:
+        orientation: "vertical"
+        canvas.before:
+            Color:
+                rgba: C.BG_DARK
+            Rectangle:
+                pos: self.pos
+                size: self.size
+
+        # ─── Top accent bar ───
+        Widget:
+            size_hint_y: None
+            height: dp(3)
+            canvas:
+                Color:
+                    rgba: C.CYAN
+                Rectangle:
+                    pos: self.pos
+                    size: [self.width * 0.5, self.height]
+                Color:
+                    rgba: C.PURPLE
+                Rectangle:
+                    pos: [self.x + self.width * 0.5, self.y]
+                    size: [self.width * 0.5, self.height]
+
+        # ─── Header ───
+        BoxLayout:
+            size_hint_y: None
+            height: dp(56)
+            padding: [dp(16), dp(8)]
+            spacing: dp(10)
+
+            Image:
+                source: asset("logo")
+                size_hint: None, None
+                size: dp(36), dp(36)
+                pos_hint: {"center_y": 0.5}
+
+            Label:
+                text: "DiscordiaVPN"
+                font_size: sp(18)
+                bold: True
+                color: C.CYAN
+                halign: "left"
+                valign: "center"
+                text_size: self.size
+
+            Label:
+                text: "ANDROID"
+                font_size: sp(9)
+                color: C.PURPLE
+                size_hint_x: None
+                width: dp(60)
+                halign: "center"
+                valign: "center"
+                text_size: self.size
+                canvas.before:
+                    Color:
+                        rgba: [C.PURPLE[0], C.PURPLE[1], C.PURPLE[2], 0.15]
+                    RoundedRectangle:
+                        pos: self.pos
+                        size: self.size
+                        radius: [dp(6)]
+
+        # ─── Scrollable content ───
+        ScrollView:
+            do_scroll_x: False
+
+            BoxLayout:
+                orientation: "vertical"
+                size_hint_y: None
+                height: self.minimum_height
+                padding: [dp(20), dp(10), dp(20), dp(16)]
+                spacing: dp(14)
+
+                # ─── Connect Orb ───
+                RelativeLayout:
+                    size_hint_y: None
+                    height: dp(220)
+
+                    ConnectOrb:
+                        id: orb
+                        size_hint: None, None
+                        size: dp(180), dp(180)
+                        pos_hint: {"center_x": 0.5, "center_y": 0.55}
+                        on_release: root.toggle_vpn()
+
+                # ─── Status Text ───
+                Label:
+                    id: status_label
+                    text: "DISCONNECTED"
+                    font_size: sp(20)
+                    bold: True
+                    color: C.CYAN
+                    halign: "center"
+                    size_hint_y: None
+                    height: dp(30)
+
+                Label:
+                    id: proto_label
+                    text: "Tap the orb to connect"
+                    font_size: sp(12)
+                    color: C.TEXT_DIM
+                    halign: "center"
+                    size_hint_y: None
+                    height: dp(20)
+
+                # ─── Info Cards Row 1 ───
+                BoxLayout:
+                    size_hint_y: None
+                    height: dp(80)
+                    spacing: dp(10)
+
+                    Card:
+                        Label:
+                            text: "IP ADDRESS"
+                            font_size: sp(9)
+                            color: C.TEXT_DIM
+                            bold: True
+                            halign: "left"
+                            text_size: self.size
+                            size_hint_y: None
+                            height: dp(16)
+                        Label:
+                            id: ip_label
+                            text: "..."
+                            font_size: sp(13)
+                            bold: True
+                            color: C.CYAN
+                            halign: "left"
+                            text_size: self.size
+
+                    Card:
+                        Label:
+                            text: "LOCATION"
+                            font_size: sp(9)
+                            color: C.TEXT_DIM
+                            bold: True
+                            halign: "left"
+                            text_size: self.size
+                            size_hint_y: None
+                            height: dp(16)
+                        Label:
+                            id: loc_label
+                            text: "..."
+                            font_size: sp(13)
+                            bold: True
+                            color: C.CYAN
+                            halign: "left"
+                            text_size: self.size
+
+                # ─── Info Cards Row 2 ───
+                BoxLayout:
+                    size_hint_y: None
+                    height: dp(80)
+                    spacing: dp(10)
+
+                    Card:
+                        Label:
+                            text: "UPTIME"
+                            font_size: sp(9)
+                            color: C.TEXT_DIM
+                            bold: True
+                            halign: "left"
+                            text_size: self.size
+                            size_hint_y: None
+                            height: dp(16)
+                        Label:
+                            id: uptime_label
+                            text: "00:00:00"
+                            font_size: sp(16)
+                            bold: True
+                            color: C.GREEN
+                            halign: "left"
+                            text_size: self.size
+
+                    Card:
+                        Label:
+                            text: "PROVIDER"
+                            font_size: sp(9)
+                            color: C.TEXT_DIM
+                            bold: True
+                            halign: "left"
+                            text_size: self.size
+                            size_hint_y: None
+                            height: dp(16)
+                        Label:
+                            id: org_label
+                            text: "..."
+                            font_size: sp(12)
+                            bold: True
+                            color: C.CYAN
+                            halign: "left"
+                            text_size: self.size
+
+                # ─── Bandwidth graph placeholder ───
+                Label:
+                    text: "▾  BANDWIDTH  ·  " + bw_graph.span_label
+                    font_size: sp(10)
+                    color: C.TEXT_DIM
+                    bold: True
+                    halign: "left"
+                    text_size: self.size
+                    size_hint_y: None
+                    height: dp(22)
+
+                BandwidthGraph:
+                    id: bw_graph
+                    size_hint_y: None
+                    height: dp(80)
+
+                BoxLayout:
+                    size_hint_y: None
+                    height: dp(18)
+                    Label:
+                        id: dl_label
+                        text: "↓ 0 KB/s"
+                        font_size: sp(11)
+                        color: C.CYAN
+                        halign: "left"
+                        text_size: self.size
+                    Label:
+                        id: ul_label
+                        text: "↑ 0 KB/s"
+                        font_size: sp(11)
+                        color: C.PURPLE
+                        halign: "right"
+                        text_size: self.size
+
+                # ─── Quick actions ───
+                Label:
+                    text: "▾  QUICK ACTIONS"
+                    font_size: sp(10)
+                    color: C.TEXT_DIM
+                    bold: True
+                    halign: "left"
+                    text_size: self.size
+                    size_hint_y: None
+                    height: dp(22)
+
+                BoxLayout:
+                    size_hint_y: None
+                    height: dp(48)
+                    spacing: dp(10)
+
+                    CyberButton:
+                        text: "WARP App"
+                        on_release: root.open_warp()
+                    CyberButton:
+                        text: "WireGuard"
+                        on_release: root.open_wireguard()
+                    CyberButton:
+                        text: "Refresh IP"
+                        on_release: root.refresh_ip()
+
+        # ─── Bottom Navigation ───
+        BottomNav:
+            NavButton:
+                text: "[color=#00e5ff]⬢[/color]\\nHome"
+                on_release: app.go("dashboard")
+            NavButton:
+                text: "⊕\\nServers"
+                on_release: app.go("servers")
+            NavButton:
+                text: "⚙\\nSettings"
+                on_release: app.go("settings")
+            NavButton:
+                text: "≡\\nLogs"
+                on_release: app.go("logs")
+            NavButton:
+                text: "ⓘ\\nAbout"
+                on_release: app.go("about")
+"""
+
+
+class DashboardScreen(Screen):
+    _last_uptime = -1
+
+    def on_enter(self):
+        self.refresh_ip()
+        ui_ticker.subscribe("orb", self.ids.orb._tick)
+        ui_ticker.subscribe("uptime", self._update_ui, 1)
+        ui_ticker.subscribe("bandwidth", self._update_bw, 1.5)
+        self._sync_state()
+
+    def on_leave(self):
+        for key in ("orb", "uptime", "bandwidth"):
+            ui_ticker.unsubscribe(key)
+
+    def _sync_state(self):
+        if vpn_engine.connected:
+            self.ids.orb.set_state(2)
+            self.ids.status_label.text = "SECURED"
+            self.ids.status_label.color = C.GREEN
+        else:
+            self.ids.orb.set_state(0)
+            self.ids.status_label.text = "DISCONNECTED"
+            self.ids.status_label.color = C.CYAN
+        ui_ticker.set_state(active=vpn_engine.connected)
+
+    def _update_ui(self, dt):
+        if not vpn_engine.connected:
+            return
+        up = vpn_engine.uptime_seconds
+        if up != self._last_uptime:
+            self._last_uptime = up
+            self.ids.uptime_label.text = vpn_engine.uptime_str
+
+    def _update_bw(self, dt):
+        dl = ul = 0
+        if vpn_engine.connected:
+            stats = vpn_engine.stats()
+            # nothing to record until a packet path has counted bytes
+            # (never, when simulated): the history keeps measurements only
+            if stats["bytes_rx"] or stats["bytes_tx"]:
+                dl = stats["rx_rate"] / 1024
+                ul = stats["tx_rate"] / 1024
+                bandwidth.add(dl, ul)
+        self.ids.bw_graph.refresh()
+        dl_text = f"↓ {dl:.0f} KB/s"
+        if self.ids.dl_label.text != dl_text:
+            self.ids.dl_label.text = dl_text
+        ul_text = f"↑ {ul:.0f} KB/s"
+        if self.ids.ul_label.text != ul_text:
+            self.ids.ul_label.text = ul_text
+
+    def toggle_vpn(self):
+        if vpn_engine.connected:
+            self._disconnect()
+        else:
+            self._connect()
+
+    def _connect(self):
+        # tap to SECURED (or FAILED) on screen, across the worker
+        sid = tracer.begin("ui.connect")
+        self.ids.orb.set_state(1)
+        ui_ticker.set_state(active=True)
+        self.ids.status_label.text = "CONNECTING …"
+        self.ids.status_label.color = list(C.AMBER)
+        self.ids.proto_label.text = "Establishing tunnel..."
+
+        def _do():
+            mode = settings.get("protocol", "doh")
+            ok, msg = vpn_engine.connect(mode)
+            Clock.schedule_once(lambda dt: self._on_connected(ok, msg, sid))
+
+        threading.Thread(target=_do, name="Discordia-Connect",
+                         daemon=True).start()
+
+    def _on_connected(self, ok, msg, sid=0):
+        tracer.end(sid, "ui.connect", ok=ok)
+        if ok:
+            self.ids.orb.set_state(2)
+            self.ids.status_label.text = "SECURED"
+            self.ids.status_label.color = list(C.GREEN)
+            self.ids.proto_label.text = msg
+            self.refresh_ip()
+        else:
+            self.ids.orb.set_state(0)
+            self.ids.status_label.text = "FAILED"
+            ui_ticker.set_state(active=False)
+            self.ids.status_label.color = list(C.ROSE)
+            self.ids.proto_label.text = msg[:60]
+
+    def _disconnect(self):
+        sid = tracer.begin("ui.disconnect")
+
+        def _do():
+            ok, msg = vpn_engine.disconnect()
+            Clock.schedule_once(
+                lambda dt: self._on_disconnected(ok, msg, sid))
+
+        threading.Thread(target=_do, name="Discordia-Connect",
+                         daemon=True).start()
+
+    def _on_disconnected(self, ok, msg, sid=0):
+        tracer.end(sid, "ui.disconnect", ok=ok)
+        self.ids.orb.set_state(0)
+        self.ids.status_label.text = "DISCONNECTED"
+        self.ids.status_label.color = list(C.CYAN)
+        self.ids.proto_label.text = "Tap the orb to connect"
+        self.ids.uptime_label.text = "00:00:00"
+        self._last_uptime = -1
+        ui_ticker.set_state(active=False)
+        bandwidth.save(BANDWIDTH_FILE)
+        self.refresh_ip()
+
+    def refresh_ip(self):
+        from discordia.storage.geoip import geodb
+        self.ids.ip_label.text = "checking..."
+        # with a local GeoIP database only the address needs the network
+        fetch_ip_threaded(self._on_ip, address_only=geodb() is not None)
+
+    def _on_ip(self, info):
+        from discordia.storage.geoip import geodb
+        db = geodb()
+        geo = db.lookup(info.get("ip", "")) if db is not None else None
+        if geo is not None:
+            info = dict(info, country=geo.country or "?",
+                        city=geo.city or "?", org=geo.provider or "?")
+        self.ids.ip_label.text = info.get("ip", "?")
+        self.ids.loc_label.text = (
+            f"{info.get('city', '?')}, {info.get('country', '?')}"
+        )
+        self.ids.org_label.text = info.get("org", "?")[:25]
+
+    def open_warp(self):
+        vpn_engine.launch_warp()
+
+    def open_wireguard(self):
+        vpn_engine.launch_wireguard()
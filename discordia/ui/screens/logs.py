@@ -0,0 +1,152 @@
+"""
+Logs — tail of the app log file, the latest failed DNS queries, the
+memory diagnostics report or the recent spans (written out as a Chrome
+trace, with the engine process's spans merged in).
+"""
+
+import os
+
+from kivy.uix.screenmanager import Screen
+
+from discordia.config import LOG_FILE, MEMORY_REPORT_FILE, TRACE_FILE
+from discordia.diag.tracing import tracer
+from discordia.engine.querylog import format_record
+from discordia.engine.control import ENGINE_PROCESS, query_log, vpn_engine
+from discordia.ui.kv import KV_HEADER
+
+KV = KV_HEADER + """
+# ═══════════════════════════════════════
+#  LOGS SCREEN
+# ═══════════════════════════════════════
+<LogsScreen>:
+    name: "logs"
+
+    BoxLayout:
+        orientation: "vertical"
+        canvas.before:
+            Color:
+                rgba: C.BG_DARK
+            Rectangle:
+                pos: self.pos
+                size: self.size
+
+        BoxLayout:
+            size_hint_y: None
+            height: dp(56)
+            padding: [dp(16), dp(8)]
+            Label:
+                text: "≡  LOGS"
+                font_size: sp(18)
+                bold: True
+                color: C.TEXT
+                halign: "left"
+                text_size: self.size
+
+        ScrollView:
+            do_scroll_x: False
+            TextInput:
+                id: log_text
+                text: ""
+                font_size: sp(10)
+                foreground_color: C.GREEN
+                background_color: C.BG
+                readonly: True
+                size_hint_y: None
+                height: max(self.minimum_height, dp(400))
+                font_name: "RobotoMono-Regular"
+
+        BoxLayout:
+            size_hint_y: None
+            height: dp(52)
+            padding: [dp(16), dp(4)]
+            spacing: dp(8)
+            CyberButton:
+                text: "Refresh"
+                on_release: root.reload_logs()
+            CyberButton:
+                text: "DNS Fails"
+                on_release: root.show_dns_failures()
+            CyberButton:
+                text: "Memory"
+                on_release: root.show_memory_report()
+            CyberButton:
+                text: "Trace"
+                on_release: root.show_trace()
+            CyberButton:
+                text: "Clear"
+                on_release: root.clear_logs()
+
+        BottomNav:
+            NavButton:
+                text: "⬢\\nHome"
+                on_release: app.go("dashboard")
+            NavButton:
+                text: "⊕\\nServers"
+                on_release: app.go("servers")
+            NavButton:
+                text: "⚙\\nSettings"
+                on_release: app.go("settings")
+            NavButton:
+                text: "[color=#00e5ff]≡[/color]\\nLogs"
+                on_release: app.go("logs")
+            NavButton:
+                text: "ⓘ\\nAbout"
+                on_release: app.go("about")
+"""
+
+
+class LogsScreen(Screen):
+    def on_enter(self):
+        self.reload_logs()
+
+    def reload_logs(self):
+        try:
+            if os.path.exists(LOG_FILE):
+                with open(LOG_FILE) as f:
+                    lines = f.readlines()
+                self.ids.log_text.text = "".join(lines[-200:])
+            else:
+                self.ids.log_text.text = "(no log file yet)"
+        except Exception:
+            self.ids.log_text.text = "(error reading logs)"
+
+    def show_dns_failures(self):
+        try:
+            recs = query_log.search(200, failures_only=True)
+        except Exception as e:
+            self.ids.log_text.text = f"(error reading query log: {e})"
+            return
+        self.ids.log_text.text = (
+            "\n".join(format_record(r) for r in reversed(recs))
+            or "(no failed DNS queries recorded)")
+
+    def show_memory_report(self):
+        try:
+            with open(MEMORY_REPORT_FILE) as f:
+                self.ids.log_text.text = f.read()
+        except FileNotFoundError:
+            self.ids.log_text.text = (
+                "(no memory report — set \"memory_diagnostics\": true in "
+                "settings.json and restart)")
+        except Exception:
+            self.ids.log_text.text = "(error reading memory report)"
+
+    def show_trace(self):
+        extra = vpn_engine.trace_events() if ENGINE_PROCESS else []
+        try:
+            spans = tracer.export(TRACE_FILE, extra)
+        except OSError as e:
+            self.ids.log_text.text = f"(error writing trace: {e})"
+            return
+        self.ids.log_text.text = (
+            f"{spans} spans -> {TRACE_FILE}\n"
+            f"(open in ui.perfetto.dev or chrome://tracing)\n\n"
+            + (tracer.summary(extra) or "(no spans recorded yet)"))
+
+    def clear_logs(self):
+        try:
+            with open(LOG_FILE, "w") as f:
+                f.write("")
+            self.ids.log_text.text = ""
+        except Exception:
+            pass
@@ -0,0 +1,337 @@
+"""
+Servers — the server catalog, filtered and probed.
+
+The list is a RecycleView: only the rows on screen exist as widgets, so
+the catalog size only costs a search and a list of row dicts per filter
+change.
+"""
+
+import threading
+import time
+from collections import deque
+
+from kivy.app import App
+from kivy.clock import Clock
+from kivy.properties import NumericProperty, StringProperty
+from kivy.uix.behaviors import ButtonBehavior
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.screenmanager import Screen
+
+from discordia.engine.control import vpn_engine
+from discordia.storage.catalog import server_catalog
+from discordia.storage.settings import settings
+from discordia.ui.kv import KV_HEADER
+from discordia.ui.netcheck import probe_servers, resolve_host
+
+KV = KV_HEADER + """
+# ═══════════════════════════════════════
+#  SERVERS SCREEN
+# ═══════════════════════════════════════
+<ServerRow>:
+    padding: [dp(14), dp(8)]
+    spacing: dp(10)
+    canvas.before:
+        Color:
+            rgba: C.BG_CARD if self.state == "normal" else C.CYAN_DIM
+        RoundedRectangle:
+            pos: self.pos
+            size: self.size
+            radius: [dp(12)]
+        Color:
+            rgba: C.BORDER
+        Line:
+            rounded_rectangle: [self.x, self.y, self.width, self.height, dp(12)]
+            width: 1
+    Label:
+        text: root.dot
+        markup: True
+        font_size: sp(16)
+        size_hint_x: None
+        width: dp(20)
+    BoxLayout:
+        orientation: "vertical"
+        Label:
+            text: root.title
+            font_size: sp(14)
+            bold: True
+            color: C.TEXT
+            halign: "left"
+            text_size: self.size
+            shorten: True
+        Label:
+            text: root.detail
+            font_size: sp(11)
+            color: C.TEXT_DIM
+            halign: "left"
+            text_size: self.size
+            shorten: True
+    Label:
+        text: root.latency
+        font_size: sp(12)
+        color: C.TEXT_DIM
+        halign: "right"
+        text_size: self.size
+        valign: "middle"
+        size_hint_x: None
+        width: dp(64)
+
+<FilterSpinner@Spinner>:
+    font_size: sp(12)
+    color: C.TEXT
+    background_normal: ""
+    background_color: C.BG_CARD
+    size_hint_y: None
+    height: dp(36)
+
+<ServersScreen>:
+    name: "servers"
+
+    BoxLayout:
+        orientation: "vertical"
+        canvas.before:
+            Color:
+                rgba: C.BG_DARK
+            Rectangle:
+                pos: self.pos
+                size: self.size
+
+        # header
+        BoxLayout:
+            size_hint_y: None
+            height: dp(56)
+            padding: [dp(16), dp(8)]
+            Label:
+                text: "⊕  SERVERS & PROTOCOLS"
+                font_size: sp(18)
+                bold: True
+                color: C.TEXT
+                halign: "left"
+                text_size: self.size
+
+        BoxLayout:
+            orientation: "vertical"
+            padding: [dp(16), 0, dp(16), dp(8)]
+            spacing: dp(8)
+
+            TextInput:
+                id: search_input
+                hint_text: "Search name, host, region  ·  #tag"
+                font_size: sp(13)
+                foreground_color: C.CYAN
+                background_color: C.BG
+                cursor_color: C.CYAN
+                multiline: False
+                size_hint_y: None
+                height: dp(38)
+                on_text: root.refresh()
+
+            BoxLayout:
+                size_hint_y: None
+                height: dp(36)
+                spacing: dp(8)
+                FilterSpinner:
+                    id: region_spinner
+                    text: root.ALL_REGIONS
+                    on_text: root.refresh()
+                FilterSpinner:
+                    id: protocol_spinner
+                    text: root.ALL_PROTOCOLS
+                    on_text: root.refresh()
+                FilterSpinner:
+                    id: sort_spinner
+                    text: "List order"
+                    values: ["List order", "Fastest first"]
+                    on_text: root.refresh()
+
+            Label:
+                id: summary_lbl
+                text: ""
+                font_size: sp(10)
+                bold: True
+                color: C.TEXT_DIM
+                halign: "left"
+                text_size: self.size
+                size_hint_y: None
+                height: dp(20)
+
+            RecycleView:
+                id: rv
+                viewclass: "ServerRow"
+                do_scroll_x: False
+                RecycleBoxLayout:
+                    orientation: "vertical"
+                    default_size: None, dp(60)
+                    default_size_hint: 1, None
+                    size_hint_y: None
+                    height: self.minimum_height
+                    spacing: dp(8)
+
+            CyberButton:
+                text: "CHECK  SERVERS"
+                height: dp(40)
+                on_release: root.check_servers()
+
+        BottomNav:
+            NavButton:
+                text: "⬢\\nHome"
+                on_release: app.go("dashboard")
+            NavButton:
+                text: "[color=#00e5ff]⊕[/color]\\nServers"
+                on_release: app.go("servers")
+            NavButton:
+                text: "⚙\\nSettings"
+                on_release: app.go("settings")
+            NavButton:
+                text: "≡\\nLogs"
+                on_release: app.go("logs")
+            NavButton:
+                text: "ⓘ\\nAbout"
+                on_release: app.go("about")
+"""
+
+_GREEN, _ROSE, _DIM = "#22c55e", "#f43f5e", "#7b8daa"
+
+
+class ServerRow(ButtonBehavior, BoxLayout):
+    index = NumericProperty(0)
+    title = StringProperty("")
+    detail = StringProperty("")
+    dot = StringProperty("")
+    latency = StringProperty("")
+
+    def on_release(self):
+        App.get_running_app().screen("servers").use_server(self.index)
+
+
+class ServersScreen(Screen):
+    ALL_REGIONS = "All regions"
+    ALL_PROTOCOLS = "All protocols"
+
+    def __init__(self, **kwargs):
+        # the KV rule's on_text handlers may fire while it is applied
+        self.refresh = Clock.create_trigger(self._apply_filter, 0.15)
+        self._rows = {}
+        self._shown = []
+        self._probed = deque()
+        self._stop = threading.Event()
+        self._last_check = ""
+        super().__init__(**kwargs)
+
+    def on_kv_post(self, base_widget):
+        self.ids.region_spinner.values = (
+            [self.ALL_REGIONS] + server_catalog.regions())
+        self.ids.protocol_spinner.values = (
+            [self.ALL_PROTOCOLS] + server_catalog.protocols())
+
+    def on_enter(self):
+        self._apply_filter()
+
+    def on_leave(self):
+        self._stop.set()
+
+    def _row(self, i: int) -> dict:
+        row = self._rows.get(i)
+        if row is None:
+            s = server_catalog.servers[i]
+            where = f"{s.host}:{s.port}" if s.host else "configure in app"
+            row = self._rows[i] = {
+                "index": i, "title": s.name,
+                "detail": f"{s.protocol.upper()}  ·  {where}  ·  {s.region}",
+            }
+            self._set_status(row, s)
+        return row
+
+    @staticmethod
+    def _set_status(row: dict, s):
+        if s.ok is None:
+            row["dot"] = f"[color={_DIM}]●[/color]"
+            row["latency"] = "—"
+        elif s.ok:
+            row["dot"] = f"[color={_GREEN}]●[/color]"
+            row["latency"] = f"{s.latency_ms} ms"
+        else:
+            row["dot"] = f"[color={_ROSE}]●[/color]"
+            row["latency"] = "offline"
+
+    def _apply_filter(self, *_):
+        ids = self.ids
+        region = ids.region_spinner.text
+        protocol = ids.protocol_spinner.text
+        shown = server_catalog.search(
+            ids.search_input.text,
+            region=None if region == self.ALL_REGIONS else region,
+            protocol=None if protocol == self.ALL_PROTOCOLS else protocol,
+            by_latency=ids.sort_spinner.text == "Fastest first",
+        )
+        self._shown = shown
+        ids.rv.data = [self._row(i) for i in shown]
+        ids.summary_lbl.text = (
+            f"▾  {len(shown)} OF {len(server_catalog)} SERVERS"
+            + self._last_check)
+
+    # ─── probing ───
+    def check_servers(self):
+        self._stop.set()
+        self._stop = stop = threading.Event()
+        servers = [server_catalog.servers[i] for i in self._shown]
+        self._last_check = "  ·  CHECKING …"
+        self.refresh()
+
+        def _done(server, ok, latency_ms):
+            server_catalog.record(server.index, ok, latency_ms, time.time())
+            self._probed.append(server.index)
+            Clock.schedule_once(self._drain_probes)
+
+        probe_servers(servers, _done, stop)
+
+    def _drain_probes(self, dt):
+        if not self._probed:
+            return
+        while self._probed:
+            i = self._probed.popleft()
+            if i in self._rows:
+                self._set_status(self._rows[i],
+                                 server_catalog.servers[i])
+        now_str = time.strftime("%H:%M:%S UTC", time.gmtime())
+        self._last_check = f"  ·  CHECKED {now_str}"
+        self.refresh()
+
+    # ─── actions ───
+    def use_server(self, index: int):
+        s = server_catalog.servers[index]
+        if s.protocol == "warp":
+            vpn_engine.launch_warp()
+        elif s.protocol == "wireguard":
+            vpn_engine.launch_wireguard()
+        else:
+            # dns_primary reaches addDnsServer, the route excludes and
+            # the upstream list, which all need an address: resolve the
+            # host off the UI thread first
+            def _resolve():
+                try:
+                    address = resolve_host(s.host)
+                except OSError:
+                    address = None
+                Clock.schedule_once(lambda dt: self._apply_server(s, address))
+
+            threading.Thread(target=_resolve, name="Discordia-UseServer",
+                             daemon=True).start()
+
+    def _apply_server(self, s, address):
+        if address is None:
+            self._last_check = f"  ·  {s.host.upper()} DID NOT RESOLVE"
+            self.refresh()
+            return
+        settings.set("dns_primary", address)
+        # the probe port is the service port; DoH mode resolves over
+        # plain DNS to the same host, like the Android service
+        settings.set("upstream_port",
+                     s.port if s.protocol == "dot" and s.port != 853 else 0)
+        settings.set("upstream_host", "" if address == s.host else s.host)
+        settings.set("protocol", s.protocol)
+        app = App.get_running_app()
+        app.go("dashboard")
+        if vpn_engine.connected:
+            vpn_engine.reconfigure()
+        else:
+            app.screen("dashboard")._connect()
@@ -0,0 +1,301 @@
+"""
+Settings — DNS servers, toggles and usage totals.
+"""
+
+import logging
+import threading
+
+from kivy.clock import Clock
+from kivy.uix.screenmanager import Screen
+
+from discordia.engine.control import session_store, vpn_engine
+from discordia.storage.settings import settings
+from discordia.ui.kv import KV_HEADER
+from discordia.ui.theme import C
+
+log = logging.getLogger("Discordia")
+
+KV = KV_HEADER + """
+# ═══════════════════════════════════════
+#  SETTINGS SCREEN
+# ═══════════════════════════════════════
+<SettingsScreen>:
+    name: "settings"
+
+    BoxLayout:
+        orientation: "vertical"
+        canvas.before:
+            Color:
+                rgba: C.BG_DARK
+            Rectangle:
+                pos: self.pos
+                size: self.size
+
+        BoxLayout:
+            size_hint_y: None
+            height: dp(56)
+            padding: [dp(16), dp(8)]
+            Label:
+                text: "⚙  SETTINGS"
+                font_size: sp(18)
+                bold: True
+                color: C.TEXT
+                halign: "left"
+                text_size: self.size
+
+        ScrollView:
+            do_scroll_x: False
+            BoxLayout:
+                orientation: "vertical"
+                size_hint_y: None
+                height: self.minimum_height
+                padding: [dp(16), dp(4), dp(16), dp(16)]
+                spacing: dp(10)
+
+                Label:
+                    text: "DNS SERVERS"
+                    font_size: sp(10)
+                    bold: True
+                    color: C.TEXT_DIM
+                    halign: "left"
+                    text_size: self.size
+                    size_hint_y: None
+                    height: dp(24)
+
+                Card:
+                    size_hint_y: None
+                    height: dp(80)
+                    BoxLayout:
+                        orientation: "vertical"
+                        spacing: dp(6)
+                        BoxLayout:
+                            Label:
+                                text: "Primary:"
+                                font_size: sp(12)
+                                color: C.TEXT_DIM
+                                size_hint_x: 0.3
+                                halign: "left"
+                                text_size: self.size
+                            TextInput:
+                                id: dns1_input
+                                text: "1.1.1.1"
+                                font_size: sp(13)
+                                foreground_color: C.CYAN
+                                background_color: C.BG
+                                cursor_color: C.CYAN
+                                multiline: False
+                                size_hint_x: 0.7
+                        BoxLayout:
+                            Label:
+                                text: "Secondary:"
+                                font_size: sp(12)
+                                color: C.TEXT_DIM
+                                size_hint_x: 0.3
+                                halign: "left"
+                                text_size: self.size
+                            TextInput:
+                                id: dns2_input
+                                text: "1.0.0.1"
+                                font_size: sp(13)
+                                foreground_color: C.CYAN
+                                background_color: C.BG
+                                cursor_color: C.CYAN
+                                multiline: False
+                                size_hint_x: 0.7
+
+                Label:
+                    text: "FEATURES"
+                    font_size: sp(10)
+                    bold: True
+                    color: C.TEXT_DIM
+                    halign: "left"
+                    text_size: self.size
+                    size_hint_y: None
+                    height: dp(24)
+
+                Card:
+                    size_hint_y: None
+                    height: dp(204)
+                    BoxLayout:
+                        orientation: "vertical"
+                        spacing: dp(8)
+
+                        BoxLayout:
+                            size_hint_y: None
+                            height: dp(36)
+                            Label:
+                                text: "Auto-connect on startup"
+                                font_size: sp(13)
+                                color: C.TEXT
+                                halign: "left"
+                                text_size: self.size
+                            Switch:
+                                id: sw_autoconnect
+                                active: False
+                                size_hint_x: None
+                                width: dp(60)
+
+                        BoxLayout:
+                            size_hint_y: None
+                            height: dp(36)
+                            Label:
+                                text: "Block ads via DNS"
+                                font_size: sp(13)
+                                color: C.TEXT
+                                halign: "left"
+                                text_size: self.size
+                            Switch:
+                                id: sw_blockads
+                                active: False
+                                size_hint_x: None
+                                width: dp(60)
+
+                        BoxLayout:
+                            size_hint_y: None
+                            height: dp(36)
+                            Label:
+                                text: "Split tunneling"
+                                font_size: sp(13)
+                                color: C.TEXT
+                                halign: "left"
+                                text_size: self.size
+                            Switch:
+                                id: sw_split
+                                active: True
+                                size_hint_x: None
+                                width: dp(60)
+
+                        BoxLayout:
+                            size_hint_y: None
+                            height: dp(36)
+                            Label:
+                                text: "DNS-over-TLS (port 853)"
+                                font_size: sp(13)
+                                color: C.TEXT
+                                halign: "left"
+                                text_size: self.size
+                            Switch:
+                                id: sw_dot
+                                active: False
+                                size_hint_x: None
+                                width: dp(60)
+
+                CyberButton:
+                    text: "💾  SAVE SETTINGS"
+                    on_release: root.save_settings()
+
+                Label:
+                    id: save_label
+                    text: ""
+                    font_size: sp(11)
+                    color: C.TEXT_DIM
+                    halign: "left"
+                    text_size: self.size
+                    size_hint_y: None
+                    height: dp(18)
+
+                Label:
+                    text: "STATISTICS"
+                    font_size: sp(10)
+                    bold: True
+                    color: C.TEXT_DIM
+                    halign: "left"
+                    text_size: self.size
+                    size_hint_y: None
+                    height: dp(24)
+
+                Card:
+                    size_hint_y: None
+                    height: dp(112)
+                    Label:
+                        id: stats_label
+                        text: "Loading..."
+                        font_size: sp(12)
+                        color: C.TEXT_DIM
+                        halign: "left"
+                        valign: "top"
+                        text_size: self.size
+                        markup: True
+
+        BottomNav:
+            NavButton:
+                text: "⬢\\nHome"
+                on_release: app.go("dashboard")
+            NavButton:
+                text: "⊕\\nServers"
+                on_release: app.go("servers")
+            NavButton:
+                text: "[color=#00e5ff]⚙[/color]\\nSettings"
+                on_release: app.go("settings")
+            NavButton:
+                text: "≡\\nLogs"
+                on_release: app.go("logs")
+            NavButton:
+                text: "ⓘ\\nAbout"
+                on_release: app.go("about")
+"""
+
+
+class SettingsScreen(Screen):
+    def on_enter(self):
+        self.ids.dns1_input.text = settings.get("dns_primary", "1.1.1.1")
+        self.ids.dns2_input.text = settings.get("dns_secondary", "1.0.0.1")
+        self.ids.sw_autoconnect.active = settings.get("auto_connect", False)
+        self.ids.sw_blockads.active = settings.get("block_ads", False)
+        self.ids.sw_split.active = settings.get("split_tunnel", True)
+        self.ids.sw_dot.active = settings.get("protocol", "doh") == "dot"
+
+        # legacy totals in settings.json predate the session store
+        hist = session_store.summary()
+        total_time = (hist["seconds"]
+                      + settings.get("total_connected_time", 0))
+        h, rem = divmod(total_time, 3600)
+        m, _ = divmod(rem, 60)
+        total_conn = (hist["sessions"]
+                      + settings.get("total_connections", 0))
+        stats = vpn_engine.stats()
+        queries = stats["queries"]
+        hit_pct = stats["cache_hits"] * 100 // queries if queries else 0
+        first = (f"{stats['first_ms']:.0f} ms"
+                 if stats["first_ms"] is not None else "—")
+        self.ids.stats_label.text = (
+            f"[color=#00e5ff]Total connections:[/color] {total_conn}\n"
+            f"[color=#00e5ff]Total time connected:[/color] {h}h {m}m\n"
+            f"[color=#00e5ff]DNS queries:[/color] {queries} "
+            f"({hit_pct}% from cache)\n"
+            f"[color=#00e5ff]First answer:[/color] {first}  "
+            f"[color=#00e5ff]TLS resumed:[/color] "
+            f"{stats['tls_resumed']}/{stats['tls_handshakes']}"
+        )
+
+    def save_settings(self):
+        primary = self.ids.dns1_input.text.strip() or "1.1.1.1"
+        if primary != settings.get("dns_primary", "1.1.1.1"):
+            # a typed address replaces the catalog entry it came from
+            settings.set("upstream_port", 0)
+            settings.set("upstream_host", "")
+        settings.set("dns_primary", primary)
+        settings.set("dns_secondary", self.ids.dns2_input.text.strip() or "1.0.0.1")
+        settings.set("auto_connect", self.ids.sw_autoconnect.active)
+        settings.set("block_ads", self.ids.sw_blockads.active)
+        settings.set("split_tunnel", self.ids.sw_split.active)
+        if self.ids.sw_dot.active:
+            settings.set("protocol", "dot")
+        elif settings.get("protocol", "doh") == "dot":
+            settings.set("protocol", "doh")
+        log.info("Settings saved")
+        self.ids.save_label.text = "Applying …"
+        self.ids.save_label.color = list(C.TEXT_DIM)
+
+        def _do():
+            # a running tunnel picks the changes up in place; that can
+            # take a blocklist load or a round trip to the engine
+            ok, msg = vpn_engine.reconfigure()
+            Clock.schedule_once(lambda dt: self._on_reconfigured(ok, msg))
+
+        threading.Thread(target=_do, name="Discordia-Reconfigure",
+                         daemon=True).start()
+
+    def _on_reconfigured(self, ok, msg):
+        self.ids.save_label.text = msg[:60]
+        self.ids.save_label.color = list(C.GREEN if ok else C.ROSE)
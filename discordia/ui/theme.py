@@ -0,0 +1,27 @@
+"""
+Colour palette, shared by the KV rules (``#:import C``) and the widgets.
+"""
+
+
+# colour palette (cyberpunk)
+class C:
+    BG           = [0.027, 0.035, 0.067, 1]       # #070912
+    BG_DARK      = [0.039, 0.059, 0.118, 1]       # #0a0f1e
+    BG_CARD      = [0.078, 0.125, 0.239, 1]       # #14203d
+    BG_CARD_LT   = [0.106, 0.176, 0.333, 1]       # #1b2d55
+    CYAN         = [0, 0.898, 1, 1]                # #00e5ff
+    CYAN_DIM     = [0, 0.431, 0.478, 1]            # #006e7a
+    PURPLE       = [0.659, 0.333, 0.969, 1]        # #a855f7
+    MAGENTA      = [0.878, 0.251, 0.984, 1]        # #e040fb
+    GREEN        = [0.133, 0.773, 0.369, 1]        # #22c55e
+    AMBER        = [0.961, 0.620, 0.043, 1]        # #f59e0b
+    ROSE         = [0.957, 0.247, 0.369, 1]        # #f43f5e
+    TEXT         = [0.886, 0.910, 0.941, 1]        # #e2e8f0
+    TEXT_DIM     = [0.482, 0.553, 0.667, 1]        # #7b8daa
+    BORDER       = [0.102, 0.180, 0.314, 1]        # #1a2e50
+    TRANSPARENT  = [0, 0, 0, 0]
+
+    @staticmethod
+    def hex(h: str) -> list:
+        h = h.lstrip("#")
+        return [int(h[i:i+2], 16) / 255 for i in (0, 2, 4)] + [1]
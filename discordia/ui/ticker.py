@@ -0,0 +1,91 @@
+"""
+Shared UI scheduler: one Clock interval drives every periodic UI timer.
+"""
+
+import time
+from typing import Dict
+
+from kivy.clock import Clock
+
+from discordia.diag.metrics import metrics
+
+UI_TICKS = metrics.counter("ui_ticks_total", "Shared UI scheduler ticks")
+
+
+class UITicker:
+    """
+    One Clock interval for all periodic UI work.
+
+    Subscribers ask for a period; they run on the first shared tick at or
+    after it is due, so several timers cost a single main-loop wakeup.
+    The tick rate follows app state:
+
+      ACTIVE_HZ       connecting/connected and in the foreground
+      IDLE_HZ         disconnected
+      BACKGROUND_HZ   window unfocused or minimised
+      0               app paused, or nobody subscribed
+    """
+    ACTIVE_HZ = 30
+    IDLE_HZ = 4
+    BACKGROUND_HZ = 1
+
+    def __init__(self):
+        self._subs: Dict[str, list] = {}  # key -> [cb, period, due, last]
+        self._event = None
+        self._hz = 0
+        self.active = False
+        self.focused = True
+        self.paused = False
+
+    def subscribe(self, key: str, callback, period: float = 0.0):
+        """Call ``callback(elapsed)`` every *period* s (0 = every tick)."""
+        now = time.monotonic()
+        self._subs[key] = [callback, period, now, now]
+        self._retune()
+
+    def unsubscribe(self, key: str):
+        self._subs.pop(key, None)
+        self._retune()
+
+    def set_state(self, active=None, focused=None, paused=None):
+        if active is not None:
+            self.active = active
+        if focused is not None:
+            self.focused = focused
+        if paused is not None:
+            self.paused = paused
+        self._retune()
+
+    def _target_hz(self) -> int:
+        if self.paused or not self._subs:
+            return 0
+        if not self.focused:
+            return self.BACKGROUND_HZ
+        return self.ACTIVE_HZ if self.active else self.IDLE_HZ
+
+    def _retune(self):
+        hz = self._target_hz()
+        if hz == self._hz:
+            return
+        if self._event is not None:
+            self._event.cancel()
+            self._event = None
+        if hz:
+            self._event = Clock.schedule_interval(self._tick, 1 / hz)
+        self._hz = hz
+
+    def _tick(self, dt):
+        UI_TICKS.inc()
+        now = time.monotonic()
+        # half a tick of slack keeps 1 s timers from slipping a tick
+        slack = 0.5 / self._hz if self._hz else 0
+        for sub in list(self._subs.values()):
+            cb, period, due, last = sub
+            if now + slack < due:
+                continue
+            sub[2] = max(due + period, now) if period else now
+            sub[3] = now
+            cb(now - last)
+
+
+ui_ticker = UITicker()
@@ -0,0 +1,175 @@
+"""
+Custom dashboard widgets: the connect orb and the bandwidth graph.
+"""
+
+import math
+
+from kivy.graphics import Color, Ellipse, Line, RoundedRectangle
+from kivy.metrics import dp
+from kivy.properties import NumericProperty, StringProperty
+from kivy.uix.button import Button
+from kivy.uix.widget import Widget
+
+from discordia.config import BANDWIDTH_FILE
+from discordia.storage.timeseries import BandwidthSeries
+from discordia.ui.theme import C
+
+# Throughput history behind the dashboard graph (1 s / 1 min / 15 min tiers)
+bandwidth = BandwidthSeries.load(BANDWIDTH_FILE)
+
+
+class ConnectOrb(Button):
+    """Animated connection orb — matches Windows version design."""
+    state_vpn = NumericProperty(0)  # 0=off, 1=busy, 2=on
+    _angle = NumericProperty(0)
+    _pulse = NumericProperty(0)
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.background_color = [0, 0, 0, 0]
+        self.background_normal = ""
+
+    def _tick(self, dt):
+        # 60°/s whatever the shared tick rate currently is
+        self._angle = (self._angle + 60 * dt) % 360
+        self._pulse = (math.sin(math.radians(self._angle * 2)) + 1) / 2
+        self.canvas.ask_update()
+
+    def on_size(self, *a):
+        self._redraw()
+
+    def on_pos(self, *a):
+        self._redraw()
+
+    def on__angle(self, *a):
+        self._redraw()
+
+    def _redraw(self):
+        self.canvas.before.clear()
+        with self.canvas.before:
+            cx = self.center_x
+            cy = self.center_y
+            R = min(self.width, self.height) / 2 - dp(10)
+
+            col_map = {
+                0: C.CYAN,
+                1: C.AMBER,
+                2: C.GREEN,
+            }
+            col = col_map.get(self.state_vpn, C.CYAN)
+            pulse = self._pulse
+
+            # outer rings
+            for i in range(4):
+                alpha = max(0.02, (0.18 - i * 0.04) * (0.5 + 0.5 * pulse))
+                rr = R + dp(6) + i * dp(5) + math.sin(
+                    math.radians(self._angle + i * 35)
+                ) * dp(2)
+                Color(col[0], col[1], col[2], alpha)
+                Line(
+                    ellipse=(cx - rr, cy - rr, rr * 2, rr * 2),
+                    width=dp(1),
+                )
+
+            # main circle fill
+            alpha_fill = 0.12 + 0.06 * pulse
+            Color(col[0], col[1], col[2], alpha_fill)
+            Ellipse(pos=(cx - R, cy - R), size=(R * 2, R * 2))
+
+            # border
+            alpha_border = 0.6 + 0.3 * pulse
+            Color(col[0], col[1], col[2], alpha_border)
+            Line(
+                ellipse=(cx - R, cy - R, R * 2, R * 2),
+                width=dp(2),
+            )
+
+            # center icon text
+            # (drawn as label overlay)
+
+    def set_state(self, s):
+        self.state_vpn = s
+
+
+# (seconds, label) — tapping the graph cycles through these
+ZOOM_SPANS = (
+    (60, "1 MIN"), (600, "10 MIN"), (3600, "1 H"),
+    (86400, "24 H"), (30 * 86400, "30 D"),
+)
+
+
+class BandwidthGraph(Widget):
+    """Bandwidth history graph; tap to cycle the time span."""
+    zoom = NumericProperty(0)
+    span_label = StringProperty(ZOOM_SPANS[0][1])
+    _flat = False
+
+    def refresh(self):
+        self._redraw()
+
+    def on_touch_down(self, touch):
+        if self.collide_point(*touch.pos):
+            self.zoom = (self.zoom + 1) % len(ZOOM_SPANS)
+            return True
+        return super().on_touch_down(touch)
+
+    def on_zoom(self, *a):
+        self.span_label = ZOOM_SPANS[self.zoom][1]
+        self._flat = False
+        self._redraw()
+
+    def on_size(self, *a):
+        self._flat = False
+        self._redraw()
+
+    def on_pos(self, *a):
+        self._flat = False
+        self._redraw()
+
+    def _redraw(self):
+        span = ZOOM_SPANS[self.zoom][0]
+        # one point per two pixels is as much as a line can show
+        xd, yd, xu, yu = bandwidth.window(span, max(int(self.width / 2), 3))
+        flat = not any(yd) and not any(yu)
+        if flat and self._flat:
+            return  # flat line stays flat — nothing to redraw
+        self._flat = flat
+
+        self.canvas.clear()
+        with self.canvas:
+            # background
+            Color(*C.BG)
+            RoundedRectangle(
+                pos=self.pos, size=self.size,
+                radius=[dp(8)]
+            )
+
+            w, h = self.width, self.height
+            x0, y0 = self.pos
+            mx = max(max(yd), max(yu), 1.0)
+
+            # grid lines
+            Color(1, 1, 1, 0.05)
+            for i in range(1, 4):
+                yy = y0 + h * i / 4
+                Line(points=[x0, yy, x0 + w, yy], width=0.5)
+
+            # download line
+            pts_dl = []
+            for x, v in zip(xd, yd):
+                px = x0 + w * (1 + x / span)
+                py = y0 + (v / mx * h * 0.85) + dp(2)
+                pts_dl.extend([px, py])
+            if len(pts_dl) >= 4:
+                Color(*C.CYAN[:3], 0.8)
+                Line(points=pts_dl, width=dp(1.2))
+
+            # upload line
+            pts_ul = []
+            for x, v in zip(xu, yu):
+                px = x0 + w * (1 + x / span)
+                py = y0 + (v / mx * h * 0.85) + dp(2)
+                pts_ul.extend([px, py])
+            if len(pts_ul) >= 4:
+                Color(*C.PURPLE[:3], 0.6)
+                Line(points=pts_ul, width=dp(1.2))
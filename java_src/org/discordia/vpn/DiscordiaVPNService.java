@@ -22,6 +22,7 @@ import java.net.InetAddress;
 import java.net.InetSocketAddress;
 import java.nio.ByteBuffer;
 import java.nio.channels.DatagramChannel;
+import java.util.Arrays;
 import java.util.concurrent.atomic.AtomicBoolean;
 
 public class DiscordiaVPNService extends VpnService {
@@ -31,15 +32,35 @@ public class DiscordiaVPNService extends VpnService {
     private static final String VPN_ADDRESS = "10.0.0.2";
     private static final String VPN_ROUTE = "0.0.0.0";
 
-    private ParcelFileDescriptor vpnInterface;
+    // Replaced (not closed first) on RECONFIGURE; the loop follows it
+    private volatile ParcelFileDescriptor vpnInterface;
     private Thread vpnThread;
+    // Guards the interface hand-over between rebuildVpn and the loop
+    private final Object interfaceLock = new Object();
+    private ParcelFileDescriptor servedInterface;
     private AtomicBoolean isRunning = new AtomicBoolean(false);
 
-    private String dnsPrimary = "1.1.1.1";
-    private String dnsSecondary = "1.0.0.1";
-    private boolean blockAds = false;
-    private boolean splitTunnel = true;
+    // Read per packet, so RECONFIGURE changes them in place
+    private volatile String dnsPrimary = "1.1.1.1";
+    private volatile String dnsSecondary = "1.0.0.1";
+    private volatile boolean blockAds = false;
+    private volatile boolean splitTunnel = true;
     private String mode = "doh";
+    private String routes = null;
+
+    // Query rate limit: a token bucket per sender (source address) in a
+    // fixed hashed table, so sender churn cannot grow it, plus one
+    // global bucket.  Over budget: REFUSED, or dropped.  0 = off.
+    private static final int RATE_SLOTS = 1024;
+    private volatile int rateQps = 50;
+    private volatile int rateBurst = 100;
+    private volatile int rateGlobalQps = 1000;
+    private volatile boolean rateRefuse = true;
+    private final double[] rateTokens = new double[RATE_SLOTS];
+    private final long[] rateStamps = new long[RATE_SLOTS];
+    private double globalTokens;
+    private long globalStamp;
+    private long rateLimited;
 
     @Override
     public int onStartCommand(Intent intent, int flags, int startId) {
@@ -55,6 +76,12 @@ public class DiscordiaVPNService extends VpnService {
             return START_NOT_STICKY;
         }
 
+        // What the running interface was built from
+        String oldRoutes = routes;
+        String oldPrimary = dnsPrimary;
+        String oldSecondary = dnsSecondary;
+        boolean oldSplit = splitTunnel;
+
         // Extract config
         mode = intent.getStringExtra("mode");
         if (mode == null) mode = "doh";
@@ -67,11 +94,39 @@ public class DiscordiaVPNService extends VpnService {
 
         blockAds = intent.getBooleanExtra("block_ads", false);
         splitTunnel = intent.getBooleanExtra("split_tunnel", true);
+        // Pre-aggregated "addr/len,addr/len,..." list from the route planner
+        routes = intent.getStringExtra("routes");
+
+        rateQps = intent.getIntExtra("rate_limit_qps", 50);
+        rateBurst = intent.getIntExtra("rate_limit_burst", 100);
+        rateGlobalQps = intent.getIntExtra("rate_limit_global_qps", 1000);
+        rateRefuse = intent.getBooleanExtra("rate_limit_refuse", true);
+
+        if ("RECONFIGURE".equals(action) && isRunning.get()) {
+            // Only routes and the advertised DNS servers live in the
+            // interface; everything else was applied by the fields above
+            boolean rebuild = !equal(routes, oldRoutes)
+                    || !dnsPrimary.equals(oldPrimary)
+                    || !dnsSecondary.equals(oldSecondary)
+                    || splitTunnel != oldSplit;
+            if (rebuild) {
+                rebuildVpn();
+            }
+            Log.i(TAG, "VPN reconfigured — DNS: " + dnsPrimary +
+                       " / " + dnsSecondary +
+                       " | Ads block: " + blockAds +
+                       " | Interface rebuilt: " + rebuild);
+            return START_STICKY;
+        }
 
         startVpn();
         return START_STICKY;
     }
 
+    private static boolean equal(String a, String b) {
+        return a == null ? b == null : a.equals(b);
+    }
+
     private void startVpn() {
         if (isRunning.get()) {
             Log.w(TAG, "VPN already running");
@@ -79,32 +134,7 @@ public class DiscordiaVPNService extends VpnService {
         }
 
         try {
-            // Build VPN interface
-            Builder builder = new Builder();
-            builder.setSession("DiscordiaVPN");
-            builder.setMtu(MTU);
-            builder.addAddress(VPN_ADDRESS, 32);
-            builder.addDnsServer(dnsPrimary);
-            builder.addDnsServer(dnsSecondary);
-
-            if (splitTunnel) {
-                // Only route DNS through VPN
-                builder.addRoute(dnsPrimary, 32);
-                builder.addRoute(dnsSecondary, 32);
-                // Common DNS blocking IPs
-                builder.addRoute("8.8.8.8", 32);
-                builder.addRoute("8.8.4.4", 32);
-            } else {
-                // Route everything
-                builder.addRoute(VPN_ROUTE, 0);
-            }
-
-            // Exclude our own app to prevent loops
-            try {
-                builder.addDisallowedApplication(getPackageName());
-            } catch (Exception ignored) {}
-
-            vpnInterface = builder.establish();
+            vpnInterface = buildInterface();
 
             if (vpnInterface == null) {
                 Log.e(TAG, "Failed to establish VPN interface");
@@ -127,9 +157,98 @@ public class DiscordiaVPNService extends VpnService {
         }
     }
 
+    /**
+     * Establish a new interface over the running one.  The system
+     * switches to it seamlessly.  The loop thread is interrupted out of
+     * its wait, picks up the new descriptor and closes the old one
+     * itself, so nothing is closed under a read in progress.
+     */
+    private void rebuildVpn() {
+        try {
+            ParcelFileDescriptor fresh = buildInterface();
+            if (fresh == null) {
+                Log.e(TAG, "Failed to re-establish VPN interface");
+                return;
+            }
+            synchronized (interfaceLock) {
+                ParcelFileDescriptor old = vpnInterface;
+                vpnInterface = fresh;
+                // replaced again before the loop got to it
+                if (old != null && old != servedInterface) {
+                    old.close();
+                }
+                Thread thread = vpnThread;
+                if (thread != null) {
+                    thread.interrupt();
+                }
+            }
+        } catch (Exception e) {
+            Log.e(TAG, "VPN rebuild error", e);
+        }
+    }
+
+    private ParcelFileDescriptor buildInterface() {
+        // Build VPN interface
+        Builder builder = new Builder();
+        builder.setSession("DiscordiaVPN");
+        // reads return at once when idle; the loop sleeps between polls
+        builder.setBlocking(false);
+        builder.setMtu(MTU);
+        builder.addAddress(VPN_ADDRESS, 32);
+        builder.addDnsServer(dnsPrimary);
+        builder.addDnsServer(dnsSecondary);
+
+        if (routes != null && !routes.isEmpty()) {
+            for (String route : routes.split(",")) {
+                int slash = route.indexOf('/');
+                if (slash < 0) continue;
+                builder.addRoute(
+                    route.substring(0, slash),
+                    Integer.parseInt(route.substring(slash + 1))
+                );
+            }
+        } else if (splitTunnel) {
+            // Only route DNS through VPN
+            builder.addRoute(dnsPrimary, 32);
+            builder.addRoute(dnsSecondary, 32);
+            // Common DNS blocking IPs
+            builder.addRoute("8.8.8.8", 32);
+            builder.addRoute("8.8.4.4", 32);
+        } else {
+            // Route everything
+            builder.addRoute(VPN_ROUTE, 0);
+        }
+
+        // Exclude our own app to prevent loops
+        try {
+            builder.addDisallowedApplication(getPackageName());
+        } catch (Exception ignored) {}
+
+        return builder.establish();
+    }
+
     private void runVpnLoop() {
-        FileInputStream in = new FileInputStream(vpnInterface.getFileDescriptor());
-        FileOutputStream out = new FileOutputStream(vpnInterface.getFileDescriptor());
+        // Serve each interface until RECONFIGURE replaces it
+        ParcelFileDescriptor pfd;
+        while (isRunning.get()) {
+            synchronized (interfaceLock) {
+                // the interrupt that announced this interface is spent
+                Thread.interrupted();
+                pfd = vpnInterface;
+                servedInterface = pfd;
+            }
+            if (pfd == null) break;
+            serveInterface(pfd);
+            if (vpnInterface == pfd) break;
+            try {
+                pfd.close();
+            } catch (IOException ignored) {}
+        }
+    }
+
+    private void serveInterface(ParcelFileDescriptor pfd) {
+        FileInputStream in = new FileInputStream(pfd.getFileDescriptor());
+        FileOutputStream out = new FileOutputStream(pfd.getFileDescriptor());
 
         ByteBuffer packet = ByteBuffer.allocate(MTU);
         DatagramChannel tunnel = null;
@@ -139,7 +258,7 @@ public class DiscordiaVPNService extends VpnService {
             tunnel.connect(new InetSocketAddress(dnsPrimary, 53));
             protect(tunnel.socket());
 
-            while (isRunning.get()) {
+            while (isRunning.get() && vpnInterface == pfd) {
                 packet.clear();
                 int length = in.read(packet.array());
 
@@ -152,6 +271,14 @@ public class DiscordiaVPNService extends VpnService {
 
                 // Check if this is a DNS packet (UDP to port 53)
                 if (isDnsPacket(packet.array(), length)) {
+                    if (!allowQuery(packet.array())) {
+                        // Over budget: never forwarded, so a flood
+                        // cannot hold up the next sender's query
+                        if (rateRefuse) {
+                            refuseDnsPacket(packet.array(), length, out);
+                        }
+                        continue;
+                    }
                     // Extract DNS query and forward to secure DNS
                     handleDnsPacket(packet, length, in, out, tunnel);
                 } else if (!splitTunnel) {
@@ -166,11 +293,14 @@ public class DiscordiaVPNService extends VpnService {
                     }
                 }
                 // In split tunnel mode, non-DNS traffic goes
-                // through the normal network
+                // through the normal network: nothing here forwards it,
+                // so the engine routes no address learned from DNS
+                // (split_domains) into this interface
             }
 
         } catch (Exception e) {
-            if (isRunning.get()) {
+            // rebuildVpn interrupts the sleep or a blocked upstream read
+            if (isRunning.get() && vpnInterface == pfd) {
                 Log.e(TAG, "VPN loop error", e);
             }
         } finally {
@@ -238,60 +368,156 @@ public class DiscordiaVPNService extends VpnService {
             dnsSocket.receive(response);
             dnsSocket.close();
 
-            // Build response IP packet
-            int responseLen = response.getLength();
-            byte[] responseData = new byte[ipHeaderLen + 8 + responseLen];
-
-            // Copy original IP header, swap src/dst
-            System.arraycopy(data, 0, responseData, 0, ipHeaderLen);
-
-            // Swap source and destination IP
-            System.arraycopy(data, 12, responseData, 16, 4); // src -> dst
-            System.arraycopy(data, 16, responseData, 12, 4); // dst -> src
-
-            // Update total length
-            int totalLen = responseData.length;
-            responseData[2] = (byte) (totalLen >> 8);
-            responseData[3] = (byte) (totalLen & 0xFF);
-
-            // UDP header
-            // Swap ports
-            responseData[ipHeaderLen] = data[ipHeaderLen + 2];
-            responseData[ipHeaderLen + 1] = data[ipHeaderLen + 3];
-            responseData[ipHeaderLen + 2] = data[ipHeaderLen];
-            responseData[ipHeaderLen + 3] = data[ipHeaderLen + 1];
-
-            // UDP length
-            int udpLen = 8 + responseLen;
-            responseData[ipHeaderLen + 4] = (byte) (udpLen >> 8);
-            responseData[ipHeaderLen + 5] = (byte) (udpLen & 0xFF);
-
-            // UDP checksum (set to 0 for now)
-            responseData[ipHeaderLen + 6] = 0;
-            responseData[ipHeaderLen + 7] = 0;
-
-            // DNS response payload
-            System.arraycopy(
-                responseBuffer, 0,
-                responseData, ipHeaderLen + 8,
-                responseLen
-            );
-
-            // Recalculate IP checksum
-            responseData[10] = 0;
-            responseData[11] = 0;
-            int checksum = calculateChecksum(responseData, 0, ipHeaderLen);
-            responseData[10] = (byte) (checksum >> 8);
-            responseData[11] = (byte) (checksum & 0xFF);
-
-            // Write back to TUN
-            out.write(responseData, 0, responseData.length);
+            writeDnsReply(data, ipHeaderLen, responseBuffer,
+                          response.getLength(), out);
 
         } catch (Exception e) {
             Log.w(TAG, "DNS handling error: " + e.getMessage());
         }
     }
 
+    /**
+     * Wrap a DNS reply in the query's IP/UDP header with addresses and
+     * ports swapped, and write it to the TUN.
+     */
+    private void writeDnsReply(byte[] data, int ipHeaderLen,
+                               byte[] responseBuffer, int responseLen,
+                               FileOutputStream out) throws IOException {
+        // Build response IP packet
+        byte[] responseData = new byte[ipHeaderLen + 8 + responseLen];
+
+        // Copy original IP header, swap src/dst
+        System.arraycopy(data, 0, responseData, 0, ipHeaderLen);
+
+        // Swap source and destination IP
+        System.arraycopy(data, 12, responseData, 16, 4); // src -> dst
+        System.arraycopy(data, 16, responseData, 12, 4); // dst -> src
+
+        // Update total length
+        int totalLen = responseData.length;
+        responseData[2] = (byte) (totalLen >> 8);
+        responseData[3] = (byte) (totalLen & 0xFF);
+
+        // UDP header
+        // Swap ports
+        responseData[ipHeaderLen] = data[ipHeaderLen + 2];
+        responseData[ipHeaderLen + 1] = data[ipHeaderLen + 3];
+        responseData[ipHeaderLen + 2] = data[ipHeaderLen];
+        responseData[ipHeaderLen + 3] = data[ipHeaderLen + 1];
+
+        // UDP length
+        int udpLen = 8 + responseLen;
+        responseData[ipHeaderLen + 4] = (byte) (udpLen >> 8);
+        responseData[ipHeaderLen + 5] = (byte) (udpLen & 0xFF);
+
+        // UDP checksum (set to 0 for now)
+        responseData[ipHeaderLen + 6] = 0;
+        responseData[ipHeaderLen + 7] = 0;
+
+        // DNS response payload
+        System.arraycopy(
+            responseBuffer, 0,
+            responseData, ipHeaderLen + 8,
+            responseLen
+        );
+
+        // Recalculate IP checksum
+        responseData[10] = 0;
+        responseData[11] = 0;
+        int checksum = calculateChecksum(responseData, 0, ipHeaderLen);
+        responseData[10] = (byte) (checksum >> 8);
+        responseData[11] = (byte) (checksum & 0xFF);
+
+        // Write back to TUN
+        out.write(responseData, 0, responseData.length);
+    }
+
+    /**
+     * Take a token for the query's sender and one from the global
+     * bucket.  Senders are told apart by source address only: stub
+     * resolvers pick a new source port per query, so a flood keyed by
+     * port would spread over every slot and starve everyone through the
+     * global bucket instead.  The owning UID would take a binder call
+     * per packet (getConnectionOwnerUid), more than the query itself
+     * costs, so apps on this device share the bucket of its address.
+     */
+    private boolean allowQuery(byte[] data) {
+        int qps = rateQps;
+        int globalQps = rateGlobalQps;
+        double burst = Math.max(rateBurst, 1);
+        long now = System.nanoTime();
+        int slot = -1;
+        double tokens = 0;
+        if (qps > 0) {
+            long client = ((long) (data[12] & 0xFF) << 24)
+                        | ((data[13] & 0xFF) << 16)
+                        | ((data[14] & 0xFF) << 8)
+                        | (data[15] & 0xFF);
+            slot = (int) ((client * 0x9E3779B1L) >>> 16) & (RATE_SLOTS - 1);
+            tokens = rateStamps[slot] == 0 ? burst
+                    : Math.min(burst, rateTokens[slot]
+                               + (now - rateStamps[slot]) * 1e-9 * qps);
+            rateStamps[slot] = now;
+            if (tokens < 1) {
+                rateTokens[slot] = tokens;
+                return limited();
+            }
+        }
+        if (globalQps > 0) {
+            double cap = Math.max(globalQps, burst);
+            double global = globalStamp == 0 ? cap
+                    : Math.min(cap, globalTokens
+                               + (now - globalStamp) * 1e-9 * globalQps);
+            globalStamp = now;
+            if (global < 1) {
+                // the sender keeps its token: the limit was not its doing
+                globalTokens = global;
+                if (slot >= 0) rateTokens[slot] = tokens;
+                return limited();
+            }
+            globalTokens = global - 1;
+        }
+        if (slot >= 0) rateTokens[slot] = tokens - 1;
+        return true;
+    }
+
+    private boolean limited() {
+        if (rateLimited++ % 1000 == 0) {
+            Log.w(TAG, "Rate limited " + rateLimited + " DNS queries");
+        }
+        return false;
+    }
+
+    /** Answer a query with REFUSED: its header and question, no records. */
+    private void refuseDnsPacket(byte[] data, int length,
+                                 FileOutputStream out) {
+        int ipHeaderLen = (data[0] & 0xF) * 4;
+        int dnsStart = ipHeaderLen + 8;
+        if (length < dnsStart + 12) return;
+
+        // End of the question: labels up to the root, then type and class
+        int end = dnsStart + 12;
+        while (end < length && data[end] != 0
+                && (data[end] & 0xC0) == 0) {
+            end += (data[end] & 0xFF) + 1;
+        }
+        end += 5;
+        boolean question = end <= length && data[end - 5] == 0;
+        byte[] reply = Arrays.copyOfRange(
+            data, dnsStart, question ? end : dnsStart + 12
+        );
+        reply[2] = (byte) (0x80 | (reply[2] & 0x01)); // QR, keep RD
+        reply[3] = (byte) (0x80 | 5);                 // RA, REFUSED
+        Arrays.fill(reply, 4, 12, (byte) 0);
+        reply[5] = (byte) (question ? 1 : 0);
+
+        try {
+            writeDnsReply(data, ipHeaderLen, reply, reply.length, out);
+        } catch (IOException e) {
+            Log.w(TAG, "DNS refuse error: " + e.getMessage());
+        }
+    }
+
     private int calculateChecksum(byte[] data, int offset, int length) {
         int sum = 0;
         for (int i = offset; i < offset + length - 1; i += 2) {